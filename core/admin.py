@@ -9,10 +9,15 @@ from .admin_actions_tokens import (
     action_renovar_token_recibo,
 )
 from django import forms
-from core.models import ConfiguracaoSistema, LogGeracaoComandas
+from core.models import (
+    ConfiguracaoSistema, ImportacaoCarteira, LancamentoExtrato, LogGeracaoComandas, LogNotificacao, RelatorioJob,
+)
 from django.contrib.auth.admin import UserAdmin
 from django.utils import timezone
 from .forms import PagamentoAdminForm
+from .dashboard import cache as dashboard_cache
+from .utils.admin_listas import FiltroMesCacheado, FiltroValoresCacheado, ListaGrandeAdminMixin
+from .utils.busca import CAMPOS_BUSCA, BuscaAdminMixin
 from .models import Fiador, Usuario, Locador, Imovel, Locatario, Locacao, Comanda, Pagamento, TemplateContrato
 from core.views_comanda_web import gerar_token_comanda
 from django.http import HttpResponse
@@ -125,9 +130,12 @@ class UsuarioAdmin(BaseUserAdmin):
 
 
 @admin.register(Locador)
-class LocadorAdmin(admin.ModelAdmin):
+class LocadorAdmin(BuscaAdminMixin, admin.ModelAdmin):
     """Admin organizado para Locador"""
     
+    # Caixa de busca nas colunas normalizadas (core/utils/busca.py)
+    campos_busca = CAMPOS_BUSCA['locador']
+    
     list_display = [
         'nome_razao_social',
         'representante',
@@ -190,9 +198,11 @@ class LocadorAdmin(admin.ModelAdmin):
     
     readonly_fields = ['created_at', 'updated_at']
 @admin.register(Imovel)
-class ImovelAdmin(admin.ModelAdmin):
+class ImovelAdmin(BuscaAdminMixin, admin.ModelAdmin):
     """Admin organizado para Imóvel"""
     
+    campos_busca = CAMPOS_BUSCA['imovel']
+    
     list_display = ['codigo_imovel', 'tipo_imovel', 'status', 'endereco', 'cidade', 'valor_aluguel', 'locador', 'is_active']
     list_filter = ['tipo_imovel', 'status', 'cidade', 'estado', 'is_active', 'created_at']
     search_fields = ['codigo_imovel', 'endereco', 'bairro', 'cidade', 'locador__nome_razao_social']
@@ -229,9 +239,11 @@ class ImovelAdmin(admin.ModelAdmin):
 
 
 @admin.register(Locatario)
-class LocatarioAdmin(admin.ModelAdmin):
+class LocatarioAdmin(BuscaAdminMixin, admin.ModelAdmin):
     """Admin organizado para Locatário"""
     
+    campos_busca = CAMPOS_BUSCA['locatario']
+    
     list_display = ['nome_razao_social', 'cpf_cnpj', 'telefone', 'email', 'empresa_trabalho', 'tem_fiador', 'is_active']
     list_filter = ['created_at', 'is_active']
     search_fields = ['nome_razao_social', 'cpf_cnpj', 'rg', 'email', 'telefone', 'empresa_trabalho']
@@ -272,9 +284,11 @@ class LocatarioAdmin(admin.ModelAdmin):
 
 
 @admin.register(Locacao)
-class LocacaoAdmin(admin.ModelAdmin):
+class LocacaoAdmin(BuscaAdminMixin, admin.ModelAdmin):
     """Admin atualizado com geração de contratos"""
     
+    campos_busca = CAMPOS_BUSCA['locacao']
+    
     list_display = [
         'numero_contrato',
         'imovel',
@@ -592,7 +606,9 @@ class SaldoFilter(admin.SimpleListFilter):
 
 
 @admin.register(Comanda)
-class ComandaAdmin(admin.ModelAdmin):
+class ComandaAdmin(ListaGrandeAdminMixin, BuscaAdminMixin, admin.ModelAdmin):
+    campos_busca = CAMPOS_BUSCA['comanda']
+    
     actions = [
         action_reenviar_link_comanda,
         action_renovar_token_comanda,
@@ -693,8 +709,8 @@ class ComandaAdmin(admin.ModelAdmin):
         'status',
         SaldoFilter,
         'data_vencimento',
-        'mes_referencia',
-        'ano_referencia',
+        ('mes_referencia', FiltroMesCacheado),
+        ('ano_referencia', FiltroValoresCacheado),
         'locacao__imovel__tipo_imovel',
     ]
     
@@ -717,8 +733,6 @@ class ComandaAdmin(admin.ModelAdmin):
         'dias_atraso_display',
     ]
     
-    date_hierarchy = 'data_vencimento'
-    
     inlines = [PagamentoInline]
     
     def save_formset(self, request, form, formset, change):
@@ -832,6 +846,7 @@ class ComandaAdmin(admin.ModelAdmin):
         'marcar_como_paga',
         'cancelar_comandas',
         'exportar_para_excel',
+        'exportar_para_xlsx',
     ]
     
     # Métodos personalizados para list_display
@@ -1270,7 +1285,10 @@ _Documento gerado via HABITAT PRO v1.0_'''
     @admin.action(description='🚫 Cancelar comandas')
     def cancelar_comandas(self, request, queryset):
         """Cancela as comandas selecionadas"""
-        atualizadas = queryset.update(status='CANCELLED')
+        # update() não dispara auto_now nem signals: marca updated_at (sync
+        # incremental) e invalida o cache do dashboard explicitamente
+        atualizadas = queryset.update(status='CANCELLED', updated_at=timezone.now())
+        dashboard_cache.invalidar(dashboard_cache.FINANCEIRO)
         
         self.message_user(
             request,
@@ -1278,75 +1296,30 @@ _Documento gerado via HABITAT PRO v1.0_'''
             level='warning'
         )
     
-    @admin.action(description='📊 Exportar para Excel')
+    @admin.action(description='📊 Exportar para Excel (CSV)')
     def exportar_para_excel(self, request, queryset):
-        """Exporta comandas selecionadas para Excel"""
-        import csv
-        from django.http import HttpResponse
+        """Exporta comandas selecionadas para CSV (streaming, sem consultas por linha)"""
+        from .services.exportacao_comandas import resposta_exportacao_comandas
         
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="comandas.csv"'
-        response.write('\ufeff'.encode('utf-8'))  # BOM para Excel reconhecer UTF-8
-        
-        writer = csv.writer(response, delimiter=';')
-        writer.writerow([
-            'Número',
-            'Locação',
-            'Locatário',
-            'Imóvel',
-            'Mês/Ano',
-            'Vencimento',
-            'Valor Aluguel',
-            'Valor Condomínio',
-            'Outros Débitos',
-            'Outros Créditos',
-            'Multa',
-            'Juros',
-            'Desconto',
-            'Valor Total',
-            'Valor Pago',
-            'Valor Pendente',
-            'Status',
-        ])
-        
-        for comanda in queryset:
-            writer.writerow([
-                comanda.numero_comanda,
-                comanda.locacao.numero_contrato,
-                comanda.locacao.locatario.nome_razao_social,
-                comanda.locacao.imovel.codigo_imovel,
-                comanda.mes_referencia.strftime('%m/%Y'),
-                comanda.data_vencimento.strftime('%d/%m/%Y'),
-                str(comanda.valor_aluguel).replace('.', ','),
-                str(comanda.valor_condominio).replace('.', ','),
-                str(comanda.outros_debitos).replace('.', ','),
-                str(comanda.outros_creditos).replace('.', ','),
-                str(comanda.valor_multa).replace('.', ','),  # ✅ CORRIGIDO
-                str(comanda.valor_juros).replace('.', ','),  # ✅ CORRIGIDO
-                str(comanda.desconto).replace('.', ','),
-                str(comanda.valor_total).replace('.', ','),
-                str(comanda.valor_pago).replace('.', ','),
-                str(comanda.valor_pendente).replace('.', ','),
-                comanda.get_status_display(),
-            ])
-        
-        self.message_user(
-            request,
-            f'📊 {queryset.count()} comanda(s) exportada(s) com sucesso.',
-            level='success'
-        )
+        return resposta_exportacao_comandas(queryset, formato='csv')
+    
+    @admin.action(description='📗 Exportar para Excel (XLSX)')
+    def exportar_para_xlsx(self, request, queryset):
+        """Exporta comandas selecionadas para XLSX nativo (streaming)"""
+        from .services.exportacao_comandas import resposta_exportacao_comandas
         
-        return response
+        return resposta_exportacao_comandas(queryset, formato='xlsx')
     
     def get_queryset(self, request):
-        """Otimiza queries com select_related"""
+        """Otimiza queries com select_related e os totais anotados (saldo sem SUM por linha)"""
         qs = super().get_queryset(request)
         return qs.select_related(
             'locacao',
             'locacao__locatario',
             'locacao__imovel',
-            'locacao__imovel__locador'
-        )
+            'locacao__imovel__locador',
+            'status_info',
+        ).com_totais()
     
     class Media:
         css = {
@@ -1426,13 +1399,17 @@ class LogGeracaoComandaAdmin(admin.ModelAdmin):
    # readonly_fields = ('numero_comanda',)
 
 @admin.register(Pagamento)
-class PagamentoAdmin(admin.ModelAdmin):
+class PagamentoAdmin(ListaGrandeAdminMixin, BuscaAdminMixin, admin.ModelAdmin):
+    campos_busca = CAMPOS_BUSCA['pagamento']
+    ordem_keyset = ('-data_pagamento', '-created_at', '-id')
+    
     form = PagamentoAdminForm
     
     actions = [
         action_reenviar_link_recibo,
         action_renovar_token_recibo,
         'gerar_recibo',
+        'exportar_recibos_zip',
     ]
     
     def gerar_recibo(self, request, queryset):
@@ -1452,6 +1429,17 @@ class PagamentoAdmin(admin.ModelAdmin):
             self.message_user(request, f'{len(recibos_gerados)} recibo(s) gerado(s) com sucesso!')
     
     gerar_recibo.short_description = "Gerar recibos Word"
+    
+    def exportar_recibos_zip(self, request, queryset):
+        """Baixa os recibos selecionados em um único ZIP (streaming)."""
+        from .services.recibos_lote import resposta_pacote_recibos
+        
+        queryset = queryset.select_related(
+            'comanda', 'comanda__locacao', 'comanda__locacao__locatario', 'comanda__locacao__imovel'
+        ).order_by('data_pagamento', 'numero_pagamento')
+        return resposta_pacote_recibos(queryset, formato='zip', nome_base='recibos_selecionados')
+    
+    exportar_recibos_zip.short_description = "📦 Baixar recibos selecionados (ZIP)"
     list_display = ('numero_pagamento', 'comanda', 'locatario_nome', 'valor_pago', 'data_pagamento', 'forma_pagamento', 'status', 'botao_recibo')
     list_filter = ('status', 'forma_pagamento', 'data_pagamento')
     search_fields = ('numero_pagamento', 'comanda__numero_comanda', 'comanda__locacao__locatario__nome_razao_social')
@@ -1578,6 +1566,108 @@ class ConfiguracaoSistemaAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(RelatorioJob)
+class RelatorioJobAdmin(admin.ModelAdmin):
+    """Relatórios do dashboard gerados em segundo plano (somente leitura)"""
+    
+    list_display = ['created_at', 'formato', 'status', 'solicitado_por', 'email_destino', 'download_link']
+    list_filter = ['status', 'formato', 'created_at']
+    readonly_fields = [
+        'formato', 'filtros', 'status', 'solicitado_por', 'email_destino',
+        'arquivo', 'iniciado_em', 'concluido_em', 'erro',
+    ]
+    list_select_related = ['solicitado_por']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.display(description='Arquivo')
+    def download_link(self, obj):
+        if not obj.concluido:
+            return '-'
+        url = reverse('relatorio_dashboard', kwargs={'job_id': obj.pk})
+        return format_html('<a href="{}">⬇️ Baixar</a>', url)
+
+
+@admin.register(LancamentoExtrato)
+class LancamentoExtratoAdmin(ListaGrandeAdminMixin, admin.ModelAdmin):
+    """Créditos importados de extrato bancário; revisão da conciliação"""
+    
+    ordem_keyset = ('-data', '-created_at', '-id')
+    list_display = ['data', 'valor', 'descricao', 'documento_pagador', 'status', 'pontuacao', 'comanda', 'pagamento']
+    list_filter = ['status', 'data']
+    search_fields = ['descricao', 'documento_pagador', 'identificador', 'comanda__numero_comanda']
+    list_select_related = ['comanda', 'pagamento']
+    raw_id_fields = ['comanda']
+    readonly_fields = [
+        'identificador', 'data', 'valor', 'descricao', 'documento_pagador',
+        'pontuacao', 'candidatos', 'pagamento',
+    ]
+    date_hierarchy = 'data'
+    actions = ['confirmar_pagamentos', 'ignorar_lancamentos']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='✅ Confirmar pagamento na comanda escolhida')
+    def confirmar_pagamentos(self, request, queryset):
+        from core.services.extrato_bancario import confirmar_lancamentos
+        
+        confirmados = confirmar_lancamentos(list(queryset), request.user)
+        self.message_user(request, f'{confirmados} pagamento(s) registrado(s)')
+        if confirmados < queryset.count():
+            self.message_user(
+                request,
+                'Lançamentos sem comanda escolhida, já pagos ou ignorados foram mantidos',
+                level='warning',
+            )
+    
+    @admin.action(description='🚫 Ignorar (não é aluguel)')
+    def ignorar_lancamentos(self, request, queryset):
+        ignorados = queryset.filter(pagamento__isnull=True).update(
+            status=LancamentoExtrato.Status.IGNORADO, updated_at=timezone.now()
+        )
+        self.message_user(request, f'{ignorados} lançamento(s) ignorado(s)')
+
+
+@admin.register(LogNotificacao)
+class LogNotificacaoAdmin(ListaGrandeAdminMixin, admin.ModelAdmin):
+    """Lembretes e avisos de atraso enviados (somente leitura)"""
+    
+    ordem_keyset = ('-enviado_em', '-id')
+    list_display = ['enviado_em', 'tipo_notificacao', 'comanda', 'destinatario_email', 'sucesso']
+    list_filter = ['tipo_notificacao', 'sucesso', 'enviado_em']
+    search_fields = ['destinatario_email', 'comanda__numero_comanda']
+    list_select_related = ['comanda']
+    raw_id_fields = ['comanda']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ImportacaoCarteira)
+class ImportacaoCarteiraAdmin(admin.ModelAdmin):
+    """Histórico das importações em massa (manage.py importar_carteira)"""
+    
+    list_display = [
+        'created_at', 'tipo', 'arquivo_nome', 'status', 'linhas_processadas',
+        'criados', 'existentes', 'total_erros', 'iniciado_por',
+    ]
+    list_filter = ['tipo', 'status', 'created_at']
+    search_fields = ['arquivo_nome', 'hash_arquivo']
+    list_select_related = ['iniciado_por']
+    readonly_fields = [
+        'tipo', 'arquivo_nome', 'hash_arquivo', 'status', 'linhas_processadas', 'criados',
+        'existentes', 'total_erros', 'erros', 'iniciado_por', 'concluida_em',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+
+
 #@admin.register(LogGeracaoComandas)
 class LogGeracaoComandasAdmin(admin.ModelAdmin):
     list_display = (
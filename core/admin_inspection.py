@@ -10,7 +10,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.conf import settings
 from core.models_inspection import Inspection, InspectionPhoto, InspectionPDF
-from core.services.inspection_pdf import gerar_pdf_vistoria
+from core.services.inspection_pdf import gerar_pdf_vistoria_incremental
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -21,8 +21,8 @@ class InspectionPhotoInline(admin.TabularInline):
     """Inline para fotos da vistoria"""
     model = InspectionPhoto
     extra = 0
-    fields = ('ordem', 'legenda', 'tamanho_mb', 'largura', 'altura', 'tirada_em')
-    readonly_fields = ('tamanho_mb', 'largura', 'altura', 'tirada_em')
+    fields = ('ordem', 'legenda', 'status_processamento', 'tamanho_mb', 'largura', 'altura', 'tirada_em')
+    readonly_fields = ('status_processamento', 'tamanho_mb', 'largura', 'altura', 'tirada_em')
     can_delete = True
 
 
@@ -219,8 +219,8 @@ class InspectionAdmin(admin.ModelAdmin):
                 continue
             
             try:
-                # Gerar PDF
-                pdf_content, total_paginas = gerar_pdf_vistoria(inspection)
+                # Gerar PDF (só páginas de foto novas/alteradas são renderizadas)
+                pdf_content, total_paginas, _ = gerar_pdf_vistoria_incremental(inspection)
                 
                 # Salvar PDF
                 from django.utils import timezone
@@ -463,10 +463,10 @@ _Mensagem automática do HABITAT PRO_"""
 @admin.register(InspectionPhoto)
 class InspectionPhotoAdmin(admin.ModelAdmin):
     """Admin para fotos (apenas visualização/debug)"""
-    list_display = ('inspection', 'ordem', 'legenda', 'tamanho_mb', 'tirada_em')
-    list_filter = ('inspection__status', 'tirada_em')
+    list_display = ('inspection', 'ordem', 'legenda', 'status_processamento', 'tamanho_mb', 'tirada_em')
+    list_filter = ('inspection__status', 'status_processamento', 'tirada_em')
     search_fields = ('inspection__titulo', 'legenda')
-    readonly_fields = ('largura', 'altura', 'tamanho_bytes', 'tirada_em')
+    readonly_fields = ('largura', 'altura', 'tamanho_bytes', 'checksum', 'status_processamento', 'erro_processamento', 'tirada_em')
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -1,7 +1,6 @@
 # core/comanda_extensions.py
 from decimal import Decimal
 from django.utils import timezone
-from django.db import transaction
 from django.db.models import Sum
 from django.db.models.functions import Coalesce
 
@@ -15,45 +14,11 @@ def calcular_total_pago(self):
 def saldo(self):
     return calcular_total_pago(self) - (self.valor_total() if callable(getattr(self, "valor_total", None)) else (self.valor_total or Decimal("0.00")))
 
-@property
-def valor_pendente(self):
-    valor_total = self.valor_total() if callable(getattr(self, "valor_total", None)) else (self.valor_total or Decimal("0.00"))
-    return valor_total - calcular_total_pago(self)
-
 def atualizar_status_e_quitacao(self):
-    from core.comanda_status import ComandaStatus
-    with transaction.atomic():
-        comanda = self.__class__.objects.select_for_update().get(pk=self.pk)
-        total_pago = calcular_total_pago(comanda)
-        valor_total = comanda.valor_total() if callable(getattr(comanda, "valor_total", None)) else (comanda.valor_total or Decimal("0.00"))
-
-        if total_pago >= valor_total:
-            cs, created = ComandaStatus.objects.get_or_create(comanda=comanda)
-            if not cs.quitado_em:
-                ultimo = comanda.pagamentos.filter(status__iexact="confirmado").order_by("-data_pagamento", "-id").first()
-                if ultimo and getattr(ultimo, "data_pagamento", None):
-                    dt = getattr(ultimo, "data_pagamento")
-                    try:
-                        cs.quitado_em = timezone.make_aware(
-                            timezone.datetime.combine(dt, timezone.datetime.min.time()),
-                            timezone.get_current_timezone(),
-                        )
-                    except Exception:
-                        cs.quitado_em = timezone.now()
-                else:
-                    cs.quitado_em = timezone.now()
-                cs.save(update_fields=["quitado_em"])
-            comanda.status = "PAID"
-        else:
-            try:
-                cs = comanda.status_info
-                if cs and cs.quitado_em:
-                    cs.quitado_em = None
-                    cs.save(update_fields=["quitado_em"])
-            except Exception:
-                pass
-            comanda.status = "PENDING"
-        comanda.save(update_fields=["status"])
+    """Recalcula na hora (mesma regra do recálculo agendado pelos signals)."""
+    from core.services.status_comanda import recalcular_comandas
+    recalcular_comandas([self.pk])
+    self.refresh_from_db(fields=["status", "data_pagamento"])
 
 def dias_atraso(self):
     if not getattr(self, "data_vencimento", None):
@@ -74,8 +39,7 @@ def bind():
     try:
         from .models import Comanda  # noqa
         Comanda.calcular_total_pago = calcular_total_pago
-        Comanda.saldo = property(saldo)
-        Comanda.valor_pendente = property(valor_pendente)
+        Comanda.saldo = saldo  # já é property
         Comanda.atualizar_status_e_quitacao = atualizar_status_e_quitacao
         Comanda.dias_atraso = dias_atraso
     except Exception:
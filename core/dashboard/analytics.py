@@ -3,6 +3,9 @@ from django.conf import settings
 from datetime import timedelta
 from decimal import Decimal
 from core.models import Comanda, Locacao, Imovel, Pagamento, RenovacaoContrato
+from core.dashboard.cache import CADASTROS, CONTRATOS, FINANCEIRO, fragmento_cacheado
+from core.services.performance_imoveis import top_imoveis
+from core.services.previsao_recebimentos import HAS_NUMPY, previsao_recebimentos
 
 
 class DashboardFinancialAnalytics:
@@ -10,6 +13,7 @@ class DashboardFinancialAnalytics:
     Serviço de analytics aprimorado - Versão 2.0 CORRIGIDA
     TODOS os Decimals convertidos para float
     TODOS os QuerySets serializáveis
+    Métodos de agregação em cache (core/dashboard/cache.py), chave pela data
     """
     
     def __init__(self):
@@ -18,6 +22,11 @@ class DashboardFinancialAnalytics:
         self.ano = hoje.year
         self.hoje = hoje
     
+    def chave_cache(self):
+        """Parâmetro das chaves de cache: os valores só dependem da data."""
+        return self.hoje.isoformat()
+    
+    @fragmento_cacheado('analytics_kpis', depende=(FINANCEIRO, CONTRATOS, CADASTROS))
     def get_kpis(self):
         """KPIs principais - CORRIGIDO: Todos valores em float."""
         total_imoveis = Imovel.objects.filter(is_active=True).count()
@@ -58,6 +67,7 @@ class DashboardFinancialAnalytics:
             'taxa_ocupacao': round(taxa_ocupacao, 2),
         }
     
+    @fragmento_cacheado('analytics_receitas', depende=(FINANCEIRO,))
     def get_receitas_12_meses(self):
         """Receitas previstas vs realizadas - JÁ CORRIGIDO."""
         labels, previsto, realizado = [], [], []
@@ -79,6 +89,7 @@ class DashboardFinancialAnalytics:
         
         return {'labels': labels, 'previsto': previsto, 'realizado': realizado}
     
+    @fragmento_cacheado('analytics_inadimplencia', depende=(FINANCEIRO,))
     def get_inadimplencia_12_meses(self):
         """Taxa de inadimplência - JÁ CORRIGIDO."""
         labels, taxas = [], []
@@ -100,6 +111,7 @@ class DashboardFinancialAnalytics:
         
         return {'labels': labels, 'taxas': taxas}
     
+    @fragmento_cacheado('analytics_formas_pagamento', depende=(FINANCEIRO,))
     def get_formas_pagamento(self):
         """Distribuição de formas de pagamento - JÁ CORRIGIDO."""
         pagamentos = Pagamento.objects.filter(status='confirmado', data_pagamento__year=self.ano)
@@ -147,6 +159,16 @@ class DashboardFinancialAnalytics:
             'total': total  # ✅ float
         }
     
+    def get_projecao_recebimentos(self, meses=12):
+        """
+        Esperado x provável por mês (core/services/previsao_recebimentos.py),
+        em cache por dia. Sem numpy retorna None.
+        """
+        if not HAS_NUMPY:
+            return None
+        return previsao_recebimentos(meses=meses, hoje=self.hoje)
+    
+    @fragmento_cacheado('analytics_alertas', depende=(FINANCEIRO, CONTRATOS, CADASTROS))
     def get_alertas_criticos(self):
         """Sistema de alertas - JÁ CORRIGIDO."""
         alertas = []
@@ -193,35 +215,21 @@ class DashboardFinancialAnalytics:
         
         return alertas
     
+    @fragmento_cacheado('analytics_performance', depende=(FINANCEIRO, CADASTROS))
     def get_performance_imoveis(self, limite=10):
-        """Performance de imóveis - CORRIGIDO: todos valores em float."""
-        imoveis_ativos = Imovel.objects.filter(is_active=True)[:limite]
-        
-        performance = []
-        
-        for imovel in imoveis_ativos:
-            comandas = Comanda.objects.filter(
-                locacao__imovel=imovel,
-                mes_referencia__year=self.ano
-            )
-            
-            # ✅ CORREÇÃO: Converter para float
-            previsto = float(sum(c.valor_total for c in comandas))
-            
-            pagas = comandas.filter(status='PAID')
-            # ✅ CORREÇÃO: Converter para float
-            realizado = float(sum(c.valor_total for c in pagas))
-            
-            taxa = (realizado / previsto * 100) if previsto > 0 else 0
-            
-            performance.append({
-                'nome': f"{imovel.codigo_imovel}",
-                'endereco': f"{imovel.endereco}, {imovel.numero}",
-                'previsto': previsto,  # ✅ float
-                'realizado': realizado,  # ✅ float
-                'taxa': round(taxa, 1)
-            })
-        
-        performance.sort(key=lambda x: x['taxa'], reverse=True)
-        
-        return performance
+        """
+        Top imóveis por taxa de recebimento no ano (valores em float).
+        Uma consulta agrupada com ranking em SQL (core/services/performance_imoveis.py).
+        """
+        comandas = Comanda.objects.filter(mes_referencia__year=self.ano)
+        
+        return [
+            {
+                'nome': linha['codigo'],
+                'endereco': linha['endereco'],
+                'previsto': linha['previsto'],
+                'realizado': linha['realizado'],
+                'taxa': linha['taxa'],
+            }
+            for linha in top_imoveis(comandas, limite=limite)
+        ]
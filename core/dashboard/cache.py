@@ -0,0 +1,178 @@
+"""
+Cache do Dashboard
+Fragmentos (KPIs, gráficos, alertas, rankings) guardados no cache do Django
+
+- Chave = fragmento + versão dos grupos de que ele depende + hash dos
+  parâmetros (filtros, data de referência)
+- Invalidação direcionada: gravações em Comanda/Pagamento/Locacao/...
+  incrementam a versão do grupo afetado (core/signals.py); chaves antigas
+  simplesmente deixam de ser lidas e expiram pelo TTL
+- A versão é incrementada na hora E após o commit, para que um leitor
+  concorrente não deixe em cache dados anteriores à transação
+- Contadores de acerto/erro por fragmento (estatisticas_cache)
+"""
+import hashlib
+import json
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Grupos de invalidação
+FINANCEIRO = 'financeiro'   # Comanda, Pagamento
+CONTRATOS = 'contratos'     # Locacao, RenovacaoContrato
+CADASTROS = 'cadastros'     # Imovel, Locatario
+
+GRUPOS = (FINANCEIRO, CONTRATOS, CADASTROS)
+
+PREFIXO = 'dashboard'
+
+# Fragmentos já registrados por este processo (o registro global fica no cache)
+_fragmentos = set()
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'DASHBOARD_CACHE_TTL', 300)
+
+
+def _chave_versao(grupo):
+    return f'{PREFIXO}:versao:{grupo}'
+
+
+def versao(grupo):
+    """Versão atual do grupo (criada em 1 na primeira leitura)."""
+    cache = _cache()
+    chave = _chave_versao(grupo)
+    atual = cache.get(chave)
+    if atual is None:
+        cache.add(chave, 1, timeout=None)
+        atual = cache.get(chave, 1)
+    return atual
+
+
+def _incrementar_versao(grupo):
+    cache = _cache()
+    chave = _chave_versao(grupo)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # Chave ausente (cache reiniciado/expulso): qualquer valor novo serve
+        cache.set(chave, 2, timeout=None)
+
+
+def invalidar(*grupos):
+    """Invalida todos os fragmentos que dependem de ``grupos``."""
+    grupos = grupos or GRUPOS
+    for grupo in grupos:
+        _incrementar_versao(grupo)
+    transaction.on_commit(lambda: [_incrementar_versao(grupo) for grupo in grupos])
+
+
+def _serializar(valor):
+    if hasattr(valor, 'chave_cache'):
+        return valor.chave_cache()
+    return str(valor)
+
+
+def chave(fragmento, parametros=None, depende=(FINANCEIRO,)):
+    """Chave versionada do fragmento para os ``parametros`` informados."""
+    versoes = '.'.join(f'{grupo}{versao(grupo)}' for grupo in depende)
+    bruto = json.dumps(parametros or {}, sort_keys=True, default=_serializar)
+    resumo = hashlib.sha1(bruto.encode('utf-8')).hexdigest()[:16]
+    return f'{PREFIXO}:{fragmento}:{versoes}:{resumo}'
+
+
+def _registrar(fragmento):
+    """Guarda o nome do fragmento no cache para estatisticas_cache()."""
+    if fragmento in _fragmentos:
+        return
+    _fragmentos.add(fragmento)
+    cache = _cache()
+    chave_registro = f'{PREFIXO}:fragmentos'
+    cache.set(chave_registro, set(cache.get(chave_registro, set())) | {fragmento}, timeout=None)
+
+
+def fragmentos_registrados():
+    return set(_cache().get(f'{PREFIXO}:fragmentos', set())) | _fragmentos
+
+
+def _contar(fragmento, evento):
+    cache = _cache()
+    contador = f'{PREFIXO}:stats:{fragmento}:{evento}'
+    cache.add(contador, 0, timeout=None)
+    try:
+        cache.incr(contador)
+    except ValueError:
+        pass
+
+
+def obter_ou_calcular(fragmento, parametros, calcular, depende=(FINANCEIRO,), ttl=None):
+    """
+    Devolve o fragmento do cache ou o calcula com ``calcular()`` e guarda.
+    O valor precisa ser serializável (pickle) pelo backend configurado.
+    """
+    _registrar(fragmento)
+    cache = _cache()
+    chave_fragmento = chave(fragmento, parametros, depende)
+
+    valor = cache.get(chave_fragmento)
+    if valor is not None:
+        _contar(fragmento, 'hit')
+        return valor
+
+    _contar(fragmento, 'miss')
+    valor = calcular()
+    cache.set(chave_fragmento, valor, timeout=_ttl() if ttl is None else ttl)
+    logger.debug(f"🗄️ [DASHBOARD CACHE] {fragmento} recalculado")
+    return valor
+
+
+def fragmento_cacheado(fragmento, depende=(FINANCEIRO,), ttl=None):
+    """
+    Decorator de obter_ou_calcular; os argumentos da chamada compõem a
+    chave (objetos podem definir ``chave_cache()``). A função original
+    fica disponível em ``.sem_cache``.
+    """
+    def decorator(funcao):
+        @wraps(funcao)
+        def wrapper(*args, **kwargs):
+            parametros = {'args': args, 'kwargs': kwargs}
+            return obter_ou_calcular(
+                fragmento, parametros, lambda: funcao(*args, **kwargs), depende=depende, ttl=ttl
+            )
+        wrapper.sem_cache = funcao
+        return wrapper
+    return decorator
+
+
+def estatisticas_cache(fragmentos=None):
+    """``{fragmento: {'hits', 'misses', 'taxa_acerto'}}``."""
+    cache = _cache()
+    resultado = {}
+    for fragmento in sorted(fragmentos or fragmentos_registrados()):
+        hits = cache.get(f'{PREFIXO}:stats:{fragmento}:hit', 0)
+        misses = cache.get(f'{PREFIXO}:stats:{fragmento}:miss', 0)
+        total = hits + misses
+        resultado[fragmento] = {
+            'hits': hits,
+            'misses': misses,
+            'taxa_acerto': round(hits / total * 100, 1) if total else 0,
+        }
+    return resultado
+
+
+def zerar_estatisticas(fragmentos=None):
+    cache = _cache()
+    cache.delete_many([
+        f'{PREFIXO}:stats:{fragmento}:{evento}'
+        for fragmento in (fragmentos or fragmentos_registrados())
+        for evento in ('hit', 'miss')
+    ])
@@ -0,0 +1,430 @@
+"""
+Cubo Financeiro em Memória (NumPy)
+Fatos de comandas e pagamentos em arrays compactos para cortes ad-hoc
+
+- Dimensões codificadas por dicionário (int32): mes, locador, tipo_imovel,
+  bairro, status (comandas) / forma_pagamento (pagamentos)
+- Medidas em centavos (int64): nada de Decimal/float no acúmulo
+- group-by/filtro/pivô vetorizados (ravel_multi_index + bincount)
+- Atualização incremental pela marca d'água de updated_at: só as linhas
+  alteradas desde a última carga são relidas (comandas também quando um
+  pagamento delas mudou); recarga completa periódica cobre mudanças de
+  cadastro (locador/bairro do imóvel)
+
+NumPy é opcional: sem ele HAS_NUMPY é False e o endpoint responde 503.
+"""
+import logging
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Comanda, Pagamento
+
+try:
+    import numpy as np  # optional
+    HAS_NUMPY = True
+except Exception:
+    np = None
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+STATUS_EM_ABERTO = (
+    Comanda.StatusComanda.PENDENTE,
+    Comanda.StatusComanda.VENCIDA,
+    Comanda.StatusComanda.PARCIALMENTE_PAGA,
+)
+
+SEM_VALOR = '(não informado)'
+
+
+def _centavos(valor):
+    return int((Decimal(valor or 0) * 100).quantize(Decimal('1')))
+
+
+def _mes(data):
+    """Data → inteiro AAAAMM."""
+    return data.year * 100 + data.month
+
+
+def _rotulo_mes(valor):
+    return f'{valor // 100:04d}-{valor % 100:02d}'
+
+
+class Dimensao:
+    """Dicionário chave → código (int32), com o rótulo exibido de cada código."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.indice = {}
+        self.rotulos = []
+
+    def codificar(self, chave, rotulo=None):
+        codigo = self.indice.get(chave)
+        if codigo is None:
+            codigo = len(self.rotulos)
+            self.indice[chave] = codigo
+            self.rotulos.append(rotulo if rotulo is not None else chave)
+        return codigo
+
+    def codigos(self, chaves):
+        """Códigos das chaves conhecidas (chaves inexistentes são ignoradas)."""
+        return [self.indice[chave] for chave in chaves if chave in self.indice]
+
+    def __len__(self):
+        return len(self.rotulos)
+
+
+class TabelaFatos:
+    """
+    Colunas de uma tabela de fatos: códigos de dimensão (int32), medidas
+    (int64) e a máscara de linhas ativas. Linhas são identificadas pelo
+    pk do registro de origem, o que torna a recarga idempotente.
+    """
+
+    def __init__(self, dimensoes, medidas):
+        self.dimensoes = {nome: Dimensao(nome) for nome in dimensoes}
+        self.medidas = tuple(medidas)
+        self.linha_por_id = {}
+        self.codigos = {nome: np.zeros(0, dtype=np.int32) for nome in dimensoes}
+        self.valores = {nome: np.zeros(0, dtype=np.int64) for nome in medidas}
+        self.ativo = np.zeros(0, dtype=bool)
+
+    def __len__(self):
+        return len(self.ativo)
+
+    def gravar(self, linhas):
+        """
+        Insere/atualiza linhas ``(id, ativo, {dimensão: (chave, rótulo)},
+        {medida: inteiro})``. Retorna ``(inseridas, atualizadas)``.
+        """
+        novas = []
+        atualizadas = 0
+        for pk, ativo, dims, medidas in linhas:
+            codigos = {nome: self.dimensoes[nome].codificar(*dims[nome]) for nome in self.dimensoes}
+            posicao = self.linha_por_id.get(pk)
+            if posicao is None:
+                self.linha_por_id[pk] = len(self.ativo) + len(novas)
+                novas.append((ativo, codigos, medidas))
+                continue
+            self.ativo[posicao] = ativo
+            for nome, codigo in codigos.items():
+                self.codigos[nome][posicao] = codigo
+            for nome in self.medidas:
+                self.valores[nome][posicao] = medidas[nome]
+            atualizadas += 1
+
+        if novas:
+            self.ativo = np.concatenate([self.ativo, np.fromiter((n[0] for n in novas), dtype=bool, count=len(novas))])
+            for nome in self.codigos:
+                self.codigos[nome] = np.concatenate([
+                    self.codigos[nome],
+                    np.fromiter((n[1][nome] for n in novas), dtype=np.int32, count=len(novas)),
+                ])
+            for nome in self.medidas:
+                self.valores[nome] = np.concatenate([
+                    self.valores[nome],
+                    np.fromiter((n[2][nome] for n in novas), dtype=np.int64, count=len(novas)),
+                ])
+        return len(novas), atualizadas
+
+    def mascara(self, filtros=None):
+        """Linhas ativas que atendem ``{dimensão: chave ou lista de chaves}``."""
+        mascara = self.ativo.copy()
+        for nome, chaves in (filtros or {}).items():
+            if nome not in self.dimensoes:
+                raise ValueError(f'Dimensão desconhecida: {nome}')
+            if not isinstance(chaves, (list, tuple, set)):
+                chaves = [chaves]
+            mascara &= np.isin(self.codigos[nome], self.dimensoes[nome].codigos(chaves))
+        return mascara
+
+    def agrupar(self, dimensoes, pesos, mascara):
+        """
+        Soma de cada array de ``pesos`` por combinação das ``dimensoes``
+        dentro da ``mascara``: ``[{dim: rótulo, ..., medida: centavos}]``.
+        """
+        for nome in dimensoes:
+            if nome not in self.dimensoes:
+                raise ValueError(f'Dimensão desconhecida: {nome}')
+
+        if not dimensoes:
+            return [{nome: int(peso[mascara].sum()) for nome, peso in pesos.items()}]
+
+        tamanhos = tuple(max(len(self.dimensoes[nome]), 1) for nome in dimensoes)
+        combinados = np.ravel_multi_index(
+            [self.codigos[nome][mascara] for nome in dimensoes], tamanhos
+        )
+        grupos, inverso = np.unique(combinados, return_inverse=True)
+        somas = {
+            nome: np.bincount(inverso, weights=peso[mascara], minlength=len(grupos))
+            for nome, peso in pesos.items()
+        }
+
+        codigos_grupo = np.unravel_index(grupos, tamanhos)
+        resultado = []
+        for i in range(len(grupos)):
+            linha = {
+                nome: self.dimensoes[nome].rotulos[codigos_grupo[j][i]]
+                for j, nome in enumerate(dimensoes)
+            }
+            linha.update({nome: int(round(soma[i])) for nome, soma in somas.items()})
+            resultado.append(linha)
+        return resultado
+
+    def pivo(self, linha, coluna, peso, mascara):
+        """Matriz ``linha × coluna`` da soma de ``peso`` (só valores presentes)."""
+        dim_linha, dim_coluna = self.dimensoes[linha], self.dimensoes[coluna]
+        codigos_linha = self.codigos[linha][mascara]
+        codigos_coluna = self.codigos[coluna][mascara]
+        n_linhas, n_colunas = max(len(dim_linha), 1), max(len(dim_coluna), 1)
+
+        matriz = np.bincount(
+            codigos_linha.astype(np.int64) * n_colunas + codigos_coluna,
+            weights=peso[mascara],
+            minlength=n_linhas * n_colunas,
+        ).reshape(n_linhas, n_colunas)
+
+        presentes_linha = np.unique(codigos_linha)
+        presentes_coluna = np.unique(codigos_coluna)
+        matriz = matriz[np.ix_(presentes_linha, presentes_coluna)]
+
+        rotulos_linha = [dim_linha.rotulos[c] for c in presentes_linha]
+        rotulos_coluna = [dim_coluna.rotulos[c] for c in presentes_coluna]
+        ordem_linha = sorted(range(len(rotulos_linha)), key=lambda i: str(rotulos_linha[i]))
+        ordem_coluna = sorted(range(len(rotulos_coluna)), key=lambda i: str(rotulos_coluna[i]))
+
+        return {
+            'linhas': [rotulos_linha[i] for i in ordem_linha],
+            'colunas': [rotulos_coluna[i] for i in ordem_coluna],
+            'valores': np.rint(matriz[np.ix_(ordem_linha, ordem_coluna)]).astype(np.int64).tolist(),
+        }
+
+
+# ============================================================================
+# CUBO FINANCEIRO
+# ============================================================================
+
+DIMENSOES_IMOVEL = ('locador', 'tipo_imovel', 'bairro')
+
+CAMPOS_IMOVEL = (
+    'locacao__imovel__locador_id',
+    'locacao__imovel__locador__nome_razao_social',
+    'locacao__imovel__tipo_imovel',
+    'locacao__imovel__bairro',
+)
+
+
+def _dimensoes_imovel(locador_id, locador_nome, tipo_imovel, bairro):
+    return {
+        'locador': (str(locador_id) if locador_id else SEM_VALOR, locador_nome or SEM_VALOR),
+        'tipo_imovel': (tipo_imovel or SEM_VALOR, tipo_imovel or SEM_VALOR),
+        'bairro': (bairro or SEM_VALOR, bairro or SEM_VALOR),
+    }
+
+
+class CuboFinanceiro:
+    """
+    Fatos de comandas (por mês de referência) e de pagamentos confirmados
+    (por mês do pagamento) com as dimensões do imóvel.
+
+    Medidas de comandas: quantidade, previsto, pago, pendente e em_atraso
+    (pendente de comandas em aberto vencidas até ``hoje``, calculada na
+    consulta a partir do vencimento). Medidas de pagamentos: quantidade, valor.
+
+    Filtros: ``{dimensão: chave(s)}`` (locador pelo id; mes como 'AAAA-MM')
+    mais ``mes_inicio``/``mes_fim`` ('AAAA-MM', inclusive).
+    """
+
+    TABELAS = ('comandas', 'pagamentos')
+    MEDIDAS = {
+        'comandas': ('quantidade', 'previsto', 'pago', 'pendente', 'em_atraso'),
+        'pagamentos': ('quantidade', 'valor'),
+    }
+
+    def __init__(self):
+        if not HAS_NUMPY:
+            raise RuntimeError('NumPy não está disponível. Instale numpy para usar o cubo financeiro.')
+        self._lock = threading.Lock()
+        self.comandas = TabelaFatos(
+            ('mes', 'status') + DIMENSOES_IMOVEL,
+            ('previsto', 'pago', 'pendente', 'mes_num', 'vencimento'),
+        )
+        self.pagamentos = TabelaFatos(
+            ('mes', 'forma_pagamento') + DIMENSOES_IMOVEL,
+            ('valor', 'mes_num'),
+        )
+        self.marca_dagua = None
+        self.carregado_em = None
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def atualizar(self):
+        """
+        Lê só o que mudou desde a última marca d'água (tudo, na primeira
+        vez). Retorna o número de linhas lidas.
+        """
+        with self._lock:
+            # Marca tomada ANTES das consultas: o que for gravado durante a
+            # carga tem updated_at posterior e entra na próxima atualização
+            nova_marca = timezone.now()
+            lidas = self._carregar_comandas(self.marca_dagua) + self._carregar_pagamentos(self.marca_dagua)
+            if self.marca_dagua is None:
+                self.carregado_em = time.monotonic()
+            self.marca_dagua = nova_marca
+        if lidas:
+            logger.debug(f"🧊 [CUBO] {lidas} linha(s) atualizada(s)")
+        return lidas
+
+    def _carregar_comandas(self, desde):
+        queryset = Comanda.objects.all()
+        if desde is not None:
+            queryset = queryset.filter(
+                Q(updated_at__gte=desde)
+                | Q(pk__in=Pagamento.objects.filter(updated_at__gte=desde).values('comanda_id'))
+            )
+        linhas = queryset.com_totais().order_by().values_list(
+            'pk', 'is_active', 'status', 'mes_referencia', 'data_vencimento',
+            'valor_total_calculado', 'total_pago_calculado', 'valor_pendente_calculado',
+            *CAMPOS_IMOVEL,
+        )
+
+        def fatos():
+            for (pk, ativo, status, mes_referencia, vencimento, total, pago, pendente, *imovel) in linhas.iterator(chunk_size=2000):
+                mes = _mes(mes_referencia)
+                dims = _dimensoes_imovel(*imovel)
+                dims['mes'] = (_rotulo_mes(mes), _rotulo_mes(mes))
+                dims['status'] = (status, status)
+                yield pk, ativo, dims, {
+                    'previsto': _centavos(total),
+                    'pago': _centavos(pago),
+                    'pendente': _centavos(pendente),
+                    'mes_num': mes,
+                    'vencimento': vencimento.toordinal() if vencimento else 0,
+                }
+
+        inseridas, atualizadas = self.comandas.gravar(fatos())
+        return inseridas + atualizadas
+
+    def _carregar_pagamentos(self, desde):
+        queryset = Pagamento.objects.all()
+        if desde is not None:
+            queryset = queryset.filter(updated_at__gte=desde)
+        linhas = queryset.order_by().values_list(
+            'pk', 'is_active', 'status', 'data_pagamento', 'forma_pagamento', 'valor_pago',
+            *[f'comanda__{campo}' for campo in CAMPOS_IMOVEL],
+        )
+
+        def fatos():
+            for (pk, ativo, status, data_pagamento, forma, valor, *imovel) in linhas.iterator(chunk_size=2000):
+                mes = _mes(data_pagamento) if data_pagamento else 0
+                dims = _dimensoes_imovel(*imovel)
+                dims['mes'] = (_rotulo_mes(mes), _rotulo_mes(mes))
+                dims['forma_pagamento'] = (forma or SEM_VALOR, forma or SEM_VALOR)
+                yield pk, ativo and status == 'confirmado', dims, {
+                    'valor': _centavos(valor),
+                    'mes_num': mes,
+                }
+
+        inseridas, atualizadas = self.pagamentos.gravar(fatos())
+        return inseridas + atualizadas
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def _tabela(self, tabela):
+        if tabela not in self.TABELAS:
+            raise ValueError(f'Tabela desconhecida: {tabela}')
+        return getattr(self, tabela)
+
+    def _mascara(self, tabela, filtros):
+        filtros = dict(filtros or {})
+        mes_inicio = filtros.pop('mes_inicio', None)
+        mes_fim = filtros.pop('mes_fim', None)
+        fatos = self._tabela(tabela)
+        mascara = fatos.mascara(filtros)
+        meses = fatos.valores['mes_num']
+        if mes_inicio:
+            mascara &= meses >= int(mes_inicio.replace('-', ''))
+        if mes_fim:
+            mascara &= meses <= int(mes_fim.replace('-', ''))
+        return mascara
+
+    def _pesos(self, tabela, medidas, hoje):
+        fatos = self._tabela(tabela)
+        desconhecidas = set(medidas) - set(self.MEDIDAS[tabela])
+        if desconhecidas:
+            raise ValueError(f"Medida desconhecida: {', '.join(sorted(desconhecidas))}")
+
+        pesos = {}
+        for medida in medidas:
+            if medida == 'quantidade':
+                pesos[medida] = np.ones(len(fatos), dtype=np.int64)
+            elif medida == 'em_atraso':
+                em_aberto = np.isin(
+                    fatos.codigos['status'], fatos.dimensoes['status'].codigos(STATUS_EM_ABERTO)
+                )
+                vencidas = fatos.valores['vencimento'] < (hoje or date.today()).toordinal()
+                pesos[medida] = np.where(em_aberto & vencidas, fatos.valores['pendente'], 0)
+            else:
+                pesos[medida] = fatos.valores[medida]
+        return pesos
+
+    def agrupar(self, tabela='comandas', dimensoes=('mes',), medidas=None, filtros=None, hoje=None):
+        """
+        Group-by vetorizado. Valores monetários voltam em reais (float),
+        ordenados pelos rótulos das dimensões.
+        """
+        medidas = tuple(medidas or self.MEDIDAS[tabela])
+        resultado = self._tabela(tabela).agrupar(
+            tuple(dimensoes), self._pesos(tabela, medidas, hoje), self._mascara(tabela, filtros)
+        )
+        for linha in resultado:
+            for medida in medidas:
+                if medida != 'quantidade':
+                    linha[medida] = linha[medida] / 100
+        return sorted(resultado, key=lambda linha: [str(linha[d]) for d in dimensoes])
+
+    def pivo(self, tabela='comandas', linhas='locador', colunas='mes', medida='previsto', filtros=None, hoje=None):
+        """Tabela dinâmica ``linhas × colunas`` de uma medida (reais)."""
+        if linhas not in self._tabela(tabela).dimensoes or colunas not in self._tabela(tabela).dimensoes:
+            raise ValueError('Dimensão desconhecida para o pivô')
+        pivo = self._tabela(tabela).pivo(
+            linhas, colunas, self._pesos(tabela, (medida,), hoje)[medida], self._mascara(tabela, filtros)
+        )
+        if medida != 'quantidade':
+            pivo['valores'] = [[valor / 100 for valor in linha] for linha in pivo['valores']]
+        return pivo
+
+
+# ============================================================================
+# INSTÂNCIA DO PROCESSO
+# ============================================================================
+
+_cubo = None
+_cubo_lock = threading.Lock()
+
+
+def obter_cubo():
+    """
+    Cubo do processo, atualizado incrementalmente a cada chamada e
+    recarregado do zero após CUBO_RECARGA_COMPLETA_SEGUNDOS.
+    """
+    global _cubo
+    recarga = getattr(settings, 'CUBO_RECARGA_COMPLETA_SEGUNDOS', 3600)
+    with _cubo_lock:
+        if _cubo is None or (
+            _cubo.carregado_em is not None and time.monotonic() - _cubo.carregado_em > recarga
+        ):
+            _cubo = CuboFinanceiro()
+        cubo = _cubo
+    cubo.atualizar()
+    return cubo
@@ -35,6 +35,7 @@ def dashboard_financeiro_view(request):
         pagamentos_recentes = analytics.get_pagamentos_recentes(limite=10)
         comandas_vencidas = analytics.get_comandas_vencidas(limite=20)
         previsao = analytics.get_previsao_recebimentos(dias=30)
+        projecao = analytics.get_projecao_recebimentos(meses=12) or {'meses': [], 'total_esperado': 0, 'total_provavel': 0}
         
         context = {
             # KPIs
@@ -72,6 +73,13 @@ def dashboard_financeiro_view(request):
             'comandas_vencidas': comandas_vencidas,
             'previsao_recebimentos': previsao['comandas'],
             'previsao_total': previsao['total'],
+            
+            # Projeção 12 meses (JSON para Chart.js)
+            'projecao_labels': json.dumps([m['mes'] for m in projecao['meses']]),
+            'projecao_esperado': json.dumps([m['esperado'] for m in projecao['meses']]),
+            'projecao_provavel': json.dumps([m['provavel'] for m in projecao['meses']]),
+            'projecao_total_esperado': projecao['total_esperado'],
+            'projecao_total_provavel': projecao['total_provavel'],
         }
         
         return render(request, 'admin/dashboard_financeiro.html', context)
@@ -106,4 +114,9 @@ def dashboard_financeiro_view(request):
             'comandas_vencidas': [],
             'previsao_recebimentos': [],
             'previsao_total': 0,
+            'projecao_labels': '[]',
+            'projecao_esperado': '[]',
+            'projecao_provavel': '[]',
+            'projecao_total_esperado': 0,
+            'projecao_total_provavel': 0,
         }, status=500)
@@ -5,15 +5,33 @@ Views customizadas para Dashboard Financeiro
 Versão: DEV_20 - Dashboard completo com dados dinâmicos
 """
 from django.contrib.admin.views.decorators import staff_member_required
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib import messages
-from django.http import HttpResponse
-from django.db.models import Sum, Q, Count, F
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.http import FileResponse, JsonResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.conf import settings
-from decimal import Decimal
-from .models import Imovel, Locacao, Locatario, Comanda, Pagamento, RenovacaoContrato
+from .dashboard import cache as dashboard_cache
+from .dashboard.cache import obter_ou_calcular
+from .dashboard.cubo import HAS_NUMPY, obter_cubo
+from .document_generator import HAS_WEASY
+from .models import Imovel, Locacao, Locatario, Comanda, RelatorioJob, RenovacaoContrato
+from .services.dashboard_financeiro import dados_dashboard, filtros_dashboard
+from .services.relatorios_dashboard import solicitar_relatorio
+
+
+def _contagens_admin_index():
+    return {
+        'total_imoveis': Imovel.objects.filter(is_active=True).count(),
+        'contratos_ativos': Locacao.objects.filter(status='ACTIVE', is_active=True).count(),
+        'total_locatarios': Locatario.objects.filter(is_active=True).count(),
+        # Contar renovações de contratos (foco em renovações ativas)
+        'contratos_vencendo': RenovacaoContrato.objects.filter(
+            locacao_original__isnull=False
+        ).count(),
+    }
 
 
 @staff_member_required
@@ -25,19 +43,12 @@ def admin_index(request):
     hoje = datetime.now().date()
     data_limite = hoje + timedelta(days=settings.PRAZO_ALERTA_VENCIMENTO_DIAS)
     
-    total_imoveis = Imovel.objects.filter(is_active=True).count()
-    contratos_ativos = Locacao.objects.filter(status='ACTIVE', is_active=True).count()
-    total_locatarios = Locatario.objects.filter(is_active=True).count()
-    # Contar renovações de contratos (foco em renovações ativas)
-    contratos_vencendo = RenovacaoContrato.objects.filter(
-        locacao_original__isnull=False
-    ).count()
-    
     context = {
-        'total_imoveis': total_imoveis,
-        'contratos_ativos': contratos_ativos,
-        'total_locatarios': total_locatarios,
-        'contratos_vencendo': contratos_vencendo,
+        # Contagens em cache (invalidadas por gravações em cadastros/contratos)
+        **obter_ou_calcular(
+            'admin_index', {}, _contagens_admin_index,
+            depende=(dashboard_cache.CADASTROS, dashboard_cache.CONTRATOS),
+        ),
         'title': 'Dashboard - HABITAT PRO',
         'site_title': 'HABITAT PRO',
         'site_header': 'HABITAT PRO',
@@ -52,261 +63,19 @@ def dashboard_financeiro(request):
     """
     Dashboard Financeiro Completo com KPIs, gráficos e análises.
     ✅ MELHORADO: Filtros de ano/mês, links nas comandas, gráficos dinâmicos
+    Cálculos em core/services/dashboard_financeiro.py (compartilhados com os relatórios)
     """
     hoje = timezone.now().date()
-    ano_atual = hoje.year
-    mes_atual = hoje.month
-    
-    # ========================================
-    # FILTROS (✅ MELHORADO: ano e mês separados)
-    # ========================================
-    periodo = request.GET.get('periodo', 'mes')
-    imovel_id = request.GET.get('imovel', 'todos')
-    status_filtro = request.GET.get('status', 'todos')
-    visualizacao = request.GET.get('visualizacao', 'real')
-    
-    # ✅ NOVO: Filtros de ano e mês
-    ano_selecionado = request.GET.get('ano')
-    mes_selecionado = request.GET.get('mes')
-    
-    if ano_selecionado:
-        try:
-            ano_selecionado = int(ano_selecionado)
-        except:
-            ano_selecionado = ano_atual
-    else:
-        ano_selecionado = ano_atual
-    
-    if mes_selecionado:
-        try:
-            mes_selecionado = int(mes_selecionado)
-        except:
-            mes_selecionado = mes_atual
-    else:
-        mes_selecionado = mes_atual
-    
-    # Determinar range de datas baseado no período
-    if periodo == 'mes':
-        data_inicio = datetime(ano_selecionado, mes_selecionado, 1).date()
-        if mes_selecionado == 12:
-            data_fim = datetime(ano_selecionado + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            data_fim = datetime(ano_selecionado, mes_selecionado + 1, 1).date() - timedelta(days=1)
-    elif periodo == 'trimestre':
-        data_inicio = (hoje - timedelta(days=90)).replace(day=1)
-        data_fim = hoje
-    elif periodo == 'semestre':
-        data_inicio = (hoje - timedelta(days=180)).replace(day=1)
-        data_fim = hoje
-    elif periodo == 'ano':
-        data_inicio = datetime(ano_selecionado, 1, 1).date()
-        data_fim = datetime(ano_selecionado, 12, 31).date()
-    else:  # comparativo
-        data_inicio = datetime(2024, 1, 1).date()
-        data_fim = datetime(2025, 12, 31).date()
-    
-    # ========================================
-    # QUERY BASE DE COMANDAS
-    # ========================================
-    comandas_query = Comanda.objects.filter(
-        mes_referencia__gte=data_inicio,
-        mes_referencia__lte=data_fim,
-        is_active=True
-    ).select_related('locacao', 'locacao__imovel', 'locacao__locatario')
-    
-    # Filtro por imóvel
-    if imovel_id != 'todos':
-        comandas_query = comandas_query.filter(locacao__imovel_id=imovel_id)
-    
-    # Filtro por status
-    if status_filtro == 'pago':
-        comandas_query = comandas_query.filter(status='PAID')
-    elif status_filtro == 'pendente':
-        comandas_query = comandas_query.filter(status__in=['PENDING', 'PARTIAL'])
-    elif status_filtro == 'atrasado':
-        comandas_query = comandas_query.filter(
-            status__in=['OVERDUE', 'PENDING'],
-            data_vencimento__lt=hoje
-        )
-    
-    # ========================================
-    # CÁLCULO DE KPIs
-    # ========================================
-    
-    # Receita Prevista (soma de todas comandas do período)
-    receita_prevista = comandas_query.aggregate(
-        total=Sum('_valor_aluguel_historico')
-    )['total'] or Decimal('0.00')
-    
-    receita_prevista += comandas_query.aggregate(
-        total=Sum('valor_condominio')
-    )['total'] or Decimal('0.00')
-    
-    receita_prevista += comandas_query.aggregate(
-        total=Sum('valor_iptu')
-    )['total'] or Decimal('0.00')
-    
-    # Receita Realizada (soma de pagamentos confirmados)
-    receita_realizada = Pagamento.objects.filter(
-        comanda__in=comandas_query,
-        status='confirmado',
-        data_pagamento__gte=data_inicio,
-        data_pagamento__lte=data_fim
-    ).aggregate(total=Sum('valor_pago'))['total'] or Decimal('0.00')
-    
-    # Taxa de Recebimento
-    taxa_recebimento = (receita_realizada / receita_prevista * 100) if receita_prevista > 0 else Decimal('0.00')
-    
-    # Comandas em Atraso
-    comandas_atrasadas = comandas_query.filter(
-        data_vencimento__lt=hoje,
-        status__in=['PENDING', 'OVERDUE', 'PARTIAL']
-    ).count()
-    
-    # Taxa de Inadimplência
-    total_comandas = comandas_query.count()
-    taxa_inadimplencia = (comandas_atrasadas / total_comandas * 100) if total_comandas > 0 else Decimal('0.00')
-    
-    # Receita Pendente
-    receita_pendente = receita_prevista - receita_realizada
-    
-    # ========================================
-    # DADOS MENSAIS (para gráficos)
-    # ========================================
-    dados_mensais = []
-    
-    # Últimos 12 meses
-    for i in range(11, -1, -1):
-        # Calcular mês de referência
-        if mes_selecionado - i <= 0:
-            mes_ref_num = 12 + (mes_selecionado - i)
-            ano_ref = ano_selecionado - 1
-        else:
-            mes_ref_num = mes_selecionado - i
-            ano_ref = ano_selecionado
-        
-        mes_ref = datetime(ano_ref, mes_ref_num, 1).date()
-        
-        # Comandas do mês
-        comandas_mes = Comanda.objects.filter(
-            mes_referencia__year=mes_ref.year,
-            mes_referencia__month=mes_ref.month,
-            is_active=True
-        )
-        
-        if imovel_id != 'todos':
-            comandas_mes = comandas_mes.filter(locacao__imovel_id=imovel_id)
-        
-        # Previsto = Soma de valores das comandas
-        previsto_mes = 0
-        for cmd in comandas_mes:
-            previsto_mes += float(cmd.valor_total)
-        
-        # Realizado = Soma de pagamentos confirmados
-        realizado_mes = float(
-            Pagamento.objects.filter(
-                comanda__mes_referencia__year=mes_ref.year,
-                comanda__mes_referencia__month=mes_ref.month,
-                status='confirmado'
-            ).aggregate(total=Sum('valor_pago'))['total'] or 0
-        )
-        
-        # Inadimplência do mês
-        total_mes = comandas_mes.count()
-        atrasadas_mes = comandas_mes.filter(
-            status__in=['OVERDUE', 'PENDING'],
-            data_vencimento__lt=hoje
-        ).count()
-        inadimplencia_mes = (atrasadas_mes / total_mes * 100) if total_mes > 0 else 0
-        
-        dados_mensais.append({
-            'mes': mes_ref.strftime('%b/%y'),
-            'previsto': previsto_mes,
-            'realizado': realizado_mes,
-            'inadimplencia': round(inadimplencia_mes, 1)
-        })
-    
-    # ========================================
-    # PERFORMANCE POR IMÓVEL
-    # ========================================
-    imoveis_lista = Imovel.objects.filter(is_active=True)[:10]  # Top 10
-    performance_imoveis = []
-    
-    for imovel in imoveis_lista:
-        comandas_imovel = comandas_query.filter(locacao__imovel=imovel)
-        
-        previsto_imovel = 0
-        for cmd in comandas_imovel:
-            previsto_imovel += float(cmd.valor_total)
-        
-        realizado_imovel = float(
-            Pagamento.objects.filter(
-                comanda__in=comandas_imovel,
-                status='confirmado'
-            ).aggregate(total=Sum('valor_pago'))['total'] or 0
-        )
-        
-        performance_imoveis.append({
-            'nome': f"{imovel.endereco}, {imovel.numero}"[:30],
-            'previsto': previsto_imovel,
-            'realizado': realizado_imovel
-        })
-    
-    # ========================================
-    # ÚLTIMOS PAGAMENTOS (✅ MELHORADO: com links)
-    # ========================================
-    ultimos_pagamentos = []
-    
-    pagamentos_recentes = Pagamento.objects.filter(
-        data_pagamento__gte=data_inicio,
-        data_pagamento__lte=data_fim,
-        status='confirmado'
-    ).select_related(
-        'comanda',
-        'comanda__locacao',
-        'comanda__locacao__locatario',
-        'comanda__locacao__imovel'
-    ).order_by('-data_pagamento')[:20]
-    
-    for pag in pagamentos_recentes:
-        ultimos_pagamentos.append({
-            'numero_comanda': pag.comanda.numero_comanda,
-            'comanda_id': pag.comanda.id,  # ✅ NOVO: ID para link
-            'numero_comanda_link': f"/admin/core/comanda/{pag.comanda.id}/change/",
-            'inquilino': pag.comanda.locacao.locatario.nome_razao_social,
-            'imovel': f"{pag.comanda.locacao.imovel.endereco}, {pag.comanda.locacao.imovel.numero}",
-            'valor': float(pag.valor_pago),
-            'data': pag.data_pagamento.strftime('%d/%m/%Y')
-        })
-    
-    # ========================================
-    # ALERTAS
-    # ========================================
-    alertas = []
-    
-    if taxa_inadimplencia > 5:
-        alertas.append({
-            'tipo': 'warning',
-            'titulo': 'Alta Inadimplência',
-            'mensagem': f'Taxa de inadimplência em {taxa_inadimplencia:.1f}% (meta: < 3%)',
-            'acao': 'Ver Comandas Atrasadas',
-            'link': '/admin/core/comanda/?status=OVERDUE'
-        })
-    
-    if comandas_atrasadas > 0:
-        alertas.append({
-            'tipo': 'warning',
-            'titulo': f'{comandas_atrasadas} Comandas em Atraso',
-            'mensagem': 'Ações de cobrança podem ser necessárias',
-            'acao': 'Ver Detalhes',
-            'link': '/admin/core/comanda/?status=OVERDUE'
-        })
+    filtros = filtros_dashboard(request.GET, hoje)
+    dados = dados_dashboard(filtros, hoje)
     
     # ✅ NOVO: Lista de anos disponíveis
-    anos_disponiveis = Comanda.objects.dates('mes_referencia', 'year', order='DESC')
-    anos_lista = sorted(set([d.year for d in anos_disponiveis]), reverse=True)
+    anos_lista = obter_ou_calcular(
+        'anos_comandas', {},
+        lambda: sorted(set([d.year for d in Comanda.objects.dates('mes_referencia', 'year', order='DESC')]), reverse=True),
+    )
     if not anos_lista:
-        anos_lista = [ano_atual]
+        anos_lista = [hoje.year]
     
     # ========================================
     # CONTEXT
@@ -314,40 +83,31 @@ def dashboard_financeiro(request):
     context = {
         # Filtros
         'filtros': {
-            'periodo': periodo,
-            'imovel': imovel_id,
-            'status': status_filtro,
-            'visualizacao': visualizacao
+            'periodo': filtros['periodo'],
+            'imovel': filtros['imovel'],
+            'status': filtros['status'],
+            'visualizacao': filtros['visualizacao'],
         },
-        'ano_atual': ano_atual,
-        'mes_atual': mes_atual,
-        'ano_selecionado': ano_selecionado,  # ✅ NOVO
-        'mes_selecionado': mes_selecionado,  # ✅ NOVO
+        'filtros_querystring': request.GET.urlencode(),
+        'ano_atual': hoje.year,
+        'mes_atual': hoje.month,
+        'ano_selecionado': filtros['ano'],  # ✅ NOVO
+        'mes_selecionado': filtros['mes'],  # ✅ NOVO
         'anos_disponiveis': anos_lista,       # ✅ NOVO
         'imoveis': Imovel.objects.filter(is_active=True),
         
         # KPIs
-        'kpis': {
-            'receita_prevista': float(receita_prevista),
-            'receita_realizada': float(receita_realizada),
-            'taxa_recebimento': float(taxa_recebimento),
-            'receita_pendente': float(receita_pendente),
-            'comandas_atrasadas': comandas_atrasadas,
-            'taxa_inadimplencia': float(taxa_inadimplencia),
-            'total_comandas': total_comandas,
-            'receita_prevista_alerta': taxa_recebimento < 80,
-            'inadimplencia_alerta': taxa_inadimplencia > 3,
-        },
+        'kpis': dados['kpis'],
         
         # Dados para gráficos
-        'dados_mensais': dados_mensais,
-        'performance_imoveis': performance_imoveis,
+        'dados_mensais': dados['dados_mensais'],
+        'performance_imoveis': dados['performance_imoveis'],
         
         # Listagem
-        'ultimos_pagamentos': ultimos_pagamentos,
+        'ultimos_pagamentos': dados['ultimos_pagamentos'],
         
         # Alertas
-        'alertas': alertas,
+        'alertas': dados['alertas'],
         
         # Django admin context
         'title': 'Dashboard Financeiro',
@@ -360,35 +120,143 @@ def dashboard_financeiro(request):
 
 
 # ========================================
-# VIEWS DE EXPORTAÇÃO (✅ MANTIDAS)
+# VIEWS DE EXPORTAÇÃO
+# Relatórios gerados em segundo plano (RelatorioJob): a requisição só
+# enfileira o job e redireciona para a página de acompanhamento.
 # ========================================
 
+def _solicitar(request, formato, email_destino=''):
+    job = solicitar_relatorio(
+        formato,
+        filtros_dashboard(request.GET),
+        usuario=request.user,
+        email_destino=email_destino,
+    )
+    return job
+
+
 @staff_member_required
 def exportar_dashboard_excel(request):
-    """Exporta dashboard para Excel"""
-    # TODO: Implementar exportação Excel
-    messages.info(request, '📊 Exportação Excel em desenvolvimento')
-    return redirect('dashboard_financeiro')
+    """Enfileira o relatório do dashboard em Excel (XLSX)"""
+    job = _solicitar(request, RelatorioJob.Formato.XLSX)
+    messages.info(request, '📊 Relatório Excel em processamento. O download começa quando estiver pronto.')
+    return redirect('relatorio_dashboard', job_id=job.pk)
 
 
 @staff_member_required
 def exportar_dashboard_pdf(request):
-    """Exporta dashboard para PDF"""
-    # TODO: Implementar exportação PDF
-    messages.info(request, '📄 Exportação PDF em desenvolvimento')
-    return redirect('dashboard_financeiro')
+    """Enfileira o relatório do dashboard em PDF"""
+    if not HAS_WEASY:
+        messages.error(request, '❌ Geração de PDF indisponível (WeasyPrint não instalado). Use a exportação Excel.')
+        return redirect('dashboard_financeiro')
+    
+    job = _solicitar(request, RelatorioJob.Formato.PDF)
+    messages.info(request, '📄 Relatório PDF em processamento. O download começa quando estiver pronto.')
+    return redirect('relatorio_dashboard', job_id=job.pk)
 
 
 @staff_member_required
 def enviar_relatorio_email(request):
-    """Envia relatório do dashboard por email"""
-    # TODO: Implementar envio de email
-    
+    """Enfileira o relatório do dashboard e envia por email ao concluir"""
     if request.method == 'POST':
-        email = request.POST.get('email', '')
-        if email:
-            messages.success(request, f'📧 Relatório será enviado para {email}')
-        else:
-            messages.warning(request, '⚠️ Email não informado')
+        email = request.POST.get('email', '').strip()
+        try:
+            validate_email(email)
+        except ValidationError:
+            messages.warning(request, '⚠️ Email não informado ou inválido')
+            return redirect('dashboard_financeiro')
+        
+        # PDF quando disponível; sem WeasyPrint o anexo vai em Excel
+        formato = RelatorioJob.Formato.PDF if HAS_WEASY else RelatorioJob.Formato.XLSX
+        _solicitar(request, formato, email_destino=email)
+        messages.success(request, f'📧 Relatório será enviado para {email}')
     
     return redirect('dashboard_financeiro')
+
+
+@staff_member_required
+def relatorio_dashboard(request, job_id):
+    """
+    Acompanhamento / download do relatório.
+    Pronto → arquivo; em processamento → página que se recarrega;
+    ``?formato=json`` → status para polling.
+    """
+    job = get_object_or_404(RelatorioJob, pk=job_id)
+    
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({
+            'id': str(job.pk),
+            'status': job.status,
+            'concluido': job.concluido,
+            'erro': job.erro,
+        })
+    
+    if job.concluido:
+        return FileResponse(
+            job.arquivo.open('rb'),
+            as_attachment=True,
+            filename=job.nome_download,
+        )
+    
+    if job.status == RelatorioJob.Status.ERRO:
+        messages.error(request, f'❌ Erro ao gerar relatório: {job.erro}')
+        return redirect('dashboard_financeiro')
+    
+    return render(request, 'relatorios/relatorio_aguardando.html', {
+        'job': job,
+        'title': 'Gerando relatório',
+        'site_title': 'HABITAT PRO',
+        'site_header': 'HABITAT PRO',
+        'has_permission': True,
+    })
+
+
+@staff_member_required
+def cubo_financeiro(request):
+    """
+    Cortes ad-hoc do cubo financeiro (core/dashboard/cubo.py) em JSON para
+    os gráficos do dashboard.
+    
+    Parâmetros: ``tabela`` (comandas|pagamentos), ``dimensoes`` e ``medidas``
+    separadas por vírgula, ou ``linhas``/``colunas``/``medida`` para pivô;
+    filtros por dimensão (``locador``, ``tipo_imovel``, ``bairro``, ``status``,
+    ``forma_pagamento``, ``mes``; vários valores separados por vírgula) e
+    ``mes_inicio``/``mes_fim`` no formato AAAA-MM.
+    """
+    if not HAS_NUMPY:
+        return JsonResponse({'erro': 'Cubo financeiro indisponível (numpy não instalado)'}, status=503)
+    
+    def _lista(nome):
+        return [valor for valor in request.GET.get(nome, '').split(',') if valor]
+    
+    tabela = request.GET.get('tabela', 'comandas')
+    filtros = {
+        nome: _lista(nome)
+        for nome in ('locador', 'tipo_imovel', 'bairro', 'status', 'forma_pagamento', 'mes')
+        if request.GET.get(nome)
+    }
+    for nome in ('mes_inicio', 'mes_fim'):
+        if request.GET.get(nome):
+            filtros[nome] = request.GET[nome]
+    
+    try:
+        cubo = obter_cubo()
+        if request.GET.get('linhas') and request.GET.get('colunas'):
+            dados = cubo.pivo(
+                tabela,
+                linhas=request.GET['linhas'],
+                colunas=request.GET['colunas'],
+                medida=request.GET.get('medida', 'previsto' if tabela == 'comandas' else 'valor'),
+                filtros=filtros,
+            )
+        else:
+            dados = cubo.agrupar(
+                tabela,
+                dimensoes=_lista('dimensoes') or ['mes'],
+                medidas=_lista('medidas') or None,
+                filtros=filtros,
+            )
+    except ValueError as e:
+        return JsonResponse({'erro': str(e)}, status=400)
+    
+    return JsonResponse({'tabela': tabela, 'dados': dados})
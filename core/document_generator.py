@@ -1,9 +1,12 @@
 # core/document_generator.py
+import glob
+import hashlib
 import os
+import tempfile
+import time
 from pathlib import Path
 from django.conf import settings
 from django.template.loader import render_to_string
-from django.utils import timezone
 
 from docx import Document
 from docx.shared import Pt, Mm
@@ -20,6 +23,22 @@ from .models import Pagamento
 DEFAULT_OUTPUT = getattr(settings, 'MEDIA_ROOT', Path.cwd() / 'media')
 RECIBOS_SUBDIR = 'recibos'
 
+# Versão do layout dos recibos: incrementar sempre que o conteúdo gerado
+# mudar, para invalidar os arquivos já existentes em disco.
+RECIBO_LAYOUT_VERSAO = '1'
+
+# Campos exibidos no recibo (template admin/pagamento_recibo.html e DOCX),
+# por objeto do contexto. Campo novo no layout => acrescentar aqui.
+RECIBO_CAMPOS = {
+    'pagamento': ('numero_pagamento', 'valor_pago', 'data_pagamento', 'forma_pagamento', 'status', 'observacoes'),
+    'comanda': ('numero_comanda', 'data_vencimento'),
+    'locatario': ('nome_razao_social', 'cpf_cnpj'),
+    'imovel': ('endereco', 'numero', 'bairro', 'cidade', 'estado'),
+}
+
+# Dias que um recibo gerado permanece em disco antes da limpeza periódica
+RECIBOS_RETENCAO_DIAS = getattr(settings, 'RECIBOS_RETENCAO_DIAS', 30)
+
 class DocumentGenerator:
     def __init__(self, output_dir: str = None):
         base = output_dir or DEFAULT_OUTPUT
@@ -29,17 +48,89 @@ class DocumentGenerator:
     def _sanitize_filename(self, name: str) -> str:
         return "".join(c for c in name if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
 
-    def gerar_recibo_pagamento(self, pagamento_id) -> str:
-        pagamento = Pagamento.objects.select_related(
+    # ═══════════════════════════════════════════════════════════
+    # CACHE DE RECIBOS (um arquivo por pagamento + versão do conteúdo)
+    # ═══════════════════════════════════════════════════════════
+
+    def _buscar_pagamento(self, pagamento_id):
+        # Aceita o próprio objeto já carregado (exportação em lote)
+        if isinstance(pagamento_id, Pagamento):
+            return pagamento_id
+        return Pagamento.objects.select_related(
             'comanda', 'comanda__locacao', 'comanda__locacao__locatario', 'comanda__locacao__imovel'
         ).get(pk=pagamento_id)
 
-        numero = pagamento.numero_pagamento or str(pagamento_id)
-        timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-        filename = f"recibo_{numero}_{timestamp}.docx"
-        filename = self._sanitize_filename(filename)
+    @staticmethod
+    def _contexto_recibo(pagamento) -> dict:
+        """Contexto do template do recibo (também a base de ``versao_conteudo``)."""
+        comanda = pagamento.comanda
+        locacao = comanda.locacao if comanda else None
+        return {
+            'pagamento': pagamento,
+            'comanda': comanda,
+            'locacao': locacao,
+            'locatario': getattr(locacao, 'locatario', None),
+            'imovel': getattr(locacao, 'imovel', None),
+        }
+
+    @classmethod
+    def versao_conteudo(cls, pagamento) -> str:
+        """
+        Hash curto de tudo que aparece no recibo.
+
+        Percorre o mesmo contexto entregue ao template, campo a campo de
+        RECIBO_CAMPOS: se qualquer campo exibido mudar, a versão muda e um
+        novo arquivo é gerado; caso contrário o já existente é reaproveitado.
+        """
+        contexto = cls._contexto_recibo(pagamento)
+        partes = [RECIBO_LAYOUT_VERSAO, getattr(settings, 'DEFAULT_FROM_EMAIL', '')]
+        for chave, campos in RECIBO_CAMPOS.items():
+            objeto = contexto[chave]
+            partes.extend(getattr(objeto, campo, '') for campo in campos)
+        bruto = '|'.join('' if p is None else str(p) for p in partes)
+        return hashlib.sha256(bruto.encode('utf-8')).hexdigest()[:16]
+
+    def _nome_arquivo(self, pagamento, versao: str, extensao: str) -> str:
+        return self._sanitize_filename(f"recibo_{pagamento.pk}_{versao}.{extensao}")
+
+    def _remover_versoes_antigas(self, pagamento, manter: str, extensao: str):
+        """Remove arquivos de versões anteriores do mesmo pagamento."""
+        padrao = os.path.join(self.output_dir, f"recibo_{pagamento.pk}_*.{extensao}")
+        for caminho in glob.glob(padrao):
+            if os.path.basename(caminho) != manter:
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+
+    def _caminho_temporario(self) -> str:
+        """Arquivo temporário no mesmo diretório (para os.replace atômico)."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix='recibo_', suffix='.tmp')
+        os.close(fd)
+        return tmp_path
+
+    def caminho_recibo(self, filename: str) -> str:
+        return os.path.join(self.output_dir, filename)
+
+    def gerar_recibo_pagamento(self, pagamento_id) -> str:
+        """
+        Gera (ou reaproveita) o recibo DOCX do pagamento.
+
+        Aceita o id ou o próprio Pagamento (com comanda/locação/locatário/
+        imóvel já carregados via select_related). Retorna apenas o nome do
+        arquivo dentro de ``output_dir``. Chamadas repetidas para um
+        pagamento sem alterações não geram novo arquivo.
+        """
+        pagamento = self._buscar_pagamento(pagamento_id)
+
+        numero = pagamento.numero_pagamento or str(pagamento.pk)
+        versao = self.versao_conteudo(pagamento)
+        filename = self._nome_arquivo(pagamento, versao, 'docx')
         path = os.path.join(self.output_dir, filename)
 
+        if os.path.exists(path):
+            return filename
+
         doc = Document()
         section = doc.sections[0]
         section.page_height = Mm(297)
@@ -92,27 +183,59 @@ class DocumentGenerator:
         doc.add_paragraph("Atenciosamente,")
         doc.add_paragraph(getattr(settings, 'DEFAULT_FROM_EMAIL', 'HABITAT PRO'))
 
-        doc.save(path)
-        return os.path.basename(path)
+        tmp_path = self._caminho_temporario()
+        doc.save(tmp_path)
+        os.replace(tmp_path, path)
+        self._remover_versoes_antigas(pagamento, filename, 'docx')
+        return filename
 
     def gerar_recibo_pdf(self, pagamento_id) -> str:
         if not HAS_WEASY:
             raise RuntimeError("WeasyPrint não está disponível. Instale weasyprint para gerar PDF.")
 
-        pagamento = Pagamento.objects.select_related(
-            'comanda', 'comanda__locacao', 'comanda__locacao__locatario', 'comanda__locacao__imovel'
-        ).get(pk=pagamento_id)
-        context = {
-            'pagamento': pagamento,
-            'comanda': pagamento.comanda,
-            'locacao': pagamento.comanda.locacao if pagamento.comanda else None,
-            'locatario': pagamento.comanda.locacao.locatario if pagamento.comanda and pagamento.comanda.locacao else None,
-            'imovel': pagamento.comanda.locacao.imovel if pagamento.comanda and pagamento.comanda.locacao else None,
-        }
-        html = render_to_string('admin/pagamento_recibo.html', context)
-        timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-        filename = f"recibo_{pagamento.numero_pagamento}_{timestamp}.pdf"
-        filename = self._sanitize_filename(filename)
+        pagamento = self._buscar_pagamento(pagamento_id)
+        versao = self.versao_conteudo(pagamento)
+        filename = self._nome_arquivo(pagamento, versao, 'pdf')
         path = os.path.join(self.output_dir, filename)
-        HTML(string=html, base_url=settings.STATIC_ROOT or settings.STATIC_URL).write_pdf(path)
-        return os.path.basename(path)
+
+        if os.path.exists(path):
+            return filename
+
+        context = self._contexto_recibo(pagamento)
+        html = render_to_string('admin/pagamento_recibo.html', context)
+        tmp_path = self._caminho_temporario()
+        HTML(string=html, base_url=settings.STATIC_ROOT or settings.STATIC_URL).write_pdf(tmp_path)
+        os.replace(tmp_path, path)
+        self._remover_versoes_antigas(pagamento, filename, 'pdf')
+        return filename
+
+    # ═══════════════════════════════════════════════════════════
+    # RETENÇÃO
+    # ═══════════════════════════════════════════════════════════
+
+    def limpar_recibos_antigos(self, dias: int = None, dry_run: bool = False) -> list:
+        """
+        Remove recibos (e temporários órfãos) sem modificação há mais de
+        ``dias`` dias. Recibos removidos são regerados sob demanda.
+
+        Retorna a lista de nomes de arquivos removidos (ou que seriam
+        removidos, em dry-run).
+        """
+        dias = RECIBOS_RETENCAO_DIAS if dias is None else dias
+        limite = time.time() - dias * 86400
+        removidos = []
+
+        with os.scandir(self.output_dir) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file() or not entrada.name.startswith('recibo_'):
+                    continue
+                try:
+                    if entrada.stat().st_mtime >= limite:
+                        continue
+                    if not dry_run:
+                        os.remove(entrada.path)
+                    removidos.append(entrada.name)
+                except OSError:
+                    continue
+
+        return removidos
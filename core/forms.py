@@ -1,5 +1,7 @@
+from decimal import Decimal
+
 from django import forms
-from .models import Pagamento, Comanda
+from .models import Pagamento, Comanda, FormaPagamento, StatusPagamento
 
 class PagamentoAdminForm(forms.ModelForm):
     class Meta:
@@ -19,3 +21,16 @@ class PagamentoAdminForm(forms.ModelForm):
         contrato = obj.locacao.numero_contrato
         valor = f"R$ {obj.valor_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
         return f"{obj.numero_comanda} - {locatario} - Contrato: {contrato} - Total: {valor}"
+
+
+class PagamentoLoteItemForm(forms.Form):
+    """
+    Um pagamento do lote (core/services/pagamentos_lote.py).
+    A comanda é validada à parte, em uma consulta para o lote inteiro.
+    """
+    comanda = forms.UUIDField()
+    valor_pago = forms.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    data_pagamento = forms.DateField(input_formats=['%Y-%m-%d', '%d/%m/%Y'])
+    forma_pagamento = forms.ChoiceField(choices=FormaPagamento.choices)
+    status = forms.ChoiceField(choices=StatusPagamento.choices, required=False)
+    observacoes = forms.CharField(required=False)
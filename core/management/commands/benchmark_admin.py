@@ -0,0 +1,148 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from core.models import Comanda, Imovel, Locacao, Locador, Locatario, Usuario
+from core.services import indice_busca
+from core.utils.admin_listas import CURSOR_VAR, ChangeListKeyset, PaginadorEstimado, codificar_cursor
+
+MESES_POR_LOCACAO = 12
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a listagem de comandas do admin: COUNT(*) x contagem estimada, OFFSET x keyset '
+        'e filtros com/sem cache. --semear cria dados sintéticos numa transação desfeita no fim'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semear', type=int, default=0, help='Comandas sintéticas a criar antes de medir')
+        parser.add_argument('--manter', action='store_true', help='Não desfaz os dados sintéticos')
+        parser.add_argument('--usuario', help='Superusuário usado nas requisições (padrão: o primeiro)')
+
+    def _medir(self, rotulo, funcao, repeticoes=3):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        self.stdout.write(f"⏱️ {rotulo}: {min(tempos):.1f} ms")
+        return resultado
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['semear']:
+                self._semear(options['semear'])
+            self._benchmark(options['usuario'])
+            if options['semear'] and not options['manter']:
+                transaction.set_rollback(True)
+                self.stdout.write('↩️ Dados sintéticos desfeitos')
+
+    def _semear(self, quantidade):
+        self.stdout.write(self.style.WARNING(f'🌱 Semeando {quantidade} comandas sintéticas...'))
+        inicio = time.perf_counter()
+        usuario = Usuario.objects.create(username=f'bench_{time.time_ns()}', email='bench@example.com')
+        locador = Locador.objects.create(
+            usuario=usuario, nome_razao_social='Locador Benchmark', cpf_cnpj=f'B{time.time_ns()}'[:18],
+            telefone='4130000000', email='bench@example.com', endereco_completo='-', cep='80000-000',
+        )
+        lote = f'{time.time_ns() % 10**6:06d}'
+        total_locacoes = -(-quantidade // MESES_POR_LOCACAO)
+        locatarios, imoveis, locacoes, comandas = [], [], [], []
+        for i in range(total_locacoes):
+            locatarios.append(Locatario(
+                nome_razao_social=f'Locatário Benchmark {i}', cpf_cnpj=f'{lote}{i:011d}'[-18:],
+                telefone='41999999999', email=f'bench{i}@example.com',
+            ))
+            imoveis.append(Imovel(
+                locador=locador, codigo_imovel=f'BN{lote}{i:07d}', tipo_imovel='APARTMENT',
+                endereco=f'Rua Benchmark {i}', numero=str(i % 1000), bairro='Centro', cidade='Curitiba',
+                estado='PR', cep='80000-000', area_total=Decimal('50.00'), valor_aluguel=Decimal('1000.00'),
+            ))
+        indice_busca.preencher(*locatarios, *imoveis)
+        Locatario.objects.bulk_create(locatarios, batch_size=1000)
+        Imovel.objects.bulk_create(imoveis, batch_size=1000)
+        for i, (locatario, imovel) in enumerate(zip(locatarios, imoveis)):
+            locacoes.append(Locacao(
+                imovel=imovel, locatario=locatario, numero_contrato=f'BN{lote}-{i:07d}', status='ACTIVE',
+                data_inicio=date(2024, 1, 1), data_fim=date(2025, 12, 31), dia_vencimento=10,
+                valor_aluguel=Decimal('1000.00'),
+            ))
+        indice_busca.preencher(*locacoes)
+        Locacao.objects.bulk_create(locacoes, batch_size=1000)
+        for i in range(quantidade):
+            locacao = locacoes[i // MESES_POR_LOCACAO]
+            mes = date(2024, i % MESES_POR_LOCACAO + 1, 1)
+            comanda = Comanda(
+                locacao=locacao, numero_comanda=f'BN{lote}-{i:08d}', mes_referencia=mes,
+                ano_referencia=mes.year, data_vencimento=mes + timedelta(days=9), status='PENDING',
+            )
+            comanda.valor_aluguel = Decimal('1000.00')
+            comandas.append(comanda)
+        indice_busca.preencher(*comandas)
+        Comanda.objects.bulk_create(comandas, batch_size=2000)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Estatísticas do planejador para a contagem estimada
+                cursor.execute('ANALYZE core_comanda')
+        self.stdout.write(f"✅ {len(comandas)} comandas em {time.perf_counter() - inicio:.1f} s")
+
+    def _benchmark(self, username):
+        usuarios = Usuario.objects.filter(is_superuser=True)
+        superusuario = usuarios.filter(username=username).first() if username else usuarios.order_by('date_joined').first()
+        if superusuario is None:
+            raise CommandError('Nenhum superusuário para as requisições do admin')
+        modelo_admin = admin.site._registry[Comanda]
+        total = Comanda.objects.count()
+        if not total:
+            raise CommandError('Nenhuma comanda para medir (use --semear)')
+        fabrica = RequestFactory()
+
+        def changelist(classe, **params):
+            request = fabrica.get('/admin/core/comanda/', params)
+            request.user = superusuario
+            original = modelo_admin.get_changelist
+            modelo_admin.get_changelist = lambda request, **kwargs: classe
+            try:
+                cl = modelo_admin.get_changelist_instance(request)
+                list(cl.result_list)
+                return cl
+            finally:
+                modelo_admin.get_changelist = original
+
+        por_pagina = modelo_admin.list_per_page
+        ultima = max(1, -(-total // por_pagina))
+        self.stdout.write(self.style.WARNING(
+            f"📋 BENCHMARK ADMIN DE COMANDAS: {total} comandas, {por_pagina} por página ({connection.vendor})"
+        ))
+        self._medir('COUNT(*) exato', Comanda.objects.count)
+        self._medir('contagem estimada', lambda: PaginadorEstimado(Comanda.objects.all(), por_pagina).count)
+
+        # Página perto do fim: OFFSET percorre tudo antes dela; keyset parte do cursor
+        self._medir(f'página {ultima} com OFFSET (Django padrão)', lambda: changelist(ChangeList, p=ultima))
+        self._medir('primeira página keyset', lambda: changelist(ChangeListKeyset))
+        ordem = [campo.lstrip('-') for campo in modelo_admin.ordem_keyset]
+        chaves = Comanda.objects.order_by(*modelo_admin.ordem_keyset).values_list(*ordem)[max(0, total - por_pagina - 1)]
+        self._medir(
+            f'página {ultima} keyset (cursor)',
+            lambda: changelist(ChangeListKeyset, **{CURSOR_VAR: codificar_cursor(chaves)}),
+        )
+
+        def distintos():
+            for campo in ('mes_referencia', 'ano_referencia'):
+                list(Comanda.objects.order_by(campo).values_list(campo, flat=True).distinct())
+
+        def filtros():
+            cl = changelist(ChangeListKeyset)
+            for filtro in cl.filter_specs:
+                list(filtro.choices(cl))
+
+        self._medir('valores dos filtros (SELECT DISTINCT)', distintos)
+        filtros()
+        self._medir('changelist com filtros em cache', filtros)
@@ -0,0 +1,58 @@
+import io
+import itertools
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Comanda, Usuario
+from core.services.cnab_retorno import (
+    STATUS_CONCILIAVEIS, IndiceComandas, conciliar_retorno, gerar_retorno_sintetico, ler_retorno,
+)
+
+
+class Command(BaseCommand):
+    help = 'Mede leitura e conciliação de um retorno CNAB sintético gerado a partir das comandas em aberto'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=20000, help='Títulos no arquivo sintético')
+        parser.add_argument('--layout', type=int, choices=[240, 400], default=400)
+    
+    def _medir(self, rotulo, funcao):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        self.stdout.write(f"⏱️ {rotulo}: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return resultado
+    
+    def handle(self, *args, **options):
+        comandas = list(
+            Comanda.objects.filter(is_active=True, status__in=STATUS_CONCILIAVEIS)
+            .values('numero_comanda', 'nosso_numero', 'data_vencimento')[:options['linhas']]
+        )
+        if not comandas:
+            raise CommandError('Nenhuma comanda em aberto para montar o arquivo')
+        usuario = Usuario.objects.filter(is_superuser=True).first()
+        
+        # Alterna os critérios: nosso número, número da comanda e sem identificação
+        titulos = [
+            {
+                'nosso_numero': comanda['nosso_numero'] if posicao % 3 == 0 else '',
+                'seu_numero': comanda['numero_comanda'] if posicao % 3 == 1 else '',
+                'valor': Decimal('100.00'),
+                'vencimento': comanda['data_vencimento'],
+                'data_pagamento': comanda['data_vencimento'],
+            }
+            for posicao, comanda in zip(range(options['linhas']), itertools.cycle(comandas))
+        ]
+        texto = gerar_retorno_sintetico(titulos, options['layout'])
+        
+        self.stdout.write(self.style.WARNING(
+            f"🏦 BENCHMARK CNAB {options['layout']}: {len(titulos)} títulos, {len(comandas)} comandas em aberto"
+        ))
+        self._medir('leitura', lambda: sum(1 for _ in ler_retorno(io.StringIO(texto))))
+        self._medir('índice (1 consulta)', IndiceComandas)
+        resultado = self._medir(
+            'conciliação completa (simulação)',
+            lambda: conciliar_retorno(io.StringIO(texto), usuario, simular=True),
+        )
+        self.stdout.write(f"✅ {resultado['conciliados']} conciliado(s), {len(resultado['nao_conciliados'])} sem comanda")
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from core.dashboard.cubo import HAS_NUMPY, CuboFinanceiro
+from core.models import Comanda
+
+
+class Command(BaseCommand):
+    help = 'Compara o cubo financeiro (NumPy) com a consulta ORM equivalente'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=5, help='Execuções por medição')
+        parser.add_argument('--dimensoes', default='mes,locador', help='Dimensões do group-by (mes, locador, tipo_imovel, bairro, status)')
+    
+    def _medir(self, funcao, repeticoes):
+        tempos = []
+        resultado = None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return min(tempos), resultado
+    
+    def handle(self, *args, **options):
+        if not HAS_NUMPY:
+            raise CommandError('numpy não está instalado')
+        
+        repeticoes = options['repeticoes']
+        dimensoes = [d for d in options['dimensoes'].split(',') if d]
+        campos_orm = {
+            'mes': 'mes',
+            'locador': 'locacao__imovel__locador__nome_razao_social',
+            'tipo_imovel': 'locacao__imovel__tipo_imovel',
+            'bairro': 'locacao__imovel__bairro',
+            'status': 'status',
+        }
+        desconhecidas = set(dimensoes) - set(campos_orm)
+        if desconhecidas:
+            raise CommandError(f"Dimensão desconhecida: {', '.join(sorted(desconhecidas))}")
+        
+        self.stdout.write(self.style.WARNING('🧊 BENCHMARK DO CUBO FINANCEIRO'))
+        self.stdout.write(f"📐 group-by por {', '.join(dimensoes)} ({repeticoes} execuções, melhor tempo)")
+        
+        def carregar():
+            cubo = CuboFinanceiro()
+            cubo.atualizar()
+            return cubo
+        
+        tempo_carga, cubo = self._medir(carregar, 1)
+        tempo_incremental, _ = self._medir(cubo.atualizar, repeticoes)
+        tempo_cubo, linhas_cubo = self._medir(
+            lambda: cubo.agrupar('comandas', dimensoes, ('quantidade', 'previsto', 'pago')),
+            repeticoes,
+        )
+        
+        def orm():
+            return list(
+                Comanda.objects.filter(is_active=True).com_totais()
+                .annotate(mes=TruncMonth('mes_referencia'))
+                .order_by()
+                .values(*[campos_orm[d] for d in dimensoes])
+                .annotate(
+                    quantidade=Count('pk'),
+                    previsto=Sum('valor_total_calculado'),
+                    pago=Sum('total_pago_calculado'),
+                )
+            )
+        
+        tempo_orm, linhas_orm = self._medir(orm, repeticoes)
+        
+        self.stdout.write(f'• Comandas no cubo: {len(cubo.comandas)}')
+        self.stdout.write(f'• Carga completa: {tempo_carga:.1f} ms')
+        self.stdout.write(f'• Atualização incremental (sem mudanças): {tempo_incremental:.1f} ms')
+        self.stdout.write(f'• Cubo: {tempo_cubo:.2f} ms ({len(linhas_cubo)} grupos)')
+        self.stdout.write(f'• ORM: {tempo_orm:.2f} ms ({len(linhas_orm)} grupos)')
+        if tempo_cubo > 0:
+            self.stdout.write(self.style.SUCCESS(f'✅ Cubo {tempo_orm / tempo_cubo:.1f}x mais rápido que o ORM'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from core.dashboard import cache as dashboard_cache
+
+
+class Command(BaseCommand):
+    help = 'Mostra acertos/erros do cache do dashboard e permite invalidá-lo'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidar', action='store_true', help='Invalida todos os fragmentos do dashboard')
+        parser.add_argument('--zerar', action='store_true', help='Zera os contadores de acerto/erro')
+    
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('🗄️ CACHE DO DASHBOARD'))
+        
+        estatisticas = dashboard_cache.estatisticas_cache()
+        if not estatisticas:
+            self.stdout.write('Nenhum fragmento registrado ainda')
+        for fragmento, dados in estatisticas.items():
+            self.stdout.write(
+                f"• {fragmento}: {dados['hits']} acerto(s), {dados['misses']} erro(s) "
+                f"({dados['taxa_acerto']}% de acerto)"
+            )
+        
+        if options['zerar']:
+            dashboard_cache.zerar_estatisticas()
+            self.stdout.write(self.style.SUCCESS('✅ Contadores zerados'))
+        
+        if options['invalidar']:
+            dashboard_cache.invalidar()
+            self.stdout.write(self.style.SUCCESS('✅ Fragmentos invalidados'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Usuario
+from core.services.cnab_retorno import ArquivoCNABInvalido, conciliar_retorno
+
+
+class Command(BaseCommand):
+    help = 'Concilia um arquivo de retorno CNAB 240/400 com as comandas e registra os pagamentos'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo de retorno')
+        parser.add_argument('--usuario', help='Usuário que registra os pagamentos (padrão: primeiro superusuário)')
+        parser.add_argument('--simular', action='store_true', help='Só concilia e mostra o relatório, sem gravar')
+    
+    def handle(self, *args, **options):
+        if options['usuario']:
+            usuario = Usuario.objects.filter(username=options['usuario']).first()
+        else:
+            usuario = Usuario.objects.filter(is_superuser=True).order_by('date_joined').first()
+        if usuario is None:
+            raise CommandError('Usuário não encontrado')
+        
+        self.stdout.write(self.style.WARNING('🏦 CONCILIAÇÃO DE RETORNO CNAB'))
+        try:
+            resultado = conciliar_retorno(options['arquivo'], usuario, simular=options['simular'])
+        except (OSError, ArquivoCNABInvalido) as e:
+            raise CommandError(str(e))
+        
+        self.stdout.write(f"📄 {resultado['titulos']} título(s), {resultado['liquidacoes']} liquidação(ões)")
+        for criterio, quantidade in sorted(resultado['por_criterio'].items()):
+            self.stdout.write(f"• {criterio}: {quantidade}")
+        if resultado['duplicados']:
+            self.stdout.write(f"↩️ {resultado['duplicados']} já registrada(s) anteriormente")
+        for item in resultado['nao_conciliados']:
+            self.stdout.write(self.style.ERROR(
+                f"❌ Linha {item['linha']}: nosso número {item['nosso_numero'] or '-'}, "
+                f"seu número {item['seu_numero'] or '-'}, R$ {item['valor_pago'] or '-'} - {item['motivo']}"
+            ))
+        
+        if options['simular']:
+            self.stdout.write(self.style.SUCCESS(f"✅ Simulação: {resultado['conciliados']} título(s) conciliado(s)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {resultado['pagamentos_criados']} pagamento(s) registrado(s), "
+                f"{resultado['comandas_atualizadas']} comanda(s) atualizada(s)"
+            ))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import ImportacaoCarteira, Usuario
+from core.services.importacao_carteira import PlanilhaInvalida, importar_carteira
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa uma planilha (CSV/XLSX) de locadores, imóveis, locatários ou locações. '
+        'Importe na ordem: locadores, imoveis, locatarios, locacoes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=ImportacaoCarteira.Tipo.values, help='O que a planilha contém')
+        parser.add_argument('arquivo', help='Caminho da planilha (.csv ou .xlsx)')
+        parser.add_argument('--formato', choices=['csv', 'xlsx'], help='Formato do arquivo (padrão: detectar)')
+        parser.add_argument('--usuario', help='Usuário responsável (padrão: primeiro superusuário)')
+        parser.add_argument('--simular', action='store_true', help='Só valida e mostra os erros, sem gravar')
+        parser.add_argument('--max-erros', type=int, default=50, help='Erros exibidos no relatório')
+
+    def handle(self, *args, **options):
+        if options['usuario']:
+            usuario = Usuario.objects.filter(username=options['usuario']).first()
+            if usuario is None:
+                raise CommandError('Usuário não encontrado')
+        else:
+            usuario = Usuario.objects.filter(is_superuser=True).order_by('date_joined').first()
+
+        self.stdout.write(self.style.WARNING(f"📥 IMPORTAÇÃO DE {options['tipo'].upper()}"))
+        try:
+            resultado = importar_carteira(
+                options['arquivo'], options['tipo'], usuario,
+                formato=options['formato'], simular=options['simular'],
+            )
+        except (OSError, PlanilhaInvalida) as e:
+            raise CommandError(str(e))
+
+        if resultado['retomada']:
+            self.stdout.write('↩️ Importação retomada do último lote gravado')
+        self.stdout.write(f"📄 {resultado['linhas']} linha(s) processada(s)")
+        if resultado['existentes']:
+            self.stdout.write(f"• {resultado['existentes']} já cadastrado(s)")
+        for item in resultado['erros'][:options['max_erros']]:
+            detalhes = '; '.join(f"{campo}: {' '.join(msgs)}" for campo, msgs in item['erros'].items())
+            self.stdout.write(self.style.ERROR(f"❌ Linha {item['linha']}: {detalhes}"))
+        if resultado['total_erros'] > options['max_erros']:
+            self.stdout.write(f"... e mais {resultado['total_erros'] - options['max_erros']} linha(s) com erro")
+
+        prefixo = 'Simulação: ' if options['simular'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {prefixo}{resultado['criados']} registro(s) criado(s), {resultado['total_erros']} com erro"
+        ))
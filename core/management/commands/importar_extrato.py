@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Usuario
+from core.services.extrato_bancario import ExtratoInvalido, importar_extrato
+
+
+class Command(BaseCommand):
+    help = 'Importa um extrato bancário (OFX/CSV) e concilia os créditos com as comandas em aberto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do extrato (.ofx ou .csv)')
+        parser.add_argument('--formato', choices=['ofx', 'csv'], help='Formato do arquivo (padrão: detectar)')
+        parser.add_argument('--usuario', help='Usuário que registra os pagamentos (padrão: primeiro superusuário)')
+        parser.add_argument('--simular', action='store_true', help='Só concilia e mostra o relatório, sem gravar')
+
+    def handle(self, *args, **options):
+        if options['usuario']:
+            usuario = Usuario.objects.filter(username=options['usuario']).first()
+        else:
+            usuario = Usuario.objects.filter(is_superuser=True).order_by('date_joined').first()
+        if usuario is None:
+            raise CommandError('Usuário não encontrado')
+
+        self.stdout.write(self.style.WARNING('🏦 IMPORTAÇÃO DE EXTRATO BANCÁRIO'))
+        try:
+            resultado = importar_extrato(
+                options['arquivo'], usuario, formato=options['formato'], simular=options['simular']
+            )
+        except (OSError, ExtratoInvalido) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"📄 {resultado['creditos']} crédito(s) no extrato")
+        if resultado['duplicados']:
+            self.stdout.write(f"↩️ {resultado['duplicados']} já importado(s) anteriormente")
+        self.stdout.write(f"🔎 {resultado['revisao']} para revisão no admin")
+        self.stdout.write(f"❓ {resultado['sem_correspondencia']} sem correspondência")
+        for item in resultado['invalidos']:
+            self.stdout.write(self.style.ERROR(f"❌ Linha {item['linha']}: {item['motivo']}"))
+
+        prefixo = 'Simulação: ' if options['simular'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {prefixo}{resultado['conciliados']} crédito(s) conciliado(s) automaticamente"
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from core.document_generator import DocumentGenerator, RECIBOS_RETENCAO_DIAS
+
+
+class Command(BaseCommand):
+    help = 'Remove recibos gerados (DOCX/PDF) sem uso há mais de X dias'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=RECIBOS_RETENCAO_DIAS, help='Dias de retenção dos arquivos')
+        parser.add_argument('--dry-run', action='store_true', help='Simula sem deletar')
+        parser.add_argument('--verbose', action='store_true', help='Mostra detalhes')
+    
+    def handle(self, *args, **options):
+        dias = options['dias']
+        dry_run = options['dry_run']
+        verbose = options['verbose']
+        
+        self.stdout.write(self.style.WARNING('🧹 LIMPEZA DE RECIBOS GERADOS'))
+        self.stdout.write(f'📅 Recibos sem modificação há mais de {dias} dias serão removidos')
+        
+        if dry_run:
+            self.stdout.write(self.style.NOTICE('🔍 MODO DRY-RUN (simulação)'))
+        
+        removidos = DocumentGenerator().limpar_recibos_antigos(dias=dias, dry_run=dry_run)
+        
+        if not removidos:
+            self.stdout.write(self.style.SUCCESS('✅ Nenhum recibo antigo encontrado'))
+            return
+        
+        if verbose:
+            for nome in removidos[:10]:
+                self.stdout.write(f'• {nome}')
+            if len(removidos) > 10:
+                self.stdout.write(f'... e mais {len(removidos) - 10} arquivos')
+        
+        if dry_run:
+            self.stdout.write(self.style.NOTICE(f'🔍 {len(removidos)} arquivo(s) SERIAM removidos'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(removidos)} arquivo(s) removido(s)!'))
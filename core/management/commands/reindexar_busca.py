@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import Comanda, Locacao, Locatario, Pagamento
+from core.services import indice_busca
+from core.utils.busca import CAMPOS_BUSCA, buscar
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói as colunas de busca normalizadas (admin e API) e mede consultas de exemplo'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--medir', nargs='+', metavar='TERMO', help='Só mede a busca destes termos, sem reindexar')
+    
+    def handle(self, *args, **options):
+        if options['medir']:
+            for termo in options['medir']:
+                self._medir(termo)
+            return
+        
+        self.stdout.write(self.style.WARNING('🔎 REINDEXAÇÃO DA BUSCA'))
+        for modelo, total in indice_busca.reindexar().items():
+            self.stdout.write(f"   {modelo}: {total} atualizado(s)")
+        self.stdout.write(self.style.SUCCESS('✅ Índice de busca atualizado'))
+    
+    def _medir(self, termo):
+        for chave, modelo in (('locatario', Locatario), ('locacao', Locacao), ('comanda', Comanda), ('pagamento', Pagamento)):
+            inicio = time.perf_counter()
+            # Primeira página do changelist: contagem + 100 linhas
+            queryset = buscar(modelo.objects.all(), termo, CAMPOS_BUSCA[chave])
+            total = queryset.count()
+            list(queryset.values_list('pk', flat=True)[:100])
+            self.stdout.write(
+                f"⏱️ {modelo._meta.verbose_name_plural} '{termo}': {total} resultado(s) em "
+                f"{(time.perf_counter() - inicio) * 1000:.0f} ms"
+            )
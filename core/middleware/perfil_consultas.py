@@ -0,0 +1,151 @@
+"""
+Perfil de Consultas SQL por Requisição
+
+Conta as consultas, soma o tempo no banco, aponta SQL repetido (o mesmo
+comando várias vezes: N+1 de list_display, de propriedades do modelo...)
+e guarda as N consultas mais lentas de cada requisição.
+
+- Ligado em todas as requisições com PERFIL_CONSULTAS_ATIVO=True, ou só
+  na requisição com o cabeçalho ``X-Perfil-Consultas: 1`` (usuário staff;
+  qualquer usuário com DEBUG)
+- Resultado no cabeçalho ``X-Perfil-Consultas`` (e ``Server-Timing``) da
+  resposta e numa linha JSON no logger ``core.middleware.perfil_consultas``
+- PERFIL_CONSULTAS_ORCAMENTOS: {nome da view: máximo de consultas}. Acima
+  do orçamento a linha sai como WARNING; os testes usam os mesmos valores
+  (OrcamentoConsultasMixin em core/tests/base.py)
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+CABECALHO = 'X-Perfil-Consultas'
+
+# Literais trocados por "?": consultas iguais a menos dos valores
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalizar_sql(sql):
+    return _LITERAIS.sub('?', ' '.join(sql.split()))
+
+
+def orcamento(nome_view):
+    """Máximo de consultas da view (None: sem orçamento)."""
+    return getattr(settings, 'PERFIL_CONSULTAS_ORCAMENTOS', {}).get(nome_view)
+
+
+class ColetorConsultas:
+    """
+    execute_wrapper que mede cada consulta, em todas as conexões, sem
+    depender de DEBUG (connection.queries)::
+
+        with ColetorConsultas() as coletor:
+            ...
+        coletor.resumo()
+    """
+
+    def __init__(self):
+        self.consultas = []  # (sql, parâmetros, ms)
+        self._pilha = None
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # executemany: os parâmetros do lote não identificam a consulta
+            self.consultas.append((sql, None if many else repr(params), (time.perf_counter() - inicio) * 1000))
+
+    def __enter__(self):
+        self._pilha = ExitStack()
+        for conexao in connections.all():
+            self._pilha.enter_context(conexao.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc):
+        self._pilha.close()
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def tempo_ms(self):
+        return sum(ms for _, _, ms in self.consultas)
+
+    def resumo(self, top=None):
+        """
+        ``duplicadas``: consultas idênticas (SQL e parâmetros) além da
+        primeira; ``repetidas``: SQL executado mais de uma vez, só os
+        valores mudando; ``lentas``: as ``top`` mais demoradas.
+        """
+        top = top or getattr(settings, 'PERFIL_CONSULTAS_TOP', 5)
+        identicas = Counter((sql, params) for sql, params, _ in self.consultas)
+        modelos = Counter(normalizar_sql(sql) for sql, _, _ in self.consultas)
+        lentas = sorted(self.consultas, key=lambda consulta: consulta[2], reverse=True)[:top]
+        return {
+            'consultas': self.total,
+            'tempo_ms': round(self.tempo_ms, 2),
+            'duplicadas': sum(vezes - 1 for vezes in identicas.values()),
+            'repetidas': [
+                {'vezes': vezes, 'sql': sql[:500]}
+                for sql, vezes in modelos.most_common(top) if vezes > 1
+            ],
+            'lentas': [{'ms': round(ms, 2), 'sql': sql[:500]} for sql, _, ms in lentas],
+        }
+
+
+class PerfilConsultasMiddleware:
+    """Mede as consultas SQL da requisição (ver docstring do módulo)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sempre = getattr(settings, 'PERFIL_CONSULTAS_ATIVO', False)
+        if not sempre and request.headers.get(CABECALHO) != '1':
+            return self.get_response(request)
+
+        inicio = time.perf_counter()
+        with ColetorConsultas() as coletor:
+            response = self.get_response(request)
+
+        # Pelo cabeçalho, só staff (o SQL pode expor dados)
+        usuario = getattr(request, 'user', None)
+        if not (sempre or settings.DEBUG or getattr(usuario, 'is_staff', False)):
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        nome_view = (match.view_name or match._func_path) if match else request.path
+        resumo = coletor.resumo()
+        limite = orcamento(nome_view)
+        excedeu = limite is not None and resumo['consultas'] > limite
+
+        response[CABECALHO] = (
+            f"consultas={resumo['consultas']}; tempo_ms={resumo['tempo_ms']}; "
+            f"duplicadas={resumo['duplicadas']}; repetidas={len(resumo['repetidas'])}"
+            + (f"; orcamento={limite}" if limite is not None else '')
+        )
+        response['Server-Timing'] = f'db;dur={resumo["tempo_ms"]};desc="{resumo["consultas"]} consultas"'
+
+        linha = {
+            'view': nome_view,
+            'metodo': request.method,
+            'caminho': request.path,
+            'status': response.status_code,
+            'total_ms': round((time.perf_counter() - inicio) * 1000, 2),
+            'orcamento': limite,
+            **resumo,
+        }
+        if excedeu:
+            logger.warning(f"🐢 Orçamento de consultas excedido: {json.dumps(linha, ensure_ascii=False)}")
+        else:
+            logger.info(f"🧮 Perfil de consultas: {json.dumps(linha, ensure_ascii=False)}")
+        return response
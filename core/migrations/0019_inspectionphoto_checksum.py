@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-19 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_inspection_system'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectionphoto',
+            name='checksum',
+            field=models.CharField(blank=True, default='', help_text='Hash do arquivo salvo; usado no cache de páginas do PDF', max_length=64, verbose_name='Checksum (SHA-256)'),
+        ),
+    ]
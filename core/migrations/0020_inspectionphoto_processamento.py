@@ -0,0 +1,39 @@
+# Generated by Django 4.2.8 on 2026-10-19 06:54
+
+import core.models_inspection
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_inspectionphoto_checksum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectionphoto',
+            name='erro_processamento',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Erro no Processamento'),
+        ),
+        migrations.AddField(
+            model_name='inspectionphoto',
+            name='miniatura',
+            field=models.ImageField(blank=True, upload_to=core.models_inspection.upload_inspection_photo_path, verbose_name='Miniatura'),
+        ),
+        migrations.AddField(
+            model_name='inspectionphoto',
+            name='original',
+            field=models.FileField(blank=True, upload_to=core.models_inspection.upload_inspection_photo_path, verbose_name='Arquivo Original'),
+        ),
+        migrations.AddField(
+            model_name='inspectionphoto',
+            name='status_processamento',
+            field=models.CharField(choices=[('pendente', 'Aguardando processamento'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], db_index=True, default='concluida', max_length=20, verbose_name='Status do Processamento'),
+        ),
+        migrations.AlterField(
+            model_name='inspectionphoto',
+            name='imagem',
+            field=models.ImageField(blank=True, upload_to=core.models_inspection.upload_inspection_photo_path, verbose_name='Imagem'),
+        ),
+    ]
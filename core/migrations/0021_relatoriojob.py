@@ -0,0 +1,41 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:02
+
+import core.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_inspectionphoto_processamento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatorioJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Identificador único do registro', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Data e hora da criação do registro', verbose_name='Data de Criação')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Data e hora da última atualização do registro', verbose_name='Data de Atualização')),
+                ('is_active', models.BooleanField(default=True, help_text='Indica se o registro está ativo (soft delete)', verbose_name='Ativo')),
+                ('formato', models.CharField(choices=[('xlsx', 'Excel (XLSX)'), ('pdf', 'PDF')], max_length=10, verbose_name='Formato')),
+                ('filtros', models.JSONField(blank=True, default=dict, help_text='Filtros do dashboard no momento da solicitação', verbose_name='Filtros')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro')], db_index=True, default='pendente', max_length=20, verbose_name='Status')),
+                ('email_destino', models.EmailField(blank=True, help_text='Se preenchido, o relatório é enviado por email ao concluir', max_length=254, verbose_name='Enviar para')),
+                ('arquivo', models.FileField(blank=True, upload_to=core.models.upload_relatorio_path, verbose_name='Arquivo')),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='relatorios_solicitados', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Relatório do Dashboard',
+                'verbose_name_plural': 'Relatórios do Dashboard',
+                'db_table': 'core_relatorio_job',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_relatoriojob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comanda',
+            index=models.Index(fields=['created_at', 'id'], name='comanda_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comanda',
+            index=models.Index(fields=['status', 'data_vencimento'], name='comanda_status_venc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='locacao',
+            index=models.Index(fields=['created_at', 'id'], name='locacao_criado_idx'),
+        ),
+    ]
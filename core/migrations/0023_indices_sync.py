@@ -0,0 +1,37 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_indices_api'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comanda',
+            index=models.Index(fields=['updated_at', 'id'], name='comanda_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['updated_at', 'id'], name='imovel_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='locacao',
+            index=models.Index(fields=['updated_at', 'id'], name='locacao_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='locador',
+            index=models.Index(fields=['updated_at', 'id'], name='locador_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='locatario',
+            index=models.Index(fields=['updated_at', 'id'], name='locatario_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagamento',
+            index=models.Index(fields=['updated_at', 'id'], name='pagamento_sync_idx'),
+        ),
+    ]
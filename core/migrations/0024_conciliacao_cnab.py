@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_indices_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comanda',
+            name='nosso_numero',
+            field=models.CharField(blank=True, db_index=True, help_text='Identificação do boleto no banco (conciliação do retorno CNAB)', max_length=20, verbose_name='Nosso Número'),
+        ),
+        migrations.AddField(
+            model_name='pagamento',
+            name='referencia_externa',
+            field=models.CharField(blank=True, db_index=True, help_text='Origem do registro importado (retorno CNAB, extrato); evita importar duas vezes', max_length=100, verbose_name='Referência Externa'),
+        ),
+    ]
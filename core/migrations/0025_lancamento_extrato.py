@@ -0,0 +1,40 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_conciliacao_cnab'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LancamentoExtrato',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Identificador único do registro', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Data e hora da criação do registro', verbose_name='Data de Criação')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Data e hora da última atualização do registro', verbose_name='Data de Atualização')),
+                ('is_active', models.BooleanField(default=True, help_text='Indica se o registro está ativo (soft delete)', verbose_name='Ativo')),
+                ('identificador', models.CharField(help_text='FITID do OFX ou hash da linha do CSV (evita importar duas vezes)', max_length=100, unique=True, verbose_name='Identificador')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Valor')),
+                ('descricao', models.CharField(blank=True, max_length=255, verbose_name='Descrição')),
+                ('documento_pagador', models.CharField(blank=True, db_index=True, help_text='Somente dígitos', max_length=14, verbose_name='CPF/CNPJ do pagador')),
+                ('status', models.CharField(choices=[('conciliado', 'Conciliado'), ('revisao', 'Em revisão'), ('sem_correspondencia', 'Sem correspondência'), ('ignorado', 'Ignorado')], db_index=True, max_length=20, verbose_name='Status')),
+                ('pontuacao', models.PositiveSmallIntegerField(default=0, verbose_name='Pontuação')),
+                ('candidatos', models.JSONField(blank=True, default=list, help_text='Comandas possíveis, da maior para a menor pontuação', verbose_name='Candidatos')),
+                ('comanda', models.ForeignKey(blank=True, help_text='Comanda conciliada (ou escolhida na revisão)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lancamentos_extrato', to='core.comanda', verbose_name='Comanda')),
+                ('pagamento', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lancamento_extrato', to='core.pagamento', verbose_name='Pagamento')),
+            ],
+            options={
+                'verbose_name': 'Lançamento de Extrato',
+                'verbose_name_plural': 'Lançamentos de Extrato',
+                'db_table': 'core_lancamento_extrato',
+                'ordering': ['-data', '-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_lancamento_extrato'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoCarteira',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Identificador único do registro', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Data e hora da criação do registro', verbose_name='Data de Criação')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Data e hora da última atualização do registro', verbose_name='Data de Atualização')),
+                ('is_active', models.BooleanField(default=True, help_text='Indica se o registro está ativo (soft delete)', verbose_name='Ativo')),
+                ('tipo', models.CharField(choices=[('locadores', 'Locadores'), ('imoveis', 'Imóveis'), ('locatarios', 'Locatários'), ('locacoes', 'Locações')], max_length=20, verbose_name='Tipo')),
+                ('arquivo_nome', models.CharField(blank=True, max_length=255, verbose_name='Arquivo')),
+                ('hash_arquivo', models.CharField(db_index=True, help_text='SHA-256 do conteúdo; identifica a importação a retomar', max_length=64, verbose_name='Hash do arquivo')),
+                ('status', models.CharField(choices=[('em_andamento', 'Em andamento'), ('concluida', 'Concluída')], db_index=True, default='em_andamento', max_length=20, verbose_name='Status')),
+                ('linhas_processadas', models.PositiveIntegerField(default=0, verbose_name='Linhas processadas')),
+                ('criados', models.PositiveIntegerField(default=0, verbose_name='Registros criados')),
+                ('existentes', models.PositiveIntegerField(default=0, help_text='Linhas cujo registro já estava cadastrado (ignoradas)', verbose_name='Já existentes')),
+                ('total_erros', models.PositiveIntegerField(default=0, verbose_name='Linhas com erro')),
+                ('erros', models.JSONField(blank=True, default=list, help_text='Erros por linha da planilha (limitado aos primeiros)', verbose_name='Erros')),
+                ('concluida_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')),
+                ('iniciado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='importacoes_carteira', to=settings.AUTH_USER_MODEL, verbose_name='Iniciado por')),
+            ],
+            options={
+                'verbose_name': 'Importação de Carteira',
+                'verbose_name_plural': 'Importações de Carteira',
+                'db_table': 'core_importacao_carteira',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Numeração de contratos por SequenceCounter (sem sondar numero_contrato)
+
+from django.db import migrations
+
+
+def _sequencias(numero):
+    """
+    ``(base, sequência)`` possíveis de um numero_contrato existente
+    (base = 1, base-1 = 2...). O código do imóvel pode conter '-', então
+    todas as leituras são consideradas: semear um contador acima do
+    necessário só pula números, nunca repete.
+    """
+    candidatos = [(numero, 1)]
+    partes = numero.split('-')
+    for corte in range(1, len(partes)):
+        base, sufixo = '-'.join(partes[:corte]), '-'.join(partes[corte:])
+        if sufixo.isdigit():
+            candidatos.append((base, int(sufixo) + 1))
+    return [
+        (base, sequencia) for base, sequencia in candidatos
+        if 13 <= len(base) <= 17 and base[:12].isdigit()
+    ]
+
+
+def semear_contadores(apps, schema_editor):
+    """Contador 'CT' + base no maior número já usado de cada base."""
+    Locacao = apps.get_model('core', 'Locacao')
+    SequenceCounter = apps.get_model('core', 'SequenceCounter')
+
+    maiores = {}
+    for numero in Locacao.objects.values_list('numero_contrato', flat=True).iterator():
+        for base, sequencia in _sequencias(numero or ''):
+            prefixo = f'CT{base}'
+            maiores[prefixo] = max(maiores.get(prefixo, 0), sequencia)
+    if not maiores:
+        return
+
+    existentes = SequenceCounter.objects.in_bulk(list(maiores), field_name='prefix')
+    novos = []
+    for prefixo, valor in maiores.items():
+        contador = existentes.get(prefixo)
+        if contador is None:
+            novos.append(SequenceCounter(prefix=prefixo, current_value=valor))
+        elif contador.current_value < valor:
+            contador.current_value = valor
+            contador.save(update_fields=['current_value'])
+    SequenceCounter.objects.bulk_create(novos, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_importacao_carteira'),
+    ]
+
+    operations = [
+        migrations.RunPython(semear_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,143 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:45
+# Colunas de busca normalizadas (core/utils/busca.py) e índices de trigramas
+
+import logging
+
+from django.db import migrations, models, transaction
+
+from core.utils.busca import somente_digitos, texto_busca
+
+logger = logging.getLogger(__name__)
+
+LOTE = 1000
+
+# Colunas atendidas por LIKE '%termo%' (índice GIN de trigramas no PostgreSQL)
+TABELAS_TRIGRAMA = ('core_locador', 'core_locatario', 'core_imovel', 'core_locacao', 'core_comanda')
+
+
+def _gravar(modelo, campos, linhas):
+    """``linhas``: (pk, {campo: valor}); grava em lotes com bulk_update."""
+    lote = []
+    for pk, valores in linhas:
+        lote.append(modelo(pk=pk, **valores))
+        if len(lote) >= LOTE:
+            modelo.objects.bulk_update(lote, campos)
+            lote = []
+    if lote:
+        modelo.objects.bulk_update(lote, campos)
+
+
+def preencher_busca(apps, schema_editor):
+    """Mesmo texto de core/services/indice_busca.py, com os modelos históricos."""
+    Locador = apps.get_model('core', 'Locador')
+    Locatario = apps.get_model('core', 'Locatario')
+    Imovel = apps.get_model('core', 'Imovel')
+    Locacao = apps.get_model('core', 'Locacao')
+    Comanda = apps.get_model('core', 'Comanda')
+
+    def pessoas(modelo, *extras):
+        colunas = ('pk', 'nome_razao_social', 'cpf_cnpj', 'email', 'telefone', *extras)
+        for linha in modelo.objects.values(*colunas).iterator(chunk_size=LOTE):
+            yield linha['pk'], {
+                'documento_digitos': somente_digitos(linha['cpf_cnpj']),
+                'busca': texto_busca(
+                    linha['nome_razao_social'], *(linha[extra] for extra in extras),
+                    linha['email'], somente_digitos(linha['telefone']),
+                ),
+            }
+
+    _gravar(Locador, ['busca', 'documento_digitos'], pessoas(Locador, 'representante'))
+    _gravar(Locatario, ['busca', 'documento_digitos'], pessoas(Locatario, 'rg', 'empresa_trabalho'))
+
+    _gravar(Imovel, ['busca'], (
+        (pk, {'busca': texto_busca(*partes)})
+        for pk, *partes in Imovel.objects.values_list(
+            'pk', 'codigo_imovel', 'endereco', 'numero', 'bairro', 'cidade'
+        ).iterator(chunk_size=LOTE)
+    ))
+    _gravar(Locacao, ['busca'], (
+        (pk, {'busca': texto_busca(numero, nome, somente_digitos(documento), imovel)})
+        for pk, numero, nome, documento, imovel in Locacao.objects.values_list(
+            'pk', 'numero_contrato', 'locatario__nome_razao_social', 'locatario__cpf_cnpj', 'imovel__busca'
+        ).iterator(chunk_size=LOTE)
+    ))
+    _gravar(Comanda, ['busca'], (
+        (pk, {'busca': texto_busca(numero, nosso_numero, locacao)})
+        for pk, numero, nosso_numero, locacao in Comanda.objects.values_list(
+            'pk', 'numero_comanda', 'nosso_numero', 'locacao__busca'
+        ).iterator(chunk_size=LOTE)
+    ))
+
+
+def criar_indices_trigrama(apps, schema_editor):
+    """
+    PostgreSQL: pg_trgm + GIN nas colunas ``busca``. Sem permissão para a
+    extensão (ou outro banco) a busca continua correta, com os índices
+    B-tree de prefixo (documento_digitos, números) e varredura no texto.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for tabela in TABELAS_TRIGRAMA:
+                schema_editor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {tabela}_busca_trgm '
+                    f'ON {tabela} USING gin (busca gin_trgm_ops)'
+                )
+    except Exception as e:
+        logger.warning(f"⚠️ Índices de trigramas não criados (busca sem pg_trgm): {e}")
+
+
+def remover_indices_trigrama(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for tabela in TABELAS_TRIGRAMA:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {tabela}_busca_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_contadores_numero_contrato'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comanda',
+            name='busca',
+            field=models.TextField(blank=True, editable=False, help_text='Comanda, nosso número e texto de busca da locação', verbose_name='Texto de Busca'),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='busca',
+            field=models.TextField(blank=True, editable=False, help_text='Código e endereço sem acentos, em minúsculas', verbose_name='Texto de Busca'),
+        ),
+        migrations.AddField(
+            model_name='locacao',
+            name='busca',
+            field=models.TextField(blank=True, editable=False, help_text='Contrato, locatário (nome e CPF/CNPJ) e imóvel normalizados', verbose_name='Texto de Busca'),
+        ),
+        migrations.AddField(
+            model_name='locador',
+            name='busca',
+            field=models.TextField(blank=True, editable=False, help_text='Nome, representante e contatos sem acentos, em minúsculas', verbose_name='Texto de Busca'),
+        ),
+        migrations.AddField(
+            model_name='locador',
+            name='documento_digitos',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='CPF/CNPJ só com dígitos (busca por prefixo)', max_length=14, verbose_name='Documento (dígitos)'),
+        ),
+        migrations.AddField(
+            model_name='locatario',
+            name='busca',
+            field=models.TextField(blank=True, editable=False, help_text='Nome, RG, empresa e contatos sem acentos, em minúsculas', verbose_name='Texto de Busca'),
+        ),
+        migrations.AddField(
+            model_name='locatario',
+            name='documento_digitos',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='CPF/CNPJ só com dígitos (busca por prefixo)', max_length=14, verbose_name='Documento (dígitos)'),
+        ),
+        migrations.RunPython(preencher_busca, migrations.RunPython.noop),
+        migrations.RunPython(criar_indices_trigrama, remover_indices_trigrama),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_indice_busca'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lancamentoextrato',
+            index=models.Index(fields=['data', 'created_at', 'id'], name='lancamento_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lognotificacao',
+            index=models.Index(fields=['enviado_em', 'id'], name='lognotificacao_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagamento',
+            index=models.Index(fields=['data_pagamento', 'created_at', 'id'], name='pagamento_lista_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_indices_listas_admin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectionphoto',
+            name='processamento_iniciado_em',
+            field=models.DateTimeField(blank=True, help_text='Quando a foto foi marcada como processando (detecta processamento travado)', null=True, verbose_name='Processamento Iniciado Em'),
+        ),
+    ]
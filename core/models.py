@@ -5,7 +5,8 @@ from typing import Optional
 from datetime import date, timedelta
 
 from django.db import models, transaction, IntegrityError
-from django.db.models import F
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Greatest, Rank
 from django.contrib.auth.models import AbstractUser
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
@@ -246,6 +247,23 @@ class Locador(BaseModel):
         help_text=_('Observações gerais sobre o locador')
     )
     
+    # Busca normalizada (core/utils/busca.py, preenchida ao salvar)
+    busca = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name=_('Texto de Busca'),
+        help_text=_('Nome, representante e contatos sem acentos, em minúsculas')
+    )
+    
+    documento_digitos = models.CharField(
+        max_length=14,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name=_('Documento (dígitos)'),
+        help_text=_('CPF/CNPJ só com dígitos (busca por prefixo)')
+    )
+    
     def __str__(self) -> str:
         return f"{self.nome_razao_social} ({self.cpf_cnpj})"
     
@@ -253,12 +271,69 @@ class Locador(BaseModel):
         verbose_name = _('Locador')
         verbose_name_plural = _('Locadores')
         db_table = 'core_locador'
+        indexes = [
+            # Sincronização incremental (/api/sync/)
+            models.Index(fields=['updated_at', 'id'], name='locador_sync_idx'),
+        ]
 
 
 # ============================================================================
 # IMOVEL MODEL
 # ============================================================================
 
+class ImovelQuerySet(models.QuerySet):
+
+    def com_performance(self, comandas=None):
+        """
+        Anota a performance financeira de cada imóvel em UMA consulta:
+
+        - previsto: soma de valor_total das ``comandas`` do imóvel
+        - realizado: pagamentos confirmados dessas comandas
+        - taxa: realizado / previsto * 100 (0 sem previsto)
+        - ranking: posição por taxa (e realizado) entre TODOS os imóveis
+          do queryset, calculada em SQL (window function)
+
+        ``comandas`` é o queryset de Comanda que entra no cálculo
+        (período, status...); padrão: todas as comandas ativas.
+        """
+        if comandas is None:
+            comandas = Comanda.objects.filter(is_active=True)
+
+        previsto = comandas.filter(
+            locacao__imovel=OuterRef('pk')
+        ).order_by().values('locacao__imovel').annotate(
+            total=Sum(expressao_valor_total())
+        ).values('total')
+
+        realizado = Pagamento.objects.filter(
+            comanda__locacao__imovel=OuterRef('pk'),
+            comanda__in=comandas.order_by().values('pk'),
+            status=StatusPagamento.CONFIRMADO,
+        ).order_by().values('comanda__locacao__imovel').annotate(
+            total=Sum('valor_pago')
+        ).values('total')
+
+        zero = models.Value(Decimal('0.00'))
+        queryset = self.annotate(
+            previsto=Coalesce(Subquery(previsto, output_field=VALOR_DECIMAL), zero, output_field=VALOR_DECIMAL),
+            realizado=Coalesce(Subquery(realizado, output_field=VALOR_DECIMAL), zero, output_field=VALOR_DECIMAL),
+        ).annotate(
+            taxa=models.Case(
+                models.When(previsto__gt=0, then=(
+                    Cast('realizado', models.FloatField()) * 100.0 / Cast('previsto', models.FloatField())
+                )),
+                default=models.Value(0.0),
+                output_field=models.FloatField(),
+            ),
+        )
+        return queryset.annotate(
+            ranking=models.Window(
+                expression=Rank(),
+                order_by=[F('taxa').desc(), F('realizado').desc()],
+            ),
+        )
+
+
 class Imovel(BaseModel):
     """Property model."""
     
@@ -409,6 +484,16 @@ class Imovel(BaseModel):
         help_text=_('Descrição detalhada do imóvel')
     )
     
+    # Busca normalizada (core/utils/busca.py, preenchida ao salvar)
+    busca = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name=_('Texto de Busca'),
+        help_text=_('Código e endereço sem acentos, em minúsculas')
+    )
+    
+    objects = ImovelQuerySet.as_manager()
+    
     @property
     def endereco_completo(self) -> str:
         return f"{self.endereco}, {self.numero} - {self.bairro}, {self.cidade}/{self.estado}"
@@ -424,6 +509,10 @@ class Imovel(BaseModel):
         verbose_name = _('Imóvel')
         verbose_name_plural = _('Imóveis')
         db_table = 'core_imovel'
+        indexes = [
+            # Sincronização incremental (/api/sync/)
+            models.Index(fields=['updated_at', 'id'], name='imovel_sync_idx'),
+        ]
 
 # ===========================================================================
 # MODELO FIADOR (NOVO - Adicionar ANTES do modelo Locatario)
@@ -719,6 +808,23 @@ class Locatario(BaseModel):
         help_text=_('Fiador/Garantidor do locatário (se houver)')
     )
     
+    # Busca normalizada (core/utils/busca.py, preenchida ao salvar)
+    busca = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name=_('Texto de Busca'),
+        help_text=_('Nome, RG, empresa e contatos sem acentos, em minúsculas')
+    )
+    
+    documento_digitos = models.CharField(
+        max_length=14,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name=_('Documento (dígitos)'),
+        help_text=_('CPF/CNPJ só com dígitos (busca por prefixo)')
+    )
+    
     def __str__(self) -> str:
         return f"{self.nome_razao_social} ({self.cpf_cnpj})"
     
@@ -726,6 +832,10 @@ class Locatario(BaseModel):
         verbose_name = _('Locatário')
         verbose_name_plural = _('Locatários')
         db_table = 'core_locatario'
+        indexes = [
+            # Sincronização incremental (/api/sync/)
+            models.Index(fields=['updated_at', 'id'], name='locatario_sync_idx'),
+        ]
 
 # ============================================================================
 # LOCACAO MODEL
@@ -742,33 +852,58 @@ class Locacao(BaseModel):
             self.caucao_valor_total = self.calcular_valor_caucao()
         
         if not self.numero_contrato:
-            from django.utils import timezone
-            import re
-            
-            hoje = timezone.now()
-            ano_mes = f"{hoje.year}{hoje.month:02d}"
-            
-            # Extrair últimos 6 dígitos do CPF/CNPJ do locatário
-            cpf_cnpj = re.sub(r'\D', '', self.locatario.cpf_cnpj)  # Remove não-dígitos
-            cpf_6dig = cpf_cnpj[-6:] if len(cpf_cnpj) >= 6 else cpf_cnpj.zfill(6)
-            
-            # Pegar primeiros 4 caracteres do código do imóvel
-            codigo_imovel = self.imovel.codigo_imovel[:5].upper() if self.imovel.codigo_imovel else "XXXX"
-            
-            # Formato: YYYYMM-XXXXXX-XXXX (ex: 202511123456-A101)
-            numero_base = f"{ano_mes}{cpf_6dig}{codigo_imovel}"
-            
-            # Verificar se já existe (caso improvável de colisão)
-            numero_final = numero_base
-            contador = 1
-            while Locacao.objects.filter(numero_contrato=numero_final).exists():
-                numero_final = f"{numero_base}-{contador}"
-                contador += 1
-            
-            self.numero_contrato = numero_final
+            Locacao.alocar_numeros_contrato([self])
         
         super().save(*args, **kwargs)
     
+    # Prefixo do SequenceCounter de cada base de número de contrato
+    PREFIXO_CONTADOR_CONTRATO = 'CT'
+    
+    @staticmethod
+    def numero_contrato_base(cpf_cnpj, codigo_imovel, quando=None):
+        """
+        Base do número do contrato:
+        YYYYMM + últimos 6 dígitos do CPF/CNPJ + 5 primeiros do código do imóvel
+        (ex: 202511123456A101).
+        """
+        import re
+        
+        quando = quando or timezone.now()
+        digitos = re.sub(r'\D', '', cpf_cnpj or '')
+        cpf_6dig = digitos[-6:] if len(digitos) >= 6 else digitos.zfill(6)
+        codigo = codigo_imovel[:5].upper() if codigo_imovel else "XXXX"
+        return f"{quando.year}{quando.month:02d}{cpf_6dig}{codigo}"
+    
+    @classmethod
+    def alocar_numeros_contrato(cls, locacoes, quando=None):
+        """
+        Preenche numero_contrato das ``locacoes`` que ainda não têm número.
+        
+        Cada base tem um SequenceCounter ('CT' + base): a 1ª locação recebe a
+        base, as seguintes base-1, base-2... Todas as bases do lote são
+        reservadas de uma vez (SequenceCounter.reservar_blocos), sem consultar
+        numero_contrato: o unique do campo continua sendo a garantia final.
+        Usado pelo save(), pela importação em massa e pela renovação.
+        """
+        from collections import Counter
+        
+        sem_numero = [locacao for locacao in locacoes if not locacao.numero_contrato]
+        if not sem_numero:
+            return
+        quando = quando or timezone.now()
+        bases = [
+            cls.numero_contrato_base(locacao.locatario.cpf_cnpj, locacao.imovel.codigo_imovel, quando)
+            for locacao in sem_numero
+        ]
+        proximos = SequenceCounter.reservar_blocos(
+            Counter(f"{cls.PREFIXO_CONTADOR_CONTRATO}{base}" for base in bases)
+        )
+        for locacao, base in zip(sem_numero, bases):
+            prefixo = f"{cls.PREFIXO_CONTADOR_CONTRATO}{base}"
+            sequencia = proximos[prefixo]
+            proximos[prefixo] += 1
+            locacao.numero_contrato = base if sequencia == 1 else f"{base}-{sequencia - 1}"
+    
     class StatusLocacao(models.TextChoices):
         ATIVA = 'ACTIVE', _('Ativa')
         INATIVA = 'INACTIVE', _('Inativa')
@@ -892,6 +1027,14 @@ class Locacao(BaseModel):
         help_text=_('Nome da seguradora')
     )
     
+    # Busca normalizada (core/utils/busca.py, preenchida ao salvar)
+    busca = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name=_('Texto de Busca'),
+        help_text=_('Contrato, locatário (nome e CPF/CNPJ) e imóvel normalizados')
+    )
+    
     def __str__(self) -> str:
         return f"Contrato {self.numero_contrato} - {self.locatario.nome_razao_social}"
     
@@ -999,6 +1142,12 @@ class Locacao(BaseModel):
         verbose_name = _('Locação')
         verbose_name_plural = _('Locações')
         db_table = 'core_locacao'
+        indexes = [
+            # Paginação por cursor da API (ordem -created_at, -id)
+            models.Index(fields=['created_at', 'id'], name='locacao_criado_idx'),
+            # Sincronização incremental (/api/sync/)
+            models.Index(fields=['updated_at', 'id'], name='locacao_sync_idx'),
+        ]
 
 
 # ============================================================================
@@ -1023,6 +1172,81 @@ class StatusPagamento(models.TextChoices):
     ESTORNADO = 'estornado', _('Estornado')
 
 
+# ============================================================================
+# COMANDA - EXPRESSÕES SQL DOS VALORES CALCULADOS
+# ============================================================================
+# Equivalentes em SQL das properties valor_aluguel / valor_total /
+# valor_pendente, para relatórios e exportações sem consultas por linha.
+# ``prefixo`` permite usar as expressões a partir de outro modelo
+# (ex.: 'comandas__' em Locacao, 'locacao__comandas__' em Imovel).
+
+VALOR_DECIMAL = models.DecimalField(max_digits=12, decimal_places=2)
+
+
+def expressao_valor_aluguel(prefixo=''):
+    """Aluguel atual do contrato se PENDENTE/VENCIDA, senão o histórico."""
+    return models.Case(
+        models.When(
+            **{f'{prefixo}status__in': ['PENDING', 'OVERDUE']},
+            then=F(f'{prefixo}locacao__valor_aluguel'),
+        ),
+        default=F(f'{prefixo}_valor_aluguel_historico'),
+        output_field=VALOR_DECIMAL,
+    )
+
+
+def expressao_valor_total(prefixo=''):
+    """Mesma regra de Comanda.valor_total (créditos e desconto subtraem, mínimo 0)."""
+    soma = models.ExpressionWrapper(
+        expressao_valor_aluguel(prefixo)
+        + F(f'{prefixo}valor_condominio')
+        + F(f'{prefixo}valor_iptu')
+        + F(f'{prefixo}valor_administracao')
+        + F(f'{prefixo}outros_debitos')
+        + F(f'{prefixo}valor_multa')
+        + F(f'{prefixo}valor_juros')
+        - F(f'{prefixo}outros_creditos')
+        - F(f'{prefixo}desconto'),
+        output_field=VALOR_DECIMAL,
+    )
+    return Greatest(soma, models.Value(Decimal('0.00')), output_field=VALOR_DECIMAL)
+
+
+class ComandaQuerySet(models.QuerySet):
+    
+    def com_totais(self):
+        """
+        Anota os valores calculados da comanda em SQL:
+        
+        - valor_aluguel_atual
+        - valor_total_calculado
+        - total_pago_calculado (pagamentos confirmados)
+        - valor_pendente_calculado (nunca negativo)
+        """
+        total_pago = Pagamento.objects.filter(
+            comanda=OuterRef('pk'),
+            status=StatusPagamento.CONFIRMADO,
+        ).order_by().values('comanda').annotate(
+            total=Sum('valor_pago')
+        ).values('total')
+        
+        return self.annotate(
+            valor_aluguel_atual=expressao_valor_aluguel(),
+            valor_total_calculado=expressao_valor_total(),
+            total_pago_calculado=Coalesce(
+                Subquery(total_pago, output_field=VALOR_DECIMAL),
+                models.Value(Decimal('0.00')),
+                output_field=VALOR_DECIMAL,
+            ),
+        ).annotate(
+            valor_pendente_calculado=Greatest(
+                F('valor_total_calculado') - F('total_pago_calculado'),
+                models.Value(Decimal('0.00')),
+                output_field=VALOR_DECIMAL,
+            ),
+        )
+
+
 # ============================================================================
 # COMANDA MODEL (Sistema Financeiro)
 # ============================================================================
@@ -1037,6 +1261,8 @@ class Comanda(BaseModel):
         PARCIALMENTE_PAGA = 'PARTIAL', _('Parcialmente Paga')
         CANCELADA = 'CANCELLED', _('Cancelada')
     
+    objects = ComandaQuerySet.as_manager()
+    
     locacao = models.ForeignKey(
         Locacao,
         on_delete=models.PROTECT,
@@ -1052,6 +1278,14 @@ class Comanda(BaseModel):
         help_text=_('Número único da comanda')
     )
     
+    nosso_numero = models.CharField(
+        max_length=20,
+        blank=True,
+        db_index=True,
+        verbose_name=_('Nosso Número'),
+        help_text=_('Identificação do boleto no banco (conciliação do retorno CNAB)')
+    )
+    
     mes_referencia = models.DateField(
         verbose_name=_('Mês de Referência'),
         help_text=_('Primeiro dia do mês de referência (formato YYYY-MM-01)')
@@ -1272,26 +1506,32 @@ class Comanda(BaseModel):
     def valor_pendente(self) -> Decimal:
         """Calculate pending amount."""
         # Calcular total pago confirmado
-        total_pago = self.pagamentos.filter(
-            status='confirmado'
-        ).aggregate(total=Sum('valor_pago'))['total'] or Decimal('0.00')
+        total_pago = self._total_pago_confirmado()
         
         # Pendente = Valor total - Total pago
         pendente = self.valor_total - total_pago
         
         return max(pendente, Decimal('0.00'))
     
+    def _total_pago_confirmado(self) -> Decimal:
+        """
+        Soma dos pagamentos confirmados. Em querysets com ``com_totais()``
+        (ComandaAdmin.get_queryset) usa ``total_pago_calculado``, sem SUM por linha.
+        """
+        anotado = getattr(self, 'total_pago_calculado', None)
+        if anotado is not None:
+            return anotado
+        return self.pagamentos.filter(
+            status='confirmado'
+        ).aggregate(total=Sum('valor_pago'))['total'] or Decimal('0.00')
+    
     def get_saldo(self):
         """
         Calcula saldo: Total pago - Valor da comanda
         Positivo = a favor do cliente (pagou a mais)
         Negativo = a favor do locatário (deve)
         """
-        total_pago = self.pagamentos.filter(
-            status="confirmado"
-        ).aggregate(
-            total=models.Sum('valor_pago')
-        )['total'] or Decimal('0.00')
+        total_pago = self._total_pago_confirmado()
         
         # Saldo = Total pago - Valor da comanda
         # Usa valor_total que já calcula corretamente
@@ -1405,17 +1645,15 @@ class Comanda(BaseModel):
         # if abs(self.valor_pago - self.valor_total) > Decimal('0.01'):  # Allow small rounding differences
         # raise ValidationError(_('Valor pago não pode ser maior que o valor total.'))
     
+    # Prefixo do SequenceCounter da numeração mensal (CMD + YYYYMM)
+    PREFIXO_CONTADOR = 'CMD'
+    
     def save(self, *args, **kwargs):
         """
-        Save override para Comanda: gera numero_comanda no formato YYYYMM-XXXX.
-        Usa retry atômico para evitar colisões UNIQUE.
+        Save override para Comanda: gera numero_comanda no formato YYYYMM-XXXX
+        com o contador do mês (Comanda.alocar_numeros): um incremento
+        atômico, sem varrer as comandas do mês nem repetir em colisão.
         """
-        from django.db import transaction, IntegrityError
-        
-        # Se não tiver numero_comanda, delega ao save padrão
-        if not hasattr(self, 'numero_comanda'):
-            return super(type(self), self).save(*args, **kwargs)
-        
         # Se já existe numero_comanda (edição), salva normalmente
         if self.numero_comanda:
             # ✅ GARANTIR: Campo preenchido mesmo em edições antigas
@@ -1427,59 +1665,71 @@ class Comanda(BaseModel):
             
             return super().save(*args, **kwargs)
         
-        # mes_referencia é DateField -> extrair ano e mês
-        if hasattr(self, 'mes_referencia') and getattr(self.mes_referencia, 'month', None):
-            when_year = int(self.mes_referencia.year)
-            when_month = int(self.mes_referencia.month)
-        else:
-            # Fallback
-            when_year = int(self.ano_referencia)
-            when_month = int(self.mes_referencia)
+        Comanda.alocar_numeros([self])
         
-        prefix = f"{when_year}{when_month:02d}"
-        
-        MAX_ATTEMPTS = 8
-        last_exc = None
+        # ✅ CORREÇÃO: Preencher _valor_aluguel_historico em novas comandas
+        # (o pk UUID já vem preenchido: _state.adding é que indica INSERT)
+        if self._state.adding and self._valor_aluguel_historico is None:
+            if self.locacao:
+                self._valor_aluguel_historico = self.locacao.valor_aluguel
+            else:
+                self._valor_aluguel_historico = Decimal('0.00')
         
-        for attempt in range(MAX_ATTEMPTS):
-            try:
-                with transaction.atomic():
-                    last = (Comanda.objects
-                           .filter(numero_comanda__startswith=prefix)
-                           .order_by('-numero_comanda')
-                           .first())
-                    
-                    if last and getattr(last, 'numero_comanda', None):
-                        try:
-                            last_seq = int(last.numero_comanda.split('-')[-1])
-                            new_seq = last_seq + 1
-                        except (IndexError, ValueError):
-                            new_seq = 1
-                    else:
-                        new_seq = 1
-                    
-                    self.numero_comanda = f"{prefix}-{new_seq:04d}"
-                    
-                    # ✅ CORREÇÃO: Preencher _valor_aluguel_historico em novas comandas
-                    if not self.pk and self._valor_aluguel_historico is None:
-                        if self.locacao:
-                            self._valor_aluguel_historico = self.locacao.valor_aluguel
-                        else:
-                            self._valor_aluguel_historico = Decimal('0.00')
-                    
-                    super().save(*args, **kwargs)
-                
-                return
-                
-            except IntegrityError as exc:
-                last_exc = exc
-                self.numero_comanda = None
-                continue
+        super().save(*args, **kwargs)
+    
+    @staticmethod
+    def prefixo_numero(mes_referencia, ano_referencia=None):
+        """'YYYYMM' do número da comanda (mes_referencia é DateField)."""
+        if getattr(mes_referencia, 'month', None):
+            return f"{int(mes_referencia.year)}{int(mes_referencia.month):02d}"
+        # Fallback
+        return f"{int(ano_referencia)}{int(mes_referencia):02d}"
+    
+    @classmethod
+    def alocar_numeros(cls, comandas):
+        """
+        Preenche numero_comanda das ``comandas`` sem número, reservando de uma
+        vez um bloco por mês no SequenceCounter ('CMD' + YYYYMM). Usado pelo
+        save() e por quem cria comandas em lote (antes do bulk_create).
+        """
+        from collections import Counter
         
-        raise IntegrityError(
-            f"Não foi possível gerar numero_comanda único após {MAX_ATTEMPTS} tentativas"
-        ) from last_exc
+        sem_numero = [comanda for comanda in comandas if not comanda.numero_comanda]
+        if not sem_numero:
+            return
+        meses = [cls.prefixo_numero(comanda.mes_referencia, comanda.ano_referencia) for comanda in sem_numero]
+        proximos = SequenceCounter.reservar_blocos(
+            Counter(f"{cls.PREFIXO_CONTADOR}{mes}" for mes in meses),
+            iniciais=cls._ultimos_numeros,
+        )
+        for comanda, mes in zip(sem_numero, meses):
+            prefixo = f"{cls.PREFIXO_CONTADOR}{mes}"
+            comanda.numero_comanda = f"{mes}-{proximos[prefixo]:04d}"
+            proximos[prefixo] += 1
     
+    @classmethod
+    def _ultimos_numeros(cls, prefixos):
+        """
+        Maior sequência já usada em cada mês, para o contador que está sendo
+        criado (comandas anteriores ao contador ou com número informado).
+        Roda uma vez por mês, na criação do contador.
+        """
+        ultimos = {}
+        for prefixo in prefixos:
+            mes = prefixo[len(cls.PREFIXO_CONTADOR):]
+            numeros = cls.objects.filter(numero_comanda__startswith=f"{mes}-").values_list('numero_comanda', flat=True)
+            sequencias = [int(numero.split('-')[-1]) for numero in numeros if numero.split('-')[-1].isdigit()]
+            ultimos[prefixo] = max(sequencias, default=0)
+        return ultimos
+    
+
+    # Busca normalizada (core/utils/busca.py, preenchida ao salvar)
+    busca = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name=_('Texto de Busca'),
+        help_text=_('Comanda, nosso número e texto de busca da locação')
+    )
 
     # ═══════════════════════════════════════════════════════════
     # TOKENS PÚBLICOS (DEV_21.6)
@@ -1501,6 +1751,16 @@ class Comanda(BaseModel):
         help_text='Data/hora de expiração do token'
     )
 
+    class Meta(BaseModel.Meta):
+        indexes = [
+            # Paginação por cursor da API (ordem -created_at, -id)
+            models.Index(fields=['created_at', 'id'], name='comanda_criado_idx'),
+            # Inadimplência / vencidas por status
+            models.Index(fields=['status', 'data_vencimento'], name='comanda_status_venc_idx'),
+            # Sincronização incremental (/api/sync/)
+            models.Index(fields=['updated_at', 'id'], name='comanda_sync_idx'),
+        ]
+    
     def __str__(self) -> str:
         return f"Comanda {self.numero_comanda} - {self.mes_referencia:02d}/{self.ano_referencia}"
         
@@ -1595,6 +1855,14 @@ class Pagamento(BaseModel):
         verbose_name=_('Observações')
     )
     
+    referencia_externa = models.CharField(
+        max_length=100,
+        blank=True,
+        db_index=True,
+        verbose_name=_('Referência Externa'),
+        help_text=_('Origem do registro importado (retorno CNAB, extrato); evita importar duas vezes')
+    )
+    
     def _gerar_numero_automatico(self):
         """Generate sequential payment number."""
         from django.utils import timezone
@@ -1653,16 +1921,24 @@ class Pagamento(BaseModel):
         return f"{self.numero_pagamento} - {self.forma_pagamento} - R$ {self.valor_pago}"
     
 
+    @staticmethod
+    def prefixo_numero():
+        """Prefixo mensal da numeração (PAGYYYYMM)."""
+        hoje = timezone.now()
+        return f"PAG{hoje.year}{hoje.month:02d}"
+    
+    @staticmethod
+    def formatar_numero(prefix, seq):
+        return f"{prefix}-{seq:04d}"
+    
     def save(self, *args, **kwargs):
         """Gera numero_pagamento sequencial único"""
         if not self.numero_pagamento:
-            from django.utils import timezone
-            hoje = timezone.now()
-            prefix = f"PAG{hoje.year}{hoje.month:02d}"
+            prefix = self.prefixo_numero()
             
             # Usar SequenceCounter para garantir unicidade
             seq = SequenceCounter.get_next(prefix)
-            self.numero_pagamento = f"{prefix}-{seq:04d}"
+            self.numero_pagamento = self.formatar_numero(prefix, seq)
         
         super().save(*args, **kwargs)
 
@@ -1671,6 +1947,12 @@ class Pagamento(BaseModel):
         verbose_name_plural = _('Pagamentos')
         ordering = ['-data_pagamento', '-created_at']
         db_table = 'core_pagamento'
+        indexes = [
+            # Sincronização incremental (/api/sync/)
+            models.Index(fields=['updated_at', 'id'], name='pagamento_sync_idx'),
+            # Paginação keyset do admin (core/utils/admin_listas.py)
+            models.Index(fields=['data_pagamento', 'created_at', 'id'], name='pagamento_lista_idx'),
+        ]
 
 
 # Adicionar ao modelo Imovel (depois dos campos existentes)
@@ -1908,6 +2190,10 @@ class LogNotificacao(BaseModel):
         verbose_name = _('Log de Notificação')
         verbose_name_plural = _('Logs de Notificações')
         ordering = ['-enviado_em']
+        indexes = [
+            # Paginação keyset do admin (core/utils/admin_listas.py)
+            models.Index(fields=['enviado_em', 'id'], name='lognotificacao_lista_idx'),
+        ]
 
 
 class SequenceCounter(models.Model):
@@ -1926,6 +2212,14 @@ class SequenceCounter(models.Model):
         Retorna próximo número da sequência de forma atômica e robusta.
         Usa select_for_update + F() para incremento atômico no DB.
         """
+        return cls.reservar_bloco(prefix, 1)
+    
+    @classmethod
+    def reservar_bloco(cls, prefix, quantidade):
+        """
+        Reserva ``quantidade`` números consecutivos em um único incremento e
+        retorna o PRIMEIRO (o bloco é ``primeiro .. primeiro + quantidade - 1``).
+        """
         import logging
         logger = logging.getLogger(__name__)
         
@@ -1942,18 +2236,18 @@ class SequenceCounter(models.Model):
                     )
                     
                     # Incrementar usando F() para atomicidade no DB
-                    counter.current_value = F('current_value') + 1
+                    counter.current_value = F('current_value') + quantidade
                     counter.save(update_fields=['current_value'])
                     
                     # Refresh para obter valor real
                     counter.refresh_from_db()
                     
-                    return counter.current_value
+                    return counter.current_value - quantidade + 1
                     
             except IntegrityError as exc:
                 last_exc = exc
                 logger.warning(
-                    f"SequenceCounter.get_next IntegrityError na tentativa {attempt+1} "
+                    f"SequenceCounter.reservar_bloco IntegrityError na tentativa {attempt+1} "
                     f"para '{prefix}': {exc}"
                 )
                 continue
@@ -1962,6 +2256,44 @@ class SequenceCounter(models.Model):
         raise IntegrityError(
             f"Não foi possível obter sequência para '{prefix}' após {MAX_ATTEMPTS} tentativas"
         ) from last_exc
+    
+    @classmethod
+    def reservar_blocos(cls, quantidades, iniciais=None):
+        """
+        Como reservar_bloco, para vários prefixos de uma vez:
+        ``{prefixo: quantidade}`` -> ``{prefixo: primeiro número}``.
+        Cria antes os contadores que faltam e depois trava todos em uma só
+        consulta, em ordem de prefixo (sem deadlock entre lotes
+        concorrentes); os novos valores são gravados em um único UPDATE: o
+        custo não depende do número de prefixos.
+        
+        Contadores que ainda não existem são criados com o valor de
+        ``iniciais(prefixos_faltando)`` (``{prefixo: último número já usado}``),
+        chamado só nessa primeira vez.
+        """
+        if not quantidades:
+            return {}
+        prefixos = sorted(quantidades)
+        with transaction.atomic():
+            existentes = set(cls.objects.filter(prefix__in=prefixos).values_list('prefix', flat=True))
+            faltando = [prefixo for prefixo in prefixos if prefixo not in existentes]
+            if faltando:
+                valores = iniciais(faltando) if iniciais else {}
+                # Criado por um lote concorrente nesse meio-tempo: o conflito é ignorado
+                cls.objects.bulk_create(
+                    [cls(prefix=prefixo, current_value=valores.get(prefixo, 0)) for prefixo in faltando],
+                    ignore_conflicts=True,
+                )
+            contadores = {
+                contador.prefix: contador
+                for contador in cls.objects.select_for_update().filter(prefix__in=prefixos).order_by('prefix')
+            }
+            primeiros = {}
+            for prefixo, contador in contadores.items():
+                primeiros[prefixo] = contador.current_value + 1
+                contador.current_value += quantidades[prefixo]
+            cls.objects.bulk_update(list(contadores.values()), ['current_value'])
+        return primeiros
 # Importa ComandaStatus criado em core/comanda_status.py para registrar o model no app.
 try:
     from .comanda_status import ComandaStatus  # noqa: F401
@@ -1970,49 +2302,11 @@ except Exception:
     pass
     
 # ============================================================
-# SIGNALS - Atualização Automática de Status da Comanda
+# STATUS DA COMANDA
 # ============================================================
-
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-from django.db.models import Sum
-from core.utils.token_publico import gerar_dados_token
-
-@receiver([post_save, post_delete], sender=Pagamento)
-def atualizar_status_comanda(sender, instance, **kwargs):
-    """
-    Atualiza automaticamente o status e data_pagamento da Comanda
-    quando um Pagamento é criado, atualizado ou deletado.
-    """
-    comanda = instance.comanda
-    
-    # Calcular total pago confirmado
-    total_pago = comanda.pagamentos.filter(
-        status='confirmado'
-    ).aggregate(total=Sum('valor_pago'))['total'] or Decimal('0.00')
-    
-    # Calcular valor total da comanda
-    valor_comanda = comanda.valor_total
-    
-    
-    # Atualizar status baseado no total pago
-    if total_pago >= valor_comanda and valor_comanda > 0:
-        comanda.status = Comanda.StatusComanda.PAGA
-        # Atualizar data_pagamento com data do último pagamento confirmado
-        ultimo_pag = comanda.pagamentos.filter(
-            status='confirmado'
-        ).order_by('-data_pagamento').first()
-        if ultimo_pag:
-            comanda.data_pagamento = ultimo_pag.data_pagamento
-    elif total_pago > 0:
-        comanda.status = Comanda.StatusComanda.PARCIALMENTE_PAGA
-        comanda.data_pagamento = None
-    else:
-        comanda.status = Comanda.StatusComanda.PENDENTE
-        comanda.data_pagamento = None
-    
-    # Salvar alterações
-    comanda.save(update_fields=['status', 'data_pagamento', 'updated_at'])
+# Recalculado a partir dos pagamentos em core/services/status_comanda.py,
+# agendado pelos receivers de Pagamento em core/signals.py (um recálculo
+# por comanda por transação).
 
 # ════════════════════════════════════════════════════════════════════════════
 # MODELO DE RENOVAÇÃO DE CONTRATOS - DEV_21
@@ -2322,33 +2616,34 @@ class RenovacaoContrato(BaseModel):
         if self.nova_locacao:
             return self.nova_locacao
         
-        # Criar nova locação baseada na proposta
-        nova_locacao = Locacao.objects.create(
-            imovel=self.locacao_original.imovel,
-            locatario=self.locacao_original.locatario,
-            data_inicio=self.nova_data_inicio,
-            data_fim=self.nova_data_fim,
-            valor_aluguel=self.novo_valor_aluguel,
-            dia_vencimento=self.locacao_original.dia_vencimento,
-            tipo_garantia=self.novo_tipo_garantia,
-            fiador_garantia=self.novo_fiador,
-            caucao_quantidade_meses=self.nova_caucao_meses,
-            seguro_apolice=self.nova_seguro_apolice,
-            status='PENDING',  # Ficará PENDING até data_inicio
-        )
-        
-        # Calcular caução automaticamente se necessário
-        if self.novo_tipo_garantia == 'caucao' and self.nova_caucao_meses:
-            nova_locacao.save()  # Trigger do save() calcula caução
-        
-        # Vincular renovação à nova locação
-        self.nova_locacao = nova_locacao
-        self.status = 'ativa'
-        self.save()
-        
-        # Inativar contrato original
-        self.locacao_original.status = 'INACTIVE'
-        self.locacao_original.save()
+        with transaction.atomic():
+            # Criar nova locação baseada na proposta
+            nova_locacao = Locacao(
+                imovel=self.locacao_original.imovel,
+                locatario=self.locacao_original.locatario,
+                data_inicio=self.nova_data_inicio,
+                data_fim=self.nova_data_fim,
+                valor_aluguel=self.novo_valor_aluguel,
+                dia_vencimento=self.locacao_original.dia_vencimento,
+                tipo_garantia=self.novo_tipo_garantia,
+                fiador_garantia=self.novo_fiador,
+                caucao_quantidade_meses=self.nova_caucao_meses,
+                seguro_apolice=self.nova_seguro_apolice,
+                status='PENDING',  # Ficará PENDING até data_inicio
+            )
+            # Número reservado no contador da base (mesmo locatário e imóvel
+            # no mesmo mês: base-1, base-2...); o save() calcula a caução
+            Locacao.alocar_numeros_contrato([nova_locacao])
+            nova_locacao.save(force_insert=True)
+            
+            # Vincular renovação à nova locação
+            self.nova_locacao = nova_locacao
+            self.status = 'ativa'
+            self.save()
+            
+            # Inativar contrato original
+            self.locacao_original.status = 'INACTIVE'
+            self.locacao_original.save()
         
         return nova_locacao
     
@@ -2547,6 +2842,258 @@ class ContratoDownloadToken(BaseModel):
         deletados = cls.objects.filter(expira_em__lt=limite).delete()
         return deletados[0]
 
+
+# ════════════════════════════════════════════════════════════════
+# MODEL: RelatorioJob (Relatórios do Dashboard em segundo plano)
+# ════════════════════════════════════════════════════════════════
+
+def upload_relatorio_path(instance, filename):
+    """relatorios/dashboard/{YYYY}/{MM}/{filename}"""
+    return f"relatorios/dashboard/{timezone.now():%Y/%m}/{filename}"
+
+
+class RelatorioJob(BaseModel):
+    """
+    Relatório do Dashboard Financeiro solicitado pelo usuário.
+    A requisição apenas cria o job; a renderização (XLSX/PDF) e o envio
+    por email acontecem em segundo plano (core/services/relatorios_dashboard.py).
+    """
+
+    class Formato(models.TextChoices):
+        XLSX = 'xlsx', _('Excel (XLSX)')
+        PDF = 'pdf', _('PDF')
+
+    class Status(models.TextChoices):
+        PENDENTE = 'pendente', _('Pendente')
+        PROCESSANDO = 'processando', _('Processando')
+        CONCLUIDO = 'concluido', _('Concluído')
+        ERRO = 'erro', _('Erro')
+
+    formato = models.CharField(
+        max_length=10,
+        choices=Formato.choices,
+        verbose_name=_('Formato')
+    )
+
+    filtros = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_('Filtros'),
+        help_text=_('Filtros do dashboard no momento da solicitação')
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDENTE,
+        db_index=True,
+        verbose_name=_('Status')
+    )
+
+    solicitado_por = models.ForeignKey(
+        'Usuario',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='relatorios_solicitados',
+        verbose_name=_('Solicitado por')
+    )
+
+    email_destino = models.EmailField(
+        blank=True,
+        verbose_name=_('Enviar para'),
+        help_text=_('Se preenchido, o relatório é enviado por email ao concluir')
+    )
+
+    arquivo = models.FileField(
+        upload_to=upload_relatorio_path,
+        blank=True,
+        verbose_name=_('Arquivo')
+    )
+
+    iniciado_em = models.DateTimeField(null=True, blank=True, verbose_name=_('Iniciado em'))
+    concluido_em = models.DateTimeField(null=True, blank=True, verbose_name=_('Concluído em'))
+
+    erro = models.TextField(blank=True, verbose_name=_('Erro'))
+
+    class Meta:
+        db_table = 'core_relatorio_job'
+        verbose_name = _('Relatório do Dashboard')
+        verbose_name_plural = _('Relatórios do Dashboard')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Relatório {self.get_formato_display()} - {self.created_at:%d/%m/%Y %H:%M} ({self.get_status_display()})"
+
+    @property
+    def concluido(self):
+        return self.status == self.Status.CONCLUIDO and bool(self.arquivo)
+
+    @property
+    def nome_download(self):
+        return f"dashboard_financeiro_{self.created_at:%Y%m%d_%H%M}.{self.formato}"
+
+
+class LancamentoExtrato(BaseModel):
+    """
+    Crédito importado de extrato bancário (OFX/CSV) e o resultado da
+    conciliação com as comandas em aberto (core/services/extrato_bancario.py).
+    Os casos sem correspondência exata ficam em revisão no admin.
+    """
+
+    class Status(models.TextChoices):
+        CONCILIADO = 'conciliado', _('Conciliado')
+        REVISAO = 'revisao', _('Em revisão')
+        SEM_CORRESPONDENCIA = 'sem_correspondencia', _('Sem correspondência')
+        IGNORADO = 'ignorado', _('Ignorado')
+
+    identificador = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name=_('Identificador'),
+        help_text=_('FITID do OFX ou hash da linha do CSV (evita importar duas vezes)')
+    )
+
+    data = models.DateField(verbose_name=_('Data'))
+
+    valor = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_('Valor'))
+
+    descricao = models.CharField(max_length=255, blank=True, verbose_name=_('Descrição'))
+
+    documento_pagador = models.CharField(
+        max_length=14,
+        blank=True,
+        db_index=True,
+        verbose_name=_('CPF/CNPJ do pagador'),
+        help_text=_('Somente dígitos')
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        db_index=True,
+        verbose_name=_('Status')
+    )
+
+    pontuacao = models.PositiveSmallIntegerField(default=0, verbose_name=_('Pontuação'))
+
+    comanda = models.ForeignKey(
+        'Comanda',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='lancamentos_extrato',
+        verbose_name=_('Comanda'),
+        help_text=_('Comanda conciliada (ou escolhida na revisão)')
+    )
+
+    candidatos = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name=_('Candidatos'),
+        help_text=_('Comandas possíveis, da maior para a menor pontuação')
+    )
+
+    pagamento = models.OneToOneField(
+        'Pagamento',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='lancamento_extrato',
+        verbose_name=_('Pagamento')
+    )
+
+    class Meta:
+        db_table = 'core_lancamento_extrato'
+        verbose_name = _('Lançamento de Extrato')
+        verbose_name_plural = _('Lançamentos de Extrato')
+        ordering = ['-data', '-created_at']
+        indexes = [
+            # Paginação keyset do admin (core/utils/admin_listas.py)
+            models.Index(fields=['data', 'created_at', 'id'], name='lancamento_lista_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y} - R$ {self.valor} - {self.descricao[:40]} ({self.get_status_display()})"
+
+
+class ImportacaoCarteira(BaseModel):
+    """
+    Importação em massa de uma planilha (CSV/XLSX) de locadores, imóveis,
+    locatários ou locações (core/services/importacao_carteira.py).
+    ``linhas_processadas`` é o checkpoint: cada lote gravado avança o
+    contador na mesma transação, e uma importação interrompida continua
+    do ponto em que parou ao processar o mesmo arquivo de novo.
+    """
+
+    class Tipo(models.TextChoices):
+        LOCADORES = 'locadores', _('Locadores')
+        IMOVEIS = 'imoveis', _('Imóveis')
+        LOCATARIOS = 'locatarios', _('Locatários')
+        LOCACOES = 'locacoes', _('Locações')
+
+    class Status(models.TextChoices):
+        EM_ANDAMENTO = 'em_andamento', _('Em andamento')
+        CONCLUIDA = 'concluida', _('Concluída')
+
+    tipo = models.CharField(max_length=20, choices=Tipo.choices, verbose_name=_('Tipo'))
+
+    arquivo_nome = models.CharField(max_length=255, blank=True, verbose_name=_('Arquivo'))
+
+    hash_arquivo = models.CharField(
+        max_length=64,
+        db_index=True,
+        verbose_name=_('Hash do arquivo'),
+        help_text=_('SHA-256 do conteúdo; identifica a importação a retomar')
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.EM_ANDAMENTO,
+        db_index=True,
+        verbose_name=_('Status')
+    )
+
+    linhas_processadas = models.PositiveIntegerField(default=0, verbose_name=_('Linhas processadas'))
+
+    criados = models.PositiveIntegerField(default=0, verbose_name=_('Registros criados'))
+
+    existentes = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Já existentes'),
+        help_text=_('Linhas cujo registro já estava cadastrado (ignoradas)')
+    )
+
+    total_erros = models.PositiveIntegerField(default=0, verbose_name=_('Linhas com erro'))
+
+    erros = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name=_('Erros'),
+        help_text=_('Erros por linha da planilha (limitado aos primeiros)')
+    )
+
+    iniciado_por = models.ForeignKey(
+        'Usuario',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='importacoes_carteira',
+        verbose_name=_('Iniciado por')
+    )
+
+    concluida_em = models.DateTimeField(null=True, blank=True, verbose_name=_('Concluída em'))
+
+    class Meta:
+        db_table = 'core_importacao_carteira'
+        verbose_name = _('Importação de Carteira')
+        verbose_name_plural = _('Importações de Carteira')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.arquivo_nome or self.hash_arquivo[:12]} ({self.get_status_display()})"
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # MODELS DE VISTORIAS (Inspection System)
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -236,12 +236,56 @@ class InspectionPhoto(models.Model):
         verbose_name='Vistoria'
     )
     
-    # Arquivo da imagem (armazenado no R2)
+    STATUS_PROCESSAMENTO_CHOICES = [
+        ('pendente', 'Aguardando processamento'),
+        ('processando', 'Processando'),
+        ('concluida', 'Concluída'),
+        ('erro', 'Erro'),
+    ]
+    
+    # Arquivo da imagem (armazenado no R2) - versão 1600px usada no PDF
     imagem = models.ImageField(
         upload_to=upload_inspection_photo_path,
+        blank=True,
         verbose_name='Imagem'
     )
     
+    # Miniatura para listagens (gerada em segundo plano)
+    miniatura = models.ImageField(
+        upload_to=upload_inspection_photo_path,
+        blank=True,
+        verbose_name='Miniatura'
+    )
+    
+    # Arquivo bruto do upload, removido após o processamento
+    original = models.FileField(
+        upload_to=upload_inspection_photo_path,
+        blank=True,
+        verbose_name='Arquivo Original'
+    )
+    
+    status_processamento = models.CharField(
+        max_length=20,
+        choices=STATUS_PROCESSAMENTO_CHOICES,
+        default='concluida',
+        db_index=True,
+        verbose_name='Status do Processamento'
+    )
+    
+    erro_processamento = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='Erro no Processamento'
+    )
+    
+    processamento_iniciado_em = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Processamento Iniciado Em',
+        help_text='Quando a foto foi marcada como processando (detecta processamento travado)'
+    )
+    
     legenda = models.CharField(
         max_length=200,
         blank=True,
@@ -274,6 +318,14 @@ class InspectionPhoto(models.Model):
         verbose_name='Tamanho (bytes)'
     )
     
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name='Checksum (SHA-256)',
+        help_text='Hash do arquivo salvo; usado no cache de páginas do PDF'
+    )
+    
     tirada_em = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Tirada Em'
@@ -296,6 +348,20 @@ class InspectionPhoto(models.Model):
         if self.tamanho_bytes:
             return round(self.tamanho_bytes / (1024 * 1024), 2)
         return 0
+    
+    @property
+    def processada(self):
+        """True quando as versões (1600px e miniatura) já foram geradas"""
+        return self.status_processamento == 'concluida'
+    
+    def excluir_arquivos(self):
+        """Remove do storage a imagem, a miniatura e o arquivo bruto"""
+        for arquivo in (self.imagem, self.miniatura, self.original):
+            if arquivo:
+                try:
+                    arquivo.delete(save=False)
+                except Exception:
+                    pass  # Se já foi deletado, ignorar
 
 
 class InspectionPDF(models.Model):
@@ -0,0 +1,14 @@
+"""
+Paginação da API
+Cursor sobre chave indexada: o custo de qualquer página é o mesmo da
+primeira (WHERE created_at < cursor ... LIMIT), sem OFFSET nem COUNT(*)
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CursorCriacaoPagination(CursorPagination):
+    """Mais recentes primeiro; usa o índice (created_at, id) do modelo."""
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
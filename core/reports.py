@@ -11,6 +11,13 @@ from django.db.models.functions import TruncMonth, TruncYear, Coalesce
 from django.utils import timezone
 from .models import Locacao, Comanda, Pagamento, Imovel, Locador, Locatario
 from .utils import formatar_moeda_brasileira
+from .services.inadimplencia import (
+    comandas_vencidas,
+    mais_recentes_por_faixa,
+    pivo_por_locador,
+    pivo_por_locatario,
+    totais_por_faixa,
+)
 
 class RelatorioFinanceiro:
     """Financial reporting system."""
@@ -129,55 +136,45 @@ class RelatorioFinanceiro:
         ]
     
     def inadimplencia_detalhada(self) -> Dict[str, Any]:
-        """Generate detailed delinquency report."""
-        comandas_vencidas = Comanda.objects.filter(
-            data_vencimento__lt=timezone.now().date(),
-            status__in=[Comanda.StatusComanda.PENDENTE, Comanda.StatusComanda.VENCIDA]
-        ).select_related('locacao', 'locacao__locatario', 'locacao__imovel')
-        
-        # Agrupar por faixas de atraso
+        """
+        Generate detailed delinquency report (aging).
+        Totals per bucket in one grouped query and the 5 most recent
+        comandas of every bucket in another (core/services/inadimplencia.py).
+        """
         hoje = timezone.now().date()
-        faixas = {
-            '0-30': comandas_vencidas.filter(
-                data_vencimento__gte=hoje - timedelta(days=30)
-            ),
-            '31-60': comandas_vencidas.filter(
-                data_vencimento__lt=hoje - timedelta(days=30),
-                data_vencimento__gte=hoje - timedelta(days=60)
-            ),
-            '61-90': comandas_vencidas.filter(
-                data_vencimento__lt=hoje - timedelta(days=60),
-                data_vencimento__gte=hoje - timedelta(days=90)
-            ),
-            '90+': comandas_vencidas.filter(
-                data_vencimento__lt=hoje - timedelta(days=90)
-            )
-        }
+        vencidas = comandas_vencidas(hoje)
+        totais = totais_por_faixa(vencidas)
+        recentes = mais_recentes_por_faixa(vencidas, limite=5)
         
         relatorio_faixas = {}
-        for faixa, queryset in faixas.items():
-            valor_total = queryset.aggregate(
-                total=Coalesce(Sum('valor_total'), Decimal('0.00'))
-            )['total']
-            
+        for faixa, total in totais.items():
             relatorio_faixas[faixa] = {
-                'quantidade': queryset.count(),
-                'valor_total': valor_total,
-                'valor_formatado': formatar_moeda_brasileira(valor_total),
+                'quantidade': total['quantidade'],
+                'valor_total': total['valor_total'],
+                'valor_pendente': total['valor_pendente'],
+                'valor_formatado': formatar_moeda_brasileira(total['valor_total']),
                 'comandas': [
                     {
                         'numero': c.numero_comanda,
                         'locatario': c.locacao.locatario.nome_razao_social,
                         'imovel': c.locacao.imovel.endereco_completo,
-                        'valor': formatar_moeda_brasileira(c.valor_total),
+                        'valor': formatar_moeda_brasileira(c.valor_total_calculado),
                         'dias_atraso': (hoje - c.data_vencimento).days,
                         'data_vencimento': c.data_vencimento.strftime('%d/%m/%Y')
                     }
-                    for c in queryset.order_by('-data_vencimento')[:5]
+                    for c in recentes[faixa]
                 ]
             }
         
         return relatorio_faixas
+    
+    def inadimplencia_por_locatario(self) -> List[Dict[str, Any]]:
+        """Open amount per tenant, split by aging bucket (one query)."""
+        return list(pivo_por_locatario(comandas_vencidas()))
+    
+    def inadimplencia_por_locador(self) -> List[Dict[str, Any]]:
+        """Open amount per landlord, split by aging bucket (one query)."""
+        return list(pivo_por_locador(comandas_vencidas()))
 
 class RelatorioOperacional:
     """Operational reporting system."""
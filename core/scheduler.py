@@ -8,6 +8,9 @@ JOBS CONFIGURADOS:
 - A cada hora: Backup para vencimentos urgentes (hoje/amanhã)
 - Semanal (domingo 2h): Limpeza de execuções antigas
 - Semanal (domingo 2h30): Limpeza de tokens de contrato expirados
+- Semanal (domingo 3h): Limpeza de recibos gerados antigos
+- A cada 5 minutos: Processamento de fotos de vistoria pendentes
+- A cada 5 minutos: Relatórios do dashboard pendentes + limpeza dos antigos
 """
 import logging
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -129,6 +132,65 @@ def limpar_tokens_contratos_job():
         logger.error(f"❌ [SCHEDULER] Erro na limpeza de tokens: {str(e)}")
 
 
+def limpar_recibos_job():
+    """
+    Job de limpeza: Remove recibos DOCX/PDF gerados há mais de RECIBOS_RETENCAO_DIAS
+    Executa: Semanalmente (domingo às 3h)
+    
+    Os recibos são reaproveitados enquanto o pagamento não muda; arquivos
+    antigos são removidos e regerados sob demanda no próximo acesso.
+    """
+    try:
+        logger.info("🧹 [SCHEDULER] Iniciando limpeza de recibos gerados...")
+        call_command('limpar_recibos')
+        logger.info("✅ [SCHEDULER] Limpeza de recibos concluída")
+    except Exception as e:
+        logger.error(f"❌ [SCHEDULER] Erro na limpeza de recibos: {str(e)}")
+
+
+def processar_fotos_vistoria_job():
+    """
+    Job de recuperação: Processa fotos de vistoria ainda pendentes
+    Executa: A cada 5 minutos
+    
+    O processamento normal acontece logo após o upload (segundo plano);
+    este job cobre fotos que ficaram na fila por reinício do processo.
+    """
+    try:
+        from core.services.inspection_fotos import processar_fotos_pendentes
+        
+        processadas = processar_fotos_pendentes()
+        if processadas:
+            logger.info(f"📸 [SCHEDULER] {processadas} foto(s) de vistoria processada(s)")
+    except Exception as e:
+        logger.error(f"❌ [SCHEDULER] Erro no processamento de fotos: {str(e)}")
+
+
+def processar_relatorios_dashboard_job():
+    """
+    Job de recuperação: Gera relatórios do dashboard ainda pendentes
+    Executa: A cada 5 minutos
+    
+    A geração normal acontece logo após a solicitação (segundo plano);
+    este job cobre jobs perdidos por reinício do processo e remove
+    relatórios com mais de RELATORIOS_RETENCAO_DIAS.
+    """
+    try:
+        from core.services.relatorios_dashboard import (
+            limpar_relatorios_antigos,
+            processar_relatorios_pendentes,
+        )
+        
+        gerados = processar_relatorios_pendentes()
+        removidos = limpar_relatorios_antigos()
+        if gerados or removidos:
+            logger.info(
+                f"📊 [SCHEDULER] Relatórios: {gerados} gerado(s), {removidos} antigo(s) removido(s)"
+            )
+    except Exception as e:
+        logger.error(f"❌ [SCHEDULER] Erro nos relatórios do dashboard: {str(e)}")
+
+
 def start_scheduler():
     """
     Inicia o APScheduler com todos os jobs configurados
@@ -215,6 +277,50 @@ def start_scheduler():
         )
         logger.info("✅ [SCHEDULER] Job 'limpar_tokens_contratos' agendado (domingos 2h30)")
         
+        # JOB 6: Limpeza de recibos gerados antigos (domingo 3h)
+        scheduler.add_job(
+            limpar_recibos_job,
+            trigger=CronTrigger(
+                day_of_week="sun",
+                hour=3,
+                minute=0,
+                timezone=pytz.timezone(settings.TIME_ZONE)
+            ),
+            id="limpar_recibos",
+            max_instances=1,
+            replace_existing=True,
+            name="Limpeza semanal de recibos gerados"
+        )
+        logger.info("✅ [SCHEDULER] Job 'limpar_recibos' agendado (domingos 3h)")
+        
+        # JOB 7: Fotos de vistoria pendentes (a cada 5 minutos)
+        scheduler.add_job(
+            processar_fotos_vistoria_job,
+            trigger=IntervalTrigger(
+                minutes=5,
+                timezone=pytz.timezone(settings.TIME_ZONE)
+            ),
+            id="processar_fotos_vistoria",
+            max_instances=1,
+            replace_existing=True,
+            name="Processar fotos de vistoria pendentes"
+        )
+        logger.info("✅ [SCHEDULER] Job 'processar_fotos_vistoria' agendado (a cada 5min)")
+        
+        # JOB 8: Relatórios do dashboard pendentes (a cada 5 minutos)
+        scheduler.add_job(
+            processar_relatorios_dashboard_job,
+            trigger=IntervalTrigger(
+                minutes=5,
+                timezone=pytz.timezone(settings.TIME_ZONE)
+            ),
+            id="processar_relatorios_dashboard",
+            max_instances=1,
+            replace_existing=True,
+            name="Processar relatórios do dashboard pendentes"
+        )
+        logger.info("✅ [SCHEDULER] Job 'processar_relatorios_dashboard' agendado (a cada 5min)")
+        
         
         # Iniciar scheduler
         scheduler.start()
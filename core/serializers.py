@@ -9,27 +9,78 @@ class UsuarioSerializer(serializers.ModelSerializer):
 class LocadorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Locador
-        fields = '__all__'
+        # Colunas de busca são internas (core/utils/busca.py)
+        exclude = ['busca', 'documento_digitos']
 
 class ImovelSerializer(serializers.ModelSerializer):
     class Meta:
         model = Imovel
-        fields = '__all__'
+        exclude = ['busca']
 
 class LocatarioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Locatario
-        fields = '__all__'
+        exclude = ['busca', 'documento_digitos']
 
 class LocacaoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Locacao
-        fields = '__all__'
+        exclude = ['busca']
 
 class ComandaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comanda
-        fields = '__all__'
+        exclude = ['busca']
+
+
+# ============================================================================
+# SERIALIZERS DE LEITURA (listagem/detalhe da API)
+# Campos explícitos; totais vêm das anotações de Comanda.objects.com_totais()
+# e os nomes relacionados do select_related da view (sem consultas extras)
+# ============================================================================
+
+class LocacaoLeituraSerializer(serializers.ModelSerializer):
+    imovel_codigo = serializers.CharField(source='imovel.codigo_imovel', read_only=True)
+    imovel_endereco = serializers.SerializerMethodField()
+    locatario_nome = serializers.CharField(source='locatario.nome_razao_social', read_only=True)
+    locador_nome = serializers.CharField(source='imovel.locador.nome_razao_social', read_only=True)
+    
+    class Meta:
+        model = Locacao
+        fields = [
+            'id', 'numero_contrato', 'status',
+            'imovel', 'imovel_codigo', 'imovel_endereco',
+            'locatario', 'locatario_nome', 'locador_nome',
+            'data_inicio', 'data_fim', 'valor_aluguel', 'dia_vencimento',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+    
+    def get_imovel_endereco(self, obj):
+        return f"{obj.imovel.endereco}, {obj.imovel.numero}"
+
+
+class ComandaLeituraSerializer(serializers.ModelSerializer):
+    numero_contrato = serializers.CharField(source='locacao.numero_contrato', read_only=True)
+    imovel_codigo = serializers.CharField(source='locacao.imovel.codigo_imovel', read_only=True)
+    locatario_nome = serializers.CharField(source='locacao.locatario.nome_razao_social', read_only=True)
+    valor_aluguel = serializers.DecimalField(source='valor_aluguel_atual', max_digits=12, decimal_places=2, read_only=True)
+    valor_total = serializers.DecimalField(source='valor_total_calculado', max_digits=12, decimal_places=2, read_only=True)
+    total_pago = serializers.DecimalField(source='total_pago_calculado', max_digits=12, decimal_places=2, read_only=True)
+    valor_pendente = serializers.DecimalField(source='valor_pendente_calculado', max_digits=12, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = Comanda
+        fields = [
+            'id', 'numero_comanda', 'status',
+            'locacao', 'numero_contrato', 'imovel_codigo', 'locatario_nome',
+            'mes_referencia', 'data_vencimento',
+            'valor_aluguel', 'valor_condominio', 'valor_iptu', 'valor_administracao',
+            'outros_debitos', 'outros_creditos', 'valor_multa', 'valor_juros', 'desconto',
+            'valor_total', 'total_pago', 'valor_pendente',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
 
 
 
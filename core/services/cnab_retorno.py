@@ -0,0 +1,498 @@
+"""
+Conciliação de Retorno Bancário CNAB 240 / 400
+Lê o arquivo de retorno de boletos e registra as liquidações como Pagamento
+
+- Leitura em streaming, linha a linha (registros de largura fixa); o
+  layout (240 ou 400) é detectado pelo tamanho da primeira linha
+- Comandas em aberto carregadas em UMA consulta e indexadas em memória:
+  nosso número → numero_comanda (seu número / uso da empresa) → valor +
+  vencimento (só quando há um único candidato)
+- Pagamentos confirmados gravados em lote (pagamentos_lote.gravar_pagamentos);
+  ``referencia_externa`` impede registrar a mesma liquidação duas vezes
+- Liquidações sem comanda correspondente voltam no relatório, com o motivo;
+  registros ilegíveis (valor não numérico, segmento T sem U) e títulos sem
+  identificação também, sem interromper o arquivo
+- gerar_retorno_sintetico() monta arquivos para testes e benchmark
+
+Posições (1-based, inclusivas) seguem o padrão FEBRABAN; bancos que
+divergem podem passar o próprio layout em ``LAYOUT_240`` / ``LAYOUT_400``.
+"""
+import logging
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import Comanda, FormaPagamento, Pagamento, StatusPagamento
+from core.services.pagamentos_lote import gravar_pagamentos
+
+logger = logging.getLogger(__name__)
+
+# Diferença máxima (dias) entre vencimento do título e da comanda na
+# conciliação por valor
+CNAB_JANELA_VENCIMENTO_DIAS = getattr(settings, 'CNAB_JANELA_VENCIMENTO_DIAS', 5)
+
+# Códigos de ocorrência/movimento que representam liquidação
+OCORRENCIAS_LIQUIDACAO = {'06', '17'}
+
+STATUS_CONCILIAVEIS = (
+    Comanda.StatusComanda.PENDENTE,
+    Comanda.StatusComanda.VENCIDA,
+    Comanda.StatusComanda.PARCIALMENTE_PAGA,
+)
+
+# ── Layouts (início, fim) ─────────────────────────────────────────────
+LAYOUT_400 = {
+    'tipo': (1, 1),
+    'banco': (77, 79),
+    'uso_empresa': (38, 62),
+    'nosso_numero': (71, 82),
+    'ocorrencia': (109, 110),
+    'data_ocorrencia': (111, 116),
+    'seu_numero': (117, 126),
+    'vencimento': (147, 152),
+    'valor_titulo': (153, 165),
+    'valor_pago': (254, 266),
+    'data_credito': (296, 301),
+    'sequencial': (395, 400),
+}
+
+LAYOUT_240 = {
+    'banco': (1, 3),
+    'tipo': (8, 8),
+    'segmento': (14, 14),
+    'ocorrencia': (16, 17),
+    # Segmento T
+    'nosso_numero': (38, 57),
+    'seu_numero': (59, 73),
+    'vencimento': (74, 81),
+    'valor_titulo': (82, 96),
+    'uso_empresa': (106, 130),
+    # Segmento U
+    'valor_pago': (78, 92),
+    'data_ocorrencia': (138, 145),
+    'data_credito': (146, 153),
+}
+
+
+class ArquivoCNABInvalido(ValueError):
+    pass
+
+
+class RegistroInvalido(ValueError):
+    """Um título ilegível: vai para os não conciliados, o arquivo segue."""
+
+
+def _campo(linha, layout, nome):
+    inicio, fim = layout[nome]
+    return linha[inicio - 1:fim].strip()
+
+
+def _valor(texto):
+    try:
+        return Decimal(int(texto or 0)) / 100
+    except ValueError:
+        raise RegistroInvalido(f'valor não numérico: {texto!r}')
+
+
+def _data(texto):
+    """DDMMAA (400) ou DDMMAAAA (240); zeros/brancos → None."""
+    if not texto or not texto.strip('0'):
+        return None
+    formato = '%d%m%y' if len(texto) == 6 else '%d%m%Y'
+    try:
+        return datetime.strptime(texto, formato).date()
+    except ValueError:
+        return None
+
+
+def _linhas(arquivo):
+    """Linhas de texto de um caminho, arquivo texto ou binário (latin-1)."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as f:
+            for linha in f:
+                yield linha.decode('latin-1').rstrip('\r\n')
+        return
+    for linha in arquivo:
+        if isinstance(linha, bytes):
+            linha = linha.decode('latin-1')
+        yield linha.rstrip('\r\n')
+
+
+def ler_retorno(arquivo):
+    """
+    Gera um dict por título do retorno: ``linha``, ``layout``, ``banco``,
+    ``ocorrencia``, ``liquidacao`` (bool), ``nosso_numero``, ``seu_numero``,
+    ``uso_empresa``, ``vencimento``, ``valor_titulo``, ``valor_pago``,
+    ``data_pagamento``, ``data_credito``. Títulos ilegíveis trazem
+    ``invalido`` (o erro), ``liquidacao=False`` e, no mínimo, ``linha``,
+    ``layout``, ``banco`` e os números.
+    """
+    linhas = _linhas(arquivo)
+    primeira = next(linhas, None)
+    if primeira is None:
+        return
+    if len(primeira) == 400:
+        yield from _ler_400(primeira, linhas)
+    elif len(primeira) == 240:
+        yield from _ler_240(primeira, linhas)
+    else:
+        raise ArquivoCNABInvalido(f'Linha com {len(primeira)} posições: esperado 240 ou 400')
+
+
+def _titulo_invalido(numero, layout, banco, linha, erro):
+    campos = LAYOUT_400 if layout == 400 else LAYOUT_240
+    return {
+        'linha': numero,
+        'layout': layout,
+        'banco': banco,
+        'invalido': str(erro),
+        'liquidacao': False,
+        'nosso_numero': _campo(linha, campos, 'nosso_numero').lstrip('0'),
+        'seu_numero': _campo(linha, campos, 'seu_numero'),
+        'valor_pago': None,
+        'data_pagamento': None,
+    }
+
+
+def _ler_400(header, linhas):
+    layout = LAYOUT_400
+    if header[0] != '0':
+        raise ArquivoCNABInvalido('Arquivo CNAB 400 sem header')
+    banco = _campo(header, layout, 'banco')
+
+    for numero, linha in enumerate(linhas, start=2):
+        if linha[:1] != '1':
+            continue
+        ocorrencia = _campo(linha, layout, 'ocorrencia')
+        try:
+            titulo = {
+                'linha': numero,
+                'layout': 400,
+                'banco': banco,
+                'ocorrencia': ocorrencia,
+                'liquidacao': ocorrencia in OCORRENCIAS_LIQUIDACAO,
+                'nosso_numero': _campo(linha, layout, 'nosso_numero').lstrip('0'),
+                'seu_numero': _campo(linha, layout, 'seu_numero'),
+                'uso_empresa': _campo(linha, layout, 'uso_empresa'),
+                'vencimento': _data(_campo(linha, layout, 'vencimento')),
+                'valor_titulo': _valor(_campo(linha, layout, 'valor_titulo')),
+                'valor_pago': _valor(_campo(linha, layout, 'valor_pago')),
+                'data_pagamento': _data(_campo(linha, layout, 'data_ocorrencia')),
+                'data_credito': _data(_campo(linha, layout, 'data_credito')),
+            }
+        except RegistroInvalido as e:
+            titulo = _titulo_invalido(numero, 400, banco, linha, e)
+        yield titulo
+
+
+def _ler_240(header, linhas):
+    layout = LAYOUT_240
+    if _campo(header, layout, 'tipo') != '0':
+        raise ArquivoCNABInvalido('Arquivo CNAB 240 sem header de arquivo')
+    banco = _campo(header, layout, 'banco')
+
+    titulo = None
+    for numero, linha in enumerate(linhas, start=2):
+        if _campo(linha, layout, 'tipo') != '3':
+            continue
+        segmento = _campo(linha, layout, 'segmento')
+        if segmento == 'T':
+            if titulo is not None:
+                yield _sem_segmento_u(titulo)
+            ocorrencia = _campo(linha, layout, 'ocorrencia')
+            try:
+                titulo = {
+                    'linha': numero,
+                    'layout': 240,
+                    'banco': banco,
+                    'ocorrencia': ocorrencia,
+                    'liquidacao': ocorrencia in OCORRENCIAS_LIQUIDACAO,
+                    'nosso_numero': _campo(linha, layout, 'nosso_numero').lstrip('0'),
+                    'seu_numero': _campo(linha, layout, 'seu_numero'),
+                    'uso_empresa': _campo(linha, layout, 'uso_empresa'),
+                    'vencimento': _data(_campo(linha, layout, 'vencimento')),
+                    'valor_titulo': _valor(_campo(linha, layout, 'valor_titulo')),
+                }
+            except RegistroInvalido as e:
+                # O U seguinte fica sem T e é ignorado
+                titulo = None
+                yield _titulo_invalido(numero, 240, banco, linha, e)
+        elif segmento == 'U' and titulo is not None:
+            # U completa o T imediatamente anterior
+            try:
+                valor_pago = _valor(_campo(linha, layout, 'valor_pago'))
+            except RegistroInvalido as e:
+                titulo.update(invalido=str(e), liquidacao=False, valor_pago=None, data_pagamento=None)
+            else:
+                titulo['valor_pago'] = valor_pago
+                titulo['data_pagamento'] = _data(_campo(linha, layout, 'data_ocorrencia'))
+                titulo['data_credito'] = _data(_campo(linha, layout, 'data_credito'))
+            yield titulo
+            titulo = None
+    if titulo is not None:
+        yield _sem_segmento_u(titulo)
+
+
+def _sem_segmento_u(titulo):
+    """T seguido de outro T ou do fim do arquivo: sem valor pago, vai para o relatório."""
+    titulo.update(invalido='segmento T sem segmento U', liquidacao=False, valor_pago=None, data_pagamento=None)
+    return titulo
+
+
+# ════════════════════════════════════════════
+# CONCILIAÇÃO
+# ════════════════════════════════════════════
+
+def _normalizar_numero(texto):
+    return (texto or '').strip().upper().replace('-', '').replace(' ', '').lstrip('0')
+
+
+class IndiceComandas:
+    """Comandas em aberto indexadas por nosso número, número e valor."""
+
+    def __init__(self):
+        linhas = (
+            Comanda.objects.filter(is_active=True, status__in=STATUS_CONCILIAVEIS)
+            .com_totais()
+            .order_by()
+            .values_list('pk', 'numero_comanda', 'nosso_numero', 'valor_pendente_calculado', 'data_vencimento')
+        )
+        self.por_nosso_numero = {}
+        self.por_numero_comanda = {}
+        self.por_valor = {}
+        for pk, numero_comanda, nosso_numero, pendente, vencimento in linhas:
+            if nosso_numero:
+                self.por_nosso_numero[_normalizar_numero(nosso_numero)] = pk
+            self.por_numero_comanda[_normalizar_numero(numero_comanda)] = pk
+            if pendente:
+                self.por_valor.setdefault(pendente, []).append((vencimento, pk))
+        # Comandas já conciliadas neste arquivo não entram na busca por valor
+        self.conciliadas = set()
+
+    def localizar(self, titulo):
+        """Retorna ``(pk, criterio)`` ou ``(None, motivo)``."""
+        pk, criterio = self._localizar(titulo)
+        if pk is not None:
+            self.conciliadas.add(pk)
+        return pk, criterio
+
+    def _localizar(self, titulo):
+        nosso_numero = _normalizar_numero(titulo['nosso_numero'])
+        if nosso_numero and nosso_numero in self.por_nosso_numero:
+            return self.por_nosso_numero[nosso_numero], 'nosso_numero'
+
+        for campo in ('seu_numero', 'uso_empresa'):
+            numero = _normalizar_numero(titulo[campo])
+            if numero and numero in self.por_numero_comanda:
+                return self.por_numero_comanda[numero], 'numero_comanda'
+
+        referencia = titulo['vencimento'] or titulo['data_pagamento']
+        candidatos = [
+            pk for vencimento, pk in self.por_valor.get(titulo['valor_titulo'] or titulo['valor_pago'], ())
+            if pk not in self.conciliadas and referencia and vencimento
+            and abs((vencimento - referencia).days) <= CNAB_JANELA_VENCIMENTO_DIAS
+        ]
+        if len(candidatos) == 1:
+            return candidatos[0], 'valor_vencimento'
+        if candidatos:
+            return None, f'{len(candidatos)} comandas com o mesmo valor e vencimento'
+        return None, 'Nenhuma comanda em aberto corresponde ao título'
+
+
+def referencia_titulo(titulo):
+    """
+    Chave da liquidação, independente da posição no arquivo: nosso número +
+    seu número; sem nenhum dos dois, uso da empresa + valor + vencimento.
+    None: título sem como identificar (não é registrado).
+    """
+    if titulo['nosso_numero'] or titulo['seu_numero']:
+        identificador = f"{titulo['nosso_numero']}/{titulo['seu_numero']}"
+    elif titulo['valor_pago'] is not None and titulo['vencimento']:
+        identificador = f"{titulo['uso_empresa']}/{titulo['valor_pago']}/{titulo['vencimento'].isoformat()}"
+    else:
+        return None
+    data = titulo['data_pagamento'].isoformat() if titulo['data_pagamento'] else ''
+    return f"cnab{titulo['layout']}:{titulo['banco']}:{identificador}:{data}"
+
+
+def _ja_registradas(referencias, fatia=500):
+    referencias = list(set(referencias))
+    existentes = set()
+    for inicio in range(0, len(referencias), fatia):
+        existentes.update(
+            Pagamento.objects.filter(referencia_externa__in=referencias[inicio:inicio + fatia])
+            .order_by().values_list('referencia_externa', flat=True)
+        )
+    return existentes
+
+
+def conciliar_retorno(arquivo, usuario, simular=False):
+    """
+    Concilia o retorno e (se não ``simular``) registra os pagamentos.
+
+    Retorna ``{'titulos', 'liquidacoes', 'conciliados', 'nao_conciliados',
+    'duplicados', 'pagamentos_criados', 'comandas_atualizadas', 'por_criterio'}``;
+    ``nao_conciliados`` traz linha, nosso/seu número, valor e motivo.
+    """
+    indice = IndiceComandas()
+    agora = timezone.now()
+
+    conciliados, nao_conciliados = [], []
+    titulos = liquidacoes = 0
+    por_criterio = {}
+    for titulo in ler_retorno(arquivo):
+        titulos += 1
+        if 'invalido' in titulo:
+            nao_conciliados.append({
+                'linha': titulo['linha'],
+                'nosso_numero': titulo['nosso_numero'],
+                'seu_numero': titulo['seu_numero'],
+                'valor_pago': None,
+                'data_pagamento': None,
+                'motivo': f"Registro inválido: {titulo['invalido']}",
+            })
+            continue
+        if not titulo['liquidacao']:
+            continue
+        liquidacoes += 1
+
+        if referencia_titulo(titulo) is None:
+            pk, criterio = None, 'Título sem identificação: sem nosso número, seu número nem vencimento'
+        else:
+            pk, criterio = indice.localizar(titulo)
+        if pk is None:
+            nao_conciliados.append({
+                'linha': titulo['linha'],
+                'nosso_numero': titulo['nosso_numero'],
+                'seu_numero': titulo['seu_numero'],
+                'valor_pago': titulo['valor_pago'],
+                'data_pagamento': titulo['data_pagamento'],
+                'motivo': criterio,
+            })
+            continue
+        por_criterio[criterio] = por_criterio.get(criterio, 0) + 1
+        conciliados.append((titulo, pk))
+
+    existentes = _ja_registradas(referencia_titulo(titulo) for titulo, _ in conciliados)
+    pagamentos = []
+    duplicados = 0
+    vistos = set()
+    for titulo, pk in conciliados:
+        referencia = referencia_titulo(titulo)
+        if referencia in existentes or referencia in vistos:
+            duplicados += 1
+            continue
+        vistos.add(referencia)
+        pagamentos.append(Pagamento(
+            comanda_id=pk,
+            usuario_registro=usuario,
+            valor_pago=titulo['valor_pago'],
+            data_pagamento=titulo['data_pagamento'] or titulo['data_credito'] or agora.date(),
+            data_confirmacao=agora,
+            forma_pagamento=FormaPagamento.BOLETO,
+            status=StatusPagamento.CONFIRMADO,
+            observacoes=f"Retorno CNAB {titulo['layout']} - nosso número {titulo['nosso_numero'] or '-'}",
+            referencia_externa=referencia,
+        ))
+
+    atualizadas = 0 if simular else gravar_pagamentos(pagamentos)
+
+    logger.info(
+        f"🏦 Retorno CNAB: {liquidacoes} liquidações, {len(pagamentos)} pagamentos"
+        f"{' (simulação)' if simular else ''}, {len(nao_conciliados)} sem comanda, {duplicados} duplicadas"
+    )
+    return {
+        'titulos': titulos,
+        'liquidacoes': liquidacoes,
+        'conciliados': len(conciliados),
+        'nao_conciliados': nao_conciliados,
+        'duplicados': duplicados,
+        'pagamentos_criados': 0 if simular else len(pagamentos),
+        'comandas_atualizadas': atualizadas,
+        'por_criterio': por_criterio,
+    }
+
+
+# ════════════════════════════════════════════
+# ARQUIVOS SINTÉTICOS (testes e benchmark)
+# ════════════════════════════════════════════
+
+def _preencher(linha, layout, nome, valor):
+    inicio, fim = layout[nome]
+    tamanho = fim - inicio + 1
+    if isinstance(valor, Decimal):
+        texto = str(int(valor * 100)).zfill(tamanho)
+    elif isinstance(valor, date):
+        texto = valor.strftime('%d%m%y' if tamanho == 6 else '%d%m%Y')
+    else:
+        texto = str(valor).ljust(tamanho)
+    linha[inicio - 1:fim] = texto[:tamanho]
+
+
+def gerar_retorno_sintetico(titulos, layout=400, banco='237', data_arquivo=None):
+    """
+    Texto de um retorno CNAB com os ``titulos`` (dicts com nosso_numero,
+    seu_numero, valor, vencimento, data_pagamento e, opcional, ocorrencia).
+    """
+    saida = []
+    hoje = data_arquivo or timezone.localdate()
+    if layout == 400:
+        header = list('02RETORNO01COBRANCA'.ljust(400))
+        _preencher(header, LAYOUT_400, 'banco', banco)
+        _preencher(header, {'data': (95, 100)}, 'data', hoje)
+        _preencher(header, LAYOUT_400, 'sequencial', '000001')
+        saida.append(''.join(header))
+        for posicao, titulo in enumerate(titulos, start=2):
+            linha = list('1'.ljust(400))
+            valores = {
+                'uso_empresa': titulo.get('seu_numero', ''),
+                'nosso_numero': str(titulo.get('nosso_numero', '')).zfill(12),
+                'ocorrencia': titulo.get('ocorrencia', '06'),
+                'data_ocorrencia': titulo['data_pagamento'],
+                'seu_numero': titulo.get('seu_numero', ''),
+                'vencimento': titulo['vencimento'],
+                'valor_titulo': titulo['valor'],
+                'valor_pago': titulo['valor'],
+                'data_credito': titulo['data_pagamento'] + timedelta(days=1),
+                'sequencial': str(posicao).zfill(6),
+            }
+            for nome, valor in valores.items():
+                _preencher(linha, LAYOUT_400, nome, valor)
+            saida.append(''.join(linha))
+        trailer = list('9'.ljust(400))
+        _preencher(trailer, LAYOUT_400, 'sequencial', str(len(titulos) + 2).zfill(6))
+        saida.append(''.join(trailer))
+    elif layout == 240:
+        header = list(f'{banco}00000'.ljust(240))
+        saida.append(''.join(header))
+        saida.append(''.join(list(f'{banco}00011'.ljust(240))))
+        for titulo in titulos:
+            segmento_t = list(f'{banco}00013'.ljust(240))
+            _preencher(segmento_t, LAYOUT_240, 'segmento', 'T')
+            for nome, valor in {
+                'ocorrencia': titulo.get('ocorrencia', '06'),
+                'nosso_numero': str(titulo.get('nosso_numero', '')).zfill(20),
+                'seu_numero': titulo.get('seu_numero', ''),
+                'vencimento': titulo['vencimento'],
+                'valor_titulo': titulo['valor'],
+                'uso_empresa': titulo.get('seu_numero', ''),
+            }.items():
+                _preencher(segmento_t, LAYOUT_240, nome, valor)
+            segmento_u = list(f'{banco}00013'.ljust(240))
+            _preencher(segmento_u, LAYOUT_240, 'segmento', 'U')
+            for nome, valor in {
+                'ocorrencia': titulo.get('ocorrencia', '06'),
+                'valor_pago': titulo['valor'],
+                'data_ocorrencia': titulo['data_pagamento'],
+                'data_credito': titulo['data_pagamento'] + timedelta(days=1),
+            }.items():
+                _preencher(segmento_u, LAYOUT_240, nome, valor)
+            saida += [''.join(segmento_t), ''.join(segmento_u)]
+        saida.append(''.join(list(f'{banco}00015'.ljust(240))))
+        saida.append(''.join(list(f'{banco}99999'.ljust(240))))
+    else:
+        raise ArquivoCNABInvalido(f'Layout desconhecido: {layout}')
+    return '\r\n'.join(saida) + '\r\n'
@@ -0,0 +1,335 @@
+"""
+Dados do Dashboard Financeiro
+Cálculo dos KPIs, séries mensais e rankings a partir dos filtros da tela
+
+Usado pela view (core/dashboard_views.py) e pelos relatórios gerados em
+segundo plano (core/services/relatorios_dashboard.py), que recebem os
+filtros já normalizados e serializáveis em JSON.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.dashboard.cache import CADASTROS, FINANCEIRO, obter_ou_calcular
+from core.models import Comanda, Imovel, Pagamento
+from core.services.performance_imoveis import top_imoveis
+
+
+def filtros_dashboard(params, hoje=None):
+    """
+    Normaliza os filtros do dashboard (request.GET ou dict salvo no job).
+    Ano/mês inválidos ou ausentes caem no mês atual.
+    """
+    hoje = hoje or timezone.now().date()
+
+    def _inteiro(valor, padrao):
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            return padrao
+
+    return {
+        'periodo': params.get('periodo') or 'mes',
+        'imovel': params.get('imovel') or 'todos',
+        'status': params.get('status') or 'todos',
+        'visualizacao': params.get('visualizacao') or 'real',
+        'ano': _inteiro(params.get('ano'), hoje.year),
+        'mes': _inteiro(params.get('mes'), hoje.month),
+    }
+
+
+def periodo_dashboard(filtros, hoje=None):
+    """Retorna ``(data_inicio, data_fim)`` do período selecionado."""
+    hoje = hoje or timezone.now().date()
+    periodo = filtros['periodo']
+    ano_selecionado = filtros['ano']
+    mes_selecionado = filtros['mes']
+
+    if periodo == 'mes':
+        data_inicio = datetime(ano_selecionado, mes_selecionado, 1).date()
+        if mes_selecionado == 12:
+            data_fim = datetime(ano_selecionado + 1, 1, 1).date() - timedelta(days=1)
+        else:
+            data_fim = datetime(ano_selecionado, mes_selecionado + 1, 1).date() - timedelta(days=1)
+    elif periodo == 'trimestre':
+        data_inicio = (hoje - timedelta(days=90)).replace(day=1)
+        data_fim = hoje
+    elif periodo == 'semestre':
+        data_inicio = (hoje - timedelta(days=180)).replace(day=1)
+        data_fim = hoje
+    elif periodo == 'ano':
+        data_inicio = datetime(ano_selecionado, 1, 1).date()
+        data_fim = datetime(ano_selecionado, 12, 31).date()
+    else:  # comparativo
+        data_inicio = datetime(2024, 1, 1).date()
+        data_fim = datetime(2025, 12, 31).date()
+
+    return data_inicio, data_fim
+
+
+def comandas_filtradas(filtros, hoje, data_inicio, data_fim):
+    """Comandas do período com os filtros de imóvel e status aplicados."""
+    imovel_id = filtros['imovel']
+    status_filtro = filtros['status']
+
+    comandas_query = Comanda.objects.filter(
+        mes_referencia__gte=data_inicio,
+        mes_referencia__lte=data_fim,
+        is_active=True
+    ).select_related('locacao', 'locacao__imovel', 'locacao__locatario')
+
+    # Filtro por imóvel
+    if imovel_id != 'todos':
+        comandas_query = comandas_query.filter(locacao__imovel_id=imovel_id)
+
+    # Filtro por status
+    if status_filtro == 'pago':
+        comandas_query = comandas_query.filter(status='PAID')
+    elif status_filtro == 'pendente':
+        comandas_query = comandas_query.filter(status__in=['PENDING', 'PARTIAL'])
+    elif status_filtro == 'atrasado':
+        comandas_query = comandas_query.filter(
+            status__in=['OVERDUE', 'PENDING'],
+            data_vencimento__lt=hoje
+        )
+
+    return comandas_query
+
+
+def calcular_kpis(filtros, hoje):
+    """KPIs do período e os alertas derivados deles."""
+    data_inicio, data_fim = periodo_dashboard(filtros, hoje)
+    comandas_query = comandas_filtradas(filtros, hoje, data_inicio, data_fim)
+
+    # Receita Prevista (soma de todas comandas do período)
+    receita_prevista = comandas_query.aggregate(
+        total=Sum('_valor_aluguel_historico')
+    )['total'] or Decimal('0.00')
+
+    receita_prevista += comandas_query.aggregate(
+        total=Sum('valor_condominio')
+    )['total'] or Decimal('0.00')
+
+    receita_prevista += comandas_query.aggregate(
+        total=Sum('valor_iptu')
+    )['total'] or Decimal('0.00')
+
+    # Receita Realizada (soma de pagamentos confirmados)
+    receita_realizada = Pagamento.objects.filter(
+        comanda__in=comandas_query,
+        status='confirmado',
+        data_pagamento__gte=data_inicio,
+        data_pagamento__lte=data_fim
+    ).aggregate(total=Sum('valor_pago'))['total'] or Decimal('0.00')
+
+    # Taxa de Recebimento
+    taxa_recebimento = (receita_realizada / receita_prevista * 100) if receita_prevista > 0 else Decimal('0.00')
+
+    # Comandas em Atraso
+    comandas_atrasadas = comandas_query.filter(
+        data_vencimento__lt=hoje,
+        status__in=['PENDING', 'OVERDUE', 'PARTIAL']
+    ).count()
+
+    # Taxa de Inadimplência
+    total_comandas = comandas_query.count()
+    taxa_inadimplencia = (comandas_atrasadas / total_comandas * 100) if total_comandas > 0 else Decimal('0.00')
+
+    # Receita Pendente
+    receita_pendente = receita_prevista - receita_realizada
+
+    # ========================================
+    # ALERTAS
+    # ========================================
+    alertas = []
+
+    if taxa_inadimplencia > 5:
+        alertas.append({
+            'tipo': 'warning',
+            'titulo': 'Alta Inadimplência',
+            'mensagem': f'Taxa de inadimplência em {taxa_inadimplencia:.1f}% (meta: < 3%)',
+            'acao': 'Ver Comandas Atrasadas',
+            'link': '/admin/core/comanda/?status=OVERDUE'
+        })
+
+    if comandas_atrasadas > 0:
+        alertas.append({
+            'tipo': 'warning',
+            'titulo': f'{comandas_atrasadas} Comandas em Atraso',
+            'mensagem': 'Ações de cobrança podem ser necessárias',
+            'acao': 'Ver Detalhes',
+            'link': '/admin/core/comanda/?status=OVERDUE'
+        })
+
+    kpis = {
+        'receita_prevista': float(receita_prevista),
+        'receita_realizada': float(receita_realizada),
+        'taxa_recebimento': float(taxa_recebimento),
+        'receita_pendente': float(receita_pendente),
+        'comandas_atrasadas': comandas_atrasadas,
+        'taxa_inadimplencia': float(taxa_inadimplencia),
+        'total_comandas': total_comandas,
+        'receita_prevista_alerta': taxa_recebimento < 80,
+        'inadimplencia_alerta': taxa_inadimplencia > 3,
+    }
+
+    return {'kpis': kpis, 'alertas': alertas}
+
+
+def calcular_dados_mensais(filtros, hoje):
+    """Previsto, realizado e inadimplência dos 12 meses até o mês selecionado."""
+    imovel_id = filtros['imovel']
+    ano_selecionado = filtros['ano']
+    mes_selecionado = filtros['mes']
+
+    dados_mensais = []
+
+    # Últimos 12 meses
+    for i in range(11, -1, -1):
+        # Calcular mês de referência
+        if mes_selecionado - i <= 0:
+            mes_ref_num = 12 + (mes_selecionado - i)
+            ano_ref = ano_selecionado - 1
+        else:
+            mes_ref_num = mes_selecionado - i
+            ano_ref = ano_selecionado
+
+        mes_ref = datetime(ano_ref, mes_ref_num, 1).date()
+
+        # Comandas do mês
+        comandas_mes = Comanda.objects.filter(
+            mes_referencia__year=mes_ref.year,
+            mes_referencia__month=mes_ref.month,
+            is_active=True
+        )
+
+        if imovel_id != 'todos':
+            comandas_mes = comandas_mes.filter(locacao__imovel_id=imovel_id)
+
+        # Previsto = Soma de valores das comandas
+        previsto_mes = 0
+        for cmd in comandas_mes:
+            previsto_mes += float(cmd.valor_total)
+
+        # Realizado = Soma de pagamentos confirmados
+        realizado_mes = float(
+            Pagamento.objects.filter(
+                comanda__mes_referencia__year=mes_ref.year,
+                comanda__mes_referencia__month=mes_ref.month,
+                status='confirmado'
+            ).aggregate(total=Sum('valor_pago'))['total'] or 0
+        )
+
+        # Inadimplência do mês
+        total_mes = comandas_mes.count()
+        atrasadas_mes = comandas_mes.filter(
+            status__in=['OVERDUE', 'PENDING'],
+            data_vencimento__lt=hoje
+        ).count()
+        inadimplencia_mes = (atrasadas_mes / total_mes * 100) if total_mes > 0 else 0
+
+        dados_mensais.append({
+            'mes': mes_ref.strftime('%b/%y'),
+            'previsto': previsto_mes,
+            'realizado': realizado_mes,
+            'inadimplencia': round(inadimplencia_mes, 1)
+        })
+
+    return dados_mensais
+
+
+def calcular_performance(filtros, hoje):
+    """Top 10 imóveis do período por taxa de recebimento."""
+    imovel_id = filtros['imovel']
+    data_inicio, data_fim = periodo_dashboard(filtros, hoje)
+    comandas_query = comandas_filtradas(filtros, hoje, data_inicio, data_fim)
+
+    # Top 10 real por taxa de recebimento, em uma consulta agrupada
+    imoveis = Imovel.objects.filter(is_active=True)
+    if imovel_id != 'todos':
+        imoveis = imoveis.filter(pk=imovel_id)
+
+    performance_imoveis = [
+        {
+            'nome': linha['endereco'][:30],
+            'previsto': linha['previsto'],
+            'realizado': linha['realizado'],
+        }
+        for linha in top_imoveis(comandas_query, imoveis, limite=10)
+    ]
+
+    return performance_imoveis
+
+
+def calcular_ultimos_pagamentos(data_inicio, data_fim):
+    """Os 20 pagamentos confirmados mais recentes do período."""
+    ultimos_pagamentos = []
+
+    pagamentos_recentes = Pagamento.objects.filter(
+        data_pagamento__gte=data_inicio,
+        data_pagamento__lte=data_fim,
+        status='confirmado'
+    ).select_related(
+        'comanda',
+        'comanda__locacao',
+        'comanda__locacao__locatario',
+        'comanda__locacao__imovel'
+    ).order_by('-data_pagamento')[:20]
+
+    for pag in pagamentos_recentes:
+        ultimos_pagamentos.append({
+            'numero_comanda': pag.comanda.numero_comanda,
+            'comanda_id': pag.comanda.id,
+            'numero_comanda_link': f"/admin/core/comanda/{pag.comanda.id}/change/",
+            'inquilino': pag.comanda.locacao.locatario.nome_razao_social,
+            'imovel': f"{pag.comanda.locacao.imovel.endereco}, {pag.comanda.locacao.imovel.numero}",
+            'valor': float(pag.valor_pago),
+            'data': pag.data_pagamento.strftime('%d/%m/%Y')
+        })
+
+    return ultimos_pagamentos
+
+
+def dados_dashboard(filtros, hoje=None):
+    """
+    Dados agregados do dashboard para os ``filtros`` normalizados (ver
+    filtros_dashboard): KPIs, dados mensais, performance por imóvel,
+    últimos pagamentos e alertas.
+
+    Cada bloco é um fragmento do cache do dashboard (core/dashboard/cache.py)
+    com chave pelos parâmetros que realmente o afetam; gravações em
+    Comanda/Pagamento/cadastros invalidam os fragmentos dependentes.
+    """
+    hoje = hoje or timezone.now().date()
+    data_inicio, data_fim = periodo_dashboard(filtros, hoje)
+    parametros = {'filtros': filtros, 'hoje': hoje}
+
+    kpis_alertas = obter_ou_calcular(
+        'financeiro_kpis', parametros, lambda: calcular_kpis(filtros, hoje),
+    )
+    dados_mensais = obter_ou_calcular(
+        'financeiro_mensal',
+        {'imovel': filtros['imovel'], 'ano': filtros['ano'], 'mes': filtros['mes'], 'hoje': hoje},
+        lambda: calcular_dados_mensais(filtros, hoje),
+    )
+    performance_imoveis = obter_ou_calcular(
+        'financeiro_performance', parametros, lambda: calcular_performance(filtros, hoje),
+        depende=(FINANCEIRO, CADASTROS),
+    )
+    ultimos_pagamentos = obter_ou_calcular(
+        'financeiro_ultimos_pagamentos', {'inicio': data_inicio, 'fim': data_fim},
+        lambda: calcular_ultimos_pagamentos(data_inicio, data_fim),
+        depende=(FINANCEIRO, CADASTROS),
+    )
+
+    return {
+        'data_inicio': data_inicio,
+        'data_fim': data_fim,
+        'kpis': kpis_alertas['kpis'],
+        'dados_mensais': dados_mensais,
+        'performance_imoveis': performance_imoveis,
+        'ultimos_pagamentos': ultimos_pagamentos,
+        'alertas': kpis_alertas['alertas'],
+    }
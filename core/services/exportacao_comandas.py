@@ -0,0 +1,114 @@
+"""
+Exportação de Comandas (CSV / XLSX)
+Streaming a partir de um queryset anotado: nenhuma consulta por linha
+
+- Valores calculados (aluguel atual, total, pago, pendente) vêm do SQL
+  via Comanda.objects.com_totais()
+- Linhas lidas com .values_list().iterator(chunk_size) e escritas
+  conforme são enviadas ao navegador (memória constante)
+"""
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from core.models import Comanda
+from core.utils.streaming import csv_streaming, xlsx_streaming
+
+EXPORTACAO_CHUNK_SIZE = 2000
+
+CENTAVOS = Decimal('0.01')
+
+CABECALHO = [
+    'Número',
+    'Locação',
+    'Locatário',
+    'Imóvel',
+    'Mês/Ano',
+    'Vencimento',
+    'Valor Aluguel',
+    'Valor Condomínio',
+    'Outros Débitos',
+    'Outros Créditos',
+    'Multa',
+    'Juros',
+    'Desconto',
+    'Valor Total',
+    'Valor Pago',
+    'Valor Pendente',
+    'Status',
+]
+
+_CAMPOS = (
+    'numero_comanda',
+    'locacao__numero_contrato',
+    'locacao__locatario__nome_razao_social',
+    'locacao__imovel__codigo_imovel',
+    'mes_referencia',
+    'data_vencimento',
+    'valor_aluguel_atual',
+    'valor_condominio',
+    'outros_debitos',
+    'outros_creditos',
+    'valor_multa',
+    'valor_juros',
+    'desconto',
+    'valor_total_calculado',
+    'valor_pago',
+    'valor_pendente_calculado',
+    'status',
+)
+
+
+def linhas_comandas(queryset, chunk_size=EXPORTACAO_CHUNK_SIZE):
+    """
+    Itera as linhas da exportação com valores nativos (date/Decimal).
+    Uma única consulta, lida em blocos de ``chunk_size``.
+    """
+    status_display = dict(Comanda.StatusComanda.choices)
+    valores = (
+        queryset.com_totais()
+        .order_by('mes_referencia', 'numero_comanda')
+        .values_list(*_CAMPOS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for linha in valores:
+        # Expressões calculadas podem vir sem a escala (ex.: SQLite)
+        linha = [v.quantize(CENTAVOS) if isinstance(v, Decimal) else v for v in linha]
+        linha[4] = linha[4].strftime('%m/%Y') if linha[4] else ''
+        linha[-1] = str(status_display.get(linha[-1], linha[-1]))
+        yield linha
+
+
+def _formatar_csv(linha):
+    """Formato brasileiro no CSV: vírgula decimal e datas dd/mm/aaaa."""
+    saida = []
+    for valor in linha:
+        if hasattr(valor, 'strftime'):
+            saida.append(valor.strftime('%d/%m/%Y'))
+        elif valor is None:
+            saida.append('')
+        else:
+            saida.append(str(valor).replace('.', ',') if not isinstance(valor, str) else valor)
+    return saida
+
+
+def resposta_exportacao_comandas(queryset, formato='csv'):
+    """StreamingHttpResponse com as comandas em CSV (;) ou XLSX."""
+    nome = f"comandas_{timezone.localdate().strftime('%Y%m%d')}"
+    linhas = linhas_comandas(queryset)
+
+    if formato == 'xlsx':
+        response = StreamingHttpResponse(
+            xlsx_streaming(CABECALHO, linhas, nome_planilha='Comandas'),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{nome}.xlsx"'
+        return response
+
+    response = StreamingHttpResponse(
+        csv_streaming(CABECALHO, (_formatar_csv(linha) for linha in linhas)),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nome}.csv"'
+    return response
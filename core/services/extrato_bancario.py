@@ -0,0 +1,467 @@
+"""
+Importação de Extrato Bancário (OFX / CSV) e Conciliação PIX/Transferência
+Cada crédito do extrato é comparado às comandas em aberto e pontuado
+
+- Leitura em streaming (OFX SGML/XML ou CSV com cabeçalho); só créditos,
+  conciliados e gravados em lotes de EXTRATO_LOTE (memória constante)
+- Comandas em aberto carregadas em UMA consulta e indexadas em dicts por
+  CPF/CNPJ do locatário (só dígitos) e por valor (pendente e total):
+  cada crédito consulta apenas os seus candidatos, O(1) por linha
+- Pontuação (ordem dos candidatos na revisão): documento do pagador,
+  valor igual ao pendente (ou ao total) e proximidade do vencimento
+- Documento + valor pendente exatos em uma única comanda → pagamento
+  confirmado automaticamente (a pontuação não decide: documento + total
+  de uma comanda parcialmente paga seria um pagamento a mais); demais
+  casos com candidatos → revisão no admin; sem candidatos → sem
+  correspondência
+- Identificador (FITID ou hash da linha) impede importar o mesmo crédito
+  duas vezes
+- Linhas ilegíveis (valor ou data inválidos) voltam no relatório, com a
+  linha e o motivo, sem interromper o arquivo
+"""
+import csv
+import hashlib
+import itertools
+import logging
+import os
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Comanda, FormaPagamento, LancamentoExtrato, Pagamento, StatusPagamento
+from core.services.pagamentos_lote import gravar_pagamentos
+
+logger = logging.getLogger(__name__)
+
+PONTOS_DOCUMENTO = 60
+PONTOS_VALOR_PENDENTE = 30
+PONTOS_VALOR_TOTAL = 20
+PONTOS_VENCIMENTO = 10
+
+# Dias de distância do vencimento que ainda somam pontos
+JANELA_VENCIMENTO_DIAS = 30
+
+# Candidatos guardados para a revisão
+MAXIMO_CANDIDATOS = 5
+
+# Créditos por lote (uma consulta de duplicados, uma transação)
+EXTRATO_LOTE = 500
+
+STATUS_CONCILIAVEIS = (
+    Comanda.StatusComanda.PENDENTE,
+    Comanda.StatusComanda.VENCIDA,
+    Comanda.StatusComanda.PARCIALMENTE_PAGA,
+)
+
+# CPF (000.000.000-00) ou CNPJ (00.000.000/0000-00), com ou sem pontuação;
+# documentos mascarados (***.456.789-**) não servem para conciliar
+RE_DOCUMENTO = re.compile(r'(?<![\d*])(\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}|\d{3}\.?\d{3}\.?\d{3}-?\d{2})(?![\d*])')
+RE_TAG_OFX = re.compile(r'<([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+COLUNAS_CSV = {
+    'data': ('data', 'date', 'data_lancamento', 'dt'),
+    'valor': ('valor', 'amount', 'valor_r$', 'credito'),
+    'descricao': ('descricao', 'descrição', 'historico', 'histórico', 'memo', 'lancamento', 'lançamento'),
+    'documento': ('documento', 'cpf_cnpj', 'cpf', 'cnpj', 'documento_pagador'),
+    'identificador': ('identificador', 'id', 'fitid', 'id_transacao'),
+}
+
+
+class ExtratoInvalido(ValueError):
+    pass
+
+
+def _invalido(linha, erro):
+    return {'linha': linha, 'invalido': str(erro)}
+
+
+def somente_digitos(texto):
+    return re.sub(r'\D', '', texto or '')
+
+
+def documento_na_descricao(descricao):
+    """Primeiro CPF (11) ou CNPJ (14 dígitos) completo citado na descrição."""
+    for encontrado in RE_DOCUMENTO.findall(descricao or ''):
+        digitos = somente_digitos(encontrado)
+        if len(digitos) in (11, 14):
+            return digitos
+    return ''
+
+
+def _valor(texto):
+    texto = (texto or '').strip().replace('R$', '').replace(' ', '')
+    negativo = texto.startswith('(') and texto.endswith(')')
+    texto = texto.strip('()')
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        raise ExtratoInvalido(f'Valor inválido: {texto!r}')
+    return -valor if negativo else valor
+
+
+def _data(texto):
+    texto = (texto or '').strip()
+    for formato in ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ExtratoInvalido(f'Data inválida: {texto!r}')
+
+
+def _linhas(arquivo):
+    """Linhas de texto de um caminho ou arquivo (bytes: UTF-8, senão latin-1)."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as f:
+            yield from _linhas(f)
+        return
+    for linha in arquivo:
+        if isinstance(linha, bytes):
+            try:
+                linha = linha.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                linha = linha.decode('latin-1')
+        yield linha.lstrip('﻿').rstrip('\r\n')
+
+
+def ler_extrato(arquivo, formato=None):
+    """
+    Gera um dict por crédito: ``identificador``, ``data``, ``valor``,
+    ``descricao``, ``documento`` (só dígitos, do arquivo ou da descrição).
+    Linhas ilegíveis geram só ``{'linha', 'invalido'}`` (o erro); arquivo
+    sem estrutura reconhecível levanta ExtratoInvalido antes do 1º registro.
+    ``formato``: 'ofx', 'csv' ou None (detecta pela primeira linha).
+    """
+    linhas = _linhas(arquivo)
+    primeiras = []
+    for linha in linhas:
+        primeiras.append(linha)
+        if linha.strip():
+            break
+    if not primeiras:
+        return
+    if formato is None:
+        inicio = primeiras[-1].lstrip().upper()
+        formato = 'ofx' if inicio.startswith(('OFXHEADER', '<OFX', '<?XML')) else 'csv'
+
+    linhas = itertools.chain(primeiras, linhas)
+    if formato == 'ofx':
+        yield from _ler_ofx(linhas)
+    elif formato == 'csv':
+        yield from _ler_csv(linhas)
+    else:
+        raise ExtratoInvalido(f'Formato desconhecido: {formato}')
+
+
+def _ler_ofx(linhas):
+    transacao = None
+    inicio = None
+    for numero, linha in enumerate(linhas, start=1):
+        for tag, valor in RE_TAG_OFX.findall(linha):
+            tag = tag.upper()
+            valor = valor.strip()
+            if tag == 'STMTTRN':
+                transacao, inicio = {}, numero
+            elif transacao is not None and tag in ('TRNTYPE', 'DTPOSTED', 'TRNAMT', 'FITID', 'NAME', 'MEMO', 'PAYEEID'):
+                transacao[tag] = valor
+        if transacao is not None and '</STMTTRN>' in linha.upper():
+            try:
+                credito = _credito_ofx(transacao)
+            except ExtratoInvalido as e:
+                credito = _invalido(inicio, e)
+            transacao = None
+            if credito:
+                yield credito
+
+
+def _credito_ofx(transacao):
+    valor = _valor(transacao.get('TRNAMT'))
+    if valor <= 0:
+        return None
+    descricao = ' '.join(filter(None, (transacao.get('NAME'), transacao.get('MEMO'))))
+    documento = somente_digitos(transacao.get('PAYEEID'))
+    return {
+        'identificador': f"ofx:{transacao.get('FITID') or _hash(transacao)}",
+        'data': _data_ofx(transacao.get('DTPOSTED')),
+        'valor': valor,
+        'descricao': descricao[:255],
+        'documento': documento if len(documento) in (11, 14) else documento_na_descricao(descricao),
+    }
+
+
+def _data_ofx(texto):
+    """AAAAMMDD[hhmmss...] do DTPOSTED."""
+    if not texto:
+        raise ExtratoInvalido('Transação sem DTPOSTED')
+    try:
+        return datetime.strptime(texto[:8], '%Y%m%d').date()
+    except ValueError:
+        raise ExtratoInvalido(f'Data inválida: {texto!r}')
+
+
+def _hash(*partes):
+    return hashlib.sha1('|'.join(str(parte) for parte in partes).encode()).hexdigest()[:32]
+
+
+class _DialetoPadrao(csv.excel):
+    delimiter = ';'
+
+
+def _ler_csv(linhas):
+    linhas = iter(linhas)
+    cabecalho = next(linhas, '')
+    try:
+        dialeto = csv.Sniffer().sniff(cabecalho, delimiters=';,\t|')
+    except csv.Error:
+        dialeto = _DialetoPadrao
+    leitor = csv.reader(itertools.chain([cabecalho], linhas), dialeto)
+
+    nomes = [coluna.strip().lower() for coluna in next(leitor)]
+    posicoes = {}
+    for campo, apelidos in COLUNAS_CSV.items():
+        for apelido in apelidos:
+            if apelido in nomes:
+                posicoes[campo] = nomes.index(apelido)
+                break
+    faltando = {'data', 'valor'} - set(posicoes)
+    if faltando:
+        raise ExtratoInvalido(f"CSV sem coluna: {', '.join(sorted(faltando))}")
+
+    def coluna(registro, campo):
+        posicao = posicoes.get(campo)
+        return registro[posicao].strip() if posicao is not None and posicao < len(registro) else ''
+
+    ocorrencias = {}
+    for registro in leitor:
+        if not any(registro):
+            continue
+        try:
+            valor = _valor(coluna(registro, 'valor'))
+            if valor <= 0:
+                continue
+            data = _data(coluna(registro, 'data'))
+        except ExtratoInvalido as e:
+            yield _invalido(leitor.line_num, e)
+            continue
+        descricao = coluna(registro, 'descricao')
+        documento = somente_digitos(coluna(registro, 'documento'))
+        identificador = coluna(registro, 'identificador')
+        if not identificador:
+            # Linhas idênticas no mesmo arquivo são créditos distintos
+            chave = (data, valor, descricao, documento)
+            ocorrencias[chave] = ocorrencias.get(chave, 0) + 1
+            identificador = _hash(*chave, ocorrencias[chave])
+        yield {
+            'identificador': f'csv:{identificador}',
+            'data': data,
+            'valor': valor,
+            'descricao': descricao[:255],
+            'documento': documento if len(documento) in (11, 14) else documento_na_descricao(descricao),
+        }
+
+
+# ════════════════════════════════════════════
+# CONCILIAÇÃO
+# ════════════════════════════════════════════
+
+class IndiceConciliacao:
+    """Comandas em aberto indexadas por documento do locatário e por valor."""
+
+    def __init__(self):
+        linhas = (
+            Comanda.objects.filter(is_active=True, status__in=STATUS_CONCILIAVEIS)
+            .com_totais()
+            .order_by()
+            .values_list(
+                'pk', 'valor_pendente_calculado', 'valor_total_calculado',
+                'data_vencimento', 'locacao__locatario__cpf_cnpj',
+            )
+        )
+        self.por_documento = {}
+        self.por_valor = {}
+        for pk, pendente, total, vencimento, cpf_cnpj in linhas:
+            comanda = (pk, pendente, total, vencimento, somente_digitos(cpf_cnpj))
+            if comanda[4]:
+                self.por_documento.setdefault(comanda[4], []).append(comanda)
+            self.por_valor.setdefault(pendente, []).append(comanda)
+            if total != pendente:
+                self.por_valor.setdefault(total, []).append(comanda)
+        # Comandas já conciliadas automaticamente nesta importação
+        self.conciliadas = set()
+
+    def pontuar(self, credito):
+        """
+        ``(candidatos, exatos)``: ``[(pontuacao, pk)]`` em ordem decrescente
+        de pontuação e as pks com documento e valor pendente iguais ao crédito.
+        """
+        candidatos, exatos = {}, []
+        for comanda in itertools.chain(
+            self.por_documento.get(credito['documento'], ()) if credito['documento'] else (),
+            self.por_valor.get(credito['valor'], ()),
+        ):
+            pk, pendente, total, vencimento, documento = comanda
+            if pk in candidatos or pk in self.conciliadas:
+                continue
+            pontos = 0
+            if credito['documento'] and documento == credito['documento']:
+                pontos += PONTOS_DOCUMENTO
+            if credito['valor'] == pendente:
+                pontos += PONTOS_VALOR_PENDENTE
+                if credito['documento'] and documento == credito['documento']:
+                    exatos.append(pk)
+            elif credito['valor'] == total:
+                pontos += PONTOS_VALOR_TOTAL
+            if vencimento:
+                distancia = abs((credito['data'] - vencimento).days)
+                if distancia <= JANELA_VENCIMENTO_DIAS:
+                    pontos += round(PONTOS_VENCIMENTO * (1 - distancia / JANELA_VENCIMENTO_DIAS))
+            candidatos[pk] = pontos
+        ordenados = sorted(((pontos, pk) for pk, pontos in candidatos.items()), key=lambda c: (-c[0], str(c[1])))
+        return ordenados, exatos
+
+    def conciliar(self, credito):
+        """``(status, pontuacao, comanda_pk, candidatos)`` do crédito."""
+        candidatos, exatos = self.pontuar(credito)
+        if not candidatos:
+            return LancamentoExtrato.Status.SEM_CORRESPONDENCIA, 0, None, []
+
+        lista = [{'comanda': str(c[1]), 'pontuacao': c[0]} for c in candidatos[:MAXIMO_CANDIDATOS]]
+        if len(exatos) == 1:
+            pk = exatos[0]
+            self.conciliadas.add(pk)
+            pontuacao = next(pontos for pontos, candidato in candidatos if candidato == pk)
+            return LancamentoExtrato.Status.CONCILIADO, pontuacao, pk, lista
+        return LancamentoExtrato.Status.REVISAO, candidatos[0][0], None, lista
+
+
+def _forma_pagamento(descricao):
+    return FormaPagamento.PIX if 'PIX' in (descricao or '').upper() else FormaPagamento.TRANSFERENCIA
+
+
+def _pagamento(lancamento, comanda_id, usuario, agora):
+    return Pagamento(
+        comanda_id=comanda_id,
+        usuario_registro=usuario,
+        valor_pago=lancamento.valor,
+        data_pagamento=lancamento.data,
+        data_confirmacao=agora,
+        forma_pagamento=_forma_pagamento(lancamento.descricao),
+        status=StatusPagamento.CONFIRMADO,
+        observacoes=f'Extrato bancário: {lancamento.descricao}'[:500],
+        referencia_externa=f'extrato:{lancamento.identificador}'[:100],
+    )
+
+
+def _ja_importados(identificadores, fatia=500):
+    identificadores = list(set(identificadores))
+    existentes = set()
+    for inicio in range(0, len(identificadores), fatia):
+        existentes.update(
+            LancamentoExtrato.objects.filter(identificador__in=identificadores[inicio:inicio + fatia])
+            .order_by().values_list('identificador', flat=True)
+        )
+    return existentes
+
+
+def _gravar_lote(lancamentos, usuario):
+    agora = timezone.now()
+    with transaction.atomic():
+        conciliados = [l for l in lancamentos if l.status == LancamentoExtrato.Status.CONCILIADO]
+        pagamentos = [_pagamento(l, l.comanda_id, usuario, agora) for l in conciliados]
+        gravar_pagamentos(pagamentos)
+        for lancamento, pagamento in zip(conciliados, pagamentos):
+            lancamento.pagamento = pagamento
+        LancamentoExtrato.objects.bulk_create(lancamentos, batch_size=EXTRATO_LOTE)
+
+
+def importar_extrato(arquivo, usuario, formato=None, simular=False, tamanho_lote=EXTRATO_LOTE):
+    """
+    Importa e concilia o extrato, lote a lote (cada lote gravado na sua
+    transação; reimportar após uma falha pula o que já foi gravado).
+    Retorna ``{'creditos', 'duplicados', 'conciliados', 'revisao',
+    'sem_correspondencia', 'invalidos'}``; ``invalidos`` traz linha e
+    motivo das linhas ilegíveis, que não interrompem a importação.
+    """
+    indice = IndiceConciliacao()
+    creditos = ler_extrato(arquivo, formato)
+    vistos = set()
+    total = 0
+    contagem = {status: 0 for status in LancamentoExtrato.Status.values}
+    invalidos = []
+
+    while True:
+        registros = list(itertools.islice(creditos, tamanho_lote))
+        if not registros:
+            break
+        lote = []
+        for registro in registros:
+            if 'invalido' in registro:
+                invalidos.append({'linha': registro['linha'], 'motivo': registro['invalido']})
+            else:
+                lote.append(registro)
+        total += len(lote)
+        existentes = _ja_importados(credito['identificador'] for credito in lote)
+        lancamentos = []
+        for credito in lote:
+            if credito['identificador'] in existentes or credito['identificador'] in vistos:
+                continue
+            vistos.add(credito['identificador'])
+            status, pontuacao, comanda_pk, candidatos = indice.conciliar(credito)
+            contagem[status] += 1
+            lancamentos.append(LancamentoExtrato(
+                identificador=credito['identificador'],
+                data=credito['data'],
+                valor=credito['valor'],
+                descricao=credito['descricao'],
+                documento_pagador=credito['documento'],
+                status=status,
+                pontuacao=pontuacao,
+                comanda_id=comanda_pk,
+                candidatos=candidatos,
+            ))
+        if not simular and lancamentos:
+            _gravar_lote(lancamentos, usuario)
+
+    logger.info(
+        f"🏦 Extrato: {total} créditos, {contagem['conciliado']} conciliados, "
+        f"{contagem['revisao']} em revisão, {contagem['sem_correspondencia']} sem correspondência, "
+        f"{len(invalidos)} linhas inválidas{' (simulação)' if simular else ''}"
+    )
+    return {
+        'creditos': total,
+        'duplicados': total - len(vistos),
+        'conciliados': contagem['conciliado'],
+        'revisao': contagem['revisao'],
+        'sem_correspondencia': contagem['sem_correspondencia'],
+        'invalidos': invalidos,
+    }
+
+
+def confirmar_lancamentos(lancamentos, usuario):
+    """
+    Revisão: registra o pagamento dos lançamentos com comanda escolhida e
+    ainda sem pagamento. Retorna quantos foram confirmados.
+    """
+    pendentes = [
+        lancamento for lancamento in lancamentos
+        if lancamento.comanda_id and lancamento.pagamento_id is None
+        and lancamento.status != LancamentoExtrato.Status.IGNORADO
+    ]
+    if not pendentes:
+        return 0
+
+    agora = timezone.now()
+    with transaction.atomic():
+        pagamentos = [_pagamento(l, l.comanda_id, usuario, agora) for l in pendentes]
+        gravar_pagamentos(pagamentos)
+        for lancamento, pagamento in zip(pendentes, pagamentos):
+            lancamento.pagamento = pagamento
+            lancamento.status = LancamentoExtrato.Status.CONCILIADO
+            lancamento.updated_at = agora
+        LancamentoExtrato.objects.bulk_update(pendentes, ['pagamento', 'status', 'updated_at'])
+    return len(pendentes)
@@ -0,0 +1,557 @@
+"""
+Importação em Massa da Carteira (locadores, imóveis, locatários, locações)
+Uma planilha CSV/XLSX por tipo, com o nome dos campos do model no cabeçalho
+
+- Leitura em streaming (csv / core.utils.streaming.xlsx_linhas) em lotes
+  de IMPORTACAO_LOTE linhas: a memória não cresce com o tamanho do arquivo
+- Cada linha é validada em Python (full_clean sem consultas + as
+  validações de CPF/CNPJ/CEP do models); erros ficam por linha
+- Por lote: UMA consulta de registros existentes (chave natural) e UMA por
+  tipo de referência (ex.: locador pelo CPF/CNPJ, imóvel pelo código),
+  depois bulk_create. Nada de save() por linha
+- Linhas já cadastradas são contadas como existentes (reimportar é seguro)
+- Checkpoint: cada lote grava e avança ImportacaoCarteira.linhas_processadas
+  na mesma transação; o mesmo arquivo de novo continua de onde parou
+- ``simular=True`` valida e resolve referências sem gravar nada
+
+Colunas de referência: imóveis usam ``locador_cpf_cnpj``; locações usam
+``codigo_imovel`` e ``locatario_cpf_cnpj``.
+"""
+import codecs
+import csv
+import hashlib
+import io
+import logging
+import os
+import unicodedata
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from core.models import (
+    Imovel, ImportacaoCarteira, Locacao, Locador, Locatario, Usuario,
+    validate_cep, validate_cnpj, validate_cpf,
+)
+from core.services import indice_busca
+from core.utils.streaming import data_serial_excel, xlsx_linhas
+
+logger = logging.getLogger(__name__)
+
+# Linhas por lote (uma transação, um checkpoint)
+IMPORTACAO_LOTE = 500
+
+# Erros guardados na ImportacaoCarteira (o total é sempre contado)
+IMPORTACAO_MAXIMO_ERROS = 1000
+
+
+class PlanilhaInvalida(ValueError):
+    pass
+
+
+def somente_digitos(valor):
+    return ''.join(filter(str.isdigit, valor or ''))
+
+
+def formatar_documento(digitos):
+    if len(digitos) == 11:
+        return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+    if len(digitos) == 14:
+        return f"{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}"
+    return digitos
+
+
+def _variantes_documento(digitos):
+    """O cadastro pode ter o documento com ou sem pontuação."""
+    return {digitos, formatar_documento(digitos)}
+
+
+# ════════════════════════════════════════════
+# LEITURA
+# ════════════════════════════════════════════
+
+@contextmanager
+def _abrir(arquivo):
+    """``(arquivo binário, nome)`` de um caminho ou de um arquivo já aberto."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as f:
+            yield f, os.path.basename(arquivo)
+    else:
+        yield arquivo, os.path.basename(getattr(arquivo, 'name', '') or '')
+
+
+def hash_arquivo(f):
+    digest = hashlib.sha256()
+    for pedaco in iter(lambda: f.read(64 * 1024), b''):
+        digest.update(pedaco)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def _coluna(nome):
+    """'Endereço Completo' -> 'endereco_completo'"""
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode()
+    return '_'.join(nome.strip().lower().split())
+
+
+def _linhas_csv(f):
+    amostra = f.read(64 * 1024)
+    f.seek(0)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        encoding = 'latin-1'
+    texto = io.TextIOWrapper(f, encoding=encoding, newline='')
+    try:
+        primeira = texto.readline()
+        try:
+            delimitador = csv.Sniffer().sniff(primeira, delimiters=';,\t').delimiter
+        except csv.Error:
+            delimitador = ';'
+        yield next(csv.reader([primeira], delimiter=delimitador), [])
+        yield from csv.reader(texto, delimiter=delimitador)
+    finally:
+        texto.detach()
+
+
+def ler_planilha(f, formato):
+    """Gera um dict ``{coluna: texto}`` por linha de dados (cabeçalho normalizado)."""
+    linhas = xlsx_linhas(f) if formato == 'xlsx' else _linhas_csv(f)
+    cabecalho = [_coluna(nome) for nome in next(linhas, [])]
+    if not any(cabecalho):
+        raise PlanilhaInvalida('Planilha sem cabeçalho')
+    for linha in linhas:
+        if any(str(valor).strip() for valor in linha):
+            yield {nome: str(valor).strip() for nome, valor in zip(cabecalho, linha) if nome}
+        else:
+            yield None
+
+
+def _formato(f, nome, formato):
+    if formato:
+        return formato
+    extensao = os.path.splitext(nome)[1].lower().lstrip('.')
+    if extensao in ('csv', 'xlsx'):
+        return extensao
+    inicio = f.read(4)
+    f.seek(0)
+    return 'xlsx' if inicio == b'PK\x03\x04' else 'csv'
+
+
+# ════════════════════════════════════════════
+# CONVERSÃO E VALIDAÇÃO
+# ════════════════════════════════════════════
+
+def _data(texto):
+    if texto.replace('.', '', 1).isdigit():
+        return data_serial_excel(texto)
+    for formato in ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValidationError('Data inválida (use dd/mm/aaaa).')
+
+
+def _decimal(texto):
+    texto = texto.replace('R$', '').replace(' ', '')
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        raise ValidationError('Valor numérico inválido.')
+
+
+def _converter(campo, texto):
+    if campo.choices:
+        opcoes = {}
+        for valor, rotulo in campo.flatchoices:
+            opcoes[str(valor).lower()] = valor
+            opcoes[str(rotulo).lower()] = valor
+        try:
+            return opcoes[texto.lower()]
+        except KeyError:
+            raise ValidationError(f'Opção inválida: {texto}.')
+    if isinstance(campo, models.DateField):
+        return _data(texto)
+    if isinstance(campo, models.DecimalField):
+        return _decimal(texto)
+    if isinstance(campo, models.IntegerField):
+        try:
+            return int(_decimal(texto))
+        except (ValueError, ArithmeticError):
+            raise ValidationError('Número inteiro inválido.')
+    if isinstance(campo, models.BooleanField):
+        return texto.lower() in ('1', 'sim', 's', 'true', 'verdadeiro', 'x')
+    return texto
+
+
+def validar_documento(valor):
+    """CPF/CNPJ só com dígitos, validado pelos validadores do models."""
+    digitos = somente_digitos(valor)
+    if len(digitos) == 11:
+        validate_cpf(digitos)
+    elif len(digitos) == 14:
+        validate_cnpj(digitos)
+    else:
+        raise ValidationError('CPF/CNPJ deve ter 11 ou 14 dígitos.')
+    return digitos
+
+
+class _Importador:
+    """Importação de um model: campos, chave natural e referências."""
+
+    modelo = None
+    # Colunas de referência: coluna -> (campo FK, model, campo de busca)
+    referencias = {}
+    ignorar = ('id', 'created_at', 'updated_at', 'is_active')
+
+    def __init__(self):
+        self.campos = [
+            campo for campo in self.modelo._meta.concrete_fields
+            if campo.editable and not campo.is_relation and campo.name not in self.ignorar
+        ]
+        self.fks = [campo.name for campo in self.modelo._meta.concrete_fields if campo.is_relation]
+
+    def preparar(self, linha):
+        """Instância validada (ainda sem FKs) e as chaves de referência da linha."""
+        valores, erros = {}, {}
+        for campo in self.campos:
+            texto = linha.get(campo.name, '')
+            if not texto:
+                continue
+            try:
+                valores[campo.name] = _converter(campo, texto)
+            except ValidationError as e:
+                erros[campo.name] = e.messages
+        self.normalizar(valores, erros)
+
+        instancia = self.modelo(**valores)
+        try:
+            instancia.full_clean(exclude=self.fks + list(erros), validate_unique=False)
+        except ValidationError as e:
+            erros.update(e.message_dict)
+
+        chaves = {}
+        for coluna, (_, modelo, campo) in self.referencias.items():
+            texto = linha.get(coluna, '')
+            if not texto:
+                erros[coluna] = ['Este campo é obrigatório.']
+            elif campo == 'cpf_cnpj':
+                chaves[coluna] = somente_digitos(texto)
+            else:
+                chaves[coluna] = texto
+        if erros:
+            raise ValidationError(erros)
+        return instancia, chaves
+
+    def normalizar(self, valores, erros):
+        """CPF/CNPJ e CEP validados e gravados no formato do cadastro."""
+        if 'cpf_cnpj' in valores:
+            try:
+                valores['cpf_cnpj'] = formatar_documento(validar_documento(valores['cpf_cnpj']))
+            except ValidationError as e:
+                erros['cpf_cnpj'] = e.messages
+        if 'cep' in valores:
+            try:
+                validate_cep(valores['cep'])
+                digitos = somente_digitos(valores['cep'])
+                valores['cep'] = f'{digitos[:5]}-{digitos[5:]}'
+            except ValidationError as e:
+                erros['cep'] = e.messages
+
+    def carregar_referencias(self, chaves):
+        """``{coluna: {chave: instância}}`` com uma consulta por coluna."""
+        mapas = {}
+        for coluna, (_, modelo, campo) in self.referencias.items():
+            valores = {chave[coluna] for chave in chaves if coluna in chave}
+            if campo == 'cpf_cnpj':
+                busca = set().union(*(_variantes_documento(v) for v in valores)) if valores else set()
+                mapas[coluna] = {
+                    somente_digitos(obj.cpf_cnpj): obj
+                    for obj in modelo.objects.filter(cpf_cnpj__in=busca)
+                }
+            else:
+                mapas[coluna] = modelo.objects.filter(**{f'{campo}__in': valores}).in_bulk(field_name=campo)
+        return mapas
+
+    def chave(self, instancia):
+        raise NotImplementedError
+
+    def existentes(self, instancias):
+        """Chaves naturais de ``instancias`` já cadastradas (uma consulta)."""
+        raise NotImplementedError
+
+    def conflitos(self, instancias):
+        """Erros de unicidade além da chave natural: ``{pk: {campo: [msg]}}``."""
+        return {}
+
+    def antes_de_gravar(self, instancias, simular):
+        pass
+
+
+class _ImportadorDocumento(_Importador):
+    """Locadores e locatários: chave natural é o CPF/CNPJ."""
+
+    def chave(self, instancia):
+        return somente_digitos(instancia.cpf_cnpj)
+
+    def existentes(self, instancias):
+        busca = set().union(*(_variantes_documento(self.chave(i)) for i in instancias)) if instancias else set()
+        return {
+            somente_digitos(valor)
+            for valor in self.modelo.objects.filter(cpf_cnpj__in=busca).values_list('cpf_cnpj', flat=True)
+        }
+
+
+class ImportadorLocadores(_ImportadorDocumento):
+    modelo = Locador
+
+    def normalizar(self, valores, erros):
+        super().normalizar(valores, erros)
+        if 'tipo_locador' not in valores and len(somente_digitos(valores.get('cpf_cnpj'))) == 14:
+            valores['tipo_locador'] = Locador.TipoLocador.PESSOA_JURIDICA
+
+    def antes_de_gravar(self, locadores, simular):
+        """Cada locador precisa do seu usuário (criados em lote)."""
+        if simular or not locadores:
+            return
+        nomes = {locador.pk: f'locador_{self.chave(locador)}' for locador in locadores}
+        ocupados = set(Usuario.objects.filter(username__in=nomes.values()).values_list('username', flat=True))
+        usuarios = []
+        for locador in locadores:
+            username = nomes[locador.pk]
+            if username in ocupados:
+                username = f'{username}_{uuid.uuid4().hex[:6]}'
+            usuario = Usuario(
+                username=username,
+                email=locador.email,
+                first_name=locador.nome_razao_social[:150],
+                tipo_usuario=Usuario.TipoUsuario.LOCADOR,
+            )
+            usuario.set_unusable_password()
+            usuarios.append(usuario)
+            locador.usuario = usuario
+        Usuario.objects.bulk_create(usuarios, batch_size=IMPORTACAO_LOTE)
+
+
+class ImportadorLocatarios(_ImportadorDocumento):
+    modelo = Locatario
+
+
+class ImportadorImoveis(_Importador):
+    modelo = Imovel
+    referencias = {'locador_cpf_cnpj': ('locador', Locador, 'cpf_cnpj')}
+
+    def normalizar(self, valores, erros):
+        super().normalizar(valores, erros)
+        if 'estado' in valores:
+            valores['estado'] = valores['estado'].upper()
+
+    def chave(self, instancia):
+        return instancia.codigo_imovel
+
+    def existentes(self, instancias):
+        return set(
+            Imovel.objects.filter(codigo_imovel__in=[i.codigo_imovel for i in instancias])
+            .values_list('codigo_imovel', flat=True)
+        )
+
+
+class ImportadorLocacoes(_Importador):
+    """Chave natural: imóvel + locatário + início do contrato."""
+
+    modelo = Locacao
+    referencias = {
+        'codigo_imovel': ('imovel', Imovel, 'codigo_imovel'),
+        'locatario_cpf_cnpj': ('locatario', Locatario, 'cpf_cnpj'),
+    }
+
+    def chave(self, instancia):
+        return (instancia.imovel_id, instancia.locatario_id, instancia.data_inicio)
+
+    def existentes(self, instancias):
+        if not instancias:
+            return set()
+        return set(
+            Locacao.objects.filter(
+                imovel__in={i.imovel_id for i in instancias},
+                data_inicio__in={i.data_inicio for i in instancias},
+            ).values_list('imovel_id', 'locatario_id', 'data_inicio')
+        )
+
+    def antes_de_gravar(self, locacoes, simular):
+        """Caução calculada como no save() e números reservados em bloco."""
+        for locacao in locacoes:
+            if locacao.tipo_garantia == 'caucao' and locacao.caucao_quantidade_meses:
+                locacao.caucao_valor_total = locacao.calcular_valor_caucao()
+        if not simular:
+            Locacao.alocar_numeros_contrato(locacoes)
+
+    def conflitos(self, locacoes):
+        """Número de contrato informado na planilha e já cadastrado."""
+        informadas = [locacao for locacao in locacoes if locacao.numero_contrato]
+        if not informadas:
+            return {}
+        usados = set(
+            Locacao.objects.filter(numero_contrato__in=[locacao.numero_contrato for locacao in informadas])
+            .values_list('numero_contrato', flat=True)
+        )
+        return {
+            locacao.pk: {'numero_contrato': ['Número de contrato já cadastrado.']}
+            for locacao in informadas if locacao.numero_contrato in usados
+        }
+
+
+IMPORTADORES = {
+    ImportacaoCarteira.Tipo.LOCADORES: ImportadorLocadores,
+    ImportacaoCarteira.Tipo.IMOVEIS: ImportadorImoveis,
+    ImportacaoCarteira.Tipo.LOCATARIOS: ImportadorLocatarios,
+    ImportacaoCarteira.Tipo.LOCACOES: ImportadorLocacoes,
+}
+
+
+# ════════════════════════════════════════════
+# IMPORTAÇÃO
+# ════════════════════════════════════════════
+
+class _Resultado:
+
+    def __init__(self, importacao=None):
+        self.criados = importacao.criados if importacao else 0
+        self.existentes = importacao.existentes if importacao else 0
+        self.total_erros = importacao.total_erros if importacao else 0
+        self.erros = list(importacao.erros) if importacao else []
+
+    def erro(self, linha, erros):
+        self.total_erros += 1
+        if len(self.erros) < IMPORTACAO_MAXIMO_ERROS:
+            self.erros.append({'linha': linha, 'erros': erros})
+
+
+def _processar_lote(importador, lote, vistas, resultado, simular):
+    preparadas = []
+    for numero, linha in lote:
+        try:
+            preparadas.append((numero, *importador.preparar(linha)))
+        except ValidationError as e:
+            resultado.erro(numero, e.message_dict)
+
+    mapas = importador.carregar_referencias([chaves for _, _, chaves in preparadas])
+    resolvidas = []
+    for numero, instancia, chaves in preparadas:
+        faltando = {}
+        for coluna, (campo_fk, modelo, _) in importador.referencias.items():
+            referencia = mapas[coluna].get(chaves[coluna])
+            if referencia is None:
+                faltando[coluna] = [f'{modelo._meta.verbose_name} não encontrado: {chaves[coluna]}.']
+            else:
+                setattr(instancia, campo_fk, referencia)
+        if faltando:
+            resultado.erro(numero, faltando)
+        else:
+            resolvidas.append((numero, instancia))
+
+    existentes = importador.existentes([instancia for _, instancia in resolvidas])
+    conflitos = importador.conflitos([instancia for _, instancia in resolvidas])
+    novas = []
+    for numero, instancia in resolvidas:
+        chave = importador.chave(instancia)
+        if chave in existentes:
+            resultado.existentes += 1
+        elif chave in vistas:
+            resultado.erro(numero, {'__all__': ['Registro repetido na planilha.']})
+        elif instancia.pk in conflitos:
+            resultado.erro(numero, conflitos[instancia.pk])
+        else:
+            vistas.add(chave)
+            novas.append(instancia)
+
+    importador.antes_de_gravar(novas, simular)
+    if not simular:
+        # bulk_create não dispara o pre_save que preenche a busca
+        indice_busca.preencher(*novas)
+        importador.modelo.objects.bulk_create(novas, batch_size=IMPORTACAO_LOTE)
+    resultado.criados += len(novas)
+
+
+def importar_carteira(arquivo, tipo, usuario=None, formato=None, simular=False, tamanho_lote=IMPORTACAO_LOTE):
+    """
+    Importa a planilha ``arquivo`` (caminho ou arquivo binário) de ``tipo``
+    (ImportacaoCarteira.Tipo). Retorna ``{'linhas', 'criados', 'existentes',
+    'total_erros', 'erros', 'retomada', 'importacao'}``; ``erros`` traz
+    ``{'linha', 'erros': {campo: [mensagens]}}`` com a linha da planilha.
+    """
+    if tipo not in IMPORTADORES:
+        raise PlanilhaInvalida(f'Tipo desconhecido: {tipo}')
+    importador = IMPORTADORES[tipo]()
+
+    with _abrir(arquivo) as (f, nome):
+        formato = _formato(f, nome, formato)
+        digest = hash_arquivo(f)
+
+        importacao, inicio = None, 0
+        if not simular:
+            importacao = ImportacaoCarteira.objects.filter(
+                tipo=tipo, hash_arquivo=digest, status=ImportacaoCarteira.Status.EM_ANDAMENTO,
+            ).first()
+            if importacao:
+                inicio = importacao.linhas_processadas
+                logger.info(f"📥 Retomando importação de {tipo} na linha {inicio + 2}")
+            else:
+                importacao = ImportacaoCarteira.objects.create(
+                    tipo=tipo, arquivo_nome=nome[:255], hash_arquivo=digest, iniciado_por=usuario,
+                )
+        resultado = _Resultado(importacao if inicio else None)
+
+        # Linha 1 é o cabeçalho: a primeira linha de dados é a 2
+        linhas = (
+            (numero, linha)
+            for numero, linha in enumerate(ler_planilha(f, formato), start=2)
+        )
+        linhas = islice(linhas, inicio, None)
+        vistas = set()
+        processadas = inicio
+        while True:
+            lote = list(islice(linhas, tamanho_lote))
+            if not lote:
+                break
+            with transaction.atomic():
+                _processar_lote(importador, [(n, l) for n, l in lote if l], vistas, resultado, simular)
+                processadas += len(lote)
+                if importacao:
+                    importacao.linhas_processadas = processadas
+                    importacao.criados = resultado.criados
+                    importacao.existentes = resultado.existentes
+                    importacao.total_erros = resultado.total_erros
+                    importacao.erros = resultado.erros
+                    importacao.save(update_fields=[
+                        'linhas_processadas', 'criados', 'existentes', 'total_erros', 'erros', 'updated_at',
+                    ])
+
+    if importacao:
+        importacao.status = ImportacaoCarteira.Status.CONCLUIDA
+        importacao.concluida_em = timezone.now()
+        importacao.save(update_fields=['status', 'concluida_em', 'updated_at'])
+
+    logger.info(
+        f"📥 Importação de {tipo}: {processadas} linhas, {resultado.criados} criados, "
+        f"{resultado.existentes} existentes, {resultado.total_erros} com erro"
+        f"{' (simulação)' if simular else ''}"
+    )
+    return {
+        'linhas': processadas,
+        'criados': resultado.criados,
+        'existentes': resultado.existentes,
+        'total_erros': resultado.total_erros,
+        'erros': resultado.erros,
+        'retomada': bool(inicio),
+        'importacao': importacao,
+    }
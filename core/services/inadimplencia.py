@@ -0,0 +1,152 @@
+"""
+Inadimplência por Faixa de Atraso (aging)
+Todas as comandas vencidas classificadas em UMA consulta (CASE no vencimento)
+
+- Faixas calculadas no SQL comparando data_vencimento com datas de corte
+  (usa o índice de vencimento; sem aritmética de datas por banco)
+- Totais por faixa: values('faixa').annotate(...) → uma consulta
+- Pivôs por locatário e por locador: Sum condicional por faixa
+- Detalhe paginado (Paginator) com valores de Comanda.objects.com_totais()
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.paginator import Paginator
+from django.db.models import Case, CharField, Count, F, Q, Sum, Value, When, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from core.models import VALOR_DECIMAL, Comanda
+
+# (nome, dias de atraso mínimo, máximo); a última faixa é aberta
+FAIXAS_ATRASO = (
+    ('0-30', 1, 30),
+    ('31-60', 31, 60),
+    ('61-90', 61, 90),
+    ('90+', 91, None),
+)
+
+STATUS_EM_ABERTO = (
+    Comanda.StatusComanda.PENDENTE,
+    Comanda.StatusComanda.VENCIDA,
+    Comanda.StatusComanda.PARCIALMENTE_PAGA,
+)
+
+ZERO = Value(Decimal('0.00'))
+
+
+def expressao_faixa_atraso(hoje):
+    """CASE com o nome da faixa de atraso a partir de data_vencimento."""
+    return Case(
+        *[
+            When(data_vencimento__gte=hoje - timedelta(days=maximo), then=Value(nome))
+            for nome, _, maximo in FAIXAS_ATRASO if maximo is not None
+        ],
+        default=Value(FAIXAS_ATRASO[-1][0]),
+        output_field=CharField(),
+    )
+
+
+def comandas_vencidas(hoje=None, queryset=None):
+    """
+    Comandas em aberto com vencimento anterior a ``hoje``, anotadas com
+    os totais (com_totais) e a faixa de atraso.
+    """
+    hoje = hoje or timezone.now().date()
+    queryset = Comanda.objects.all() if queryset is None else queryset
+    return queryset.filter(
+        is_active=True,
+        data_vencimento__lt=hoje,
+        status__in=STATUS_EM_ABERTO,
+    ).com_totais().annotate(faixa=expressao_faixa_atraso(hoje))
+
+
+def _somar(campo, **filtro):
+    return Coalesce(
+        Sum(campo, filter=Q(**filtro) if filtro else None),
+        ZERO,
+        output_field=VALOR_DECIMAL,
+    )
+
+
+def totais_por_faixa(vencidas):
+    """
+    ``{faixa: {'quantidade', 'valor_total', 'valor_pendente'}}`` para todas
+    as faixas (inclusive vazias), em uma consulta.
+    """
+    totais = {
+        nome: {'quantidade': 0, 'valor_total': Decimal('0.00'), 'valor_pendente': Decimal('0.00')}
+        for nome, _, _ in FAIXAS_ATRASO
+    }
+    linhas = vencidas.order_by().values('faixa').annotate(
+        quantidade=Count('pk'),
+        total=_somar('valor_total_calculado'),
+        pendente=_somar('valor_pendente_calculado'),
+    )
+    for linha in linhas:
+        totais[linha['faixa']] = {
+            'quantidade': linha['quantidade'],
+            'valor_total': linha['total'],
+            'valor_pendente': linha['pendente'],
+        }
+    return totais
+
+
+def _pivo(vencidas, chave, nome):
+    colunas = {
+        f"faixa_{nome_faixa.replace('-', '_').replace('+', '_mais')}": _somar(
+            'valor_pendente_calculado', faixa=nome_faixa
+        )
+        for nome_faixa, _, _ in FAIXAS_ATRASO
+    }
+    return vencidas.order_by().values(
+        pessoa_id=F(chave), nome=F(nome)
+    ).annotate(
+        quantidade=Count('pk'),
+        total=_somar('valor_pendente_calculado'),
+        **colunas,
+    ).order_by('-total', 'nome')
+
+
+def pivo_por_locatario(vencidas):
+    """Valor em aberto por locatário e faixa (colunas faixa_0_30 ... faixa_90_mais)."""
+    return _pivo(vencidas, 'locacao__locatario_id', 'locacao__locatario__nome_razao_social')
+
+
+def pivo_por_locador(vencidas):
+    """Valor em aberto por locador (dono do imóvel) e faixa."""
+    return _pivo(vencidas, 'locacao__imovel__locador_id', 'locacao__imovel__locador__nome_razao_social')
+
+
+def detalhe_vencidas(vencidas, faixa=None):
+    """Queryset do detalhe (mais antigas primeiro), opcionalmente de uma faixa."""
+    if faixa:
+        vencidas = vencidas.filter(faixa=faixa)
+    return vencidas.select_related(
+        'locacao', 'locacao__locatario', 'locacao__imovel'
+    ).order_by('data_vencimento', 'numero_comanda')
+
+
+def pagina_detalhe(vencidas, faixa=None, pagina=1, por_pagina=50):
+    """Página do detalhe (django Paginator)."""
+    return Paginator(detalhe_vencidas(vencidas, faixa), por_pagina).get_page(pagina)
+
+
+def mais_recentes_por_faixa(vencidas, limite=5):
+    """
+    As ``limite`` comandas de vencimento mais recente de cada faixa, em uma
+    consulta (ROW_NUMBER particionado pela faixa).
+    """
+    por_faixa = {nome: [] for nome, _, _ in FAIXAS_ATRASO}
+    linhas = vencidas.select_related(
+        'locacao', 'locacao__locatario', 'locacao__imovel'
+    ).annotate(
+        posicao=Window(
+            expression=RowNumber(),
+            partition_by=[F('faixa')],
+            order_by=[F('data_vencimento').desc(), F('numero_comanda').asc()],
+        )
+    ).filter(posicao__lte=limite).order_by('faixa', 'posicao')
+    for comanda in linhas:
+        por_faixa[comanda.faixa].append(comanda)
+    return por_faixa
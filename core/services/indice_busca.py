@@ -0,0 +1,150 @@
+"""
+Índice de Busca (colunas normalizadas)
+Mantém as colunas ``busca``/``documento_digitos`` lidas por
+core/utils/busca.py
+
+- save(): pre_save preenche a coluna da própria linha (core/signals.py)
+  quando algum campo de origem é gravado
+- bulk_create (importação): quem grava chama preencher() antes
+- Locatário/imóvel/locação alterados: o texto deles está copiado nas
+  locações e comandas, que são regravadas em lote (propagar)
+- reindexar(): reconstrói tudo (comando reindexar_busca)
+"""
+import logging
+
+from core.models import Comanda, Imovel, Locacao, Locador, Locatario
+from core.utils.busca import somente_digitos, texto_busca
+
+logger = logging.getLogger(__name__)
+
+# Linhas por bulk_update
+REINDEXACAO_LOTE = 1000
+
+
+def _pessoa(instancia, *extras):
+    instancia.documento_digitos = somente_digitos(instancia.cpf_cnpj)
+    instancia.busca = texto_busca(
+        instancia.nome_razao_social, *extras, instancia.email, somente_digitos(instancia.telefone)
+    )
+
+
+def _locador(locador):
+    _pessoa(locador, locador.representante)
+
+
+def _locatario(locatario):
+    _pessoa(locatario, locatario.rg, locatario.empresa_trabalho)
+
+
+def _imovel(imovel):
+    imovel.busca = texto_busca(imovel.codigo_imovel, imovel.endereco, imovel.numero, imovel.bairro, imovel.cidade)
+
+
+def _locacao(locacao):
+    locatario, imovel = locacao.locatario, locacao.imovel
+    locacao.busca = texto_busca(
+        locacao.numero_contrato,
+        locatario.nome_razao_social,
+        somente_digitos(locatario.cpf_cnpj),
+        imovel.busca,
+    )
+
+
+def _comanda(comanda):
+    comanda.busca = texto_busca(comanda.numero_comanda, comanda.nosso_numero, comanda.locacao.busca)
+
+
+PREENCHEDORES = {
+    Locador: _locador,
+    Locatario: _locatario,
+    Imovel: _imovel,
+    Locacao: _locacao,
+    Comanda: _comanda,
+}
+
+# Campos de busca de cada modelo (bulk_update / comparação antes do save)
+CAMPOS = {
+    Locador: ['busca', 'documento_digitos'],
+    Locatario: ['busca', 'documento_digitos'],
+    Imovel: ['busca'],
+    Locacao: ['busca'],
+    Comanda: ['busca'],
+}
+
+# Campos de origem do texto: save(update_fields=...) sem nenhum deles
+# (status, valores...) não recalcula a busca
+FONTES = {
+    Locador: {'nome_razao_social', 'representante', 'cpf_cnpj', 'email', 'telefone'},
+    Locatario: {'nome_razao_social', 'rg', 'empresa_trabalho', 'cpf_cnpj', 'email', 'telefone'},
+    Imovel: {'codigo_imovel', 'endereco', 'numero', 'bairro', 'cidade'},
+    Locacao: {'numero_contrato', 'locatario', 'locatario_id', 'imovel', 'imovel_id'},
+    Comanda: {'numero_comanda', 'nosso_numero', 'locacao', 'locacao_id'},
+}
+
+
+def afeta_busca(modelo, update_fields=None):
+    return update_fields is None or bool(FONTES[modelo] & set(update_fields))
+
+
+def preencher(*instancias):
+    """Preenche as colunas de busca (sem gravar). FKs devem estar carregadas."""
+    for instancia in instancias:
+        PREENCHEDORES[type(instancia)](instancia)
+
+
+def _regravar(queryset, campos):
+    """Recalcula e grava só as linhas cujo texto mudou. Retorna quantas."""
+    alteradas, total = [], 0
+    for instancia in queryset.iterator(chunk_size=REINDEXACAO_LOTE):
+        antes = [getattr(instancia, campo) for campo in campos]
+        preencher(instancia)
+        if antes != [getattr(instancia, campo) for campo in campos]:
+            alteradas.append(instancia)
+        if len(alteradas) >= REINDEXACAO_LOTE:
+            queryset.model.objects.bulk_update(alteradas, campos)
+            total += len(alteradas)
+            alteradas = []
+    if alteradas:
+        queryset.model.objects.bulk_update(alteradas, campos)
+        total += len(alteradas)
+    return total
+
+
+def _comandas(filtro):
+    return Comanda.objects.filter(**filtro).select_related('locacao').only(
+        'numero_comanda', 'nosso_numero', 'busca', 'locacao__busca'
+    )
+
+
+def _locacoes(filtro):
+    return Locacao.objects.filter(**filtro).select_related('locatario', 'imovel').only(
+        'numero_contrato', 'busca',
+        'locatario__nome_razao_social', 'locatario__cpf_cnpj',
+        'imovel__busca',
+    )
+
+
+def propagar(instancia):
+    """
+    Regrava o texto copiado de ``instancia`` (locatário, imóvel ou
+    locação) nas locações e comandas dependentes.
+    """
+    if isinstance(instancia, Locacao):
+        return _regravar(_comandas({'locacao': instancia}), CAMPOS[Comanda])
+    if isinstance(instancia, (Locatario, Imovel)):
+        filtro = {'locatario' if isinstance(instancia, Locatario) else 'imovel': instancia}
+        locacoes = _regravar(_locacoes(filtro), CAMPOS[Locacao])
+        comandas = _regravar(_comandas({f'locacao__{campo}': valor for campo, valor in filtro.items()}), CAMPOS[Comanda])
+        return locacoes + comandas
+    return 0
+
+
+def reindexar():
+    """Reconstrói todas as colunas de busca, das pessoas às comandas."""
+    totais = {}
+    for modelo in (Locador, Locatario, Imovel):
+        totais[modelo._meta.verbose_name_plural] = _regravar(modelo.objects.all(), CAMPOS[modelo])
+    totais[Locacao._meta.verbose_name_plural] = _regravar(_locacoes({}), CAMPOS[Locacao])
+    totais[Comanda._meta.verbose_name_plural] = _regravar(_comandas({}), CAMPOS[Comanda])
+    logger.info(f"🔎 Índice de busca reconstruído: {totais}")
+    return totais
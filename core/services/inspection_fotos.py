@@ -0,0 +1,137 @@
+"""
+Processamento de Fotos de Vistoria
+Gera as versões da foto DEPOIS do upload, fora do ciclo da requisição
+
+Fluxo:
+1. upload_foto_vistoria grava o arquivo bruto (campo ``original``) e
+   responde imediatamente com status 'pendente'
+2. processar_foto_vistoria (segundo plano) corrige a orientação EXIF e gera:
+   - imagem: 1600px JPEG q75 (usada no PDF, embutida sem recompressão)
+   - miniatura: 320px JPEG q70 (listagens)
+3. O celular consulta o status em /vistoria/<token>/foto/<id>/status/
+"""
+import hashlib
+import logging
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models_inspection import InspectionPhoto
+
+logger = logging.getLogger(__name__)
+
+FOTO_MAX_LADO = 1600
+FOTO_QUALIDADE = 75
+FOTO_MAX_BYTES = int(1.5 * 1024 * 1024)
+
+MINIATURA_MAX_LADO = 320
+MINIATURA_QUALIDADE = 70
+
+# Fotos em processamento há mais que isso (desde processamento_iniciado_em)
+# voltam para a fila na varredura
+PROCESSAMENTO_TIMEOUT = timedelta(minutes=5)
+
+
+def _jpeg(img, qualidade):
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=qualidade, optimize=True)
+    return buffer.getvalue()
+
+
+def gerar_versoes(dados):
+    """
+    Recebe os bytes do upload e devolve ``(imagem_1600, miniatura, (largura, altura))``.
+    Levanta ValueError se a foto continuar grande demais após a compressão.
+    """
+    img = Image.open(BytesIO(dados))
+    img = ImageOps.exif_transpose(img)
+    img = img.convert("RGB")
+
+    if img.width > FOTO_MAX_LADO or img.height > FOTO_MAX_LADO:
+        img.thumbnail((FOTO_MAX_LADO, FOTO_MAX_LADO), Image.LANCZOS)
+    principal = _jpeg(img, FOTO_QUALIDADE)
+    if len(principal) > FOTO_MAX_BYTES:
+        raise ValueError('Foto muito grande (máx 1.5 MB após compressão)')
+
+    tamanho = img.size
+    img.thumbnail((MINIATURA_MAX_LADO, MINIATURA_MAX_LADO), Image.LANCZOS)
+    miniatura = _jpeg(img, MINIATURA_QUALIDADE)
+
+    return principal, miniatura, tamanho
+
+
+def processar_foto_vistoria(foto_id):
+    """
+    Processa uma foto pendente. Idempotente: só quem conseguir marcar a
+    foto como 'processando' executa (seguro contra execuções duplicadas).
+    """
+    reivindicada = InspectionPhoto.objects.filter(
+        pk=foto_id, status_processamento='pendente'
+    ).update(status_processamento='processando', processamento_iniciado_em=timezone.now())
+    if not reivindicada:
+        return False
+
+    foto = InspectionPhoto.objects.select_related('inspection').get(pk=foto_id)
+    try:
+        foto.original.open('rb')
+        try:
+            dados = foto.original.read()
+        finally:
+            foto.original.close()
+
+        principal, miniatura, (largura, altura) = gerar_versoes(dados)
+
+        base = f"{foto.ordem}-{foto.id.hex[:8]}"
+        foto.imagem.save(f"{base}.jpg", ContentFile(principal), save=False)
+        foto.miniatura.save(f"{base}-thumb.jpg", ContentFile(miniatura), save=False)
+        foto.largura = largura
+        foto.altura = altura
+        foto.tamanho_bytes = len(principal)
+        foto.checksum = hashlib.sha256(principal).hexdigest()
+        foto.status_processamento = 'concluida'
+        foto.erro_processamento = ''
+        foto.save()
+
+        try:
+            foto.original.delete(save=True)
+        except Exception:
+            pass  # arquivo bruto órfão é removido junto com a vistoria
+
+        logger.info(f"📸 [VISTORIA] Foto {foto.id} processada ({largura}x{altura})")
+        return True
+
+    except Exception as e:
+        InspectionPhoto.objects.filter(pk=foto_id).update(
+            status_processamento='erro',
+            erro_processamento=str(e)[:255],
+        )
+        logger.error(f"❌ [VISTORIA] Erro ao processar foto {foto_id}: {e}")
+        return False
+
+
+def processar_fotos_pendentes(inspection=None, incluir_travadas=True):
+    """
+    Processa de forma síncrona as fotos ainda pendentes (antes de gerar o
+    PDF, ou pela varredura do scheduler). Fotos 'processando' há mais de
+    PROCESSAMENTO_TIMEOUT voltam para a fila (processo interrompido).
+    """
+    fotos = InspectionPhoto.objects.all()
+    if inspection is not None:
+        fotos = fotos.filter(inspection=inspection)
+
+    if incluir_travadas:
+        limite = timezone.now() - PROCESSAMENTO_TIMEOUT
+        # Sem processamento_iniciado_em: reivindicadas antes desse campo existir
+        travadas = Q(processamento_iniciado_em__lt=limite) | Q(processamento_iniciado_em__isnull=True)
+        fotos.filter(travadas, status_processamento='processando').update(
+            status_processamento='pendente'
+        )
+
+    processadas = 0
+    for foto_id in fotos.filter(status_processamento='pendente').values_list('pk', flat=True):
+        processadas += int(processar_foto_vistoria(foto_id))
+    return processadas
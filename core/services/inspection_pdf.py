@@ -4,8 +4,11 @@ Usa ReportLab (pure Python, sem dependências de SO)
 Autor: Claude + Cícero (Policorp)
 Data: 11/01/2026
 """
+import hashlib
+from functools import partial
 from io import BytesIO
 from PIL import Image
+from pypdf import PdfReader, PdfWriter
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
@@ -13,24 +16,87 @@ from reportlab.lib import colors
 from reportlab.lib.utils import ImageReader
 from django.utils import timezone
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.conf import settings
 import os
-from django.conf import settings
-import os
 
+from core.services.inspection_fotos import processar_fotos_pendentes
+from core.utils.paralelo import mapear_em_ordem
+
+
+# Lado máximo (px) das fotos embutidas no PDF
+PDF_FOTO_MAX_LADO = 1600
+
+# Threads que buscam/preparam fotos em paralelo (latência do R2 domina)
+PDF_FOTOS_WORKERS = getattr(settings, 'VISTORIA_PDF_WORKERS', 8)
+
+# Fotos preparadas em memória ao mesmo tempo (janela deslizante)
+PDF_FOTOS_JANELA = PDF_FOTOS_WORKERS * 2
+
+# Versão do layout da página de foto: incrementar ao mudar o desenho para
+# invalidar as páginas já em cache
+PAGINA_FOTO_LAYOUT_VERSAO = '1'
 
-def gerar_pdf_vistoria(inspection):
+
+def _fotos_para_pdf(inspection):
     """
-    Gera PDF completo da vistoria com capa e fotos
-    
-    Args:
-        inspection: Objeto Inspection com fotos relacionadas
-    
-    Returns:
-        tuple: (ContentFile com PDF, número de páginas)
+    Fotos prontas para o PDF, em ordem. Fotos ainda aguardando o
+    processamento em segundo plano são processadas aqui mesmo.
     """
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
+    processar_fotos_pendentes(inspection, incluir_travadas=False)
+    return list(
+        inspection.fotos.filter(status_processamento='concluida').order_by('ordem', 'tirada_em')
+    )
+
+
+def _ler_bytes_foto(foto):
+    """Lê os bytes da foto do storage (R2 ou local)."""
+    foto.imagem.open('rb')
+    try:
+        return foto.imagem.read()
+    finally:
+        foto.imagem.close()
+
+
+def _jpeg_compativel(img):
+    """
+    True se a imagem já pode ir para o PDF como está: JPEG RGB/tons de
+    cinza, dentro do tamanho máximo e sem rotação EXIF pendente.
+    """
+    if img.format != 'JPEG' or img.mode not in ('RGB', 'L'):
+        return False
+    if max(img.size) > PDF_FOTO_MAX_LADO:
+        return False
+    try:
+        orientacao = img.getexif().get(0x0112, 1)
+    except Exception:
+        orientacao = 1
+    return orientacao in (None, 1)
+
+
+def preparar_foto_pdf(foto):
+    """
+    Busca a foto e devolve ``(bytes_jpeg, (largura, altura))``.
+
+    Fotos enviadas pelo mobile já são JPEG 1600px q75: os bytes vão direto
+    para o PDF (o ReportLab embute JPEG sem decodificar). Só imagens fora
+    do padrão são decodificadas, reduzidas e recomprimidas.
+    """
+    dados = _ler_bytes_foto(foto)
+    img = Image.open(BytesIO(dados))  # lê apenas o cabeçalho
+
+    if _jpeg_compativel(img):
+        return dados, img.size
+
+    img = img.convert("RGB")
+    img.thumbnail((PDF_FOTO_MAX_LADO, PDF_FOTO_MAX_LADO), Image.LANCZOS)
+    saida = BytesIO()
+    img.save(saida, format='JPEG', quality=85, optimize=True)
+    return saida.getvalue(), img.size
+
+
+def _desenhar_capa(c, inspection):
+    """Desenha a página de capa (contrato, imóvel e dados da vistoria)."""
     width, height = A4
     
     # Dados da vistoria
@@ -159,104 +225,241 @@ def gerar_pdf_vistoria(inspection):
     )
     
     c.showPage()  # Finalizar capa
+
+
+def _desenhar_pagina_foto(c, foto, jpeg_bytes, tamanho, cabecalho=None):
+    """
+    Desenha a página de uma foto. ``cabecalho`` ("Foto i/N") é opcional
+    para que a página possa ser reaproveitada em outras posições.
+    """
+    width, height = A4
+    iw, ih = tamanho
+    image_reader = ImageReader(BytesIO(jpeg_bytes))
     
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # PÁGINAS 2-N: FOTOS
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # Calcular dimensões para caber no A4
+    margin = 2*cm
+    header_space = 2*cm
+    footer_space = 3*cm
     
-    fotos = list(inspection.fotos.all().order_by('ordem', 'tirada_em'))
-    total_fotos = len(fotos)
+    usable_w = width - 2*margin
+    usable_h = height - header_space - footer_space
     
-    for idx, foto in enumerate(fotos, start=1):
-        try:
-            # Abrir imagem do storage (R2 ou local)
-            foto.imagem.open('rb')
-            img_data = foto.imagem.read()
-            foto.imagem.close()
-            
-            img = Image.open(BytesIO(img_data))
-            img = img.convert("RGB")
-            
-            # Thumbnail para otimizar (já está comprimida, mas garantir)
-            img.thumbnail((1600, 1600), Image.LANCZOS)
-            
-            # Criar ImageReader para ReportLab
-            img_buffer = BytesIO()
-            img.save(img_buffer, format='JPEG', quality=85, optimize=True)
-            img_buffer.seek(0)
-            image_reader = ImageReader(img_buffer)
-            
-            # Calcular dimensões para caber no A4
-            margin = 2*cm
-            header_space = 2*cm
-            footer_space = 3*cm
-            
-            usable_w = width - 2*margin
-            usable_h = height - header_space - footer_space
-            
-            iw, ih = img.size
-            ratio = min(usable_w/iw, usable_h/ih)
-            draw_w = iw * ratio
-            draw_h = ih * ratio
-            
-            # Centralizar imagem
-            x = (width - draw_w) / 2
-            y = footer_space + (usable_h - draw_h) / 2
-            
-            # Cabeçalho
-            c.setFont("Helvetica-Bold", 12)
-            c.setFillColor(colors.black)
-            c.drawString(margin, height - margin, f"Foto {idx}/{total_fotos}")
-            
-            # Linha abaixo do cabeçalho
-            c.setStrokeColor(colors.HexColor("#ddd"))
-            c.setLineWidth(0.5)
-            c.line(margin, height - margin - 0.3*cm, width - margin, height - margin - 0.3*cm)
-            
-            # Desenhar imagem
-            c.drawImage(
-                image_reader,
-                x, y,
-                width=draw_w,
-                height=draw_h,
-                preserveAspectRatio=True
-            )
-            
-            # Rodapé com legenda
-            c.setFont("Helvetica-Bold", 10)
-            c.setFillColor(colors.black)
-            
-            if foto.legenda:
-                legenda_texto = f"Legenda: {foto.legenda[:80]}"
-                c.drawString(margin, margin + 1.2*cm, legenda_texto)
-            
-            # Data/hora
-            c.setFont("Helvetica", 9)
-            c.setFillColor(colors.HexColor("#666"))
-            data_foto = foto.tirada_em.strftime('%d/%m/%Y às %H:%M')
-            c.drawString(margin, margin + 0.6*cm, f"Registrada em: {data_foto}")
-            
-            # Informações técnicas
-            info_tecnica = f"Resolução: {foto.largura}x{foto.altura}px | Tamanho: {foto.tamanho_mb} MB"
-            c.drawString(margin, margin + 0.2*cm, info_tecnica)
-            
-            c.showPage()  # Próxima foto
-            
-        except Exception as e:
-            # Se der erro em uma foto, continuar com as outras
-            print(f"⚠️  Erro ao processar foto {idx}: {e}")
+    ratio = min(usable_w/iw, usable_h/ih)
+    draw_w = iw * ratio
+    draw_h = ih * ratio
+    
+    # Centralizar imagem
+    x = (width - draw_w) / 2
+    y = footer_space + (usable_h - draw_h) / 2
+    
+    # Cabeçalho
+    if cabecalho:
+        _desenhar_cabecalho(c, cabecalho)
+    
+    # Linha abaixo do cabeçalho
+    c.setStrokeColor(colors.HexColor("#ddd"))
+    c.setLineWidth(0.5)
+    c.line(margin, height - margin - 0.3*cm, width - margin, height - margin - 0.3*cm)
+    
+    # Desenhar imagem
+    c.drawImage(
+        image_reader,
+        x, y,
+        width=draw_w,
+        height=draw_h,
+        preserveAspectRatio=True
+    )
+    
+    # Rodapé com legenda
+    c.setFont("Helvetica-Bold", 10)
+    c.setFillColor(colors.black)
+    
+    if foto.legenda:
+        legenda_texto = f"Legenda: {foto.legenda[:80]}"
+        c.drawString(margin, margin + 1.2*cm, legenda_texto)
+    
+    # Data/hora
+    c.setFont("Helvetica", 9)
+    c.setFillColor(colors.HexColor("#666"))
+    data_foto = foto.tirada_em.strftime('%d/%m/%Y às %H:%M')
+    c.drawString(margin, margin + 0.6*cm, f"Registrada em: {data_foto}")
+    
+    # Informações técnicas
+    info_tecnica = f"Resolução: {foto.largura}x{foto.altura}px | Tamanho: {foto.tamanho_mb} MB"
+    c.drawString(margin, margin + 0.2*cm, info_tecnica)
+    
+    c.showPage()
+
+
+def _desenhar_cabecalho(c, texto):
+    """Texto de cabeçalho das páginas de foto ("Foto i/N")."""
+    width, height = A4
+    margin = 2*cm
+    c.setFont("Helvetica-Bold", 12)
+    c.setFillColor(colors.black)
+    c.drawString(margin, height - margin, texto)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# GERAÇÃO INCREMENTAL (páginas de foto em cache)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _diretorio_paginas(inspection):
+    """tenant_001/vistorias/{inspection_id}/paginas/"""
+    return f"tenant_001/vistorias/{inspection.id}/paginas"
+
+
+def chave_pagina_foto(foto):
+    """
+    Chave da página em cache: muda quando a imagem (checksum) ou qualquer
+    texto impresso na página muda. Fotos antigas sem checksum usam o nome
+    do arquivo no storage (único, sem sobrescrita).
+    """
+    partes = [
+        PAGINA_FOTO_LAYOUT_VERSAO,
+        foto.checksum or foto.imagem.name,
+        foto.legenda,
+        foto.tirada_em.isoformat() if foto.tirada_em else '',
+        foto.largura,
+        foto.altura,
+        foto.tamanho_bytes,
+    ]
+    bruto = '|'.join('' if p is None else str(p) for p in partes)
+    return hashlib.sha256(bruto.encode('utf-8')).hexdigest()[:16]
+
+
+def _nome_pagina(foto):
+    return f"{foto.id}-{chave_pagina_foto(foto)}.pdf"
+
+
+def _renderizar_pagina_foto(foto):
+    """PDF de uma página com a foto (sem o cabeçalho "Foto i/N")."""
+    jpeg_bytes, tamanho = preparar_foto_pdf(foto)
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    _desenhar_pagina_foto(c, foto, jpeg_bytes, tamanho)
+    c.save()
+    return buffer.getvalue()
+
+
+def _obter_pagina_foto(foto, diretorio, em_cache):
+    """
+    Devolve ``(bytes_pdf, renderizada)``: lê a página do cache quando a
+    chave existe; senão renderiza e grava no cache. Erros viram resultado.
+    """
+    nome = _nome_pagina(foto)
+    caminho = f"{diretorio}/{nome}"
+    try:
+        if nome in em_cache:
+            with default_storage.open(caminho, 'rb') as f:
+                return f.read(), False
+        
+        pagina = _renderizar_pagina_foto(foto)
+        # save() renomeia em caso de colisão e o nome deixaria de ser a
+        # chave: o arquivo existente (fora da listagem) é sobrescrito
+        if default_storage.exists(caminho):
+            default_storage.delete(caminho)
+        salvo = default_storage.save(caminho, ContentFile(pagina))
+        if salvo != caminho:
+            # Outra geração gravou a mesma chave no meio tempo (mesmo conteúdo)
+            default_storage.delete(salvo)
+        return pagina, True
+    except Exception as e:
+        return e
+
+
+def _listar_paginas_em_cache(diretorio):
+    try:
+        return set(default_storage.listdir(diretorio)[1])
+    except (FileNotFoundError, OSError):
+        return set()
+
+
+def gerar_pdf_vistoria_incremental(inspection):
+    """
+    Gera o PDF da vistoria reaproveitando as páginas de foto em cache.
+    
+    Cada página de foto é guardada no storage com chave (id da foto +
+    checksum + textos da página). Apenas fotos novas ou alteradas são
+    renderizadas; a capa é sempre redesenhada e a numeração "Foto i/N" é
+    carimbada na montagem final (pypdf), então inserir uma foto não
+    invalida as demais.
+    
+    Returns:
+        tuple: (ContentFile com PDF, número de páginas, ids das fotos no PDF)
+    """
+    diretorio = _diretorio_paginas(inspection)
+    em_cache = _listar_paginas_em_cache(diretorio)
+    
+    fotos = _fotos_para_pdf(inspection)
+    
+    # Capa
+    buffer_capa = BytesIO()
+    c = canvas.Canvas(buffer_capa, pagesize=A4)
+    _desenhar_capa(c, inspection)
+    c.save()
+    
+    writer = PdfWriter()
+    writer.append(PdfReader(BytesIO(buffer_capa.getvalue())))
+    
+    # Páginas das fotos (cache ou renderização, em paralelo), anexadas ao
+    # writer conforme chegam: só a janela do mapear_em_ordem fica em memória
+    incluidas = []
+    renderizadas = 0
+    obter = partial(_obter_pagina_foto, diretorio=diretorio, em_cache=em_cache)
+    for idx, (foto, resultado) in enumerate(
+        mapear_em_ordem(obter, fotos, workers=PDF_FOTOS_WORKERS,
+                        janela=PDF_FOTOS_JANELA, nome='vistoria-pdf'),
+        start=1,
+    ):
+        if isinstance(resultado, Exception):
+            print(f"⚠️  Erro ao processar foto {idx}: {resultado}")
             continue
+        pagina, nova = resultado
+        renderizadas += int(nova)
+        writer.add_page(PdfReader(BytesIO(pagina)).pages[0])
+        incluidas.append(foto.pk)
     
-    # Finalizar PDF
+    # Cabeçalhos "Foto i/N" (N só é conhecido no fim) em um único PDF de
+    # sobreposição, carimbados nas páginas já anexadas
+    total = len(incluidas)
+    buffer_cabecalhos = BytesIO()
+    c = canvas.Canvas(buffer_cabecalhos, pagesize=A4)
+    for idx in range(1, total + 1):
+        _desenhar_cabecalho(c, f"Foto {idx}/{total}")
+        c.showPage()
     c.save()
-    buffer.seek(0)
+    cabecalhos = PdfReader(BytesIO(buffer_cabecalhos.getvalue())) if total else None
     
-    total_paginas = total_fotos + 1  # Capa + fotos
+    for idx in range(total):
+        # Página 0 é a capa
+        writer.pages[idx + 1].merge_page(cabecalhos.pages[idx])
     
-    # Retornar como ContentFile para salvar no modelo
-    pdf_file = ContentFile(buffer.read())
+    saida = BytesIO()
+    writer.write(saida)
+    writer.close()
     
-    return pdf_file, total_paginas
+    # Remover páginas em cache de fotos que saíram ou mudaram
+    validas = {_nome_pagina(foto) for foto in fotos}
+    for nome in em_cache - validas:
+        try:
+            default_storage.delete(f"{diretorio}/{nome}")
+        except Exception:
+            pass
+    
+    print(f"📄 PDF da vistoria montado: {total} foto(s), {renderizadas} página(s) renderizada(s)")
+    
+    return ContentFile(saida.getvalue()), total + 1, incluidas
+
+
+def limpar_paginas_em_cache(inspection):
+    """Remove todas as páginas em cache da vistoria (após finalizar)."""
+    diretorio = _diretorio_paginas(inspection)
+    for nome in _listar_paginas_em_cache(diretorio):
+        try:
+            default_storage.delete(f"{diretorio}/{nome}")
+        except Exception:
+            pass
 
 
 def _quebrar_texto(texto, max_chars):
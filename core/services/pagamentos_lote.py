@@ -0,0 +1,118 @@
+"""
+Registro de Pagamentos em Lote
+Registra N pagamentos (ex.: os recebimentos PIX do dia) em uma requisição
+
+- Validação de cada item (PagamentoLoteItemForm) + UMA consulta para todas
+  as comandas do lote; erros reportados por índice do item
+- Numeração: um bloco de N números reservado com um único incremento do
+  SequenceCounter (em vez de N chamadas a get_next)
+- bulk_create dos pagamentos e recálculo de status das comandas afetadas
+  em uma passada (core/services/status_comanda.py), tudo na mesma transação
+- Por padrão o lote é tudo-ou-nada; ``parcial=True`` grava os itens
+  válidos e devolve os erros dos demais
+"""
+import logging
+
+from django.db import transaction
+
+from core.dashboard import cache as dashboard_cache
+from core.forms import PagamentoLoteItemForm
+from core.models import Comanda, Pagamento, SequenceCounter, StatusPagamento
+from core.services.status_comanda import recalcular_comandas
+
+logger = logging.getLogger(__name__)
+
+# Limite de itens por chamada (requisição e transação de tamanho razoável)
+PAGAMENTOS_LOTE_MAXIMO = 1000
+
+# Linhas por INSERT do bulk_create
+PAGAMENTOS_LOTE_BATCH = 500
+
+
+class LoteInvalido(ValueError):
+    pass
+
+
+def gravar_pagamentos(pagamentos):
+    """
+    Numera (um bloco do SequenceCounter), insere com bulk_create e recalcula
+    as comandas afetadas, em uma transação. ``pagamentos``: instâncias ainda
+    não salvas. Retorna quantas comandas mudaram de status.
+    """
+    if not pagamentos:
+        return 0
+
+    with transaction.atomic():
+        prefixo = Pagamento.prefixo_numero()
+        primeiro = SequenceCounter.reservar_bloco(prefixo, len(pagamentos))
+        for posicao, pagamento in enumerate(pagamentos):
+            pagamento.numero_pagamento = Pagamento.formatar_numero(prefixo, primeiro + posicao)
+
+        # bulk_create não dispara post_save: o recálculo é feito aqui, uma vez
+        Pagamento.objects.bulk_create(pagamentos, batch_size=PAGAMENTOS_LOTE_BATCH)
+        atualizadas = recalcular_comandas({pagamento.comanda_id for pagamento in pagamentos})
+        dashboard_cache.invalidar(dashboard_cache.FINANCEIRO)
+    return atualizadas
+
+
+def validar_itens(itens):
+    """
+    Valida os itens do lote. Retorna ``(validos, erros)``: ``validos`` é uma
+    lista de ``(indice, dados_limpos, comanda)`` e ``erros`` uma lista de
+    ``{'indice', 'erros'}``.
+    """
+    limpos, erros = [], []
+    for indice, item in enumerate(itens):
+        form = PagamentoLoteItemForm(item if isinstance(item, dict) else {})
+        if form.is_valid():
+            limpos.append((indice, form.cleaned_data))
+        else:
+            erros.append({'indice': indice, 'erros': {campo: list(msgs) for campo, msgs in form.errors.items()}})
+
+    comandas = Comanda.objects.filter(is_active=True).in_bulk({dados['comanda'] for _, dados in limpos})
+
+    validos = []
+    for indice, dados in limpos:
+        comanda = comandas.get(dados['comanda'])
+        if comanda is None:
+            erros.append({'indice': indice, 'erros': {'comanda': ['Comanda não encontrada.']}})
+        elif comanda.status == Comanda.StatusComanda.CANCELADA:
+            erros.append({'indice': indice, 'erros': {'comanda': ['Comanda cancelada.']}})
+        else:
+            validos.append((indice, dados, comanda))
+
+    erros.sort(key=lambda erro: erro['indice'])
+    return validos, erros
+
+
+def registrar_pagamentos_em_lote(itens, usuario, parcial=False):
+    """
+    Registra os pagamentos de ``itens`` (lista de dicts com comanda,
+    valor_pago, data_pagamento, forma_pagamento, status, observacoes).
+
+    Retorna ``{'criados': [Pagamento], 'erros': [...], 'comandas_atualizadas': int}``.
+    Com erros e ``parcial=False`` nada é gravado.
+    """
+    if len(itens) > PAGAMENTOS_LOTE_MAXIMO:
+        raise LoteInvalido(f'Lote com {len(itens)} itens; máximo {PAGAMENTOS_LOTE_MAXIMO}.')
+
+    validos, erros = validar_itens(itens)
+    if not validos or (erros and not parcial):
+        return {'criados': [], 'erros': erros, 'comandas_atualizadas': 0}
+
+    pagamentos = [
+        Pagamento(
+            comanda=comanda,
+            usuario_registro=usuario,
+            valor_pago=dados['valor_pago'],
+            data_pagamento=dados['data_pagamento'],
+            forma_pagamento=dados['forma_pagamento'],
+            status=dados['status'] or StatusPagamento.PENDENTE,
+            observacoes=dados['observacoes'],
+        )
+        for _, dados, comanda in validos
+    ]
+    atualizadas = gravar_pagamentos(pagamentos)
+
+    logger.info(f"💰 Lote de pagamentos: {len(pagamentos)} registrados, {len(erros)} com erro")
+    return {'criados': pagamentos, 'erros': erros, 'comandas_atualizadas': atualizadas}
@@ -0,0 +1,63 @@
+"""
+Performance por Imóvel
+Previsto, realizado, taxa de recebimento e ranking de todos os imóveis
+em uma consulta agrupada (Imovel.objects.com_performance)
+
+- Ordenação e paginação no SQL (ORDER BY / LIMIT), nunca em Python
+- Ranking por window function: o "top 10" é o top 10 real, calculado
+  sobre todos os imóveis, e não os 10 primeiros da tabela
+"""
+from django.core.paginator import Paginator
+
+from core.models import Imovel
+
+# Ordenações aceitas (``-`` inverte); o desempate é sempre pelo código
+ORDENACOES = {
+    'ranking': 'ranking',
+    'taxa': 'taxa',
+    'previsto': 'previsto',
+    'realizado': 'realizado',
+    'codigo': 'codigo_imovel',
+}
+ORDENACAO_PADRAO = 'ranking'
+
+
+def queryset_performance(comandas=None, imoveis=None, ordenar=ORDENACAO_PADRAO):
+    """
+    Queryset de imóveis anotado (previsto, realizado, taxa, ranking) e
+    ordenado por ``ordenar`` (ver ORDENACOES; ex.: '-realizado').
+    """
+    if imoveis is None:
+        imoveis = Imovel.objects.filter(is_active=True)
+
+    ordenar = ordenar or ORDENACAO_PADRAO
+    decrescente = ordenar.startswith('-')
+    campo = ORDENACOES.get(ordenar.lstrip('-'), ORDENACOES[ORDENACAO_PADRAO])
+
+    return imoveis.com_performance(comandas).order_by(
+        f"{'-' if decrescente else ''}{campo}", 'codigo_imovel'
+    )
+
+
+def linha_performance(imovel):
+    """Dicionário serializável (JSON/Chart.js) de um imóvel anotado."""
+    return {
+        'id': str(imovel.pk),
+        'codigo': imovel.codigo_imovel,
+        'endereco': f"{imovel.endereco}, {imovel.numero}",
+        'previsto': float(imovel.previsto),
+        'realizado': float(imovel.realizado),
+        'taxa': round(imovel.taxa, 1),
+        'ranking': imovel.ranking,
+    }
+
+
+def top_imoveis(comandas=None, imoveis=None, limite=10):
+    """Os ``limite`` imóveis de melhor taxa de recebimento (uma consulta)."""
+    return [linha_performance(imovel) for imovel in queryset_performance(comandas, imoveis)[:limite]]
+
+
+def pagina_performance(comandas=None, imoveis=None, ordenar=ORDENACAO_PADRAO, pagina=1, por_pagina=50):
+    """Página (django Paginator) do ranking, com ordenação/paginação no SQL."""
+    paginator = Paginator(queryset_performance(comandas, imoveis, ordenar), por_pagina)
+    return paginator.get_page(pagina)
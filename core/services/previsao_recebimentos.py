@@ -0,0 +1,250 @@
+"""
+Previsão de Recebimentos (próximos N meses)
+Projeção do caixa a partir dos contratos ativos, sem criar comandas
+
+- Esperado: aluguel de cada Locacao ativa em cada mês até data_fim; após o
+  fim, renovações em andamento entram com o novo valor ponderado pela
+  chance de fechamento (PROBABILIDADE_RENOVACAO). Meses que já têm comanda
+  usam o saldo em aberto dela (o que já foi pago não é caixa futuro).
+- Provável: o esperado distribuído pelos meses seguintes conforme o atraso
+  histórico de CADA locatário (fração paga no mês do vencimento, 1, 2, ...
+  meses depois, ou nunca), suavizada pela distribuição geral quando o
+  locatário tem pouco histórico. Comandas já vencidas entram com a chance
+  condicional de ainda serem pagas.
+- Tudo em matrizes contratos × meses (NumPy); número fixo de consultas,
+  independente da quantidade de contratos.
+"""
+import logging
+from datetime import date
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from core.dashboard.cache import CONTRATOS, FINANCEIRO, obter_ou_calcular
+from core.models import Comanda, Locacao, Pagamento, RenovacaoContrato
+
+try:
+    import numpy as np  # optional
+    HAS_NUMPY = True
+except Exception:
+    np = None
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+# Atraso máximo modelado (meses); além disso conta como "não recebido"
+MESES_ATRASO = 3
+
+# Meses de vencimentos usados para estimar a distribuição de atraso
+# (terminando MESES_ATRASO meses atrás, para que todos já tenham tido
+# a chance de serem pagos)
+HISTORICO_MESES = 12
+
+# Peso (em comandas) da distribuição geral na suavização por locatário
+PESO_DISTRIBUICAO_GERAL = 3
+
+PROBABILIDADE_RENOVACAO = {
+    'rascunho': 0.5,
+    'pendente_proprietario': 0.7,
+    'pendente_locatario': 0.7,
+    'aprovada': 1.0,
+}
+
+STATUS_EM_ABERTO = (
+    Comanda.StatusComanda.PENDENTE,
+    Comanda.StatusComanda.VENCIDA,
+    Comanda.StatusComanda.PARCIALMENTE_PAGA,
+)
+
+
+def _indice_mes(data):
+    return data.year * 12 + data.month - 1
+
+
+def _rotulo_mes(indice):
+    return f'{indice // 12:04d}-{indice % 12 + 1:02d}'
+
+
+def distribuicao_atrasos(hoje=None):
+    """
+    Fração do valor das comandas paga com 0..MESES_ATRASO meses de atraso
+    (coluna final = não recebido), por locatário e geral.
+
+    Retorna ``(indice_locatario, matriz, geral)``: ``matriz[indice_locatario[id]]``
+    é a distribuição suavizada do locatário; ``geral`` a de quem não tem
+    histórico. Cada linha soma 1.
+    """
+    hoje = hoje or timezone.now().date()
+    mes_atual = _indice_mes(hoje)
+    fim = mes_atual - MESES_ATRASO
+    inicio = fim - HISTORICO_MESES
+    data_inicio = date(inicio // 12, inicio % 12 + 1, 1)
+    data_fim = date(fim // 12, fim % 12 + 1, 1)
+
+    comandas = Comanda.objects.filter(
+        is_active=True,
+        data_vencimento__gte=data_inicio,
+        data_vencimento__lt=data_fim,
+    ).exclude(status=Comanda.StatusComanda.CANCELADA)
+
+    totais = list(
+        comandas.com_totais().order_by().values('locacao__locatario_id').annotate(
+            total=Sum('valor_total_calculado'),
+            quantidade=Count('pk'),
+        ).values_list('locacao__locatario_id', 'total', 'quantidade')
+    )
+    pagamentos = list(
+        Pagamento.objects.filter(
+            comanda__in=comandas, status='confirmado'
+        ).values_list('comanda__locacao__locatario_id', 'comanda__data_vencimento', 'data_pagamento', 'valor_pago')
+    )
+
+    indice_locatario = {linha[0]: i for i, linha in enumerate(totais)}
+    n = len(indice_locatario)
+    colunas = MESES_ATRASO + 2  # 0..MESES_ATRASO + não recebido
+
+    total = np.array([float(linha[1] or 0) for linha in totais], dtype=np.float64)
+    pagos = np.zeros((n, colunas), dtype=np.float64)
+    if pagamentos:
+        linhas = np.array([indice_locatario.get(p[0], -1) for p in pagamentos], dtype=np.int64)
+        # Pagamento antecipado conta como em dia; depois de MESES_ATRASO
+        # fica de fora (entra como "não recebido" no modelo)
+        atraso = np.array(
+            [_indice_mes(p[2]) - _indice_mes(p[1]) for p in pagamentos], dtype=np.int64
+        ).clip(0, None)
+        valores = np.array([float(p[3]) for p in pagamentos], dtype=np.float64)
+        validos = (linhas >= 0) & (atraso <= MESES_ATRASO)
+        np.add.at(pagos, (linhas[validos], atraso[validos]), valores[validos])
+
+    pagos[:, -1] = np.maximum(total - pagos[:, :-1].sum(axis=1), 0)
+    soma = pagos.sum(axis=1, keepdims=True)
+
+    geral = np.zeros(colunas, dtype=np.float64)
+    if soma.sum() > 0:
+        geral = pagos.sum(axis=0) / soma.sum()
+    else:
+        geral[0] = 1.0  # sem histórico: todos pagam em dia
+
+    bruta = np.divide(pagos, soma, out=np.tile(geral, (n, 1)), where=soma > 0)
+    peso = np.array([linha[2] for linha in totais], dtype=np.float64)[:, None]
+    matriz = (bruta * peso + geral * PESO_DISTRIBUICAO_GERAL) / (peso + PESO_DISTRIBUICAO_GERAL)
+
+    return indice_locatario, matriz, geral
+
+
+def projetar_recebimentos(meses=12, hoje=None):
+    """
+    Esperado e provável por mês a partir do mês atual.
+    ``{'meses': [{'mes', 'esperado', 'provavel', 'contratos'}], 'total_esperado',
+    'total_provavel', 'recuperacao_atrasados'}`` (valores em reais, float).
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError('NumPy não está disponível. Instale numpy para projetar recebimentos.')
+
+    hoje = hoje or timezone.now().date()
+    base = _indice_mes(hoje)
+    ultimo = base + meses - 1
+
+    # ── Contratos ativos ───────────────────────────────────────────────
+    ativos = Locacao.objects.filter(status='ACTIVE', is_active=True).filter(
+        Q(data_fim__isnull=True) | Q(data_fim__gte=hoje.replace(day=1))
+    )
+    contratos = list(ativos.values_list('pk', 'locatario_id', 'valor_aluguel', 'data_inicio', 'data_fim'))
+    indice_contrato = {pk: i for i, (pk, *_) in enumerate(contratos)}
+    n = len(contratos)
+
+    valor = np.array([float(c[2] or 0) for c in contratos], dtype=np.float64)
+    inicio = np.array([max(_indice_mes(c[3]), base) if c[3] else base for c in contratos], dtype=np.int64)
+    fim = np.array([_indice_mes(c[4]) if c[4] else ultimo for c in contratos], dtype=np.int64)
+
+    colunas_mes = np.arange(base, ultimo + 1)
+    vigente = (colunas_mes[None, :] >= inicio[:, None]) & (colunas_mes[None, :] <= fim[:, None])
+    esperado = np.where(vigente, valor[:, None], 0.0)
+
+    # ── Renovações em andamento: novo valor após o fim, ponderado ─────
+    renovacoes = RenovacaoContrato.objects.filter(
+        locacao_original__in=ativos,
+        status__in=PROBABILIDADE_RENOVACAO,
+    ).values_list('locacao_original_id', 'status', 'novo_valor_aluguel', 'nova_data_fim')
+    for locacao_id, status, novo_valor, nova_data_fim in renovacoes:
+        i = indice_contrato[locacao_id]
+        fim_renovacao = _indice_mes(nova_data_fim) if nova_data_fim else ultimo
+        periodo = (colunas_mes > fim[i]) & (colunas_mes <= fim_renovacao)
+        esperado[i, periodo] = float(novo_valor or valor[i]) * PROBABILIDADE_RENOVACAO[status]
+
+    # ── Comandas já emitidas no horizonte: saldo em aberto ────────────
+    emitidas = Comanda.objects.filter(
+        is_active=True,
+        locacao__in=ativos,
+        data_vencimento__gte=hoje.replace(day=1),
+    ).com_totais().values_list('locacao_id', 'data_vencimento', 'status', 'valor_pendente_calculado')
+    for locacao_id, vencimento, status, pendente in emitidas:
+        coluna = _indice_mes(vencimento) - base
+        if 0 <= coluna < meses:
+            aberto = status in STATUS_EM_ABERTO
+            esperado[indice_contrato[locacao_id], coluna] = float(pendente or 0) if aberto else 0.0
+
+    # ── Provável: convolução com a distribuição de atraso ─────────────
+    indice_locatario, distribuicoes, geral = distribuicao_atrasos(hoje)
+    linha_distribuicao = np.array([indice_locatario.get(c[1], -1) for c in contratos], dtype=np.int64)
+    distribuicao = np.tile(geral, (n, 1))
+    com_historico = linha_distribuicao >= 0
+    distribuicao[com_historico] = distribuicoes[linha_distribuicao[com_historico]]
+
+    provavel = np.zeros_like(esperado)
+    for atraso in range(min(MESES_ATRASO + 1, meses)):
+        provavel[:, atraso:] += esperado[:, :meses - atraso] * distribuicao[:, atraso][:, None]
+
+    # ── Atrasados: chance condicional de ainda serem pagos ────────────
+    recuperacao = np.zeros(meses, dtype=np.float64)
+    vencidas = list(
+        Comanda.objects.filter(
+            is_active=True,
+            status__in=STATUS_EM_ABERTO,
+            data_vencimento__lt=hoje.replace(day=1),
+        ).com_totais().values_list('locacao__locatario_id', 'data_vencimento', 'valor_pendente_calculado')
+    )
+    for locatario_id, vencimento, pendente in vencidas:
+        linha = indice_locatario.get(locatario_id)
+        dist = distribuicoes[linha] if linha is not None else geral
+        # Não foi paga até o mês passado: redistribui o que resta da
+        # distribuição a partir do atraso atual (mês corrente = coluna 0)
+        ja_atrasado = base - _indice_mes(vencimento)
+        restante = dist[min(ja_atrasado, MESES_ATRASO + 1):]
+        if restante.sum() <= 0:
+            continue
+        chances = restante[:-1] / restante.sum()  # sem a coluna "não recebido"
+        recuperacao[:min(len(chances), meses)] += float(pendente or 0) * chances[:meses]
+    provavel_total_mes = provavel.sum(axis=0) + recuperacao
+
+    resultado = [
+        {
+            'mes': _rotulo_mes(indice),
+            'esperado': round(float(esperado[:, coluna].sum()), 2),
+            'provavel': round(float(provavel_total_mes[coluna]), 2),
+            'contratos': int((esperado[:, coluna] > 0).sum()),
+        }
+        for coluna, indice in enumerate(colunas_mes)
+    ]
+    return {
+        'meses': resultado,
+        'total_esperado': round(float(esperado.sum()), 2),
+        'total_provavel': round(float(provavel_total_mes.sum()), 2),
+        'recuperacao_atrasados': round(float(recuperacao.sum()), 2),
+    }
+
+
+def previsao_recebimentos(meses=12, hoje=None):
+    """
+    projetar_recebimentos em cache por dia (core/dashboard/cache.py);
+    mudanças em contratos/renovações e em comandas/pagamentos (saldos em
+    aberto, histórico de atraso) invalidam a projeção.
+    """
+    hoje = hoje or timezone.now().date()
+    return obter_ou_calcular(
+        'previsao_recebimentos',
+        {'meses': meses, 'hoje': hoje},
+        lambda: projetar_recebimentos(meses, hoje),
+        depende=(FINANCEIRO, CONTRATOS),
+        ttl=24 * 60 * 60,
+    )
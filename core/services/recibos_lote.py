@@ -0,0 +1,139 @@
+"""
+Exportação de Recibos em Lote
+Gera o pacote mensal de recibos (ZIP ou PDF único) em uma só requisição
+
+- Seleciona os pagamentos com UMA query (select_related + iterator)
+- Renderiza os recibos via DocumentGenerator em um pool limitado de threads
+- Janela de renderização limitada: memória constante no nº de recibos
+- Recibos já gerados são reaproveitados (cache do DocumentGenerator)
+"""
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+
+from core.document_generator import DocumentGenerator, HAS_WEASY
+from core.models import Pagamento, StatusPagamento
+from core.utils.paralelo import mapear_em_ordem
+from core.utils.streaming import zip_streaming
+
+logger = logging.getLogger(__name__)
+
+# Threads que renderizam recibos em paralelo
+RECIBOS_LOTE_WORKERS = getattr(settings, 'RECIBOS_LOTE_WORKERS', 4)
+
+# Recibos em produção ao mesmo tempo (limita memória e arquivos abertos)
+RECIBOS_LOTE_JANELA = RECIBOS_LOTE_WORKERS * 2
+
+
+def selecionar_pagamentos(ano=None, mes=None, locador_id=None, status=StatusPagamento.CONFIRMADO):
+    """
+    Pagamentos do pacote, com tudo que o recibo exibe já carregado.
+
+    Filtros opcionais: mês/ano do pagamento, locador dono do imóvel e
+    status (padrão: apenas confirmados; ``None`` para todos).
+    """
+    queryset = Pagamento.objects.select_related(
+        'comanda', 'comanda__locacao', 'comanda__locacao__locatario', 'comanda__locacao__imovel'
+    )
+    if ano:
+        queryset = queryset.filter(data_pagamento__year=ano)
+    if mes:
+        queryset = queryset.filter(data_pagamento__month=mes)
+    if locador_id:
+        queryset = queryset.filter(comanda__locacao__imovel__locador_id=locador_id)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.order_by('data_pagamento', 'numero_pagamento')
+
+
+def _renderizar_em_ordem(pagamentos, renderizar):
+    """Renderiza os recibos no pool limitado, preservando a ordem."""
+    return mapear_em_ordem(
+        renderizar, pagamentos,
+        workers=RECIBOS_LOTE_WORKERS, janela=RECIBOS_LOTE_JANELA, nome='recibos',
+    )
+
+
+def _nome_no_pacote(pagamento, extensao):
+    numero = pagamento.numero_pagamento or str(pagamento.pk)
+    return f"recibo_{numero}.{extensao}"
+
+
+def gerar_zip_recibos(queryset, formato='docx', generator=None):
+    """
+    Gera os bytes de um ZIP com um recibo por pagamento (streaming).
+
+    ``formato`` pode ser 'docx' (padrão) ou 'pdf' (requer WeasyPrint).
+    """
+    generator = generator or DocumentGenerator()
+    if formato == 'pdf':
+        if not HAS_WEASY:
+            raise RuntimeError("WeasyPrint não está disponível. Instale weasyprint para gerar PDF.")
+        renderizar = generator.gerar_recibo_pdf
+    else:
+        renderizar = generator.gerar_recibo_pagamento
+
+    def arquivos():
+        pagamentos = queryset.iterator(chunk_size=200)
+        for pagamento, filename in _renderizar_em_ordem(pagamentos, renderizar):
+            yield _nome_no_pacote(pagamento, formato), generator.caminho_recibo(filename)
+
+    return zip_streaming(arquivos())
+
+
+def gerar_pdf_unico_recibos(queryset, generator=None):
+    """
+    Junta os recibos PDF em um único arquivo paginado (pypdf).
+
+    Retorna o caminho de um arquivo temporário em disco; quem chama é
+    responsável por removê-lo após servir. O pypdf mantém as páginas do
+    documento de saída em memória, então para pacotes muito grandes o ZIP
+    (constante em memória) é o formato recomendado.
+    """
+    from pypdf import PdfWriter
+
+    if not HAS_WEASY:
+        raise RuntimeError("WeasyPrint não está disponível. Instale weasyprint para gerar PDF.")
+
+    generator = generator or DocumentGenerator()
+    writer = PdfWriter()
+    total = 0
+    pagamentos = queryset.iterator(chunk_size=200)
+    for pagamento, filename in _renderizar_em_ordem(pagamentos, generator.gerar_recibo_pdf):
+        writer.append(generator.caminho_recibo(filename))
+        total += 1
+
+    fd, caminho = tempfile.mkstemp(prefix='recibos_lote_', suffix='.pdf')
+    with os.fdopen(fd, 'wb') as destino:
+        writer.write(destino)
+    writer.close()
+
+    logger.info(f"📄 PDF único de recibos gerado: {total} recibo(s)")
+    return caminho
+
+
+def resposta_pacote_recibos(queryset, formato='zip', nome_base='recibos'):
+    """
+    Monta a resposta HTTP do pacote de recibos.
+
+    Formatos: 'zip' (DOCX), 'zip_pdf' (um PDF por recibo) e 'pdf'
+    (PDF único paginado).
+    """
+    from django.http import FileResponse, StreamingHttpResponse
+
+    if formato == 'pdf':
+        caminho = gerar_pdf_unico_recibos(queryset)
+        arquivo = open(caminho, 'rb')
+        # O arquivo continua legível pelo handle aberto após a remoção
+        os.remove(caminho)
+        return FileResponse(arquivo, as_attachment=True, filename=f"{nome_base}.pdf",
+                            content_type='application/pdf')
+
+    response = StreamingHttpResponse(
+        gerar_zip_recibos(queryset, formato='pdf' if formato == 'zip_pdf' else 'docx'),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nome_base}.zip"'
+    return response
@@ -0,0 +1,263 @@
+"""
+Relatórios do Dashboard Financeiro (segundo plano)
+XLSX / PDF gerados fora da requisição a partir dos dados agregados
+
+Fluxo:
+1. A view chama solicitar_relatorio → cria um RelatorioJob 'pendente' e
+   agenda gerar_relatorio para depois do commit (tarefas_background)
+2. gerar_relatorio reivindica o job, calcula os dados com os filtros
+   salvos, renderiza (XLSX em streaming / PDF via WeasyPrint) para um
+   arquivo temporário e grava em RelatorioJob.arquivo
+3. Se houver email_destino, o arquivo segue anexado por email
+4. A varredura do scheduler recupera jobs pendentes ou travados e remove
+   relatórios antigos (RELATORIOS_RETENCAO_DIAS)
+"""
+import logging
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files import File
+from django.core.mail import EmailMessage
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.models import Imovel, RelatorioJob
+from core.services.dashboard_financeiro import dados_dashboard, filtros_dashboard
+from core.services.tarefas_background import agendar_tarefa
+from core.utils.streaming import xlsx_streaming_planilhas
+
+logger = logging.getLogger(__name__)
+
+RELATORIOS_RETENCAO_DIAS = getattr(settings, 'RELATORIOS_RETENCAO_DIAS', 7)
+
+# Jobs 'processando' há mais que isso voltam para a fila (processo interrompido)
+PROCESSAMENTO_TIMEOUT = timedelta(minutes=15)
+
+CONTENT_TYPES = {
+    RelatorioJob.Formato.XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    RelatorioJob.Formato.PDF: 'application/pdf',
+}
+
+NOMES_MESES = {
+    'Jan': 'Jan', 'Feb': 'Fev', 'Mar': 'Mar', 'Apr': 'Abr', 'May': 'Mai', 'Jun': 'Jun',
+    'Jul': 'Jul', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Nov': 'Nov', 'Dec': 'Dez',
+}
+
+
+def solicitar_relatorio(formato, filtros, usuario=None, email_destino=''):
+    """Cria o job e agenda a geração para depois do commit."""
+    job = RelatorioJob.objects.create(
+        formato=formato,
+        filtros=filtros,
+        solicitado_por=usuario if usuario is not None and usuario.is_authenticated else None,
+        email_destino=email_destino or '',
+    )
+    agendar_tarefa(gerar_relatorio, job.pk)
+    logger.info(f"📊 [RELATÓRIOS] Job {job.pk} ({formato}) enfileirado")
+    return job
+
+
+# ═══════════════════════════════════════════════════════════
+# RENDERIZAÇÃO
+# ═══════════════════════════════════════════════════════════
+
+def _valor(numero):
+    return Decimal(str(numero)).quantize(Decimal('0.01'))
+
+
+def planilhas_relatorio(dados):
+    """Planilhas do XLSX: ``(nome, cabecalho, linhas)``."""
+    kpis = dados['kpis']
+    resumo = [
+        ['Período', f"{dados['data_inicio']:%d/%m/%Y} a {dados['data_fim']:%d/%m/%Y}"],
+        ['Receita Prevista', _valor(kpis['receita_prevista'])],
+        ['Receita Realizada', _valor(kpis['receita_realizada'])],
+        ['Receita Pendente', _valor(kpis['receita_pendente'])],
+        ['Taxa de Recebimento (%)', round(kpis['taxa_recebimento'], 1)],
+        ['Total de Comandas', kpis['total_comandas']],
+        ['Comandas em Atraso', kpis['comandas_atrasadas']],
+        ['Taxa de Inadimplência (%)', round(kpis['taxa_inadimplencia'], 1)],
+    ]
+    mensal = (
+        [m['mes'], _valor(m['previsto']), _valor(m['realizado']), m['inadimplencia']]
+        for m in dados['dados_mensais']
+    )
+    imoveis = (
+        [i['nome'], _valor(i['previsto']), _valor(i['realizado'])]
+        for i in dados['performance_imoveis']
+    )
+    pagamentos = (
+        [p['numero_comanda'], p['inquilino'], p['imovel'], _valor(p['valor']), p['data']]
+        for p in dados['ultimos_pagamentos']
+    )
+    return [
+        ('Resumo', ['Indicador', 'Valor'], resumo),
+        ('Mensal', ['Mês', 'Previsto', 'Realizado', 'Inadimplência (%)'], mensal),
+        ('Imóveis', ['Imóvel', 'Previsto', 'Realizado'], imoveis),
+        ('Últimos Pagamentos', ['Comanda', 'Inquilino', 'Imóvel', 'Valor', 'Data'], pagamentos),
+    ]
+
+
+def _taxa(realizado, previsto):
+    return round(realizado / previsto * 100, 1) if previsto else 0
+
+
+def contexto_pdf(dados, filtros):
+    """Adapta os dados agregados ao template relatorios/dashboard_pdf_template.html."""
+    kpis = dados['kpis']
+    imoveis_ativos = Imovel.objects.filter(is_active=True)
+    total_imoveis = imoveis_ativos.count()
+    imoveis_ocupados = imoveis_ativos.filter(
+        locacoes__status='ACTIVE', locacoes__is_active=True
+    ).distinct().count()
+
+    dados_mensais = []
+    for mes in dados['dados_mensais']:
+        abreviado, _, ano = mes['mes'].partition('/')
+        dados_mensais.append({
+            **mes,
+            'nome_mes': f"{NOMES_MESES.get(abreviado, abreviado)}/{ano}",
+            'diferenca': mes['realizado'] - mes['previsto'],
+            'taxa_realizacao': _taxa(mes['realizado'], mes['previsto']),
+        })
+
+    return {
+        'ano': filtros['ano'],
+        'data_geracao': timezone.localtime().strftime('%d/%m/%Y %H:%M'),
+        'kpis': {
+            **kpis,
+            'taxa_realizacao': round(kpis['taxa_recebimento'], 1),
+            'inadimplencia_valor': kpis['receita_pendente'],
+            'inadimplencia_percentual': round(kpis['taxa_inadimplencia'], 1),
+            'inadimplencia_qtd': kpis['comandas_atrasadas'],
+            'taxa_ocupacao': _taxa(imoveis_ocupados, total_imoveis),
+            'imoveis_ocupados': imoveis_ocupados,
+            'total_imoveis': total_imoveis,
+        },
+        'dados_mensais': dados_mensais,
+        'performance_imoveis': [
+            {**i, 'taxa': _taxa(i['realizado'], i['previsto'])}
+            for i in dados['performance_imoveis']
+        ],
+    }
+
+
+def renderizar_xlsx(dados, destino):
+    """Grava o XLSX em ``destino`` (arquivo binário aberto), em streaming."""
+    for pedaco in xlsx_streaming_planilhas(planilhas_relatorio(dados)):
+        destino.write(pedaco)
+
+
+def renderizar_pdf(dados, filtros, destino):
+    """Grava o PDF em ``destino`` via WeasyPrint."""
+    from core.document_generator import HAS_WEASY
+
+    if not HAS_WEASY:
+        raise RuntimeError("WeasyPrint não está disponível. Instale weasyprint para gerar PDF.")
+
+    from weasyprint import HTML
+
+    html = render_to_string('relatorios/dashboard_pdf_template.html', contexto_pdf(dados, filtros))
+    HTML(string=html).write_pdf(destino)
+
+
+# ═══════════════════════════════════════════════════════════
+# EXECUÇÃO DO JOB
+# ═══════════════════════════════════════════════════════════
+
+def _enviar_email(job):
+    email = EmailMessage(
+        subject='📊 HABITAT PRO - Relatório do Dashboard Financeiro',
+        body=(
+            'Olá,\n\n'
+            'Segue em anexo o relatório do Dashboard Financeiro '
+            f'gerado em {timezone.localtime(job.concluido_em):%d/%m/%Y %H:%M}.\n\n'
+            'Atenciosamente,\nHABITAT PRO'
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[job.email_destino],
+    )
+    with job.arquivo.open('rb') as arquivo:
+        email.attach(job.nome_download, arquivo.read(), CONTENT_TYPES[job.formato])
+    email.send(fail_silently=False)
+
+
+def gerar_relatorio(job_id):
+    """
+    Gera o relatório de um job pendente. Idempotente: só quem conseguir
+    marcar o job como 'processando' executa.
+    """
+    reivindicado = RelatorioJob.objects.filter(
+        pk=job_id, status=RelatorioJob.Status.PENDENTE
+    ).update(status=RelatorioJob.Status.PROCESSANDO, iniciado_em=timezone.now())
+    if not reivindicado:
+        return False
+
+    job = RelatorioJob.objects.get(pk=job_id)
+    try:
+        filtros = filtros_dashboard(job.filtros)
+        dados = dados_dashboard(filtros)
+
+        with tempfile.TemporaryFile() as tmp:
+            if job.formato == RelatorioJob.Formato.PDF:
+                renderizar_pdf(dados, filtros, tmp)
+            else:
+                renderizar_xlsx(dados, tmp)
+            tmp.seek(0)
+            job.arquivo.save(f"dashboard_{job.pk.hex}.{job.formato}", File(tmp), save=False)
+
+        job.status = RelatorioJob.Status.CONCLUIDO
+        job.concluido_em = timezone.now()
+        job.erro = ''
+        job.save(update_fields=['arquivo', 'status', 'concluido_em', 'erro', 'updated_at'])
+        logger.info(f"✅ [RELATÓRIOS] Job {job.pk} concluído ({job.formato})")
+
+    except Exception as e:
+        RelatorioJob.objects.filter(pk=job_id).update(
+            status=RelatorioJob.Status.ERRO, erro=str(e)[:500], concluido_em=timezone.now()
+        )
+        logger.error(f"❌ [RELATÓRIOS] Erro ao gerar job {job_id}: {e}")
+        return False
+
+    if job.email_destino:
+        try:
+            _enviar_email(job)
+            logger.info(f"📧 [RELATÓRIOS] Job {job.pk} enviado para {job.email_destino}")
+        except Exception as e:
+            RelatorioJob.objects.filter(pk=job_id).update(erro=f"Falha no envio do email: {e}"[:500])
+            logger.error(f"❌ [RELATÓRIOS] Erro ao enviar job {job_id} por email: {e}")
+
+    return True
+
+
+def processar_relatorios_pendentes():
+    """
+    Varredura do scheduler: devolve à fila jobs travados em 'processando'
+    e gera os pendentes de forma síncrona. Retorna quantos foram gerados.
+    """
+    limite = timezone.now() - PROCESSAMENTO_TIMEOUT
+    RelatorioJob.objects.filter(
+        status=RelatorioJob.Status.PROCESSANDO, iniciado_em__lt=limite
+    ).update(status=RelatorioJob.Status.PENDENTE)
+
+    pendentes = RelatorioJob.objects.filter(
+        status=RelatorioJob.Status.PENDENTE
+    ).order_by('created_at').values_list('pk', flat=True)
+    return sum(int(gerar_relatorio(job_id)) for job_id in pendentes)
+
+
+def limpar_relatorios_antigos(dias=None):
+    """Remove jobs (e arquivos) com mais de ``dias`` (RELATORIOS_RETENCAO_DIAS)."""
+    dias = RELATORIOS_RETENCAO_DIAS if dias is None else dias
+    limite = timezone.now() - timedelta(days=dias)
+    removidos = 0
+    for job in RelatorioJob.objects.filter(created_at__lt=limite).exclude(
+        status=RelatorioJob.Status.PROCESSANDO
+    ):
+        if job.arquivo:
+            job.arquivo.delete(save=False)
+        job.delete()
+        removidos += 1
+    return removidos
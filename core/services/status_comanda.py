@@ -0,0 +1,163 @@
+"""
+Status e Quitação da Comanda (caminho único)
+Recalcula status, data_pagamento e ComandaStatus.quitado_em a partir dos
+pagamentos confirmados
+
+- Gravar/excluir Pagamento só MARCA a comanda (marcar_para_recalculo);
+  o recálculo roda uma vez por transação, em transaction.on_commit
+- Todas as comandas marcadas na transação são lidas em UMA consulta
+  (total pago, valor total, último pagamento e quitação anotados) e só
+  as que mudaram são gravadas, em lote
+- Importação com N pagamentos da mesma comanda = 1 recálculo
+- Fora de transação (autocommit) o on_commit executa na hora
+"""
+import logging
+from datetime import datetime, time
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from core.comanda_status import ComandaStatus
+from core.dashboard import cache as dashboard_cache
+from core.models import Comanda, Pagamento, StatusPagamento
+
+logger = logging.getLogger(__name__)
+
+# Comandas por consulta (limite de parâmetros do IN em lotes grandes)
+RECALCULO_FATIA = 500
+
+
+def _fatias(itens, tamanho):
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def situacao(status_atual, valor_total, total_pago):
+    """Status resultante (regra única para todos os pontos de gravação)."""
+    if status_atual == Comanda.StatusComanda.CANCELADA:
+        return status_atual
+    if valor_total > 0 and total_pago >= valor_total:
+        return Comanda.StatusComanda.PAGA
+    if total_pago > 0:
+        return Comanda.StatusComanda.PARCIALMENTE_PAGA
+    if status_atual == Comanda.StatusComanda.VENCIDA:
+        return status_atual
+    return Comanda.StatusComanda.PENDENTE
+
+
+def recalcular_comandas(comanda_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Recalcula as comandas indicadas: uma consulta de leitura com bloqueio e
+    gravações em lote (bulk_update/bulk_create) só do que mudou.
+    Retorna quantas comandas tiveram status/data_pagamento alterados.
+    """
+    comanda_ids = set(comanda_ids)
+    if not comanda_ids:
+        return 0
+
+    ultimo_pagamento = Pagamento.objects.filter(
+        comanda=OuterRef('pk'), status=StatusPagamento.CONFIRMADO,
+    ).order_by('-data_pagamento', '-pk').values('data_pagamento')[:1]
+
+    agora = timezone.now()
+    alteradas, quitacoes_novas, quitacoes_alteradas = [], [], []
+    with transaction.atomic(using=using):
+        consulta = (
+            Comanda.objects.using(using)
+            .select_related('status_info')
+            .select_for_update(of=('self',))
+            .com_totais()
+            .annotate(ultimo_pagamento=Subquery(ultimo_pagamento))
+        )
+        comandas = (
+            comanda
+            for fatia in _fatias(sorted(comanda_ids, key=str), RECALCULO_FATIA)
+            for comanda in consulta.filter(pk__in=fatia)
+        )
+        for comanda in comandas:
+            status = situacao(comanda.status, comanda.valor_total_calculado, comanda.total_pago_calculado)
+            pago = status == Comanda.StatusComanda.PAGA
+            data_pagamento = comanda.ultimo_pagamento if pago else None
+
+            if (status, data_pagamento) != (comanda.status, comanda.data_pagamento):
+                comanda.status = status
+                comanda.data_pagamento = data_pagamento
+                comanda.updated_at = agora
+                alteradas.append(comanda)
+
+            _atualizar_quitacao(comanda, pago, agora, quitacoes_novas, quitacoes_alteradas)
+
+        # bulk_update não chama save(): updated_at definido acima e o
+        # cache do dashboard invalidado aqui (sem post_save)
+        if alteradas:
+            Comanda.objects.using(using).bulk_update(
+                alteradas, ['status', 'data_pagamento', 'updated_at'], batch_size=RECALCULO_FATIA
+            )
+            dashboard_cache.invalidar(dashboard_cache.FINANCEIRO)
+        if quitacoes_novas:
+            ComandaStatus.objects.using(using).bulk_create(quitacoes_novas, batch_size=RECALCULO_FATIA)
+        if quitacoes_alteradas:
+            ComandaStatus.objects.using(using).bulk_update(
+                quitacoes_alteradas, ['quitado_em'], batch_size=RECALCULO_FATIA
+            )
+
+    logger.debug(f"🔄 Status recalculado: {len(comanda_ids)} comanda(s), {len(alteradas)} alterada(s)")
+    return len(alteradas)
+
+
+def _atualizar_quitacao(comanda, pago, agora, novas, alteradas):
+    """quitado_em congela os dias de atraso; só entra no lote quando muda."""
+    try:
+        status_info = comanda.status_info
+    except ComandaStatus.DoesNotExist:
+        status_info = None
+
+    if pago:
+        if status_info is not None and status_info.quitado_em is not None:
+            return
+        ultimo = comanda.ultimo_pagamento
+        quitado_em = timezone.make_aware(datetime.combine(ultimo, time.min)) if ultimo else agora
+        if status_info is None:
+            novas.append(ComandaStatus(comanda=comanda, quitado_em=quitado_em))
+        else:
+            status_info.quitado_em = quitado_em
+            alteradas.append(status_info)
+    elif status_info is not None and status_info.quitado_em is not None:
+        status_info.quitado_em = None
+        alteradas.append(status_info)
+
+
+class _RecalculoPendente:
+    """Callback de on_commit com as comandas marcadas na transação."""
+
+    def __init__(self, conexao, using):
+        self.conexao = conexao
+        self.using = using
+        self.ids = set()
+
+    def agendado(self):
+        # Rollback (da transação ou de um savepoint) descarta o callback
+        return any(item[1] is self for item in self.conexao.run_on_commit)
+
+    def __call__(self):
+        if getattr(self.conexao, '_recalculo_comandas', None) is self:
+            self.conexao._recalculo_comandas = None
+        recalcular_comandas(self.ids, using=self.using)
+
+
+def marcar_para_recalculo(comanda_id, using=DEFAULT_DB_ALIAS):
+    """
+    Agenda o recálculo da comanda para o commit da transação atual.
+    Várias marcações na mesma transação resultam em um único recálculo.
+    """
+    conexao = transaction.get_connection(using)
+    if not conexao.in_atomic_block:
+        recalcular_comandas([comanda_id], using=using)
+        return
+
+    pendente = getattr(conexao, '_recalculo_comandas', None)
+    if pendente is None or not pendente.agendado():
+        pendente = conexao._recalculo_comandas = _RecalculoPendente(conexao, using)
+        transaction.on_commit(pendente, using=using)
+    pendente.ids.add(comanda_id)
@@ -0,0 +1,58 @@
+"""
+Execução de Tarefas em Segundo Plano
+Pool de threads no próprio processo (sem Redis/Celery), no mesmo espírito
+do APScheduler já usado em core/scheduler.py
+
+- ``agendar_tarefa`` dispara a função APÓS o commit da transação atual,
+  então a tarefa sempre enxerga os dados que a requisição gravou
+- Conexões de banco são abertas/fechadas por tarefa (thread própria)
+- Em testes (ou com BACKGROUND_TAREFAS_SINCRONAS=True) a função roda na
+  própria thread, logo após o commit
+- Tarefas são idempotentes e também varridas por um job do scheduler, que
+  recupera itens que ficaram pendentes (ex.: reinício do processo)
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_TAREFAS_WORKERS', 2),
+                    thread_name_prefix='sgli-tarefas',
+                )
+    return _executor
+
+
+def _executar(funcao, args, kwargs):
+    close_old_connections()
+    try:
+        funcao(*args, **kwargs)
+    except Exception:
+        logger.exception(f"❌ [TAREFAS] Erro em {funcao.__name__}")
+    finally:
+        close_old_connections()
+
+
+def agendar_tarefa(funcao, *args, **kwargs):
+    """Agenda ``funcao(*args, **kwargs)`` para depois do commit atual."""
+    if getattr(settings, 'BACKGROUND_TAREFAS_SINCRONAS', False):
+        transaction.on_commit(lambda: funcao(*args, **kwargs))
+        return
+
+    def _submeter():
+        _get_executor().submit(_executar, funcao, args, kwargs)
+
+    transaction.on_commit(_submeter)
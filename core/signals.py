@@ -1,27 +1,83 @@
 # core/signals.py
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db import transaction
 from .models import Pagamento, Comanda
+from .services.status_comanda import marcar_para_recalculo
 
+
+# Status/quitação da comanda: marca e recalcula uma vez no commit
+# (core/services/status_comanda.py)
 @receiver(post_save, sender=Pagamento)
-def pagamento_saved(sender, instance, created, **kwargs):
-    if not getattr(instance, "comanda_id", None):
-        return
-    try:
-        with transaction.atomic():
-            comanda = Comanda.objects.select_for_update().get(pk=instance.comanda_id)
-            comanda.atualizar_status_e_quitacao()
-    except Comanda.DoesNotExist:
+def pagamento_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw or not getattr(instance, "comanda_id", None):
         return
+    marcar_para_recalculo(instance.comanda_id, using=using)
 
 @receiver(post_delete, sender=Pagamento)
-def pagamento_deleted(sender, instance, **kwargs):
+def pagamento_deleted(sender, instance, using=None, **kwargs):
     if not getattr(instance, "comanda_id", None):
         return
-    try:
-        with transaction.atomic():
-            comanda = Comanda.objects.select_for_update().get(pk=instance.comanda_id)
-            comanda.atualizar_status_e_quitacao()
-    except Comanda.DoesNotExist:
+    marcar_para_recalculo(instance.comanda_id, using=using)
+
+
+# ════════════════════════════════════════════
+# INVALIDAÇÃO DO CACHE DO DASHBOARD (core/dashboard/cache.py)
+# ════════════════════════════════════════════
+from .dashboard import cache as dashboard_cache
+from .models import Imovel, Locacao, Locatario, RenovacaoContrato
+
+GRUPOS_CACHE_POR_MODELO = {
+    Comanda: (dashboard_cache.FINANCEIRO,),
+    Pagamento: (dashboard_cache.FINANCEIRO,),
+    Locacao: (dashboard_cache.CONTRATOS,),
+    RenovacaoContrato: (dashboard_cache.CONTRATOS,),
+    Imovel: (dashboard_cache.CADASTROS,),
+    Locatario: (dashboard_cache.CADASTROS,),
+}
+
+
+def invalidar_cache_dashboard(sender, **kwargs):
+    dashboard_cache.invalidar(*GRUPOS_CACHE_POR_MODELO[sender])
+
+
+for _modelo in GRUPOS_CACHE_POR_MODELO:
+    post_save.connect(invalidar_cache_dashboard, sender=_modelo, dispatch_uid=f'cache_dashboard_save_{_modelo.__name__}')
+    post_delete.connect(invalidar_cache_dashboard, sender=_modelo, dispatch_uid=f'cache_dashboard_delete_{_modelo.__name__}')
+
+
+
+# ════════════════════════════════════════════
+# ÍNDICE DE BUSCA (core/services/indice_busca.py)
+# ════════════════════════════════════════════
+from django.db.models.signals import pre_save
+from .services import indice_busca
+
+# Modelos cujo texto é copiado por locações/comandas
+MODELOS_COM_COPIAS = (Locatario, Imovel, Locacao)
+
+
+def preencher_busca(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._busca_alterada = False
+    if raw or not indice_busca.afeta_busca(sender, update_fields):
         return
+    indice_busca.preencher(instance)
+    if sender in MODELOS_COM_COPIAS and not instance._state.adding:
+        anterior = sender.objects.filter(pk=instance.pk).values_list('busca', flat=True).first()
+        instance._busca_alterada = anterior is not None and anterior != instance.busca
+
+
+def gravar_busca(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not indice_busca.afeta_busca(sender, update_fields):
+        return
+    campos = indice_busca.CAMPOS[sender]
+    if update_fields is not None and not set(campos) <= set(update_fields):
+        # save(update_fields=...) não inclui as colunas de busca
+        sender.objects.filter(pk=instance.pk).update(**{campo: getattr(instance, campo) for campo in campos})
+    if getattr(instance, '_busca_alterada', False):
+        instance._busca_alterada = False
+        indice_busca.propagar(instance)
+
+
+for _modelo in indice_busca.PREENCHEDORES:
+    pre_save.connect(preencher_busca, sender=_modelo, dispatch_uid=f'busca_preencher_{_modelo.__name__}')
+    post_save.connect(gravar_busca, sender=_modelo, dispatch_uid=f'busca_gravar_{_modelo.__name__}')
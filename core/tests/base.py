@@ -0,0 +1,101 @@
+"""Dados de apoio compartilhados pelos testes do core"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.urls import resolve
+
+from core.middleware.perfil_consultas import ColetorConsultas, orcamento
+from core.models import Comanda, Imovel, Locacao, Locador, Locatario, Pagamento, Usuario
+
+
+def criar_locacao(sufixo='1', valor_aluguel=Decimal('1000.00'), locador=None, **extra):
+    """Cria locador (se não informado), locatário, imóvel e locação ativos."""
+    if locador is None:
+        usuario = Usuario.objects.create(username=f'locador_{sufixo}', email=f'locador{sufixo}@test.com')
+        locador = Locador.objects.create(
+            usuario=usuario,
+            nome_razao_social=f'Locador {sufixo}',
+            tipo_locador='PF',
+            cpf_cnpj=f'111222333{sufixo}'[-11:].rjust(11, '0'),
+        )
+    locatario = Locatario.objects.create(
+        nome_razao_social=f'Locatário {sufixo}',
+        cpf_cnpj=f'987654321{sufixo}'[-11:].rjust(11, '0'),
+        email=f'locatario{sufixo}@test.com',
+        telefone='41999999999',
+    )
+    imovel = Imovel.objects.create(
+        locador=locador,
+        codigo_imovel=f'IMV{sufixo}',
+        tipo_imovel='APARTAMENTO',
+        endereco=f'Rua Teste {sufixo}',
+        numero='123',
+        bairro=extra.pop('bairro', 'Centro'),
+        cidade='Curitiba',
+        estado='PR',
+        cep='80000-000',
+        area_total=Decimal('100.00'),
+        valor_aluguel=valor_aluguel,
+    )
+    return Locacao.objects.create(
+        imovel=imovel,
+        locatario=locatario,
+        numero_contrato=extra.pop('numero_contrato', f'CT-{sufixo}'),
+        status='ACTIVE',
+        data_inicio=extra.pop('data_inicio', date.today() - timedelta(days=60)),
+        data_fim=extra.pop('data_fim', date.today() + timedelta(days=305)),
+        dia_vencimento=10,
+        valor_aluguel=valor_aluguel,
+        **extra
+    )
+
+
+def criar_comanda(locacao, numero, mes_referencia=None, vencimento=None, **extra):
+    """Cria uma comanda pendente para a locação."""
+    mes_referencia = mes_referencia or date.today().replace(day=1)
+    return Comanda.objects.create(
+        locacao=locacao,
+        numero_comanda=numero,
+        mes_referencia=mes_referencia,
+        ano_referencia=mes_referencia.year,
+        data_vencimento=vencimento or mes_referencia + timedelta(days=9),
+        status=extra.pop('status', 'PENDING'),
+        **extra
+    )
+
+
+def criar_pagamento(comanda, valor, usuario=None, **extra):
+    """Registra um pagamento para a comanda."""
+    return Pagamento.objects.create(
+        comanda=comanda,
+        usuario_registro=usuario or comanda.locacao.imovel.locador.usuario,
+        valor_pago=valor,
+        data_pagamento=extra.pop('data_pagamento', date.today()),
+        forma_pagamento=extra.pop('forma_pagamento', 'pix'),
+        **extra
+    )
+
+
+class OrcamentoConsultasMixin:
+    """
+    Orçamento de consultas SQL por view em TestCase. Sem ``maximo`` vale o
+    PERFIL_CONSULTAS_ORCAMENTOS das settings (o mesmo que o middleware
+    de perfil usa em produção).
+    """
+
+    def assertOrcamentoConsultas(self, url, maximo=None, dados=None, **extra):
+        if maximo is None:
+            nome_view = resolve(url.split('?')[0]).view_name
+            maximo = orcamento(nome_view)
+            self.assertIsNotNone(maximo, f'Sem orçamento em PERFIL_CONSULTAS_ORCAMENTOS para {nome_view}')
+        with ColetorConsultas() as coletor:
+            response = self.client.get(url, dados, **extra)
+        self.assertLess(response.status_code, 400, url)
+        if coletor.total > maximo:
+            resumo = coletor.resumo()
+            repetidas = '\n'.join(f"  {r['vezes']}x {r['sql']}" for r in resumo['repetidas'])
+            self.fail(
+                f"{url}: {coletor.total} consultas (orçamento {maximo}), "
+                f"{resumo['duplicadas']} duplicadas\nRepetidas:\n{repetidas or '  -'}"
+            )
+        return response
@@ -0,0 +1,102 @@
+"""Testes das listagens grandes do admin (contagem estimada, keyset, filtros em cache)"""
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Comanda, Usuario
+from core.tests.base import criar_comanda, criar_locacao
+from core.utils import admin_listas
+
+URL_COMANDAS = '/admin/core/comanda/'
+
+
+class ListasAdminTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(self.admin)
+        self.locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        # Todas no mesmo milissegundo (como num bulk_create), 100µs entre elas:
+        # o cursor precisa dos microssegundos para não pular linhas
+        base = timezone.now().replace(microsecond=0)
+        for mes in (1, 2, 3):
+            comanda = criar_comanda(self.locacao, f'2025{mes:02d}-0001', mes_referencia=date(2025, mes, 1),
+                                    valor_aluguel=Decimal('1000.00'))
+            Comanda.objects.filter(pk=comanda.pk).update(created_at=base + timedelta(microseconds=100 * mes))
+        self.patch = mock.patch.object(admin.site._registry[Comanda], 'list_per_page', 2)
+        self.patch.start()
+        self.addCleanup(self.patch.stop)
+
+    def _numeros(self, response):
+        return [comanda.numero_comanda for comanda in response.context['cl'].result_list]
+
+    def test_paginas_keyset_sem_offset(self):
+        primeira = self.client.get(URL_COMANDAS)
+        self.assertEqual(primeira.status_code, 200)
+        self.assertEqual(self._numeros(primeira), ['202503-0001', '202502-0001'])
+        proxima = primeira.context['cl'].url_proxima
+        self.assertIn(admin_listas.CURSOR_VAR, proxima)
+
+        with CaptureQueriesContext(connection) as contexto:
+            segunda = self.client.get(URL_COMANDAS + proxima)
+        self.assertEqual(self._numeros(segunda), ['202501-0001'])
+        self.assertIsNone(segunda.context['cl'].url_proxima)
+        self.assertFalse([q['sql'] for q in contexto if 'OFFSET' in q['sql'].upper()])
+        self.assertContains(segunda, 'Primeira página')
+
+    def test_filtros_e_cursor_invalido(self):
+        filtrada = self.client.get(URL_COMANDAS, {'ano_referencia': '2025', 'status': 'PENDING'})
+        self.assertEqual(filtrada.context['cl'].result_count, 3)
+        # Mudar um filtro recomeça da primeira página
+        self.assertNotIn(admin_listas.CURSOR_VAR, filtrada.context['cl'].get_query_string({'status': 'PAID'}))
+
+        invalido = self.client.get(URL_COMANDAS, {admin_listas.CURSOR_VAR: 'xx'})
+        self.assertEqual(invalido.status_code, 302)
+
+        # Ordenar por coluna: paginação numerada padrão
+        ordenada = self.client.get(URL_COMANDAS, {'o': '1'})
+        self.assertFalse(ordenada.context['cl'].keyset)
+
+    @override_settings(ADMIN_CONTAGEM_ESTIMADA_ACIMA=1000)
+    def test_contagem_estimada_acima_do_limiar(self):
+        with mock.patch.object(admin_listas, 'contagem_estimada', return_value=250000):
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.client.get(URL_COMANDAS)
+        self.assertTrue(response.context['cl'].paginator.estimada)
+        self.assertEqual(response.context['cl'].result_count, 250000)
+        self.assertContains(response, '~250000')
+        self.assertFalse([q['sql'] for q in contexto if 'COUNT(' in q['sql'].upper() and 'core_comanda' in q['sql']])
+
+        with mock.patch.object(admin_listas, 'contagem_estimada', return_value=10):
+            response = self.client.get(URL_COMANDAS)
+        self.assertFalse(response.context['cl'].paginator.estimada)
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_valores_dos_filtros_em_cache(self):
+        def distintos():
+            with CaptureQueriesContext(connection) as contexto:
+                self.client.get(URL_COMANDAS)
+            return [q['sql'] for q in contexto if 'DISTINCT' in q['sql'].upper()]
+
+        self.assertTrue(distintos())
+        self.assertEqual(distintos(), [])
+
+        # Gravação em comanda invalida (versão do grupo financeiro)
+        criar_comanda(self.locacao, '202604-0001', mes_referencia=date(2026, 4, 1), valor_aluguel=Decimal('1000.00'))
+        self.assertTrue(distintos())
+        response = self.client.get(URL_COMANDAS)
+        self.assertContains(response, '04/2026')
+
+    def test_demais_listagens_grandes(self):
+        for url in ('/admin/core/pagamento/', '/admin/core/lognotificacao/', '/admin/core/lancamentoextrato/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertTrue(response.context['cl'].keyset)
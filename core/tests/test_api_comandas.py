@@ -0,0 +1,66 @@
+"""Testes da API de leitura de comandas e locações (cursor, sem N+1)"""
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import Usuario
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+
+class ApiComandasTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(self.admin)
+        for i in range(1, 6):
+            locacao = criar_locacao(sufixo=f'{i:02d}', valor_aluguel=Decimal('1000.00'))
+            comanda = criar_comanda(locacao, f'202503-{i:04d}', mes_referencia=date(2025, 3, 1),
+                                    valor_condominio=Decimal('200.00'))
+            criar_pagamento(comanda, Decimal('300.00'), status='confirmado')
+
+    def _consultas_da_listagem(self, page_size):
+        # Sessão + usuário + página: constante, independente do tamanho
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/comandas/', {'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_listagem_com_totais_sem_n_mais_1(self):
+        self._consultas_da_listagem(1)
+        dados = self._consultas_da_listagem(5)
+
+        self.assertEqual(len(dados['results']), 5)
+        comanda = dados['results'][0]
+        self.assertEqual(comanda['valor_total'], '1200.00')
+        self.assertEqual(comanda['total_pago'], '300.00')
+        self.assertEqual(comanda['valor_pendente'], '900.00')
+        self.assertTrue(comanda['locatario_nome'].startswith('Locatário'))
+        self.assertNotIn('token', comanda)
+
+    def test_paginacao_por_cursor(self):
+        vistos = []
+        url = '/api/comandas/?page_size=2'
+        while url:
+            dados = self.client.get(url).json()
+            self.assertNotIn('count', dados)
+            vistos += [c['numero_comanda'] for c in dados['results']]
+            url = dados['next']
+
+        self.assertEqual(len(vistos), 5)
+        self.assertEqual(len(set(vistos)), 5)
+        # Mais recentes primeiro
+        self.assertEqual(vistos[0], '202503-0005')
+
+    def test_locacoes(self):
+        dados = self.client.get('/api/locacoes/', {'status': 'ACTIVE'}).json()
+
+        self.assertEqual(len(dados['results']), 5)
+        self.assertEqual(dados['results'][0]['imovel_codigo'], 'IMV05')
+        self.assertEqual(dados['results'][0]['locador_nome'], 'Locador 05')
+
+    def test_somente_staff(self):
+        usuario = Usuario.objects.create_user('comum', 'comum@test.com', 'senha')
+        self.client.force_login(usuario)
+
+        self.assertEqual(self.client.get('/api/comandas/').status_code, 403)
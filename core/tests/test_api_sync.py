@@ -0,0 +1,88 @@
+"""Testes da sincronização incremental (/api/sync/)"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Comanda, Usuario
+from core.tests.base import criar_comanda, criar_locacao
+from core.views_sync import alteracoes_desde
+
+
+@override_settings(SYNC_MARGEM_SEGUNDOS=0)
+class ApiSyncTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(self.admin)
+        self.comandas = [
+            criar_comanda(criar_locacao(sufixo=f'{i:02d}', valor_aluguel=Decimal('1000.00')), f'202503-{i:04d}')
+            for i in range(1, 6)
+        ]
+
+    def _sincronizar(self, cursor=None, limite=2):
+        vistos = []
+        while True:
+            params = {'limite': limite}
+            if cursor:
+                params['cursor'] = cursor
+            dados = self.client.get(reverse('api_sync_modelo', args=['comandas']), params).json()
+            vistos += dados['resultados']
+            cursor = dados['proximo_cursor']
+            if not dados['tem_mais']:
+                return vistos, cursor
+
+    def test_carga_inicial_paginada(self):
+        vistos, cursor = self._sincronizar()
+
+        self.assertEqual([linha['numero_comanda'] for linha in vistos],
+                         [c.numero_comanda for c in self.comandas])
+        self.assertTrue(all(linha['operacao'] == 'criado' for linha in vistos))
+        self.assertIn('locacao_id', vistos[0])
+        self.assertNotIn('token', vistos[0])
+        self.assertIsNotNone(cursor)
+
+    def test_apenas_alteracoes_desde_o_cursor(self):
+        _, cursor = self._sincronizar()
+
+        alterada, removida = self.comandas[1], self.comandas[3]
+        alterada.observacoes = 'Ajuste'
+        alterada.save()
+        removida.is_active = False
+        removida.save()
+
+        vistos, novo_cursor = self._sincronizar(cursor)
+
+        self.assertEqual({linha['numero_comanda']: linha['operacao'] for linha in vistos}, {
+            alterada.numero_comanda: 'atualizado',
+            removida.numero_comanda: 'removido',
+        })
+        # Nada novo: o cursor se mantém
+        vazios, mesmo_cursor = self._sincronizar(novo_cursor)
+        self.assertEqual(vazios, [])
+        self.assertEqual(mesmo_cursor, novo_cursor)
+
+    def test_update_em_lote_marca_updated_at(self):
+        _, cursor = self._sincronizar()
+
+        Comanda.objects.filter(pk=self.comandas[0].pk).update(status='CANCELLED', updated_at=timezone.now())
+
+        vistos, _ = self._sincronizar(cursor)
+        self.assertEqual([linha['status'] for linha in vistos], ['CANCELLED'])
+
+    @override_settings(SYNC_MARGEM_SEGUNDOS=60)
+    def test_margem_para_transacoes_em_andamento(self):
+        linhas, _, _ = alteracoes_desde(Comanda)
+        self.assertEqual(linhas, [])
+
+        linhas, _, _ = alteracoes_desde(Comanda, agora=timezone.now() + timedelta(minutes=2))
+        self.assertEqual(len(linhas), 5)
+
+    def test_erros(self):
+        url = reverse('api_sync_modelo', args=['comandas'])
+        self.assertEqual(self.client.get(url, {'cursor': 'nao-e-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limite': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_sync_modelo', args=['usuarios'])).status_code, 404)
+        self.assertIn('pagamentos', self.client.get(reverse('api_sync')).json()['modelos'])
@@ -0,0 +1,98 @@
+"""Testes da busca normalizada (admin e API)"""
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib import admin
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Comanda, Locacao, Locatario, Usuario
+from core.services import indice_busca
+from core.tests.base import criar_comanda, criar_locacao
+from core.utils.busca import normalizar
+
+
+class BuscaTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        self.locatario = self.locacao.locatario
+        self.locatario.nome_razao_social = 'José Conceição'
+        self.locatario.save()
+        self.locacao.refresh_from_db()
+        self.outra = criar_locacao(sufixo='02', valor_aluguel=Decimal('900.00'), bairro='Água Verde')
+        self.comanda = criar_comanda(self.locacao, '202503-0001', mes_referencia=date(2025, 3, 1))
+        criar_comanda(self.outra, '202503-0002', mes_referencia=date(2025, 3, 1))
+
+    def _admin(self, modelo, termo):
+        request = RequestFactory().get('/', {'q': termo})
+        request.user = self.admin
+        modelo_admin = admin.site._registry[modelo]
+        resultado, duplicatas = modelo_admin.get_search_results(request, modelo.objects.all(), termo)
+        self.assertFalse(duplicatas)
+        return list(resultado)
+
+    def test_colunas_normalizadas(self):
+        self.assertEqual(normalizar('  JOSÉ   Conceição '), 'jose conceicao')
+        self.locatario.refresh_from_db()
+        self.assertEqual(self.locatario.documento_digitos, '98765432101')
+        self.assertIn('jose conceicao', self.locatario.busca)
+        self.comanda.refresh_from_db()
+        self.assertIn('202503-0001', self.comanda.busca)
+        self.assertIn('98765432101', self.comanda.busca)
+        self.assertIn('rua teste 01', self.comanda.busca)
+
+    def test_admin_sem_acento_maiusculas_e_pontuacao(self):
+        self.assertEqual(self._admin(Comanda, 'jose CONCEICAO'), [self.comanda])
+        self.assertEqual(self._admin(Comanda, '987.654.321-01'), [self.comanda])
+        self.assertEqual(self._admin(Locatario, '98765432101'), [self.locatario])
+        # Prefixo do documento, com pontuação parcial
+        self.assertEqual(set(self._admin(Locatario, '987.654.321')), {self.locatario, self.outra.locatario})
+        self.assertEqual(self._admin(Locacao, 'agua verde'), [self.outra])
+
+    def test_uma_consulta_sem_joins(self):
+        with CaptureQueriesContext(connection) as contexto:
+            self._admin(Comanda, 'conceição rua')
+        self.assertEqual(len(contexto), 1)
+        self.assertNotIn('JOIN', contexto[0]['sql'].upper())
+
+    def test_renomear_locatario_atualiza_locacoes_e_comandas(self):
+        self.locatario.nome_razao_social = 'Maria Antônia'
+        self.locatario.save(update_fields=['nome_razao_social'])
+
+        self.assertEqual(self._admin(Comanda, 'antonia'), [self.comanda])
+        self.assertEqual(self._admin(Comanda, 'conceicao'), [])
+        self.assertEqual(self._admin(Locacao, 'maria'), [self.locacao])
+
+    def test_reindexar_reconstroi_colunas_vazias(self):
+        Comanda.objects.update(busca='')
+        Locatario.objects.update(busca='', documento_digitos='')
+
+        indice_busca.reindexar()
+
+        self.assertEqual(self._admin(Comanda, 'josé'), [self.comanda])
+        self.assertEqual(self._admin(Locatario, '98765432101'), [self.locatario])
+
+    def test_migracao_gera_o_mesmo_texto_do_servico(self):
+        esperado = list(Comanda.objects.order_by('numero_comanda').values_list('busca', flat=True))
+        Comanda.objects.update(busca='')
+        Locacao.objects.update(busca='')
+
+        migracao = import_module('core.migrations.0028_indice_busca')
+        migracao.preencher_busca(apps, None)
+
+        self.assertEqual(list(Comanda.objects.order_by('numero_comanda').values_list('busca', flat=True)), esperado)
+
+    def test_api_usa_a_mesma_busca(self):
+        self.client.force_login(self.admin)
+
+        comandas = self.client.get('/api/comandas/', {'search': 'Jose 98765432101'}).json()['results']
+        locacoes = self.client.get('/api/locacoes/', {'search': '987.654.321-02'}).json()['results']
+
+        self.assertEqual([c['numero_comanda'] for c in comandas], ['202503-0001'])
+        self.assertNotIn('busca', comandas[0])
+        self.assertEqual([l['numero_contrato'] for l in locacoes], ['CT-02'])
@@ -0,0 +1,159 @@
+"""Testes da conciliação de retorno CNAB 240/400"""
+import io
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.test import TestCase
+
+from core.models import Comanda, Pagamento, Usuario
+from core.services.cnab_retorno import (
+    conciliar_retorno, gerar_retorno_sintetico, ler_retorno, referencia_titulo,
+)
+from core.tests.base import criar_comanda, criar_locacao
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'cnab'
+
+
+class CNABRetornoTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        vencimento = date(2025, 3, 10)
+        self.por_nosso_numero = criar_comanda(
+            criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00')), '202503-0001',
+            vencimento=vencimento, nosso_numero='1001',
+        )
+        self.por_numero = criar_comanda(
+            criar_locacao(sufixo='02', valor_aluguel=Decimal('1000.00')), '202503-0002', vencimento=vencimento,
+        )
+        self.por_valor = criar_comanda(
+            criar_locacao(sufixo='03', valor_aluguel=Decimal('1000.00')), '202503-0003',
+            vencimento=vencimento, valor_condominio=Decimal('200.00'),
+        )
+
+    def test_leitura_dos_dois_layouts(self):
+        for layout in (400, 240):
+            titulos = list(ler_retorno(FIXTURES / f'retorno_{layout}.ret'))
+            self.assertEqual(len(titulos), 5)
+            self.assertEqual([t['liquidacao'] for t in titulos], [True, True, True, True, False])
+            primeiro = titulos[0]
+            self.assertEqual(primeiro['nosso_numero'], '1001')
+            self.assertEqual(primeiro['valor_pago'], Decimal('1000.00'))
+            self.assertEqual(primeiro['vencimento'], date(2025, 3, 10))
+            self.assertEqual(primeiro['data_pagamento'], date(2025, 3, 9))
+
+    def test_conciliacao_e_reprocessamento(self):
+        for layout in (400, 240):
+            with self.subTest(layout=layout):
+                Pagamento.objects.all().delete()
+                Comanda.objects.update(status=Comanda.StatusComanda.PENDENTE)
+
+                resultado = conciliar_retorno(FIXTURES / f'retorno_{layout}.ret', self.admin)
+
+                self.assertEqual(resultado['liquidacoes'], 4)
+                self.assertEqual(
+                    resultado['por_criterio'],
+                    {'nosso_numero': 1, 'numero_comanda': 1, 'valor_vencimento': 1},
+                )
+                self.assertEqual(len(resultado['nao_conciliados']), 1)
+                self.assertEqual(resultado['nao_conciliados'][0]['nosso_numero'], '9999')
+                self.assertEqual(resultado['pagamentos_criados'], 3)
+
+                for comanda in (self.por_nosso_numero, self.por_numero, self.por_valor):
+                    comanda.refresh_from_db()
+                    self.assertEqual(comanda.status, Comanda.StatusComanda.PAGA)
+                self.assertEqual(
+                    Pagamento.objects.get(comanda=self.por_nosso_numero).data_pagamento, date(2025, 3, 9)
+                )
+
+                # Mesmo arquivo de novo: nada duplicado
+                repetido = conciliar_retorno(FIXTURES / f'retorno_{layout}.ret', self.admin)
+                self.assertEqual(repetido['pagamentos_criados'], 0)
+                self.assertEqual(Pagamento.objects.count(), 3)
+
+    def test_simulacao_nao_grava(self):
+        resultado = conciliar_retorno(FIXTURES / 'retorno_400.ret', self.admin, simular=True)
+        self.assertEqual(resultado['conciliados'], 3)
+        self.assertFalse(Pagamento.objects.exists())
+
+    def test_valor_ambiguo_nao_concilia(self):
+        criar_comanda(
+            criar_locacao(sufixo='04', valor_aluguel=Decimal('1000.00')), '202503-0004',
+            vencimento=date(2025, 3, 10), valor_condominio=Decimal('200.00'),
+        )
+
+        resultado = conciliar_retorno(FIXTURES / 'retorno_400.ret', self.admin, simular=True)
+
+        self.assertNotIn('valor_vencimento', resultado['por_criterio'])
+        self.assertIn('2 comandas', resultado['nao_conciliados'][0]['motivo'])
+
+    def test_registro_invalido_vai_para_nao_conciliados(self):
+        for layout, campo in ((400, (153, 165)), (240, (78, 92))):
+            with self.subTest(layout=layout):
+                linhas = (FIXTURES / f'retorno_{layout}.ret').read_text('latin-1').splitlines()
+                # Valor do 1º título (400) / do 1º segmento U (240) corrompido
+                indice = 1 if layout == 400 else next(i for i, l in enumerate(linhas) if l[13:14] == 'U')
+                inicio, fim = campo
+                linha = linhas[indice]
+                linhas[indice] = linha[:inicio - 1] + 'ABC'.ljust(fim - inicio + 1) + linha[fim:]
+
+                resultado = conciliar_retorno(io.StringIO('\n'.join(linhas)), self.admin, simular=True)
+
+                self.assertEqual(resultado['titulos'], 5)
+                invalido = resultado['nao_conciliados'][0]
+                self.assertEqual(invalido['nosso_numero'], '1001')
+                self.assertIn('Registro inválido', invalido['motivo'])
+                # As demais liquidações seguem conciliadas
+                self.assertEqual(resultado['conciliados'], 2)
+
+    def _linhas(self, layout):
+        return (FIXTURES / f'retorno_{layout}.ret').read_text('latin-1').splitlines()
+
+    def test_segmento_t_sem_u_vai_para_nao_conciliados(self):
+        linhas = self._linhas(240)
+        segmentos_u = [i for i, l in enumerate(linhas) if l[13:14] == 'U']
+        # Sem o U do 1º título (T seguido de T) nem o do último (T antes do trailer do lote)
+        for indice in (segmentos_u[-1], segmentos_u[0]):
+            del linhas[indice]
+
+        titulos = list(ler_retorno(io.StringIO('\n'.join(linhas))))
+        self.assertEqual(len(titulos), 5)
+        self.assertEqual([t.get('invalido') for t in titulos if 'invalido' in t], ['segmento T sem segmento U'] * 2)
+
+        resultado = conciliar_retorno(io.StringIO('\n'.join(linhas)), self.admin, simular=True)
+        motivos = [(t['nosso_numero'], t['motivo']) for t in resultado['nao_conciliados']]
+        self.assertIn(('1001', 'Registro inválido: segmento T sem segmento U'), motivos)
+        self.assertEqual(resultado['conciliados'], 2)
+
+    def test_referencia_nao_depende_da_posicao_no_arquivo(self):
+        linhas = self._linhas(400)
+        # Mesmos títulos em outra ordem, com uma linha a mais antes
+        reordenado = [linhas[0], '0'.ljust(400), *reversed(linhas[1:-1]), linhas[-1]]
+
+        referencias = [referencia_titulo(t) for t in ler_retorno(FIXTURES / 'retorno_400.ret')]
+        reordenadas = [referencia_titulo(t) for t in ler_retorno(io.StringIO('\n'.join(reordenado)))]
+
+        self.assertEqual(len(set(referencias)), 5)
+        self.assertEqual(sorted(referencias), sorted(reordenadas))
+
+    def test_titulo_sem_identificacao_nao_e_registrado(self):
+        titulo = next(t for t in ler_retorno(FIXTURES / 'retorno_400.ret') if t['linha'] == 4)
+        self.assertEqual((titulo['nosso_numero'], titulo['seu_numero']), ('', ''))
+        self.assertIsNotNone(referencia_titulo(titulo))
+
+        titulo['vencimento'] = None
+        self.assertIsNone(referencia_titulo(titulo))
+
+    def test_arquivo_grande_em_consultas_constantes(self):
+        titulos = [
+            {'nosso_numero': '1001', 'valor': Decimal('10.00'), 'vencimento': date(2025, 3, 10),
+             'data_pagamento': date(2025, 3, d % 28 + 1), 'seu_numero': f'X{d}'}
+            for d in range(3000)
+        ]
+        texto = gerar_retorno_sintetico(titulos, 400)
+
+        # Índice + referências já registradas (3000 distintas: 6 fatias); nada gravado
+        with self.assertNumQueries(7):
+            resultado = conciliar_retorno(io.StringIO(texto), self.admin, simular=True)
+        self.assertEqual(resultado['conciliados'], 3000)
@@ -0,0 +1,92 @@
+"""Testes do cubo financeiro em memória (NumPy)"""
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.dashboard import cubo as modulo_cubo
+from core.dashboard.cubo import HAS_NUMPY, CuboFinanceiro
+from core.models import Usuario
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+HOJE = date(2025, 4, 20)
+
+
+@skipUnless(HAS_NUMPY, 'numpy não instalado')
+class CuboFinanceiroTest(TestCase):
+
+    def setUp(self):
+        self.loc_centro = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        self.loc_batel = criar_locacao(sufixo='02', valor_aluguel=Decimal('2000.00'), bairro='Batel')
+        self.locador = self.loc_centro.imovel.locador
+        self.c_marco = criar_comanda(self.loc_centro, '202503-0001', mes_referencia=date(2025, 3, 1),
+                                     _valor_aluguel_historico=Decimal('1000.00'))
+        self.c_abril = criar_comanda(self.loc_centro, '202504-0001', mes_referencia=date(2025, 4, 1),
+                                     vencimento=date(2025, 4, 30),
+                                     _valor_aluguel_historico=Decimal('1000.00'))
+        self.c_batel = criar_comanda(self.loc_batel, '202503-0002', mes_referencia=date(2025, 3, 1),
+                                     _valor_aluguel_historico=Decimal('2000.00'))
+        criar_pagamento(self.c_marco, Decimal('400.00'), status='confirmado', data_pagamento=date(2025, 3, 12))
+        criar_pagamento(self.c_batel, Decimal('999.00'), status='pendente', data_pagamento=date(2025, 3, 12))
+        self.cubo = CuboFinanceiro()
+        self.cubo.atualizar()
+
+    def test_agrupar_por_mes(self):
+        linhas = self.cubo.agrupar('comandas', ['mes'], ['quantidade', 'previsto', 'pago', 'em_atraso'], hoje=HOJE)
+
+        self.assertEqual(linhas, [
+            {'mes': '2025-03', 'quantidade': 2, 'previsto': 3000.0, 'pago': 400.0, 'em_atraso': 2600.0},
+            {'mes': '2025-04', 'quantidade': 1, 'previsto': 1000.0, 'pago': 0.0, 'em_atraso': 0.0},
+        ])
+
+    def test_filtros_e_pivo(self):
+        linhas = self.cubo.agrupar('comandas', ['bairro'], ['previsto'],
+                                   filtros={'locador': str(self.locador.pk), 'mes_fim': '2025-03'})
+        self.assertEqual(linhas, [{'bairro': 'Centro', 'previsto': 1000.0}])
+
+        pivo = self.cubo.pivo('comandas', linhas='bairro', colunas='mes', medida='previsto')
+        self.assertEqual(pivo['linhas'], ['Batel', 'Centro'])
+        self.assertEqual(pivo['colunas'], ['2025-03', '2025-04'])
+        self.assertEqual(pivo['valores'], [[2000.0, 0.0], [1000.0, 1000.0]])
+
+    def test_pagamentos_confirmados(self):
+        linhas = self.cubo.agrupar('pagamentos', ['mes', 'forma_pagamento'])
+
+        self.assertEqual(linhas, [{'mes': '2025-03', 'forma_pagamento': 'pix', 'quantidade': 1, 'valor': 400.0}])
+
+    def test_atualizacao_incremental(self):
+        # Sem mudanças: nada a reler
+        self.assertEqual(self.cubo.atualizar(), 0)
+
+        criar_pagamento(self.c_abril, Decimal('250.00'), status='confirmado', data_pagamento=date(2025, 4, 5))
+        self.c_batel.is_active = False
+        self.c_batel.save()
+
+        self.assertGreater(self.cubo.atualizar(), 0)
+        self.assertEqual(len(self.cubo.comandas), 3)
+
+        linhas = self.cubo.agrupar('comandas', ['mes'], ['quantidade', 'pago'])
+        self.assertEqual(linhas, [
+            {'mes': '2025-03', 'quantidade': 1, 'pago': 400.0},
+            {'mes': '2025-04', 'quantidade': 1, 'pago': 250.0},
+        ])
+
+    def test_dimensao_invalida(self):
+        with self.assertRaises(ValueError):
+            self.cubo.agrupar('comandas', ['cidade'])
+
+    def test_endpoint_json(self):
+        modulo_cubo._cubo = None
+        admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('cubo_financeiro'), {
+            'dimensoes': 'mes', 'medidas': 'previsto', 'bairro': 'Centro,Batel', 'mes_inicio': '2025-04',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['dados'], [{'mes': '2025-04', 'previsto': 1000.0}])
+
+        response = self.client.get(reverse('cubo_financeiro'), {'dimensoes': 'cidade'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,79 @@
+"""Testes do cache do dashboard (fragmentos versionados + invalidação)"""
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.dashboard import cache as dashboard_cache
+from core.dashboard.analytics import DashboardFinancialAnalytics
+from core.services.dashboard_financeiro import dados_dashboard, filtros_dashboard
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+HOJE = date(2025, 3, 20)
+MES = date(2025, 3, 1)
+
+
+class DashboardCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        self.comanda = criar_comanda(self.locacao, '202503-0001', mes_referencia=MES,
+                                     vencimento=date(2025, 3, 10),
+                                     _valor_aluguel_historico=Decimal('1000.00'))
+        self.filtros = filtros_dashboard({'ano': '2025', 'mes': '3'}, HOJE)
+
+    def test_segunda_leitura_sem_consultas(self):
+        primeiro = dados_dashboard(self.filtros, HOJE)
+
+        with self.assertNumQueries(0):
+            segundo = dados_dashboard(self.filtros, HOJE)
+
+        self.assertEqual(primeiro, segundo)
+        estatisticas = dashboard_cache.estatisticas_cache(['financeiro_kpis'])
+        self.assertEqual(estatisticas['financeiro_kpis']['hits'], 1)
+        self.assertEqual(estatisticas['financeiro_kpis']['misses'], 1)
+        self.assertEqual(estatisticas['financeiro_kpis']['taxa_acerto'], 50.0)
+
+    def test_filtros_diferentes_tem_chaves_diferentes(self):
+        dados_dashboard(self.filtros, HOJE)
+        outros = filtros_dashboard({'ano': '2025', 'mes': '3', 'status': 'pago'}, HOJE)
+
+        dados = dados_dashboard(outros, HOJE)
+
+        self.assertEqual(dados['kpis']['total_comandas'], 0)
+
+    def test_pagamento_invalida_fragmentos_financeiros(self):
+        antes = dados_dashboard(self.filtros, HOJE)
+        self.assertEqual(antes['kpis']['receita_realizada'], 0.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_pagamento(self.comanda, Decimal('400.00'), status='confirmado',
+                            data_pagamento=date(2025, 3, 15))
+
+        depois = dados_dashboard(self.filtros, HOJE)
+        self.assertEqual(depois['kpis']['receita_realizada'], 400.0)
+        self.assertEqual(depois['ultimos_pagamentos'][0]['valor'], 400.0)
+
+    def test_invalidacao_direcionada_por_grupo(self):
+        versao_financeiro = dashboard_cache.versao(dashboard_cache.FINANCEIRO)
+        versao_contratos = dashboard_cache.versao(dashboard_cache.CONTRATOS)
+
+        self.locacao.seguro_seguradora = 'Seguradora X'
+        self.locacao.save()
+
+        self.assertEqual(dashboard_cache.versao(dashboard_cache.FINANCEIRO), versao_financeiro)
+        self.assertGreater(dashboard_cache.versao(dashboard_cache.CONTRATOS), versao_contratos)
+
+    def test_analytics_em_cache_por_data(self):
+        analytics = DashboardFinancialAnalytics()
+        kpis = analytics.get_kpis()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(DashboardFinancialAnalytics().get_kpis(), kpis)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_locacao(sufixo='02')
+
+        self.assertEqual(analytics.get_kpis()['total_imoveis'], kpis['total_imoveis'] + 1)
@@ -0,0 +1,76 @@
+"""Testes do cache de recibos do DocumentGenerator"""
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.document_generator import DocumentGenerator
+from core.models import Comanda, Imovel, Pagamento
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+
+class ReciboCacheTest(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.generator = DocumentGenerator(output_dir=self.media)
+
+        locacao = criar_locacao()
+        comanda = criar_comanda(locacao, 'TEST-0001')
+        self.pagamento = criar_pagamento(comanda, Decimal('500.00'))
+
+    def _arquivos(self):
+        return sorted(os.listdir(self.generator.output_dir))
+
+    def test_reaproveita_recibo_sem_alteracoes(self):
+        primeiro = self.generator.gerar_recibo_pagamento(self.pagamento.id)
+        caminho = self.generator.caminho_recibo(primeiro)
+        mtime = os.path.getmtime(caminho)
+
+        segundo = self.generator.gerar_recibo_pagamento(self.pagamento.id)
+
+        self.assertEqual(primeiro, segundo)
+        self.assertEqual(os.path.getmtime(caminho), mtime)
+        self.assertEqual(self._arquivos(), [primeiro])
+
+    def test_nova_versao_substitui_anterior(self):
+        antigo = self.generator.gerar_recibo_pagamento(self.pagamento.id)
+
+        Pagamento.objects.filter(pk=self.pagamento.pk).update(valor_pago=Decimal('600.00'))
+        novo = self.generator.gerar_recibo_pagamento(self.pagamento.id)
+
+        self.assertNotEqual(antigo, novo)
+        self.assertEqual(self._arquivos(), [novo])
+
+    def test_versao_cobre_campos_exibidos_de_imovel_e_comanda(self):
+        antigo = self.generator.gerar_recibo_pagamento(self.pagamento.id)
+
+        Imovel.objects.filter(pk=self.pagamento.comanda.locacao.imovel_id).update(cidade='Outra Cidade')
+        cidade = self.generator.gerar_recibo_pagamento(self.pagamento.id)
+        self.assertNotEqual(antigo, cidade)
+
+        Comanda.objects.filter(pk=self.pagamento.comanda_id).update(
+            data_vencimento=self.pagamento.comanda.data_vencimento + timedelta(days=5)
+        )
+        vencimento = self.generator.gerar_recibo_pagamento(self.pagamento.id)
+        self.assertNotEqual(cidade, vencimento)
+        self.assertEqual(self._arquivos(), [vencimento])
+
+    def test_limpeza_remove_apenas_arquivos_antigos(self):
+        nome = self.generator.gerar_recibo_pagamento(self.pagamento.id)
+        caminho = self.generator.caminho_recibo(nome)
+
+        self.assertEqual(self.generator.limpar_recibos_antigos(dias=30), [])
+
+        antigo = time.time() - 40 * 86400
+        os.utime(caminho, (antigo, antigo))
+        self.assertEqual(self.generator.limpar_recibos_antigos(dias=30, dry_run=True), [nome])
+        self.assertTrue(os.path.exists(caminho))
+
+        self.assertEqual(self.generator.limpar_recibos_antigos(dias=30), [nome])
+        self.assertFalse(os.path.exists(caminho))
@@ -0,0 +1,70 @@
+"""Testes da exportação de comandas (CSV/XLSX em streaming)"""
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Comanda, Usuario
+from core.services.exportacao_comandas import CABECALHO, linhas_comandas
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+
+class ExportacaoComandasTest(TestCase):
+
+    def setUp(self):
+        locacao = criar_locacao(valor_aluguel=Decimal('1500.00'))
+        self.comandas = []
+        for mes in range(1, 4):
+            self.comandas.append(criar_comanda(
+                locacao, f'2025{mes:02d}-0001',
+                mes_referencia=date(2025, mes, 1),
+                _valor_aluguel_historico=Decimal('1200.00'),
+                valor_condominio=Decimal('300.00'),
+                outros_creditos=Decimal('50.00'),
+                desconto=Decimal('10.00'),
+            ))
+        criar_pagamento(self.comandas[0], Decimal('700.00'), status='confirmado')
+        criar_pagamento(self.comandas[0], Decimal('99.00'), status='pendente')
+
+    def test_valores_calculados_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            linhas = list(linhas_comandas(Comanda.objects.all()))
+
+        self.assertEqual(len(linhas), 3)
+        por_numero = {linha[0]: linha for linha in linhas}
+        for comanda in Comanda.objects.all():
+            linha = por_numero[comanda.numero_comanda]
+            total_pago = sum(
+                (p.valor_pago for p in comanda.pagamentos.filter(status='confirmado')), Decimal('0.00')
+            )
+            self.assertEqual(linha[CABECALHO.index('Valor Aluguel')], comanda.valor_aluguel)
+            self.assertEqual(linha[CABECALHO.index('Valor Total')], comanda.valor_total)
+            self.assertEqual(
+                linha[CABECALHO.index('Valor Pendente')],
+                max(comanda.valor_total - total_pago, Decimal('0.00')),
+            )
+
+    def test_acoes_do_admin_fazem_streaming(self):
+        admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(admin)
+        url = reverse('admin:core_comanda_changelist')
+        selecionadas = [str(c.pk) for c in self.comandas]
+
+        response = self.client.post(url, {'action': 'exportar_para_excel', '_selected_action': selecionadas})
+        self.assertTrue(response.streaming)
+        conteudo = b''.join(response.streaming_content).decode('utf-8-sig')
+        linhas = conteudo.strip().splitlines()
+        self.assertEqual(linhas[0].split(';'), CABECALHO)
+        self.assertEqual(len(linhas), 4)
+        self.assertIn('1740,00', linhas[1])  # 1500 + 300 - 50 - 10
+
+        response = self.client.post(url, {'action': 'exportar_para_xlsx', '_selected_action': selecionadas})
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as zf:
+            self.assertIsNone(zf.testzip())
+            planilha = zf.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(planilha.count('<row '), 4)
+        self.assertIn('<v>1740.00</v>', planilha)
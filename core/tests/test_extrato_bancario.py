@@ -0,0 +1,157 @@
+"""Testes da importação de extrato bancário (OFX/CSV) e conciliação"""
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import Comanda, LancamentoExtrato, Pagamento, Usuario
+from core.services.extrato_bancario import confirmar_lancamentos, importar_extrato, ler_extrato
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250309120000[-3:BRT]
+<TRNAMT>1000.00
+<FITID>A1
+<MEMO>PIX RECEBIDO 987.654.321-01 FULANO
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250309
+<TRNAMT>-50.00
+<FITID>A2
+<MEMO>TARIFA
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250310
+<TRNAMT>1200.00
+<FITID>A3
+<MEMO>TED RECEBIDA
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+CSV = """Data;Descrição;Valor;Documento
+09/03/2025;PIX RECEBIDO FULANO;1.000,00;987.654.321-01
+09/03/2025;TARIFA;-50,00;
+12/03/2025;DEPOSITO;77,00;
+"""
+
+
+class ExtratoBancarioTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        vencimento = date(2025, 3, 10)
+        # Locatário 98765432101
+        self.com_documento = criar_comanda(
+            criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00')), '202503-0001', vencimento=vencimento,
+        )
+        self.por_valor = criar_comanda(
+            criar_locacao(sufixo='02', valor_aluguel=Decimal('1000.00')), '202503-0002',
+            vencimento=vencimento, valor_condominio=Decimal('200.00'),
+        )
+
+    def test_leitura_ofx_e_csv(self):
+        ofx = list(ler_extrato(io.StringIO(OFX)))
+        self.assertEqual([c['identificador'] for c in ofx], ['ofx:A1', 'ofx:A3'])
+        self.assertEqual(ofx[0]['data'], date(2025, 3, 9))
+        self.assertEqual(ofx[0]['valor'], Decimal('1000.00'))
+        self.assertEqual(ofx[0]['documento'], '98765432101')
+
+        csv = list(ler_extrato(io.BytesIO(CSV.encode('latin-1'))))
+        self.assertEqual(len(csv), 2)
+        self.assertEqual(csv[0]['valor'], Decimal('1000.00'))
+        self.assertEqual(csv[0]['documento'], '98765432101')
+        self.assertEqual(csv[1]['documento'], '')
+
+    def test_conciliacao_automatica_revisao_e_reimportacao(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = importar_extrato(io.StringIO(OFX), self.admin)
+
+        self.assertEqual(resultado['conciliados'], 1)
+        self.assertEqual(resultado['revisao'], 1)
+
+        self.com_documento.refresh_from_db()
+        self.assertEqual(self.com_documento.status, Comanda.StatusComanda.PAGA)
+        pagamento = Pagamento.objects.get(comanda=self.com_documento)
+        self.assertEqual(pagamento.forma_pagamento, 'pix')
+        self.assertEqual(pagamento.lancamento_extrato.identificador, 'ofx:A1')
+
+        # Só o valor bate: fica para revisão, com o candidato registrado
+        revisao = LancamentoExtrato.objects.get(identificador='ofx:A3')
+        self.assertEqual(revisao.status, LancamentoExtrato.Status.REVISAO)
+        self.assertEqual(revisao.candidatos[0]['comanda'], str(self.por_valor.pk))
+        self.assertIsNone(revisao.pagamento)
+
+        repetido = importar_extrato(io.StringIO(OFX), self.admin)
+        self.assertEqual(repetido['duplicados'], 2)
+        self.assertEqual(LancamentoExtrato.objects.count(), 2)
+        self.assertEqual(Pagamento.objects.count(), 1)
+
+        # Revisão no admin: escolhe a comanda e confirma
+        revisao.comanda = self.por_valor
+        revisao.save()
+        self.assertEqual(confirmar_lancamentos([revisao], self.admin), 1)
+        self.por_valor.refresh_from_db()
+        self.assertEqual(self.por_valor.status, Comanda.StatusComanda.PAGA)
+        self.assertEqual(confirmar_lancamentos([revisao], self.admin), 0)
+
+    def test_documento_com_duas_comandas_vai_para_revisao(self):
+        locacao = self.com_documento.locacao
+        criar_comanda(locacao, '202504-0001', mes_referencia=date(2025, 4, 1), vencimento=date(2025, 3, 10))
+
+        resultado = importar_extrato(io.StringIO(OFX), self.admin, simular=True)
+
+        self.assertEqual(resultado['conciliados'], 0)
+        self.assertEqual(resultado['revisao'], 2)
+        self.assertFalse(LancamentoExtrato.objects.exists())
+
+    def test_valor_total_de_comanda_parcialmente_paga_vai_para_revisao(self):
+        # Pendente 600,00: o crédito de 1000,00 com o documento é o total original
+        criar_pagamento(self.com_documento, Decimal('400.00'), status='confirmado')
+
+        resultado = importar_extrato(io.StringIO(OFX), self.admin, tamanho_lote=1)
+
+        self.assertEqual(resultado['conciliados'], 0)
+        self.assertEqual(resultado['revisao'], 2)
+        lancamento = LancamentoExtrato.objects.get(identificador='ofx:A1')
+        self.assertEqual(lancamento.status, LancamentoExtrato.Status.REVISAO)
+        self.assertEqual(lancamento.candidatos[0]['comanda'], str(self.com_documento.pk))
+        self.assertEqual(Pagamento.objects.filter(comanda=self.com_documento).count(), 1)
+
+    def test_linhas_invalidas_vao_para_o_relatorio(self):
+        # Transação sem DTPOSTED depois do 1º crédito (já gravado no 1º lote)
+        ofx = OFX.replace('<DTPOSTED>20250310\n', '')
+        resultado = importar_extrato(io.StringIO(ofx), self.admin, tamanho_lote=1)
+
+        self.assertEqual(resultado['invalidos'], [{'linha': 19, 'motivo': 'Transação sem DTPOSTED'}])
+        self.assertEqual(resultado['creditos'], 1)
+        self.assertEqual(LancamentoExtrato.objects.get().identificador, 'ofx:A1')
+
+        csv = CSV.replace('12/03/2025;DEPOSITO', '32/13/2025;DEPOSITO') + '13/03/2025;PIX;abc;\n14/03/2025;TED;88,00;\n'
+        resultado = importar_extrato(io.StringIO(csv), self.admin, tamanho_lote=1)
+
+        self.assertEqual([item['linha'] for item in resultado['invalidos']], [4, 5])
+        self.assertIn('Data inválida', resultado['invalidos'][0]['motivo'])
+        self.assertIn('Valor inválido', resultado['invalidos'][1]['motivo'])
+        # As linhas seguintes continuam sendo importadas
+        self.assertEqual(resultado['creditos'], 2)
+        self.assertTrue(LancamentoExtrato.objects.filter(valor=Decimal('88.00')).exists())
+
+    def test_extrato_grande_em_consultas_constantes(self):
+        linhas = ['data;valor;descricao;documento']
+        linhas += [f'0{d % 9 + 1}/03/2025;1000,00;PIX {d};98765432101' for d in range(2000)]
+
+        # Índice + identificadores já importados (um por lote de 500); nada gravado
+        with self.assertNumQueries(5):
+            resultado = importar_extrato(io.StringIO('\n'.join(linhas)), self.admin, simular=True)
+        self.assertEqual(resultado['conciliados'], 1)
+        self.assertEqual(resultado['sem_correspondencia'], 1999)
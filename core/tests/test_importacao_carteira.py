@@ -0,0 +1,148 @@
+"""Testes da importação em massa da carteira (CSV/XLSX)"""
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from core.models import Imovel, ImportacaoCarteira, Locacao, Locador, Locatario, Usuario
+from core.services import importacao_carteira
+from core.services.importacao_carteira import importar_carteira
+from core.utils.streaming import xlsx_streaming
+
+
+def cpf_valido(base):
+    """CPF com dígitos verificadores a partir de 9 dígitos."""
+    digitos = f'{base:09d}'
+    for peso in (10, 11):
+        resto = sum(int(d) * (peso - i) for i, d in enumerate(digitos)) % 11
+        digitos += '0' if resto < 2 else str(11 - resto)
+    return digitos
+
+
+def csv_bytes(linhas):
+    return io.BytesIO('\n'.join(';'.join(map(str, linha)) for linha in linhas).encode('utf-8'))
+
+
+def planilha_locatarios(quantidade, inicio=1):
+    linhas = [['Nome Razão Social', 'cpf_cnpj', 'Telefone', 'Email', 'Endereço Completo']]
+    for i in range(inicio, inicio + quantidade):
+        linhas.append([f'Locatário {i}', cpf_valido(100000000 + i), '41999999999', f'l{i}@test.com', f'Rua {i}'])
+    return csv_bytes(linhas)
+
+
+class ImportacaoCarteiraTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+
+    def test_carteira_completa(self):
+        cpf_locador, cpf_locatario = cpf_valido(123456789), cpf_valido(987654321)
+        locadores = csv_bytes([
+            ['nome_razao_social', 'cpf_cnpj', 'telefone', 'email', 'endereco_completo', 'cep'],
+            ['Maria', cpf_locador, '4133334444', 'maria@test.com', 'Rua A, 1', '80000000'],
+            ['Inválido', '11111111111', '4133334444', 'x@test.com', 'Rua B, 2', '80000-000'],
+        ])
+        resultado = importar_carteira(locadores, 'locadores', self.admin, formato='csv')
+
+        self.assertEqual(resultado['criados'], 1)
+        self.assertEqual(resultado['erros'], [{'linha': 3, 'erros': {'cpf_cnpj': ['CPF inválido.']}}])
+        locador = Locador.objects.get()
+        self.assertEqual(locador.cpf_cnpj, f'{cpf_locador[:3]}.{cpf_locador[3:6]}.{cpf_locador[6:9]}-{cpf_locador[9:]}')
+        self.assertEqual(locador.cep, '80000-000')
+        self.assertEqual(locador.usuario.tipo_usuario, Usuario.TipoUsuario.LOCADOR)
+        self.assertFalse(locador.usuario.has_usable_password())
+
+        # Imóveis em XLSX: tipo pelo rótulo, valores numéricos da planilha
+        imoveis = io.BytesIO(b''.join(xlsx_streaming(
+            ['locador_cpf_cnpj', 'codigo_imovel', 'tipo_imovel', 'endereco', 'numero', 'bairro',
+             'cidade', 'estado', 'cep', 'area_total', 'valor_aluguel'],
+            [
+                [cpf_locador, 'AP101', 'Apartamento', 'Rua C', '10', 'Centro', 'Curitiba', 'pr', '80000-000',
+                 Decimal('70.5'), Decimal('1500.00')],
+                ['00000000191', 'AP102', 'Apartamento', 'Rua C', '10', 'Centro', 'Curitiba', 'PR', '80000-000',
+                 Decimal('70.5'), Decimal('1500.00')],
+            ],
+        )))
+        resultado = importar_carteira(imoveis, 'imoveis', self.admin)
+
+        self.assertEqual(resultado['criados'], 1)
+        self.assertIn('locador_cpf_cnpj', resultado['erros'][0]['erros'])
+        imovel = Imovel.objects.get()
+        self.assertEqual((imovel.tipo_imovel, imovel.estado, imovel.locador), ('APARTMENT', 'PR', locador))
+        self.assertEqual(imovel.valor_aluguel, Decimal('1500.00'))
+
+        importar_carteira(csv_bytes([
+            ['nome_razao_social', 'cpf_cnpj', 'telefone', 'email', 'endereco_completo'],
+            ['João', cpf_locatario, '41999999999', 'joao@test.com', 'Rua D, 4'],
+        ]), 'locatarios', self.admin)
+
+        locacoes = csv_bytes([
+            ['codigo_imovel', 'locatario_cpf_cnpj', 'data_inicio', 'data_fim', 'valor_aluguel', 'status'],
+            ['AP101', cpf_locatario, '01/03/2025', '28/02/2026', '1.500,00', 'Ativa'],
+            ['AP101', cpf_locatario, '01/03/2025', '28/02/2026', '1.500,00', 'Ativa'],
+        ])
+        resultado = importar_carteira(locacoes, 'locacoes', self.admin)
+
+        self.assertEqual(resultado['criados'], 1)
+        self.assertEqual(resultado['erros'][0]['erros'], {'__all__': ['Registro repetido na planilha.']})
+        locacao = Locacao.objects.get()
+        self.assertEqual(locacao.status, Locacao.StatusLocacao.ATIVA)
+        self.assertTrue(locacao.numero_contrato.endswith(f'{cpf_locatario[-6:]}AP101'))
+
+    def test_reimportacao_e_simulacao_nao_duplicam(self):
+        simulado = importar_carteira(planilha_locatarios(3), 'locatarios', self.admin, simular=True)
+        self.assertEqual(simulado['criados'], 3)
+        self.assertFalse(Locatario.objects.exists())
+        self.assertFalse(ImportacaoCarteira.objects.exists())
+
+        importar_carteira(planilha_locatarios(3), 'locatarios', self.admin)
+        # Arquivo diferente com sobreposição: só os novos entram
+        resultado = importar_carteira(planilha_locatarios(4), 'locatarios', self.admin)
+
+        self.assertEqual((resultado['criados'], resultado['existentes']), (1, 3))
+        self.assertEqual(Locatario.objects.count(), 4)
+
+    def test_retoma_do_ultimo_lote_gravado(self):
+        processar = importacao_carteira._processar_lote
+        chamadas = []
+
+        def falha_no_terceiro_lote(*args):
+            chamadas.append(1)
+            if len(chamadas) == 3:
+                raise RuntimeError('queda no meio da importação')
+            return processar(*args)
+
+        with mock.patch.object(importacao_carteira, '_processar_lote', falha_no_terceiro_lote):
+            with self.assertRaises(RuntimeError):
+                importar_carteira(planilha_locatarios(10), 'locatarios', self.admin, tamanho_lote=2)
+
+        importacao = ImportacaoCarteira.objects.get()
+        self.assertEqual((importacao.status, importacao.linhas_processadas), ('em_andamento', 4))
+        self.assertEqual(Locatario.objects.count(), 4)
+
+        resultado = importar_carteira(planilha_locatarios(10), 'locatarios', self.admin, tamanho_lote=2)
+
+        self.assertTrue(resultado['retomada'])
+        self.assertEqual((resultado['criados'], resultado['existentes']), (10, 0))
+        self.assertEqual(Locatario.objects.count(), 10)
+        importacao.refresh_from_db()
+        self.assertEqual(importacao.status, ImportacaoCarteira.Status.CONCLUIDA)
+
+    def test_consultas_por_lote_e_nao_por_linha(self):
+        def consultas(quantidade, inicio):
+            with CaptureQueriesContext(connection) as contexto:
+                importar_carteira(planilha_locatarios(quantidade, inicio), 'locatarios', self.admin, tamanho_lote=100)
+            return len(contexto)
+
+        um_lote = consultas(100, 1)
+        tres_lotes = consultas(300, 1000)
+
+        self.assertEqual(Locatario.objects.count(), 400)
+        # Cada lote extra custa o mesmo número fixo de consultas (savepoint,
+        # existentes, INSERTs do bulk_create, checkpoint), não 100
+        por_lote = (tres_lotes - um_lote) // 2
+        self.assertLess(por_lote, 10)
+        self.assertEqual(tres_lotes, um_lote + 2 * por_lote)
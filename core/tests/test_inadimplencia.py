@@ -0,0 +1,88 @@
+"""Testes do relatório de inadimplência por faixa de atraso"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Usuario
+from core.reports import RelatorioFinanceiro
+from core.services.inadimplencia import (
+    comandas_vencidas, mais_recentes_por_faixa, pivo_por_locador, pivo_por_locatario, totais_por_faixa,
+)
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+
+class InadimplenciaTest(TestCase):
+
+    def setUp(self):
+        self.hoje = date.today()
+        self.locacao_a = criar_locacao(sufixo='1')
+        self.locacao_b = criar_locacao(sufixo='2')
+
+        def vencida(locacao, numero, dias, **extra):
+            vencimento = self.hoje - timedelta(days=dias)
+            return criar_comanda(
+                locacao, numero, mes_referencia=vencimento.replace(day=1), vencimento=vencimento,
+                _valor_aluguel_historico=Decimal('1000.00'), **extra
+            )
+
+        vencida(self.locacao_a, 'A-5', 5)
+        vencida(self.locacao_a, 'A-45', 45, status='OVERDUE')
+        vencida(self.locacao_b, 'B-75', 75, status='OVERDUE')
+        vencida(self.locacao_b, 'B-120', 120, status='OVERDUE')
+        parcial = vencida(self.locacao_b, 'B-200', 200, status='PARTIAL')
+        criar_pagamento(parcial, Decimal('400.00'), status='confirmado')
+
+        # Fora do relatório: paga e a vencer
+        vencida(self.locacao_a, 'A-PAGA', 10, status='PAID')
+        criar_comanda(self.locacao_a, 'A-FUTURA', vencimento=self.hoje + timedelta(days=5))
+
+    def test_totais_por_faixa_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            totais = totais_por_faixa(comandas_vencidas(self.hoje))
+
+        self.assertEqual(list(totais), ['0-30', '31-60', '61-90', '90+'])
+        self.assertEqual(totais['0-30']['quantidade'], 1)
+        self.assertEqual(totais['31-60']['quantidade'], 1)
+        self.assertEqual(totais['61-90']['quantidade'], 1)
+        self.assertEqual(totais['90+']['quantidade'], 2)
+        self.assertEqual(totais['90+']['valor_total'], Decimal('2000.00'))
+        self.assertEqual(totais['90+']['valor_pendente'], Decimal('1600.00'))
+
+    def test_pivos_por_locatario_e_locador(self):
+        vencidas = comandas_vencidas(self.hoje)
+        with self.assertNumQueries(1):
+            por_locatario = list(pivo_por_locatario(vencidas))
+
+        self.assertEqual(len(por_locatario), 2)
+        primeiro = por_locatario[0]
+        self.assertEqual(primeiro['nome'], 'Locatário 2')
+        self.assertEqual(primeiro['quantidade'], 3)
+        self.assertEqual(primeiro['faixa_61_90'], Decimal('1000.00'))
+        self.assertEqual(primeiro['faixa_90_mais'], Decimal('1600.00'))
+        self.assertEqual(primeiro['faixa_0_30'], Decimal('0.00'))
+        self.assertEqual(primeiro['total'], Decimal('2600.00'))
+
+        por_locador = {linha['nome']: linha for linha in pivo_por_locador(vencidas)}
+        self.assertEqual(por_locador['Locador 1']['total'], Decimal('2000.00'))
+
+    def test_mais_recentes_por_faixa_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            recentes = mais_recentes_por_faixa(comandas_vencidas(self.hoje), limite=1)
+
+        self.assertEqual([c.numero_comanda for c in recentes['90+']], ['B-120'])
+
+    def test_relatorio_financeiro_mantem_formato(self):
+        relatorio = RelatorioFinanceiro().inadimplencia_detalhada()
+        self.assertEqual(relatorio['31-60']['quantidade'], 1)
+        self.assertEqual(relatorio['31-60']['valor_formatado'], 'R$ 1.000,00')
+        self.assertEqual(relatorio['31-60']['comandas'][0]['numero'], 'A-45')
+        self.assertEqual(relatorio['31-60']['comandas'][0]['dias_atraso'], 45)
+
+    def test_view_filtra_por_faixa(self):
+        self.client.force_login(Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha'))
+        response = self.client.get(reverse('relatorio_inadimplencia'), {'faixa': '90+'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c.numero_comanda for c in response.context['comandas']], ['B-200', 'B-120'])
+        self.assertEqual(response.context['quantidade'], 5)
@@ -0,0 +1,225 @@
+"""Testes do gerador de PDF de vistorias"""
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from pypdf import PdfReader
+
+from core.models_inspection import Inspection, InspectionPhoto
+from core.services.inspection_fotos import PROCESSAMENTO_TIMEOUT, processar_fotos_pendentes
+from core.services import inspection_pdf
+from core.services.inspection_pdf import (
+    gerar_pdf_vistoria_incremental, limpar_paginas_em_cache, preparar_foto_pdf,
+)
+from core.tests.base import criar_locacao
+
+MEDIA_TESTE = tempfile.mkdtemp()
+
+
+def _imagem_bytes(formato='JPEG', tamanho=(800, 600), cor=(200, 40, 40)):
+    buffer = BytesIO()
+    Image.new('RGB', tamanho, cor).save(buffer, format=formato)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TESTE)
+class InspectionPDFTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TESTE, ignore_errors=True)
+
+    def setUp(self):
+        self.inspection = Inspection.objects.create(
+            locacao=criar_locacao(),
+            titulo='Vistoria de entrada',
+        )
+
+    def _adicionar_foto(self, ordem, dados, nome='foto.jpg'):
+        foto = InspectionPhoto(inspection=self.inspection, ordem=ordem, legenda=f'Foto {ordem}')
+        foto.imagem.save(nome, ContentFile(dados), save=True)
+        return foto
+
+    def test_jpeg_compativel_vai_sem_recompressao(self):
+        dados = _imagem_bytes()
+        foto = self._adicionar_foto(1, dados)
+
+        jpeg, tamanho = preparar_foto_pdf(foto)
+
+        self.assertEqual(jpeg, dados)
+        self.assertEqual(tamanho, (800, 600))
+
+    def test_imagem_fora_do_padrao_e_reduzida(self):
+        foto = self._adicionar_foto(1, _imagem_bytes('PNG', (3200, 1600)), nome='foto.png')
+
+        jpeg, tamanho = preparar_foto_pdf(foto)
+
+        self.assertEqual(tamanho, (1600, 800))
+        self.assertEqual(Image.open(BytesIO(jpeg)).format, 'JPEG')
+
+    def test_pdf_tem_capa_e_uma_pagina_por_foto(self):
+        for ordem in range(1, 6):
+            self._adicionar_foto(ordem, _imagem_bytes(cor=(ordem * 40, 0, 0)))
+        self._adicionar_foto(6, b'arquivo corrompido')
+
+        pdf_file, paginas, _ = gerar_pdf_vistoria_incremental(self.inspection)
+
+        # A foto corrompida é ignorada sem interromper as demais
+        self.assertEqual(paginas, 6)
+        self.assertEqual(len(PdfReader(BytesIO(pdf_file.read())).pages), 6)
+
+    def test_pagina_em_cache_sobrescreve_arquivo_com_a_mesma_chave(self):
+        foto = self._adicionar_foto(1, _imagem_bytes())
+        diretorio = inspection_pdf._diretorio_paginas(self.inspection)
+        caminho = f"{diretorio}/{inspection_pdf._nome_pagina(foto)}"
+        default_storage.save(caminho, ContentFile(b'pagina antiga'))
+
+        pagina, renderizada = inspection_pdf._obter_pagina_foto(foto, diretorio, em_cache=set())
+
+        self.assertTrue(renderizada)
+        with default_storage.open(caminho, 'rb') as f:
+            self.assertEqual(f.read(), pagina)
+        self.assertEqual(default_storage.listdir(diretorio)[1], [inspection_pdf._nome_pagina(foto)])
+
+    def test_finalizar_apaga_so_as_fotos_do_pdf(self):
+        boa = self._adicionar_foto(1, _imagem_bytes())
+        corrompida = self._adicionar_foto(2, b'arquivo corrompido')
+
+        response = self.client.post(reverse('inspection_finalizar', kwargs={'token': self.inspection.token}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['fotos_nao_incluidas'], [str(corrompida.pk)])
+        self.assertFalse(InspectionPhoto.objects.filter(pk=boa.pk).exists())
+        self.assertTrue(InspectionPhoto.objects.filter(pk=corrompida.pk).exists())
+
+    def test_finalizar_recusa_fotos_em_processamento_ou_com_erro(self):
+        self._adicionar_foto(1, _imagem_bytes())
+        processando = self._adicionar_foto(2, _imagem_bytes())
+        com_erro = self._adicionar_foto(3, _imagem_bytes())
+        InspectionPhoto.objects.filter(pk=processando.pk).update(
+            status_processamento='processando', processamento_iniciado_em=timezone.now()
+        )
+        InspectionPhoto.objects.filter(pk=com_erro.pk).update(status_processamento='erro', erro_processamento='x')
+
+        response = self.client.post(reverse('inspection_finalizar', kwargs={'token': self.inspection.token}))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([f['status'] for f in response.json()['fotos']], ['processando', 'erro'])
+        self.assertEqual(self.inspection.fotos.count(), 3)
+        self.inspection.refresh_from_db()
+        self.assertNotEqual(self.inspection.status, 'completed')
+
+    def test_incremental_renderiza_apenas_paginas_novas_ou_alteradas(self):
+        fotos = [self._adicionar_foto(ordem, _imagem_bytes()) for ordem in range(1, 4)]
+        renderizar = mock.patch.object(
+            inspection_pdf, '_renderizar_pagina_foto', wraps=inspection_pdf._renderizar_pagina_foto
+        )
+
+        with renderizar as espiao:
+            _, paginas, _ = gerar_pdf_vistoria_incremental(self.inspection)
+        self.assertEqual(paginas, 4)
+        self.assertEqual(espiao.call_count, 3)
+
+        # Foto nova + legenda alterada: só essas duas são renderizadas
+        self._adicionar_foto(4, _imagem_bytes())
+        fotos[0].legenda = 'Sala - parede norte'
+        fotos[0].save()
+        with renderizar as espiao:
+            pdf_file, paginas, _ = gerar_pdf_vistoria_incremental(self.inspection)
+        self.assertEqual(espiao.call_count, 2)
+        self.assertEqual(paginas, 5)
+
+        reader = PdfReader(BytesIO(pdf_file.read()))
+        self.assertEqual(len(reader.pages), 5)
+        self.assertIn('Foto 4/4', reader.pages[4].extract_text())
+
+        limpar_paginas_em_cache(self.inspection)
+        with renderizar as espiao:
+            gerar_pdf_vistoria_incremental(self.inspection)
+        self.assertEqual(espiao.call_count, 4)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TESTE, BACKGROUND_TAREFAS_SINCRONAS=True)
+class InspectionUploadAssincronoTest(TestCase):
+
+    def setUp(self):
+        self.inspection = Inspection.objects.create(
+            locacao=criar_locacao(),
+            titulo='Vistoria de saída',
+        )
+
+    def _upload(self, dados, nome='foto.png'):
+        arquivo = SimpleUploadedFile(nome, dados)
+        return self.client.post(
+            reverse('inspection_upload_foto', kwargs={'token': self.inspection.token}),
+            {'foto': arquivo, 'legenda': 'Cozinha'},
+        )
+
+    def test_upload_responde_pendente_e_processa_apos_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self._upload(_imagem_bytes('PNG', (3000, 2000)))
+
+        self.assertEqual(response.status_code, 202)
+        dados = response.json()
+        self.assertEqual(dados['status'], 'pendente')
+        foto = InspectionPhoto.objects.get(pk=dados['foto_id'])
+        self.assertFalse(foto.imagem)
+        self.assertTrue(foto.original)
+
+        for callback in callbacks:
+            callback()
+
+        status = self.client.get(dados['status_url']).json()
+        self.assertEqual(status['status'], 'concluida')
+        self.assertTrue(status['miniatura_url'])
+
+        foto.refresh_from_db()
+        self.assertEqual((foto.largura, foto.altura), (1600, 1067))
+        self.assertEqual(len(foto.checksum), 64)
+        self.assertFalse(foto.original)
+        self.assertEqual(max(Image.open(foto.miniatura.path).size), 320)
+
+    def test_arquivo_invalido_rejeitado_na_hora(self):
+        response = self._upload(b'nao e imagem', nome='foto.jpg')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.inspection.fotos.exists())
+
+    def test_pdf_processa_fotos_pendentes(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self._upload(_imagem_bytes('PNG', (800, 600)))
+        self.assertTrue(self.inspection.fotos.filter(status_processamento='pendente').exists())
+
+        _, paginas, _ = gerar_pdf_vistoria_incremental(self.inspection)
+
+        self.assertEqual(paginas, 2)
+        self.assertFalse(self.inspection.fotos.exclude(status_processamento='concluida').exists())
+
+    def test_varredura_so_reenfileira_processamento_travado(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self._upload(_imagem_bytes('PNG', (800, 600)))
+            self._upload(_imagem_bytes('PNG', (800, 600)))
+        antiga = timezone.now() - PROCESSAMENTO_TIMEOUT * 3
+        recente, travada = self.inspection.fotos.order_by('ordem')
+        # Ambas enviadas há muito tempo; só a travada começou a ser processada há muito tempo
+        InspectionPhoto.objects.filter(pk=recente.pk).update(
+            tirada_em=antiga, status_processamento='processando', processamento_iniciado_em=timezone.now()
+        )
+        InspectionPhoto.objects.filter(pk=travada.pk).update(
+            tirada_em=antiga, status_processamento='processando', processamento_iniciado_em=antiga
+        )
+
+        self.assertEqual(processar_fotos_pendentes(self.inspection), 1)
+
+        recente.refresh_from_db()
+        travada.refresh_from_db()
+        self.assertEqual(recente.status_processamento, 'processando')
+        self.assertEqual(travada.status_processamento, 'concluida')
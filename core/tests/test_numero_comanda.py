@@ -0,0 +1,118 @@
+"""Testes da numeração de comandas (contador mensal)"""
+import threading
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Comanda, SequenceCounter
+from core.tests.base import criar_comanda, criar_locacao
+
+MARCO = date(2025, 3, 1)
+
+
+def nova_comanda(locacao, mes=MARCO):
+    return Comanda(
+        locacao=locacao,
+        mes_referencia=mes,
+        ano_referencia=mes.year,
+        data_vencimento=mes.replace(day=10),
+        status='PENDING',
+        valor_aluguel=locacao.valor_aluguel,
+    )
+
+
+class NumeroComandaTest(TestCase):
+
+    def setUp(self):
+        self.locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+
+    def test_contador_continua_numeros_ja_existentes(self):
+        # Comanda numerada antes do contador existir
+        criar_comanda(self.locacao, '202503-0007', mes_referencia=MARCO)
+
+        primeira = nova_comanda(self.locacao)
+        primeira.save()
+        segunda = nova_comanda(self.locacao)
+        segunda.save()
+        abril = nova_comanda(self.locacao, date(2025, 4, 1))
+        abril.save()
+
+        self.assertEqual(
+            [primeira.numero_comanda, segunda.numero_comanda, abril.numero_comanda],
+            ['202503-0008', '202503-0009', '202504-0001'],
+        )
+        self.assertEqual(SequenceCounter.objects.get(prefix='CMD202503').current_value, 9)
+
+    def test_save_nao_varre_as_comandas_do_mes(self):
+        nova_comanda(self.locacao).save()
+
+        with CaptureQueriesContext(connection) as contexto:
+            nova_comanda(self.locacao).save()
+
+        sqls = [consulta['sql'] for consulta in contexto]
+        self.assertFalse([sql for sql in sqls if 'LIKE' in sql.upper()])
+        # Contadores existentes, trava (uma consulta, em ordem) e UPDATE
+        self.assertEqual(len([sql for sql in sqls if 'core_sequence_counter' in sql]), 3)
+
+    def test_alocacao_em_lote_um_bloco_por_mes(self):
+        comandas = [nova_comanda(self.locacao) for _ in range(50)]
+        comandas += [nova_comanda(self.locacao, date(2025, 4, 1)) for _ in range(50)]
+        Comanda.alocar_numeros(comandas[:1])
+
+        # CMD202503 existe, CMD202504 não: contadores existentes, varredura
+        # inicial de abril, cria, trava os dois e um UPDATE para os dois
+        with self.assertNumQueries(7) as contexto:
+            Comanda.alocar_numeros(comandas[1:])
+
+        # Todos os contadores travados numa só consulta, depois de criar os que faltavam
+        sqls = [consulta['sql'] for consulta in contexto.captured_queries if 'core_sequence_counter' in consulta['sql']]
+        criacao = next(i for i, sql in enumerate(sqls) if sql.startswith('INSERT'))
+        leituras = [sql for sql in sqls[criacao + 1:] if sql.startswith('SELECT')]
+        self.assertEqual(len(leituras), 1)
+        self.assertIn('ORDER BY', leituras[0])
+        self.assertIn('CMD202503', leituras[0])
+        self.assertIn('CMD202504', leituras[0])
+
+        self.assertEqual(comandas[49].numero_comanda, '202503-0050')
+        self.assertEqual(comandas[50].numero_comanda, '202504-0001')
+        self.assertEqual(comandas[99].numero_comanda, '202504-0050')
+        Comanda.objects.bulk_create(comandas)
+        self.assertEqual(Comanda.objects.count(), 100)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class NumeroComandaConcorrenteTest(TransactionTestCase):
+    """Criação simultânea: cada thread usa a própria conexão."""
+
+    THREADS = 8
+    POR_THREAD = 10
+
+    def test_threads_sem_colisao(self):
+        locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        erros = []
+        largada = threading.Barrier(self.THREADS)
+
+        def criar():
+            try:
+                largada.wait()
+                for _ in range(self.POR_THREAD):
+                    nova_comanda(locacao).save()
+            except Exception as exc:
+                erros.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=criar) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erros, [])
+        total = self.THREADS * self.POR_THREAD
+        numeros = sorted(Comanda.objects.values_list('numero_comanda', flat=True))
+        self.assertEqual(numeros, [f'202503-{n:04d}' for n in range(1, total + 1)])
+        self.assertEqual(SequenceCounter.objects.get(prefix='CMD202503').current_value, total)
@@ -0,0 +1,89 @@
+"""Testes da numeração de contratos (Locacao.numero_contrato)"""
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
+from django.test import TestCase
+
+from core.models import Locacao, RenovacaoContrato, SequenceCounter
+from core.tests.base import criar_locacao
+
+
+class NumeroContratoTest(TestCase):
+
+    def setUp(self):
+        self.original = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        self.quando = date(2025, 3, 1)
+        self.base = Locacao.numero_contrato_base(
+            self.original.locatario.cpf_cnpj, self.original.imovel.codigo_imovel, self.quando
+        )
+
+    def _nova(self):
+        return Locacao(
+            imovel=self.original.imovel,
+            locatario=self.original.locatario,
+            data_inicio=date(2025, 3, 1),
+            data_fim=date(2026, 2, 28),
+            valor_aluguel=Decimal('1000.00'),
+        )
+
+    def test_mesma_base_recebe_sufixos_sem_sondar(self):
+        locacoes = [self._nova() for _ in range(3)]
+
+        # Um contador para as três: trava (não existe), cria, trava, UPDATE
+        with self.assertNumQueries(6):
+            Locacao.alocar_numeros_contrato(locacoes, self.quando)
+
+        self.assertEqual(self.base, '202503432101IMV01')
+        self.assertEqual(
+            [locacao.numero_contrato for locacao in locacoes],
+            [self.base, f'{self.base}-1', f'{self.base}-2'],
+        )
+        self.assertEqual(SequenceCounter.objects.get(prefix=f'CT{self.base}').current_value, 3)
+
+    def test_save_e_lote_usam_o_mesmo_contador(self):
+        primeira = self._nova()
+        primeira.save()
+        segunda = self._nova()
+        Locacao.alocar_numeros_contrato([segunda])
+        segunda.save()
+
+        self.assertEqual(segunda.numero_contrato, f'{primeira.numero_contrato}-1')
+
+    def test_renovacao_numera_e_calcula_caucao(self):
+        renovacao = RenovacaoContrato.objects.create(
+            locacao_original=self.original,
+            nova_data_inicio=date(2026, 1, 1),
+            nova_data_fim=date(2026, 12, 31),
+            novo_valor_aluguel=Decimal('1100.00'),
+            novo_tipo_garantia='caucao',
+            nova_caucao_meses=2,
+        )
+        irma = self._nova()
+        irma.save()
+
+        nova = renovacao.gerar_nova_locacao()
+
+        self.assertEqual(nova.numero_contrato, f'{irma.numero_contrato}-1')
+        self.assertEqual(nova.caucao_valor_total, Decimal('2200.00'))
+        self.original.refresh_from_db()
+        self.assertEqual(self.original.status, 'INACTIVE')
+
+    def test_migracao_semeia_contadores_dos_numeros_existentes(self):
+        for numero in (self.base, f'{self.base}-4', '202503000001AP-10'):
+            locacao = self._nova()
+            locacao.numero_contrato = numero
+            locacao.save()
+
+        migracao = import_module('core.migrations.0027_contadores_numero_contrato')
+        migracao.semear_contadores(apps, None)
+
+        self.assertEqual(SequenceCounter.objects.get(prefix=f'CT{self.base}').current_value, 5)
+        self.assertEqual(SequenceCounter.objects.get(prefix='CT202503000001AP-10').current_value, 1)
+        # Leitura alternativa ('AP' + sufixo 10) também protegida
+        self.assertEqual(SequenceCounter.objects.get(prefix='CT202503000001AP').current_value, 11)
+
+        seguinte = self._nova()
+        Locacao.alocar_numeros_contrato([seguinte], self.quando)
+        self.assertEqual(seguinte.numero_contrato, f'{self.base}-5')
@@ -0,0 +1,111 @@
+"""Testes do registro de pagamentos em lote"""
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import Comanda, Pagamento, SequenceCounter, Usuario
+from core.services.pagamentos_lote import registrar_pagamentos_em_lote
+from core.tests.base import criar_comanda, criar_locacao
+
+
+class PagamentosLoteTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.comandas = []
+        for i in range(1, 4):
+            locacao = criar_locacao(sufixo=f'{i:02d}', valor_aluguel=Decimal('1000.00'))
+            self.comandas.append(criar_comanda(locacao, f'202503-{i:04d}', mes_referencia=date(2025, 3, 1)))
+
+    def _item(self, comanda, valor, **extra):
+        return {
+            'comanda': str(comanda.pk),
+            'valor_pago': valor,
+            'data_pagamento': '2025-03-10',
+            'forma_pagamento': 'pix',
+            'status': 'confirmado',
+            **extra,
+        }
+
+    def test_registra_numera_e_recalcula(self):
+        itens = [self._item(c, '1000.00') for c in self.comandas] + [self._item(self.comandas[0], '50.00')]
+
+        resultado = registrar_pagamentos_em_lote(itens, self.admin)
+
+        self.assertEqual(resultado['erros'], [])
+        self.assertEqual(len(resultado['criados']), 4)
+        numeros = sorted(Pagamento.objects.values_list('numero_pagamento', flat=True))
+        prefixo = Pagamento.prefixo_numero()
+        self.assertEqual(numeros, [Pagamento.formatar_numero(prefixo, n) for n in range(1, 5)])
+        self.assertEqual(SequenceCounter.objects.get(prefix=prefixo).current_value, 4)
+
+        for comanda in self.comandas:
+            comanda.refresh_from_db()
+            self.assertEqual(comanda.status, Comanda.StatusComanda.PAGA)
+            self.assertEqual(comanda.data_pagamento, date(2025, 3, 10))
+
+        # Numeração individual continua depois do bloco
+        avulso = Pagamento.objects.create(
+            comanda=self.comandas[1], usuario_registro=self.admin, valor_pago=Decimal('1.00'),
+            data_pagamento=date(2025, 3, 11), forma_pagamento='pix',
+        )
+        self.assertEqual(avulso.numero_pagamento, Pagamento.formatar_numero(prefixo, 5))
+
+    def test_consultas_independem_do_tamanho(self):
+        itens = [self._item(c, '100.00') for c in self.comandas]
+        registrar_pagamentos_em_lote(itens[:1], self.admin)
+
+        with self.assertNumQueries(14):
+            registrar_pagamentos_em_lote(itens * 10, self.admin)
+        self.assertEqual(Pagamento.objects.count(), 31)
+
+    def test_erros_por_item_tudo_ou_nada(self):
+        itens = [
+            self._item(self.comandas[0], '100.00'),
+            self._item(self.comandas[1], '-5'),
+            self._item(self.comandas[2], '100.00'),
+        ]
+        itens[2]['comanda'] = '00000000-0000-0000-0000-000000000000'
+
+        resultado = registrar_pagamentos_em_lote(itens, self.admin)
+
+        self.assertEqual([erro['indice'] for erro in resultado['erros']], [1, 2])
+        self.assertIn('valor_pago', resultado['erros'][0]['erros'])
+        self.assertIn('comanda', resultado['erros'][1]['erros'])
+        self.assertFalse(Pagamento.objects.exists())
+
+        parcial = registrar_pagamentos_em_lote(itens, self.admin, parcial=True)
+        self.assertEqual(len(parcial['criados']), 1)
+        self.assertEqual(Pagamento.objects.count(), 1)
+
+    def test_endpoint(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.post(
+            '/api/pagamentos/lote/',
+            {'pagamentos': [self._item(c, '1000.00') for c in self.comandas]},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        dados = response.json()
+        self.assertEqual(len(dados['criados']), 3)
+        self.assertEqual(dados['comandas_atualizadas'], 3)
+        self.assertEqual(dados['criados'][0]['comanda_numero'], '202503-0001')
+
+        response = self.client.post('/api/pagamentos/lote/', {'x': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_de_pagamentos_somente_staff(self):
+        comum = Usuario.objects.create_user('locador', 'locador@test.com', 'senha')
+        self.client.force_login(comum)
+
+        self.assertEqual(self.client.get('/api/pagamentos/').status_code, 403)
+        response = self.client.post('/api/pagamentos/', self._item(self.comandas[0], '1000.00'),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/api/pagamentos/lote/', [self._item(self.comandas[0], '1000.00')],
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Pagamento.objects.exists())
@@ -0,0 +1,100 @@
+"""Testes do perfil de consultas SQL por requisição e dos orçamentos por view"""
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from core.middleware.perfil_consultas import CABECALHO, ColetorConsultas, normalizar_sql
+from core.models import Comanda, Usuario
+from core.tests.base import OrcamentoConsultasMixin, criar_comanda, criar_locacao, criar_pagamento
+
+URL_API = '/api/comandas/'
+LOGGER = 'core.middleware.perfil_consultas'
+
+
+class PerfilConsultasTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        self.comanda = criar_comanda(self.locacao, '202503-0001', mes_referencia=date(2025, 3, 1),
+                                     valor_aluguel=Decimal('1000.00'))
+
+    def _linha(self, logs):
+        return json.loads(logs.records[-1].getMessage().split(': ', 1)[1])
+
+    def test_desligado_sem_cabecalho(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(URL_API)
+        self.assertNotIn(CABECALHO, response)
+
+    def test_cabecalho_de_staff_gera_cabecalho_e_log(self):
+        self.client.force_login(self.admin)
+        with self.assertLogs(LOGGER, 'INFO') as logs:
+            response = self.client.get(URL_API, HTTP_X_PERFIL_CONSULTAS='1')
+
+        self.assertIn('consultas=', response[CABECALHO])
+        self.assertIn('db;dur=', response['Server-Timing'])
+        linha = self._linha(logs)
+        self.assertEqual(linha['view'], 'api-comanda-list')
+        self.assertEqual(linha['status'], 200)
+        self.assertGreater(linha['consultas'], 0)
+        self.assertLessEqual(len(linha['lentas']), 5)
+
+    def test_cabecalho_ignorado_para_quem_nao_e_staff(self):
+        comum = Usuario.objects.create_user('comum', 'comum@test.com', 'senha')
+        self.client.force_login(comum)
+        response = self.client.get(URL_API, HTTP_X_PERFIL_CONSULTAS='1')
+        self.assertNotIn(CABECALHO, response)
+
+    @override_settings(PERFIL_CONSULTAS_ATIVO=True, PERFIL_CONSULTAS_ORCAMENTOS={'api-comanda-list': 1})
+    def test_orcamento_excedido_sai_como_warning(self):
+        self.client.force_login(self.admin)
+        with self.assertLogs(LOGGER, 'WARNING') as logs:
+            response = self.client.get(URL_API)
+        self.assertIn('orcamento=1', response[CABECALHO])
+        self.assertEqual(self._linha(logs)['orcamento'], 1)
+
+    def test_duplicadas_e_repetidas(self):
+        outra = criar_comanda(self.locacao, '202504-0001', mes_referencia=date(2025, 4, 1),
+                              valor_aluguel=Decimal('1000.00'))
+        with ColetorConsultas() as coletor:
+            for comanda in Comanda.objects.filter(pk__in=[self.comanda.pk, outra.pk]):
+                comanda.get_saldo()
+                comanda.get_saldo_formatado()
+
+        resumo = coletor.resumo()
+        # SELECT das comandas + por comanda: 2 SUM idênticos e a locação
+        self.assertEqual(resumo['consultas'], 7)
+        # 2º SUM de cada comanda e a mesma locação buscada de novo
+        self.assertEqual(resumo['duplicadas'], 3)
+        # O SUM por comanda: mesmo SQL, ids diferentes
+        self.assertEqual(resumo['repetidas'][0]['vezes'], 4)
+        self.assertEqual(normalizar_sql("WHERE id = 'a1' AND n > 10"), 'WHERE id = ? AND n > ?')
+
+
+class OrcamentoConsultasTest(OrcamentoConsultasMixin, TestCase):
+    """As listagens não podem crescer em consultas com o número de linhas."""
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(self.admin)
+        for i in range(6):
+            locacao = criar_locacao(sufixo=f'{i:02d}', valor_aluguel=Decimal('1000.00'))
+            for mes in (1, 2):
+                comanda = criar_comanda(locacao, f'2025{mes:02d}-{i:04d}', mes_referencia=date(2025, mes, 1),
+                                        valor_aluguel=Decimal('1000.00'))
+                criar_pagamento(comanda, Decimal('400.00'), status='confirmado')
+
+    def test_orcamentos_das_listagens(self):
+        for url in ('/admin/core/comanda/', '/admin/core/pagamento/', '/admin/core/locacao/',
+                    '/dashboard/financeiro/', '/api/comandas/', '/api/locacoes/', '/api/pagamentos/'):
+            self.assertOrcamentoConsultas(url)
+
+    def test_saldo_da_listagem_usa_total_anotado(self):
+        response = self.assertOrcamentoConsultas('/admin/core/comanda/')
+        comanda = response.context['cl'].result_list[0]
+        self.assertEqual(comanda.total_pago_calculado, Decimal('400.00'))
+        self.assertEqual(comanda.get_saldo(), Comanda.objects.get(pk=comanda.pk).get_saldo())
+        self.assertContains(response, '-R$ 600,00')
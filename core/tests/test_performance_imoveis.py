@@ -0,0 +1,59 @@
+"""Testes do ranking de performance por imóvel"""
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import Comanda, Imovel
+from core.services.performance_imoveis import pagina_performance, top_imoveis
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+MES = date(2025, 3, 1)
+
+
+class PerformanceImoveisTest(TestCase):
+
+    def setUp(self):
+        # Taxas crescentes: o melhor imóvel é o ÚLTIMO criado
+        self.pagos = {}
+        for i in range(1, 13):
+            locacao = criar_locacao(sufixo=f'{i:02d}', valor_aluguel=Decimal('1000.00'))
+            comanda = criar_comanda(locacao, f'202503-{i:04d}', mes_referencia=MES,
+                                    _valor_aluguel_historico=Decimal('1000.00'))
+            pago = Decimal(i * 50)
+            criar_pagamento(comanda, pago, status='confirmado')
+            criar_pagamento(comanda, Decimal('999.00'), status='pendente')
+            self.pagos[locacao.imovel.codigo_imovel] = pago
+        # Imóvel sem comandas no período
+        criar_locacao(sufixo='99')
+        self.comandas = Comanda.objects.filter(mes_referencia=MES)
+
+    def test_top_real_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            top = top_imoveis(self.comandas, limite=10)
+
+        self.assertEqual(len(top), 10)
+        self.assertEqual([linha['codigo'] for linha in top[:3]], ['IMV12', 'IMV11', 'IMV10'])
+        self.assertEqual([linha['ranking'] for linha in top[:3]], [1, 2, 3])
+        self.assertEqual(top[0]['previsto'], 1000.0)
+        self.assertEqual(top[0]['realizado'], 600.0)
+        self.assertEqual(top[0]['taxa'], 60.0)
+
+    def test_valores_conferem_com_o_modelo(self):
+        for imovel in Imovel.objects.com_performance(self.comandas):
+            comandas = self.comandas.filter(locacao__imovel=imovel)
+            self.assertEqual(imovel.previsto, sum((c.valor_total for c in comandas), Decimal('0.00')))
+            self.assertEqual(imovel.realizado, self.pagos.get(imovel.codigo_imovel, Decimal('0.00')))
+
+    def test_paginacao_e_ordenacao_no_sql(self):
+        pagina = pagina_performance(self.comandas, ordenar='codigo', pagina=2, por_pagina=5)
+        self.assertEqual(pagina.paginator.count, 13)
+        self.assertEqual([i.codigo_imovel for i in pagina], ['IMV06', 'IMV07', 'IMV08', 'IMV09', 'IMV10'])
+        # O ranking é global, não da página
+        self.assertEqual(pagina[0].ranking, 7)
+
+        ultima = pagina_performance(self.comandas, ordenar='-taxa', pagina=3, por_pagina=5)
+        sem_comandas = list(ultima)[-1]
+        self.assertEqual(sem_comandas.codigo_imovel, 'IMV99')
+        self.assertEqual(sem_comandas.previsto, Decimal('0.00'))
+        self.assertEqual(sem_comandas.taxa, 0)
@@ -0,0 +1,99 @@
+"""Testes da projeção de recebimentos (esperado x provável)"""
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import Comanda, RenovacaoContrato
+from core.services.previsao_recebimentos import (
+    HAS_NUMPY, distribuicao_atrasos, previsao_recebimentos, projetar_recebimentos,
+)
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+HOJE = date(2025, 6, 15)
+
+
+@skipUnless(HAS_NUMPY, 'numpy não instalado')
+class PrevisaoRecebimentosTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # A: paga sempre um mês depois; contrato termina em dezembro/2025
+        self.loc_a = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'),
+                                   data_inicio=date(2024, 1, 1), data_fim=date(2025, 12, 31))
+        # B: paga em dia; contrato até dezembro/2026
+        self.loc_b = criar_locacao(sufixo='02', valor_aluguel=Decimal('2000.00'),
+                                   data_inicio=date(2024, 1, 1), data_fim=date(2026, 12, 31))
+        for mes in (1, 2):
+            comanda_a = criar_comanda(self.loc_a, f'2025{mes:02d}-0001', mes_referencia=date(2025, mes, 1),
+                                      vencimento=date(2025, mes, 10))
+            criar_pagamento(comanda_a, Decimal('1000.00'), status='confirmado',
+                            data_pagamento=date(2025, mes + 1, 5))
+            comanda_b = criar_comanda(self.loc_b, f'2025{mes:02d}-0002', mes_referencia=date(2025, mes, 1),
+                                      vencimento=date(2025, mes, 10))
+            criar_pagamento(comanda_b, Decimal('2000.00'), status='confirmado',
+                            data_pagamento=date(2025, mes, 9))
+
+    def test_distribuicao_suavizada_por_locatario(self):
+        indice, matriz, geral = distribuicao_atrasos(HOJE)
+
+        self.assertAlmostEqual(geral[0], 2 / 3)
+        self.assertAlmostEqual(geral[1], 1 / 3)
+        # 2 comandas próprias + peso 3 da distribuição geral
+        linha_a = matriz[indice[self.loc_a.locatario_id]]
+        self.assertAlmostEqual(linha_a[0], 0.4)
+        self.assertAlmostEqual(linha_a[1], 0.6)
+        self.assertAlmostEqual(linha_a.sum(), 1.0)
+
+    def test_projecao_esperado_e_provavel(self):
+        comandas_antes = Comanda.objects.count()
+
+        projecao = projetar_recebimentos(meses=12, hoje=HOJE)
+
+        meses = projecao['meses']
+        self.assertEqual(len(meses), 12)
+        self.assertEqual(meses[0]['mes'], '2025-06')
+        self.assertEqual(meses[0]['esperado'], 3000.0)
+        self.assertAlmostEqual(meses[0]['provavel'], 1000 * 0.4 + 2000 * 0.8)
+        self.assertAlmostEqual(meses[1]['provavel'], 3000.0)
+        # Contrato A termina em dezembro: a partir de janeiro só B
+        self.assertEqual(meses[7]['esperado'], 2000.0)
+        self.assertEqual(meses[7]['contratos'], 1)
+        self.assertEqual(projecao['total_esperado'], 7 * 1000 + 12 * 2000)
+        # Nenhuma comanda criada
+        self.assertEqual(Comanda.objects.count(), comandas_antes)
+
+    def test_renovacao_em_andamento_e_atrasados(self):
+        RenovacaoContrato.objects.create(
+            locacao_original=self.loc_a, status='aprovada',
+            nova_data_inicio=date(2026, 1, 1), nova_data_fim=date(2026, 12, 31),
+            novo_valor_aluguel=Decimal('1100.00'),
+        )
+        criar_comanda(self.loc_b, '202505-0002', mes_referencia=date(2025, 5, 1),
+                      vencimento=date(2025, 5, 10))
+
+        projecao = projetar_recebimentos(meses=12, hoje=HOJE)
+
+        self.assertEqual(projecao['meses'][7]['esperado'], 3100.0)
+        self.assertEqual(projecao['total_esperado'], 7 * 1000 + 5 * 1100 + 12 * 2000)
+        # B nunca deixa de pagar: o atrasado de maio entra todo em junho
+        self.assertAlmostEqual(projecao['recuperacao_atrasados'], 2000.0)
+        self.assertAlmostEqual(projecao['meses'][0]['provavel'], 1000 * 0.4 + 2000 * 0.8 + 2000)
+
+    def test_cache_por_dia(self):
+        primeiro = previsao_recebimentos(meses=6, hoje=HOJE)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(previsao_recebimentos(meses=6, hoje=HOJE), primeiro)
+
+    def test_pagamento_invalida_cache(self):
+        junho = criar_comanda(self.loc_b, '202506-0002', mes_referencia=date(2025, 6, 1),
+                              vencimento=date(2025, 6, 10))
+        self.assertEqual(previsao_recebimentos(meses=6, hoje=HOJE)['meses'][0]['esperado'], 3000.0)
+
+        criar_pagamento(junho, Decimal('2000.00'), status='confirmado', data_pagamento=HOJE)
+
+        # Saldo em aberto de junho zerado: só o aluguel de A continua esperado
+        self.assertEqual(previsao_recebimentos(meses=6, hoje=HOJE)['meses'][0]['esperado'], 1000.0)
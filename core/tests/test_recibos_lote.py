@@ -0,0 +1,72 @@
+"""Testes da exportação de recibos em lote"""
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.document_generator import DocumentGenerator
+from core.models import Usuario
+from core.services.recibos_lote import gerar_zip_recibos, selecionar_pagamentos
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+
+class RecibosLoteTest(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+        locacao = criar_locacao()
+        self.locador = locacao.imovel.locador
+        self.pagamentos = []
+        for i in range(3):
+            comanda = criar_comanda(locacao, f'TEST-000{i}', mes_referencia=date(2025, 1 + i, 1))
+            self.pagamentos.append(criar_pagamento(
+                comanda, Decimal('100.00') + i,
+                data_pagamento=date(2025, 3, 10 + i),
+                status='confirmado',
+            ))
+
+        outra = criar_locacao(sufixo='2')
+        criar_pagamento(criar_comanda(outra, 'OUTRA-0001'), Decimal('50.00'),
+                        data_pagamento=date(2025, 3, 5), status='pendente')
+
+    def test_selecao_em_uma_query(self):
+        with self.assertNumQueries(1):
+            pagamentos = list(selecionar_pagamentos(ano=2025, mes=3))
+            nomes = [p.comanda.locacao.locatario.nome_razao_social for p in pagamentos]
+        self.assertEqual(len(pagamentos), 3)
+        self.assertEqual(set(nomes), {'Locatário 1'})
+
+    def test_zip_contem_um_recibo_por_pagamento(self):
+        generator = DocumentGenerator(output_dir=self.media)
+        queryset = selecionar_pagamentos(ano=2025, mes=3, locador_id=self.locador.pk)
+
+        conteudo = b''.join(gerar_zip_recibos(queryset, generator=generator))
+
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(
+                zf.namelist(),
+                [f"recibo_{p.numero_pagamento}.docx" for p in self.pagamentos],
+            )
+
+    def test_view_exige_filtro(self):
+        staff = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(staff)
+
+        response = self.client.get(reverse('exportar_recibos_lote'))
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(reverse('exportar_recibos_lote'), {'locador': 'nao-e-uuid'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(reverse('exportar_recibos_lote'), {'ano': 2025, 'mes': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
@@ -0,0 +1,112 @@
+"""Testes dos relatórios do dashboard gerados em segundo plano"""
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.document_generator import HAS_WEASY
+from core.models import RelatorioJob, Usuario
+from core.services.relatorios_dashboard import processar_relatorios_pendentes
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+MEDIA_TESTE = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TESTE, BACKGROUND_TAREFAS_SINCRONAS=True)
+class RelatoriosDashboardTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TESTE, ignore_errors=True)
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(self.admin)
+        comanda = criar_comanda(
+            criar_locacao(valor_aluguel=Decimal('1000.00')), '202503-0001',
+            mes_referencia=date(2025, 3, 1),
+            vencimento=date(2025, 3, 10),
+        )
+        criar_pagamento(comanda, Decimal('1000.00'), status='confirmado', data_pagamento=date(2025, 3, 8))
+
+    def test_dashboard_continua_renderizando(self):
+        response = self.client.get(reverse('dashboard_financeiro'), {'ano': 2025, 'mes': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['kpis']['total_comandas'], 1)
+        self.assertEqual(response.context['filtros_querystring'], 'ano=2025&mes=3')
+
+    def test_excel_e_gerado_apos_a_requisicao(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.get(reverse('exportar_dashboard_excel'), {'ano': 2025, 'mes': 3})
+
+        job = RelatorioJob.objects.get()
+        self.assertRedirects(response, reverse('relatorio_dashboard', kwargs={'job_id': job.pk}),
+                             fetch_redirect_response=False)
+        self.assertEqual(job.status, RelatorioJob.Status.PENDENTE)
+        self.assertEqual(job.filtros['ano'], 2025)
+        self.assertEqual(job.solicitado_por, self.admin)
+
+        status_url = reverse('relatorio_dashboard', kwargs={'job_id': job.pk})
+        self.assertFalse(self.client.get(status_url, {'formato': 'json'}).json()['concluido'])
+        self.assertEqual(self.client.get(status_url).status_code, 200)
+
+        for callback in callbacks:
+            callback()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, RelatorioJob.Status.CONCLUIDO)
+        self.assertTrue(self.client.get(status_url, {'formato': 'json'}).json()['concluido'])
+
+        response = self.client.get(status_url)
+        conteudo = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as zf:
+            self.assertIsNone(zf.testzip())
+            workbook = zf.read('xl/workbook.xml').decode('utf-8')
+            resumo = zf.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(workbook.count('<sheet '), 4)
+        self.assertIn('<v>1000.00</v>', resumo)
+
+    def test_email_envia_relatorio_anexado(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('enviar_relatorio_email') + '?ano=2025&mes=3',
+                             {'email': 'financeiro@test.com'})
+
+        job = RelatorioJob.objects.get()
+        self.assertEqual(job.email_destino, 'financeiro@test.com')
+        self.assertEqual(job.status, RelatorioJob.Status.CONCLUIDO)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['financeiro@test.com'])
+        nome, _, _ = mail.outbox[0].attachments[0]
+        self.assertTrue(nome.endswith(f'.{job.formato}'))
+
+    def test_email_invalido_nao_cria_job(self):
+        self.client.post(reverse('enviar_relatorio_email'), {'email': 'nao-e-email'})
+        self.assertFalse(RelatorioJob.objects.exists())
+
+    def test_pdf_sem_weasyprint_nao_enfileira(self):
+        if HAS_WEASY:
+            self.skipTest('WeasyPrint disponível')
+        response = self.client.get(reverse('exportar_dashboard_pdf'))
+        self.assertRedirects(response, reverse('dashboard_financeiro'), fetch_redirect_response=False)
+        self.assertFalse(RelatorioJob.objects.exists())
+
+    def test_varredura_recupera_jobs_pendentes_e_travados(self):
+        pendente = RelatorioJob.objects.create(formato='xlsx', filtros={'ano': 2025, 'mes': 3})
+        travado = RelatorioJob.objects.create(
+            formato='xlsx', status=RelatorioJob.Status.PROCESSANDO,
+            iniciado_em=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(processar_relatorios_pendentes(), 2)
+        for job in (pendente, travado):
+            job.refresh_from_db()
+            self.assertEqual(job.status, RelatorioJob.Status.CONCLUIDO)
+            self.assertTrue(job.arquivo)
@@ -0,0 +1,147 @@
+"""Testes do GET condicional (ETag/Last-Modified) nas páginas de token e na API"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from core.models import Comanda, Imovel, Locatario, Usuario
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+from core.views_comanda_web import gerar_token_comanda
+from core.views_publico import comanda_publica_view, recibo_publico_view
+
+
+class PaginasPublicasCondicionaisTest(TestCase):
+
+    def setUp(self):
+        self.locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        vencimento = timezone.now().date() + timedelta(days=10)
+        self.comanda = criar_comanda(self.locacao, '202503-0001', vencimento=vencimento)
+        self.factory = RequestFactory()
+
+    def _comanda_publica(self, **headers):
+        request = self.factory.get('/', **headers)
+        return comanda_publica_view(request, token=self.comanda.token)
+
+    def test_repeticao_com_if_none_match_responde_304(self):
+        primeira = self._comanda_publica()
+        self.assertEqual(primeira.status_code, 200)
+        self.assertIn('ETag', primeira)
+        self.assertIn('Last-Modified', primeira)
+        self.assertIn('private', primeira['Cache-Control'])
+        self.assertIn('must-revalidate', primeira['Cache-Control'])
+
+        # Só a consulta de estado, sem montar contexto nem renderizar
+        with self.assertNumQueries(1):
+            segunda = self._comanda_publica(HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(segunda.status_code, 304)
+
+    def test_pagamento_novo_muda_etag(self):
+        etag = self._comanda_publica()['ETag']
+        criar_pagamento(self.comanda, Decimal('100.00'), status='confirmado')
+
+        response = self._comanda_publica(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_token_expirado_muda_etag(self):
+        etag = self._comanda_publica()['ETag']
+        Comanda.objects.filter(pk=self.comanda.pk).update(
+            token_expira_em=timezone.now() - timedelta(days=1)
+        )
+
+        response = self._comanda_publica(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_locatario_ou_imovel_alterado_muda_etag(self):
+        pagamento = criar_pagamento(self.comanda, Decimal('100.00'), status='confirmado')
+        etag_comanda = self._comanda_publica()['ETag']
+        etag_recibo = recibo_publico_view(self.factory.get('/'), token=pagamento.token)['ETag']
+
+        depois = timezone.now() + timedelta(minutes=1)
+        Locatario.objects.filter(pk=self.locacao.locatario_id).update(
+            nome_razao_social='Nome Corrigido', updated_at=depois
+        )
+        response = self._comanda_publica(HTTP_IF_NONE_MATCH=etag_comanda)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Nome Corrigido')
+
+        response = recibo_publico_view(self.factory.get('/', HTTP_IF_NONE_MATCH=etag_recibo), token=pagamento.token)
+        self.assertEqual(response.status_code, 200)
+
+        etag_comanda = self._comanda_publica()['ETag']
+        Imovel.objects.filter(pk=self.locacao.imovel_id).update(updated_at=depois + timedelta(minutes=1))
+        self.assertEqual(self._comanda_publica(HTTP_IF_NONE_MATCH=etag_comanda).status_code, 200)
+
+    def test_recibo(self):
+        pagamento = criar_pagamento(self.comanda, Decimal('100.00'), status='confirmado')
+        primeira = recibo_publico_view(self.factory.get('/'), token=pagamento.token)
+        self.assertEqual(primeira.status_code, 200)
+
+        segunda = recibo_publico_view(
+            self.factory.get('/', HTTP_IF_NONE_MATCH=primeira['ETag']), token=pagamento.token
+        )
+        self.assertEqual(segunda.status_code, 304)
+
+    def test_comanda_web_token_invalido_continua_404(self):
+        response = self.client.get(f'/comanda/{self.comanda.pk}/token-errado/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_comanda_web_vencida_304_apos_aplicar_multa(self):
+        Comanda.objects.filter(pk=self.comanda.pk).update(
+            data_vencimento=timezone.now().date() - timedelta(days=20), status='OVERDUE'
+        )
+        url = f'/comanda/{self.comanda.pk}/{gerar_token_comanda(str(self.comanda.pk))}/'
+
+        primeira = self.client.get(url)
+        self.assertEqual(primeira.status_code, 200)
+
+        # A primeira resposta já traz o ETag da versão com multa/juros gravados
+        segunda = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(segunda.status_code, 304)
+
+
+class ApiCondicionalTest(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'admin@test.com', 'senha')
+        self.client.force_login(self.admin)
+        self.locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        self.comanda = criar_comanda(self.locacao, '202503-0001', mes_referencia=date(2025, 3, 1))
+
+    def test_detalhe_304_com_uma_consulta_de_estado(self):
+        url = f'/api/comandas/{self.comanda.pk}/'
+        primeira = self.client.get(url)
+        self.assertEqual(primeira.status_code, 200)
+        self.assertIn('no-cache', primeira['Cache-Control'])
+
+        # Sessão + usuário + estado
+        with self.assertNumQueries(3):
+            segunda = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(segunda.status_code, 304)
+
+        criar_pagamento(self.comanda, Decimal('100.00'), status='confirmado')
+        terceira = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(terceira.status_code, 200)
+        self.assertEqual(terceira.json()['total_pago'], '100.00')
+
+    def test_detalhe_locacao_muda_com_locatario(self):
+        url = f'/api/locacoes/{self.locacao.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        locatario = self.locacao.locatario
+        locatario.nome_razao_social = 'Outro Nome'
+        locatario.save()
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_listagem(self):
+        primeira = self.client.get('/api/comandas/')
+        self.assertEqual(primeira.status_code, 200)
+
+        segunda = self.client.get('/api/comandas/', HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(segunda.status_code, 304)
@@ -0,0 +1,84 @@
+"""Testes do recálculo único de status/quitação da comanda"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase
+
+from core.comanda_status import ComandaStatus
+from core.models import Comanda
+from core.services import status_comanda
+from core.tests.base import criar_comanda, criar_locacao, criar_pagamento
+
+
+class StatusComandaTest(TestCase):
+
+    def setUp(self):
+        locacao = criar_locacao(sufixo='01', valor_aluguel=Decimal('1000.00'))
+        self.comanda = criar_comanda(locacao, '202503-0001', mes_referencia=date(2025, 3, 1))
+        self.outra = criar_comanda(locacao, '202504-0001', mes_referencia=date(2025, 4, 1))
+
+    def _pagar(self, comanda, valor, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return criar_pagamento(comanda, Decimal(valor), status='confirmado', **extra)
+
+    def test_parcial_e_quitada(self):
+        self._pagar(self.comanda, '400.00', data_pagamento=date(2025, 3, 5))
+        self.comanda.refresh_from_db()
+        self.assertEqual(self.comanda.status, Comanda.StatusComanda.PARCIALMENTE_PAGA)
+        self.assertIsNone(self.comanda.data_pagamento)
+
+        self._pagar(self.comanda, '600.00', data_pagamento=date(2025, 3, 12))
+        self.comanda.refresh_from_db()
+        self.assertEqual(self.comanda.status, Comanda.StatusComanda.PAGA)
+        self.assertEqual(self.comanda.data_pagamento, date(2025, 3, 12))
+        self.assertEqual(ComandaStatus.objects.get(comanda=self.comanda).quitado_em.date(), date(2025, 3, 12))
+        self.assertEqual(self.comanda.valor_pendente, Decimal('0.00'))
+
+    def test_excluir_pagamento_reabre_comanda(self):
+        pagamento = self._pagar(self.comanda, '1000.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pagamento.delete()
+
+        self.comanda.refresh_from_db()
+        self.assertEqual(self.comanda.status, Comanda.StatusComanda.PENDENTE)
+        self.assertIsNone(ComandaStatus.objects.get(comanda=self.comanda).quitado_em)
+
+    def test_cancelada_nao_muda(self):
+        Comanda.objects.filter(pk=self.comanda.pk).update(status=Comanda.StatusComanda.CANCELADA)
+        self._pagar(self.comanda, '1000.00')
+        self.comanda.refresh_from_db()
+        self.assertEqual(self.comanda.status, Comanda.StatusComanda.CANCELADA)
+
+    def test_varios_pagamentos_um_recalculo_por_transacao(self):
+        recalcular = mock.Mock(wraps=status_comanda.recalcular_comandas)
+        with mock.patch.object(status_comanda, 'recalcular_comandas', recalcular):
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for _ in range(4):
+                        criar_pagamento(self.comanda, Decimal('250.00'), status='confirmado')
+                    criar_pagamento(self.outra, Decimal('100.00'), status='confirmado')
+
+        recalcular.assert_called_once()
+        self.assertEqual(set(recalcular.call_args.args[0]), {self.comanda.pk, self.outra.pk})
+        self.comanda.refresh_from_db()
+        self.outra.refresh_from_db()
+        self.assertEqual(self.comanda.status, Comanda.StatusComanda.PAGA)
+        self.assertEqual(self.outra.status, Comanda.StatusComanda.PARCIALMENTE_PAGA)
+
+    def test_rollback_de_savepoint_reagenda(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    criar_pagamento(self.comanda, Decimal('1000.00'), status='confirmado')
+                    raise ValueError
+            except ValueError:
+                pass
+            criar_pagamento(self.outra, Decimal('1000.00'), status='confirmado')
+
+        self.comanda.refresh_from_db()
+        self.outra.refresh_from_db()
+        self.assertEqual(self.comanda.status, Comanda.StatusComanda.PENDENTE)
+        self.assertEqual(self.outra.status, Comanda.StatusComanda.PAGA)
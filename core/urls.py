@@ -3,28 +3,45 @@ from core.views_download_contrato import download_contrato_token, verificar_toke
 URLs do core - VERSÃO DEV_21
 Adicionado: Rotas de Renovação de Contratos
 """
-from django.urls import path
+from django.urls import include, path
 from django.contrib import admin
+from rest_framework.routers import DefaultRouter
 
 from .views import (
     enviar_comanda_email,
     download_recibo_pagamento,
     pagina_recibo_pagamento,
+    exportar_recibos_lote,
 )
 from .views_comanda_web import comanda_web_view
+from .views import ComandaViewSet, LocacaoViewSet, PagamentoViewSet
+from .views_sync import SincronizacaoView
 
 # ✅ DEV_20: Import das views do dashboard
 from .dashboard_views import (
     dashboard_financeiro,
     exportar_dashboard_excel,
     exportar_dashboard_pdf,
-    enviar_relatorio_email
+    enviar_relatorio_email,
+    relatorio_dashboard,
+    cubo_financeiro,
 )
 
 # ✅ DEV_21: Import das views de renovação
 from . import views_renovacao
+from .views_relatorios import relatorio_inadimplencia
+
+# API REST (somente staff; leitura paginada por cursor)
+router = DefaultRouter()
+router.register('comandas', ComandaViewSet, basename='api-comanda')
+router.register('locacoes', LocacaoViewSet, basename='api-locacao')
+router.register('pagamentos', PagamentoViewSet, basename='api-pagamento')
 
 urlpatterns = [    
+    path('api/sync/', SincronizacaoView.as_view(), name='api_sync'),
+    path('api/sync/<str:modelo>/', SincronizacaoView.as_view(), name='api_sync_modelo'),
+    path('api/', include(router.urls)),
+    
     path('comanda/<uuid:comanda_id>/enviar-email/', enviar_comanda_email, name='enviar_comanda_email'),
     path('comanda/<uuid:comanda_id>/<str:token>/', comanda_web_view, name='comanda_web_view'),
     
@@ -37,6 +54,11 @@ urlpatterns = [
          download_recibo_pagamento, 
          name='download_recibo_pagamento'),
     
+    # Pacote de recibos (mês e/ou locador)
+    path('pagamentos/recibos/lote/', 
+         exportar_recibos_lote, 
+         name='exportar_recibos_lote'),
+    
     # ✅ DEV_20: Dashboard Financeiro
     path('dashboard/financeiro/', 
          admin.site.admin_view(dashboard_financeiro), 
@@ -54,6 +76,19 @@ urlpatterns = [
          admin.site.admin_view(enviar_relatorio_email), 
          name='enviar_relatorio_email'),
     
+    path('dashboard/financeiro/relatorio/<uuid:job_id>/', 
+         admin.site.admin_view(relatorio_dashboard), 
+         name='relatorio_dashboard'),
+    
+    path('dashboard/financeiro/cubo/', 
+         admin.site.admin_view(cubo_financeiro), 
+         name='cubo_financeiro'),
+    
+    # Inadimplência por faixa de atraso (cobrança)
+    path('relatorios/inadimplencia/', 
+         admin.site.admin_view(relatorio_inadimplencia), 
+         name='relatorio_inadimplencia'),
+    
     # ✅ DEV_21: Rotas Públicas de Renovação (sem autenticação)
     path('renovacao/proprietario/<uuid:token>/', 
          views_renovacao.responder_renovacao_proprietario, 
@@ -22,6 +22,13 @@ urlpatterns = [
         name='inspection_upload_foto'
     ),
     
+    # Status do processamento da foto (GET)
+    path(
+        'vistoria/<str:token>/foto/<uuid:foto_id>/status/',
+        views_inspection.status_foto_vistoria,
+        name='inspection_status_foto'
+    ),
+    
     # Deletar foto (POST)
     path(
         'vistoria/<str:token>/foto/<uuid:foto_id>/deletar/',
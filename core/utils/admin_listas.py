@@ -0,0 +1,239 @@
+"""
+Listagens Grandes no Admin (comandas, pagamentos, logs, extratos)
+
+- Contagem estimada: acima de ADMIN_CONTAGEM_ESTIMADA_ACIMA linhas o total
+  vem das estatísticas do planejador do PostgreSQL (pg_class.reltuples sem
+  filtros, EXPLAIN com filtros) em vez de COUNT(*); abaixo disso, ou em
+  outro banco, a contagem é exata
+- Paginação keyset: na ordem padrão da listagem (``ordem_keyset``, com
+  índice) a próxima página é ``WHERE (campos) < último visto LIMIT n``, com
+  o mesmo custo da primeira. Ordenar por uma coluna volta para a
+  paginação numerada do Django
+- Filtros com valores distintos (ano, mês de referência) guardados no
+  cache, com a versão do grupo do dashboard: gravações invalidam
+"""
+import base64
+import binascii
+import datetime
+import json
+import logging
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ALL_VAR, ORDER_VAR, ChangeList
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from core.dashboard import cache as dashboard_cache
+
+logger = logging.getLogger(__name__)
+
+# Parâmetro da URL com a posição da página keyset
+CURSOR_VAR = 'apos'
+
+
+def _limiar_estimativa():
+    return getattr(settings, 'ADMIN_CONTAGEM_ESTIMADA_ACIMA', 20000)
+
+
+def contagem_estimada(queryset):
+    """
+    Linhas estimadas pelo planejador do PostgreSQL (None em outros bancos).
+    Sem filtros: reltuples da tabela; com filtros: linhas do EXPLAIN.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            linha = cursor.fetchone()
+            # -1: tabela ainda não analisada (ANALYZE)
+            if linha and linha[0] >= 0:
+                return linha[0]
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plano = cursor.fetchone()[0]
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]['Plan']['Plan Rows'])
+
+
+class PaginadorEstimado(Paginator):
+    """Paginator com ``count`` estimado acima do limiar (``estimada=True``)."""
+
+    estimada = False
+
+    @cached_property
+    def count(self):
+        try:
+            estimativa = contagem_estimada(self.object_list)
+        except Exception as e:
+            logger.warning(f"⚠️ Contagem estimada indisponível, usando COUNT(*): {e}")
+            estimativa = None
+        if estimativa is not None and estimativa >= _limiar_estimativa():
+            self.estimada = True
+            return estimativa
+        return super().count
+
+
+def _texto_cursor(valor):
+    # isoformat() completo: DjangoJSONEncoder corta datetimes em milissegundos
+    # e linhas do mesmo milissegundo (bulk_create) seriam puladas
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def codificar_cursor(valores):
+    bruto = json.dumps(list(valores), default=_texto_cursor)
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, campos):
+    """
+    Valores da última linha vista, convertidos pelos ``campos`` do modelo
+    (datetime com microssegundos, UUID...); IncorrectLookupParameters se inválido.
+    """
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise IncorrectLookupParameters
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        raise IncorrectLookupParameters
+    try:
+        return [campo.to_python(valor) for campo, valor in zip(campos, valores)]
+    except ValidationError:
+        raise IncorrectLookupParameters
+
+
+def filtro_apos(campos, valores, descendente=True):
+    """``(campos) < valores`` (ou >) expandido em Q: a<x OR (a=x AND b<y) ..."""
+    operador = 'lt' if descendente else 'gt'
+    filtro = Q()
+    for posicao, campo in enumerate(campos):
+        condicao = Q(**{f'{campo}__{operador}': valores[posicao]})
+        for anterior, valor in zip(campos[:posicao], valores[:posicao]):
+            condicao &= Q(**{anterior: valor})
+        filtro |= condicao
+    return filtro
+
+
+class ChangeListKeyset(ChangeList):
+    """
+    ChangeList paginado por keyset na ordem ``model_admin.ordem_keyset``
+    (todos os campos no mesmo sentido, terminando na PK). ``?o=`` (ordenar
+    por coluna) e "mostrar tudo" usam o comportamento padrão.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.keyset = ORDER_VAR not in request.GET and ALL_VAR not in request.GET
+        self.cursor = request.GET.get(CURSOR_VAR) or None
+        self.url_primeira = self.url_proxima = None
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def _campos_keyset(self):
+        return [campo.lstrip('-') for campo in self.model_admin.ordem_keyset]
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Filtros, busca e ordenação sempre recomeçam da primeira página
+        return super().get_query_string({CURSOR_VAR: None, **(new_params or {})}, remove)
+
+    def get_ordering(self, request, queryset):
+        if self.keyset:
+            return list(self.model_admin.ordem_keyset)
+        return super().get_ordering(request, queryset)
+
+    def get_results(self, request):
+        if not self.keyset:
+            return super().get_results(request)
+
+        # Páginas numeradas não são exibidas (core/templates/admin/core/pagination.html)
+        self.page_num = 1
+        campos = self._campos_keyset
+        descendente = self.model_admin.ordem_keyset[0].startswith('-')
+        pagina = self.queryset
+        if self.cursor:
+            modelo = self.model._meta
+            valores = decodificar_cursor(self.cursor, [modelo.get_field(campo) for campo in campos])
+            pagina = pagina.filter(filtro_apos(campos, valores, descendente))
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        # Só as chaves (índice): define a próxima página sem carregar linhas a mais
+        chaves = list(pagina.values_list(*campos)[:self.list_per_page + 1])
+        tem_mais = len(chaves) > self.list_per_page
+
+        self.result_count = paginator.count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.full_result_count = self.root_queryset.count() if self.show_full_result_count else None
+        self.show_admin_actions = True
+        self.result_list = pagina[:self.list_per_page]
+        self.can_show_all = False
+        self.multi_page = tem_mais or self.cursor is not None
+        self.paginator = paginator
+        if self.cursor:
+            self.url_primeira = self.get_query_string()
+        if tem_mais:
+            self.url_proxima = self.get_query_string({CURSOR_VAR: codificar_cursor(chaves[self.list_per_page - 1])})
+
+
+class FiltroValoresCacheado(admin.AllValuesFieldListFilter):
+    """
+    AllValuesFieldListFilter com os valores distintos no cache (sem o
+    SELECT DISTINCT a cada página). A chave inclui a versão dos
+    ``grupos_cache`` do dashboard, incrementada nas gravações.
+    """
+
+    grupos_cache = (dashboard_cache.FINANCEIRO,)
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        versoes = '.'.join(str(dashboard_cache.versao(grupo)) for grupo in self.grupos_cache)
+        chave = f'admin:filtro:{model._meta.label_lower}:{field_path}:{versoes}'
+        valores = cache.get(chave)
+        if valores is None:
+            valores = list(self.lookup_choices)
+            cache.set(chave, valores, getattr(settings, 'ADMIN_FILTROS_CACHE_TTL', 600))
+        self.lookup_choices = valores
+
+
+class FiltroMesCacheado(FiltroValoresCacheado):
+    """Meses distintos (campo com o 1º dia do mês), exibidos como MM/AAAA."""
+
+    def choices(self, changelist):
+        for escolha in super().choices(changelist):
+            try:
+                ano, mes, _ = escolha['display'].split('-')
+                escolha['display'] = f'{mes}/{ano}'
+            except (AttributeError, ValueError):
+                pass
+            yield escolha
+
+
+class ListaGrandeAdminMixin:
+    """
+    ModelAdmin de tabelas grandes: contagem estimada, paginação keyset em
+    ``ordem_keyset`` (precisa de índice nesses campos) e sem a contagem
+    total não filtrada.
+    """
+
+    ordem_keyset = ('-created_at', '-id')
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return ChangeListKeyset
@@ -0,0 +1,119 @@
+"""
+Busca por nomes, documentos e endereços (admin e API)
+
+As colunas de busca guardam o texto já normalizado (minúsculo, sem
+acentos, documentos só com dígitos), preenchidas ao salvar
+(core/services/indice_busca.py). A consulta é normalizada do mesmo jeito
+e cada termo vira um ``contains``/``startswith`` nessas colunas:
+
+- PostgreSQL: índices GIN de trigramas (pg_trgm) atendem o
+  ``LIKE '%termo%'`` das colunas de texto
+- Qualquer banco: índice B-tree (db_index) atende os prefixos
+  (documento digitado pela metade, número da comanda/contrato)
+
+Quem usa declara ``campos_busca`` (admin ou viewset da API):
+``{'texto': (...), 'documentos': (...), 'prefixos': (...)}``; os de cada
+modelo ficam em CAMPOS_BUSCA, compartilhados pelos dois.
+"""
+import re
+import unicodedata
+
+from django.db.models import Q
+from rest_framework import filters
+
+RE_DOCUMENTO = re.compile(r'^[\d.\-/]+$')
+
+# Termos de documento menores que isso procuram só no texto
+DIGITOS_MINIMOS_DOCUMENTO = 3
+
+# Comandas e locações copiam o texto do locatário e do imóvel: uma coluna
+# só, sem JOIN. Pagamentos usam o texto da comanda (um JOIN pela FK).
+CAMPOS_BUSCA = {
+    'locador': {'texto': ('busca',), 'documentos': ('documento_digitos',)},
+    'locatario': {'texto': ('busca',), 'documentos': ('documento_digitos',)},
+    'imovel': {'texto': ('busca', 'locador__busca')},
+    'locacao': {'texto': ('busca',)},
+    'comanda': {'texto': ('busca',)},
+    'pagamento': {'texto': ('comanda__busca',), 'prefixos': ('numero_pagamento',)},
+}
+
+
+def normalizar(texto):
+    """'  José  da SILVA ' -> 'jose da silva'"""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def somente_digitos(texto):
+    return re.sub(r'\D', '', texto or '')
+
+
+def texto_busca(*partes):
+    """Junta e normaliza as partes de uma coluna de busca (vazias ignoradas)."""
+    return ' '.join(filter(None, (normalizar(parte) for parte in partes)))
+
+
+def filtro_busca(consulta, texto=(), documentos=(), prefixos=()):
+    """
+    Q com todos os termos de ``consulta`` (AND); cada termo casa com
+    qualquer um dos campos (OR). Retorna None se a consulta for vazia.
+
+    - ``texto``: colunas normalizadas, ``contains`` do termo normalizado
+    - ``documentos``: colunas só com dígitos, ``startswith`` dos dígitos
+      quando o termo é um CPF/CNPJ (com ou sem pontuação, completo ou não)
+    - ``prefixos``: números gerados pelo sistema (sempre maiúsculos),
+      ``startswith`` do termo em maiúsculas (índice do próprio campo)
+    """
+    filtro = None
+    for termo in (consulta or '').split():
+        normalizado = normalizar(termo)
+        condicao = Q()
+        for campo in texto:
+            condicao |= Q(**{f'{campo}__contains': normalizado})
+        digitos = somente_digitos(termo)
+        if RE_DOCUMENTO.match(termo) and len(digitos) >= DIGITOS_MINIMOS_DOCUMENTO:
+            # CPF/CNPJ ficam só com dígitos também nas colunas de texto
+            if digitos != normalizado:
+                for campo in texto:
+                    condicao |= Q(**{f'{campo}__contains': digitos})
+            for campo in documentos:
+                condicao |= Q(**{f'{campo}__startswith': digitos})
+        for campo in prefixos:
+            condicao |= Q(**{f'{campo}__startswith': termo.upper()})
+        filtro = condicao if filtro is None else filtro & condicao
+    return filtro
+
+
+def buscar(queryset, consulta, campos_busca):
+    filtro = filtro_busca(consulta, **campos_busca)
+    return queryset if filtro is None else queryset.filter(filtro)
+
+
+class BuscaAdminMixin:
+    """
+    ModelAdmin: a caixa de busca usa ``campos_busca`` (colunas normalizadas
+    e indexadas) em vez dos ``icontains`` de search_fields.
+    ``search_fields`` continua necessário para o admin exibir a caixa.
+    """
+
+    campos_busca = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not self.campos_busca:
+            return super().get_search_results(request, queryset, search_term)
+        # Só colunas do próprio model ou FKs para frente: sem duplicatas
+        return buscar(queryset, search_term, self.campos_busca), False
+
+
+class BuscaFilter(filters.SearchFilter):
+    """SearchFilter da API com ``campos_busca`` da view (mesmo ?search=)."""
+
+    def filter_queryset(self, request, queryset, view):
+        campos_busca = getattr(view, 'campos_busca', None)
+        if not campos_busca:
+            return super().filter_queryset(request, queryset, view)
+        consulta = ' '.join(self.get_search_terms(request))
+        return buscar(queryset, consulta, campos_busca)
@@ -0,0 +1,187 @@
+"""
+GET Condicional (ETag / Last-Modified)
+Responde 304 antes de montar contexto, aplicar regras ou renderizar template
+
+- Estado da versão lido em UMA consulta pequena pela chave indexada
+  (token/pk): updated_at do registro + último updated_at e quantidade dos
+  pagamentos (pagamento novo, alterado ou excluído muda o ETag)
+- Páginas com dias de atraso/vencimento dependem da data: o dia entra no
+  ETag e o Last-Modified nunca é anterior à meia-noite de hoje
+- Validade do token entra no ETag: link expirado não recebe 304 da
+  página antiga
+- Cache-Control por tipo de view (CACHE_PAGINA_PUBLICA, CACHE_API)
+"""
+import hashlib
+import json
+from datetime import datetime, time
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from core.models import Comanda, Pagamento
+
+# Páginas de token (dados pessoais): só o navegador guarda, sempre revalida
+CACHE_PAGINA_PUBLICA = {'private': True, 'max_age': 0, 'must_revalidate': True}
+
+# API autenticada: nenhum cache compartilhado, revalidação a cada uso
+CACHE_API = {'private': True, 'no_cache': True}
+
+# Locatário (nome) e imóvel (endereço) exibidos nas páginas de token da comanda
+RELACIONADOS_COMANDA = ('locacao__locatario__updated_at', 'locacao__imovel__updated_at')
+
+
+def gerar_etag(*partes):
+    return hashlib.md5('|'.join(str(parte) for parte in partes).encode()).hexdigest()
+
+
+def inicio_do_dia():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def estado_comanda(*relacionados, **filtro):
+    """
+    ``{'pk', 'updated_at', 'pagamentos_atualizado', 'pagamentos_qtd',
+    'token_expira_em', *relacionados}`` da comanda (ou None), em uma consulta.
+    ``relacionados``: outros ``<relação>__updated_at`` exibidos na resposta.
+    """
+    return (
+        Comanda.objects.filter(**filtro)
+        .annotate(pagamentos_atualizado=Max('pagamentos__updated_at'), pagamentos_qtd=Count('pagamentos'))
+        .values('pk', 'updated_at', 'pagamentos_atualizado', 'pagamentos_qtd', 'token_expira_em', *relacionados)
+        .first()
+    )
+
+
+def estado_pagamento(*relacionados, **filtro):
+    """
+    Estado do pagamento e da comanda dele (observações), em uma consulta.
+    ``relacionados``: como em estado_comanda.
+    """
+    return (
+        Pagamento.objects.filter(**filtro)
+        .values('pk', 'updated_at', 'comanda__updated_at', 'token_expira_em', *relacionados)
+        .first()
+    )
+
+
+def _token_valido(estado):
+    expira = estado['token_expira_em']
+    return expira is None or expira > timezone.now()
+
+
+def etag_estado(estado):
+    """ETag de um estado (dicionário de versões), incluindo o dia de hoje."""
+    partes = [timezone.localdate().isoformat()]
+    for chave in sorted(estado):
+        if chave == 'token_expira_em':
+            partes.append('valido' if _token_valido(estado) else 'expirado')
+        else:
+            valor = estado[chave]
+            partes.append(f'{chave}={valor.isoformat() if hasattr(valor, "isoformat") else valor}')
+    return gerar_etag(*partes)
+
+
+def last_modified_estado(estado):
+    """Alteração mais recente entre as datas do estado, nunca antes de hoje 00:00."""
+    datas = [
+        valor for chave, valor in estado.items()
+        if chave != 'token_expira_em' and isinstance(valor, datetime)
+    ]
+    return max([inicio_do_dia(), *datas])
+
+
+def get_condicional(carregar_estado, cache=CACHE_PAGINA_PUBLICA):
+    """
+    Decorator de views de função: ``carregar_estado(*args, **kwargs)``
+    recebe os argumentos da URL e devolve o estado (ou None → a view roda
+    normalmente, p. ex. para o 404). A consulta é feita uma vez por request.
+    """
+    def _estado(request, *args, **kwargs):
+        if not hasattr(request, '_estado_condicional'):
+            request._estado_condicional = carregar_estado(*args, **kwargs)
+        return request._estado_condicional
+
+    def _etag(request, *args, **kwargs):
+        estado = _estado(request, *args, **kwargs)
+        return etag_estado(estado) if estado else None
+
+    def _last_modified(request, *args, **kwargs):
+        estado = _estado(request, *args, **kwargs)
+        return last_modified_estado(estado) if estado else None
+
+    def decorator(view):
+        condicional = condition(etag_func=_etag, last_modified_func=_last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = condicional(request, *args, **kwargs)
+            if response.status_code == 200 and not hasattr(request, '_estado_condicional'):
+                # A view gravou o registro (estado_alterado): validadores da versão nova
+                estado = _estado(request, *args, **kwargs)
+                if estado:
+                    response['ETag'] = quote_etag(etag_estado(estado))
+                    response['Last-Modified'] = http_date(last_modified_estado(estado).timestamp())
+            patch_cache_control(response, **cache)
+            return response
+        return wrapper
+    return decorator
+
+
+def estado_alterado(request):
+    """
+    Chamado pela view que grava o próprio registro durante o GET: a resposta
+    sai com o ETag da versão gravada, e o próximo acesso já recebe 304.
+    """
+    if hasattr(request, '_estado_condicional'):
+        del request._estado_condicional
+
+
+class RespostaCondicionalMixin:
+    """
+    ViewSets DRF: ``retrieve`` confere If-None-Match/If-Modified-Since com
+    estado_condicional() (uma consulta) antes de carregar e serializar;
+    ``list`` calcula o ETag da página serializada e economiza a transferência.
+    ``campos_versao``: ``<relação>__updated_at`` dos dados relacionados
+    exibidos pelo serializer.
+    """
+    campos_versao = ()
+
+    def estado_condicional(self, pk):
+        modelo = self.get_queryset().model
+        return modelo._default_manager.filter(pk=pk).values('pk', 'updated_at', *self.campos_versao).first()
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            estado = self.estado_condicional(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except (ValueError, ValidationError):
+            estado = None  # pk malformado: o retrieve padrão responde
+        if estado is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = quote_etag(etag_estado(estado))
+        last_modified = int(last_modified_estado(estado).timestamp())
+        nao_modificado = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if nao_modificado is not None:
+            patch_cache_control(nao_modificado, **CACHE_API)
+            return nao_modificado
+
+        response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, **CACHE_API)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        etag = quote_etag(gerar_etag(json.dumps(response.data, sort_keys=True, cls=DjangoJSONEncoder)))
+        response = get_conditional_response(request, etag=etag, response=response)
+        response['ETag'] = etag
+        patch_cache_control(response, **CACHE_API)
+        return response
+
@@ -0,0 +1,32 @@
+"""
+Execução paralela com janela limitada
+
+``mapear_em_ordem`` aplica uma função a um iterável em um pool de threads,
+devolvendo os resultados na ordem de entrada. No máximo ``janela``
+tarefas ficam em voo: o iterável de entrada só avança conforme a saída é
+consumida, então a memória fica limitada mesmo para entradas grandes.
+
+Indicado para trabalho dominado por I/O (storage R2, disco) ou por
+bibliotecas que liberam o GIL (Pillow, zlib).
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def mapear_em_ordem(funcao, itens, workers=4, janela=None, nome='paralelo'):
+    """
+    Gera tuplas ``(item, resultado)`` na ordem de ``itens``.
+
+    Exceções da função são propagadas ao consumir o item correspondente.
+    """
+    janela = janela or workers * 2
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=nome) as pool:
+        em_voo = deque()
+        for item in itens:
+            em_voo.append((item, pool.submit(funcao, item)))
+            if len(em_voo) >= janela:
+                anterior, futuro = em_voo.popleft()
+                yield anterior, futuro.result()
+        while em_voo:
+            anterior, futuro = em_voo.popleft()
+            yield anterior, futuro.result()
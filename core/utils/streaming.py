@@ -0,0 +1,332 @@
+"""
+Utilitários de streaming para respostas grandes (ZIP/XLSX) e para a
+leitura de planilhas XLSX grandes (importação)
+
+O zipfile da biblioteca padrão aceita escrever em um destino sem seek
+(usa data descriptors). Aqui o destino é um buffer que é esvaziado a
+cada pedaço produzido, então a memória usada não cresce com o número
+de arquivos do pacote.
+"""
+import csv
+import datetime
+import zipfile
+from decimal import Decimal
+from itertools import chain
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape, quoteattr
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BufferStreaming:
+    """Destino de escrita que acumula bytes até serem retirados."""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def retirar(self) -> bytes:
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def zip_streaming(arquivos, compressao=zipfile.ZIP_DEFLATED):
+    """
+    Gera os bytes de um ZIP a partir de ``arquivos``.
+
+    ``arquivos`` é um iterável de tuplas ``(nome_no_zip, origem)``, onde
+    origem pode ser um caminho em disco, ``bytes`` ou um iterável de
+    pedaços ``bytes`` (escrito em streaming). Cada item é consumido sob
+    demanda, então o chamador pode produzir os arquivos preguiçosamente.
+    """
+    buffer = BufferStreaming()
+    with zipfile.ZipFile(buffer, mode='w', compression=compressao) as zf:
+        for nome, origem in arquivos:
+            with zf.open(nome, mode='w', force_zip64=True) as destino:
+                if isinstance(origem, (bytes, bytearray)):
+                    destino.write(origem)
+                elif isinstance(origem, str):
+                    with open(origem, 'rb') as f:
+                        while True:
+                            pedaco = f.read(CHUNK_SIZE)
+                            if not pedaco:
+                                break
+                            destino.write(pedaco)
+                            dados = buffer.retirar()
+                            if dados:
+                                yield dados
+                else:
+                    for pedaco in origem:
+                        destino.write(pedaco)
+                        dados = buffer.retirar()
+                        if dados:
+                            yield dados
+            dados = buffer.retirar()
+            if dados:
+                yield dados
+    dados = buffer.retirar()
+    if dados:
+        yield dados
+
+
+# ═══════════════════════════════════════════════════════════
+# CSV
+# ═══════════════════════════════════════════════════════════
+
+class _Eco:
+    """Pseudo-arquivo: devolve o que for escrito (padrão da doc do Django)."""
+
+    def write(self, valor):
+        return valor
+
+
+def csv_streaming(cabecalho, linhas, delimitador=';', bom=True):
+    """Gera o CSV linha a linha (str), com BOM para o Excel reconhecer UTF-8."""
+    writer = csv.writer(_Eco(), delimiter=delimitador)
+    if bom:
+        yield '\ufeff'
+    yield writer.writerow(cabecalho)
+    for linha in linhas:
+        yield writer.writerow(linha)
+
+
+# ═══════════════════════════════════════════════════════════
+# XLSX (Office Open XML mínimo, escrito em streaming)
+# ═══════════════════════════════════════════════════════════
+
+def _xlsx_content_types(total_planilhas):
+    planilhas = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, total_planilhas + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        f'{planilhas}'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    )
+
+
+_XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+def _xlsx_workbook_rels(total_planilhas):
+    planilhas = ''.join(
+        f'<Relationship Id="rId{i}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, total_planilhas + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'{planilhas}'
+        f'<Relationship Id="rId{total_planilhas + 1}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    )
+
+
+# Estilos: 0 = padrão, 1 = data (dd/mm/aaaa), 2 = valor (#.##0,00), 3 = cabeçalho (negrito)
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+
+_EPOCA_EXCEL = datetime.date(1899, 12, 30)
+
+
+def _xlsx_coluna(indice):
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _xlsx_celula(ref, valor, estilo_texto=0):
+    if valor is None or valor == '':
+        return ''
+    if isinstance(valor, bool):
+        return f'<c r="{ref}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, Decimal):
+        return f'<c r="{ref}" s="2"><v>{valor}</v></c>'
+    if isinstance(valor, (int, float)):
+        return f'<c r="{ref}"><v>{valor}</v></c>'
+    if isinstance(valor, datetime.date):
+        if isinstance(valor, datetime.datetime):
+            valor = valor.date()
+        return f'<c r="{ref}" s="1"><v>{(valor - _EPOCA_EXCEL).days}</v></c>'
+    texto = escape(str(valor))
+    return f'<c r="{ref}" t="inlineStr" s="{estilo_texto}"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _xlsx_linhas(cabecalho, linhas):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<sheetData>'
+    ).encode('utf-8')
+
+    numero = 0
+    bloco = []
+    for linha in chain([cabecalho], linhas):
+        numero += 1
+        estilo = 3 if numero == 1 else 0
+        celulas = ''.join(
+            _xlsx_celula(f'{_xlsx_coluna(i)}{numero}', valor, estilo)
+            for i, valor in enumerate(linha)
+        )
+        bloco.append(f'<row r="{numero}">{celulas}</row>')
+        if len(bloco) >= 500:
+            yield ''.join(bloco).encode('utf-8')
+            bloco = []
+    if bloco:
+        yield ''.join(bloco).encode('utf-8')
+
+    yield '</sheetData></worksheet>'.encode('utf-8')
+
+
+def xlsx_streaming(cabecalho, linhas, nome_planilha='Planilha1'):
+    """
+    Gera os bytes de um .xlsx com uma planilha, em memória constante.
+
+    Células de texto são gravadas como inlineStr (sem tabela de strings
+    compartilhadas), Decimal com formato monetário e datas como data.
+    """
+    return xlsx_streaming_planilhas([(nome_planilha, cabecalho, linhas)])
+
+
+def xlsx_streaming_planilhas(planilhas):
+    """
+    Como xlsx_streaming, mas com várias planilhas no mesmo arquivo.
+    ``planilhas``: lista de ``(nome, cabecalho, linhas)``, gravadas em ordem.
+    """
+    planilhas = list(planilhas)
+    abas = ''.join(
+        f'<sheet name={quoteattr(nome[:31])} sheetId="{i}" r:id="rId{i}"/>'
+        for i, (nome, _, _) in enumerate(planilhas, start=1)
+    )
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets>{abas}</sheets>'
+        '</workbook>'
+    )
+    arquivos = [
+        ('[Content_Types].xml', _xlsx_content_types(len(planilhas)).encode('utf-8')),
+        ('_rels/.rels', _XLSX_RELS.encode('utf-8')),
+        ('xl/workbook.xml', workbook.encode('utf-8')),
+        ('xl/_rels/workbook.xml.rels', _xlsx_workbook_rels(len(planilhas)).encode('utf-8')),
+        ('xl/styles.xml', _XLSX_STYLES.encode('utf-8')),
+    ]
+    arquivos.extend(
+        (f'xl/worksheets/sheet{i}.xml', _xlsx_linhas(cabecalho, linhas))
+        for i, (_, cabecalho, linhas) in enumerate(planilhas, start=1)
+    )
+    return zip_streaming(arquivos)
+
+
+# ═══════════════════════════════════════════════════════════
+# XLSX (leitura em streaming)
+# ═══════════════════════════════════════════════════════════
+
+_XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+def _xlsx_indice_coluna(ref):
+    """'A1' -> 0, 'AA7' -> 26 (inverso de _xlsx_coluna)"""
+    indice = 0
+    for letra in ref:
+        if not letra.isalpha():
+            break
+        indice = indice * 26 + ord(letra.upper()) - 64
+    return indice - 1
+
+
+def _xlsx_texto(elemento):
+    return ''.join(t.text or '' for t in elemento.iter(f'{_XLSX_NS}t'))
+
+
+def xlsx_linhas(arquivo, planilha=1):
+    """
+    Gera as linhas da planilha como listas de str, lendo o XML com
+    iterparse e descartando cada linha após usá-la (memória constante no
+    número de linhas; só a tabela de strings compartilhadas fica inteira).
+
+    ``arquivo``: caminho ou arquivo binário com seek. Números e datas vêm
+    como o texto da célula (datas no número serial do Excel, ver
+    ``data_serial_excel``); células vazias viram ''.
+    """
+    with zipfile.ZipFile(arquivo) as zf:
+        compartilhadas = []
+        if 'xl/sharedStrings.xml' in zf.namelist():
+            with zf.open('xl/sharedStrings.xml') as xml:
+                for _, elemento in iterparse(xml):
+                    if elemento.tag == f'{_XLSX_NS}si':
+                        compartilhadas.append(_xlsx_texto(elemento))
+                        elemento.clear()
+
+        with zf.open(f'xl/worksheets/sheet{planilha}.xml') as xml:
+            for _, elemento in iterparse(xml):
+                if elemento.tag != f'{_XLSX_NS}row':
+                    continue
+                valores = {}
+                for posicao, celula in enumerate(elemento.iter(f'{_XLSX_NS}c')):
+                    ref = celula.get('r')
+                    coluna = _xlsx_indice_coluna(ref) if ref else posicao
+                    tipo = celula.get('t')
+                    if tipo == 'inlineStr':
+                        valores[coluna] = _xlsx_texto(celula)
+                        continue
+                    v = celula.find(f'{_XLSX_NS}v')
+                    texto = v.text or '' if v is not None else ''
+                    valores[coluna] = compartilhadas[int(texto)] if tipo == 's' and texto else texto
+                elemento.clear()
+                if valores:
+                    yield [valores.get(i, '') for i in range(max(valores) + 1)]
+                else:
+                    yield []
+
+
+def data_serial_excel(serial):
+    """Número serial de data do Excel ('45726') -> date."""
+    return _EPOCA_EXCEL + datetime.timedelta(days=int(float(serial)))
@@ -1,17 +1,23 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+import uuid
 from datetime import datetime
 
 # Imports básicos que sabemos que funcionam
 from .models import Usuario, Locador, Imovel, Locatario, Locacao, Comanda, Pagamento
 from .serializers import (
     UsuarioSerializer, LocadorSerializer, ImovelSerializer,
-    LocatarioSerializer, LocacaoSerializer, ComandaSerializer, PagamentoSerializer
+    LocatarioSerializer, LocacaoSerializer, ComandaSerializer, PagamentoSerializer,
+    ComandaLeituraSerializer, LocacaoLeituraSerializer,
 )
+from .pagination import CursorCriacaoPagination
+from .utils.condicional import RespostaCondicionalMixin, estado_comanda
+from .services.pagamentos_lote import LoteInvalido, registrar_pagamentos_em_lote
+from .utils.busca import CAMPOS_BUSCA, BuscaFilter
 
 # ViewSets básicos que funcionavam antes
 class UsuarioViewSet(viewsets.ModelViewSet):
@@ -34,15 +40,44 @@ class LocatarioViewSet(viewsets.ModelViewSet):
     serializer_class = LocatarioSerializer
     permission_classes = [IsAuthenticated]
 
-class LocacaoViewSet(viewsets.ModelViewSet):
-    queryset = Locacao.objects.all()
-    serializer_class = LocacaoSerializer
-    permission_classes = [IsAuthenticated]
+class LeituraEnxutaMixin:
+    """
+    list/retrieve usam o serializer de leitura (campos explícitos, totais
+    anotados) e paginação por cursor; escrita mantém o serializer completo.
+    """
+    pagination_class = CursorCriacaoPagination
+    filter_backends = [DjangoFilterBackend, BuscaFilter]
+    read_serializer_class = None
+    
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve'):
+            return self.read_serializer_class
+        return super().get_serializer_class()
 
-class ComandaViewSet(viewsets.ModelViewSet):
-    queryset = Comanda.objects.all()
+
+class LocacaoViewSet(RespostaCondicionalMixin, LeituraEnxutaMixin, viewsets.ModelViewSet):
+    queryset = Locacao.objects.select_related('imovel', 'imovel__locador', 'locatario')
+    serializer_class = LocacaoSerializer
+    read_serializer_class = LocacaoLeituraSerializer
+    permission_classes = [IsAdminUser]
+    filterset_fields = ['status', 'imovel', 'locatario']
+    campos_busca = CAMPOS_BUSCA['locacao']
+    campos_versao = ('imovel__updated_at', 'imovel__locador__updated_at', 'locatario__updated_at')
+
+class ComandaViewSet(RespostaCondicionalMixin, LeituraEnxutaMixin, viewsets.ModelViewSet):
+    queryset = Comanda.objects.select_related(
+        'locacao', 'locacao__imovel', 'locacao__locatario'
+    ).com_totais()
     serializer_class = ComandaSerializer
-    permission_classes = [IsAuthenticated]
+    read_serializer_class = ComandaLeituraSerializer
+    permission_classes = [IsAdminUser]
+    filterset_fields = ['status', 'locacao', 'mes_referencia']
+    campos_busca = CAMPOS_BUSCA['comanda']
+    campos_versao = ('locacao__updated_at', 'locacao__imovel__updated_at', 'locacao__locatario__updated_at')
+    
+    def estado_condicional(self, pk):
+        # Totais vêm dos pagamentos: versão inclui o último pagamento
+        return estado_comanda(*self.campos_versao, pk=pk)
 
 
 
@@ -71,15 +106,39 @@ class PagamentoViewSet(viewsets.ModelViewSet):
     """ViewSet for payment management."""
     queryset = Pagamento.objects.select_related('comanda', 'usuario_registro').all()
     serializer_class = PagamentoSerializer
-    permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend, BuscaFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'forma_pagamento', 'comanda']
-    search_fields = ['numero_pagamento', 'comanda__numero_comanda']
+    campos_busca = CAMPOS_BUSCA['pagamento']
     ordering_fields = ['data_pagamento', 'valor_pago', 'created_at']
     ordering = ['-data_pagamento']
     
     def perform_create(self, serializer):
         serializer.save(usuario_registro=self.request.user)
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def lote(self, request):
+        """
+        POST /api/pagamentos/lote/
+        Corpo: lista de pagamentos ou {"pagamentos": [...], "parcial": true}
+        """
+        dados = request.data
+        itens = dados.get('pagamentos') if isinstance(dados, dict) else dados
+        if not isinstance(itens, list):
+            return Response({'erro': 'Envie uma lista de pagamentos'}, status=status.HTTP_400_BAD_REQUEST)
+        parcial = isinstance(dados, dict) and str(dados.get('parcial', '')).lower() in ('1', 'true')
+        
+        try:
+            resultado = registrar_pagamentos_em_lote(itens, request.user, parcial=parcial)
+        except LoteInvalido as e:
+            return Response({'erro': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        criados = resultado['criados']
+        return Response({
+            'criados': PagamentoSerializer(criados, many=True).data,
+            'erros': resultado['erros'],
+            'comandas_atualizadas': resultado['comandas_atualizadas'],
+        }, status=status.HTTP_201_CREATED if criados else status.HTTP_400_BAD_REQUEST)
 
 
 from django.http import FileResponse, HttpResponse, Http404
@@ -110,7 +169,7 @@ def download_recibo_pagamento(request, pagamento_id):
         filename = generator.gerar_recibo_pagamento(pagamento.id)
         
         # Caminho completo do arquivo
-        file_path = os.path.join(generator.output_dir, filename)
+        file_path = generator.caminho_recibo(filename)
         
         # Verificar se existe
         if not os.path.exists(file_path):
@@ -121,20 +180,23 @@ def download_recibo_pagamento(request, pagamento_id):
         if content_type is None:
             content_type = 'application/octet-stream'
         
-        # Abrir arquivo
-        with open(file_path, 'rb') as f:
-            response = HttpResponse(f.read(), content_type=content_type)
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            # Log de auditoria (opcional)
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.info(
-                f"Recibo baixado: {filename} por {request.user.username} "
-                f"(Pagamento: {pagamento.numero_pagamento})"
-            )
-            
-            return response
+        # Servir em streaming (o arquivo não é carregado inteiro em memória)
+        response = FileResponse(
+            open(file_path, 'rb'),
+            as_attachment=True,
+            filename=f"recibo_{pagamento.numero_pagamento or pagamento.id}{os.path.splitext(filename)[1]}",
+            content_type=content_type,
+        )
+        
+        # Log de auditoria (opcional)
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.info(
+            f"Recibo baixado: {filename} por {request.user.username} "
+            f"(Pagamento: {pagamento.numero_pagamento})"
+        )
+        
+        return response
             
     except Exception as e:
         import logging
@@ -190,10 +252,10 @@ def pagina_recibo_pagamento(request, pagamento_id):
                 from django.conf import settings
                 from .document_generator import DocumentGenerator
                 
-                # Gerar recibo
+                # Gerar recibo (reaproveita o arquivo se já existir)
                 generator = DocumentGenerator()
                 filename = generator.gerar_recibo_pagamento(pagamento.id)
-                file_path = os.path.join(generator.output_dir, filename)
+                file_path = generator.caminho_recibo(filename)
                 
                 # Preparar email
                 locatario_email = locatario.email if locatario else None
@@ -239,8 +301,7 @@ Sistema de Gestão Imobiliária
                     )
                     
                     # Anexar recibo
-                    with open(file_path, 'rb') as f:
-                        email.attach(filename, f.read(), 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+                    email.attach_file(file_path, 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
                     
                     email.send()
                     
@@ -351,6 +412,50 @@ def visualizar_recibo_pagamento(request, pagamento_id):
     return render(request, 'admin/recibo_modal.html', context)
 
 
+@staff_member_required
+def exportar_recibos_lote(request):
+    """
+    Exporta em um só download os recibos de um mês e/ou de um locador.
+
+    Parâmetros GET: ano, mes, locador (uuid), formato (zip | zip_pdf | pdf).
+    """
+    from .services.recibos_lote import selecionar_pagamentos, resposta_pacote_recibos
+    
+    if not request.user.has_perm('core.view_pagamento'):
+        raise Http404("Permissão negada")
+    
+    try:
+        ano = int(request.GET['ano']) if request.GET.get('ano') else None
+        mes = int(request.GET['mes']) if request.GET.get('mes') else None
+    except ValueError:
+        return HttpResponse('Parâmetros ano/mes inválidos', status=400)
+    
+    locador_id = request.GET.get('locador') or None
+    if locador_id:
+        # Validado aqui: dentro do gerador do streaming o erro viraria um ZIP truncado
+        try:
+            locador_id = uuid.UUID(locador_id)
+        except ValueError:
+            return HttpResponse('Parâmetro locador inválido', status=400)
+    formato = request.GET.get('formato', 'zip')
+    if formato not in ('zip', 'zip_pdf', 'pdf'):
+        return HttpResponse('Formato inválido', status=400)
+    
+    if not (ano or locador_id):
+        return HttpResponse('Informe ao menos ano/mes ou locador', status=400)
+    
+    queryset = selecionar_pagamentos(ano=ano, mes=mes, locador_id=locador_id)
+    
+    nome_base = 'recibos'
+    if ano:
+        nome_base += f'_{ano}' + (f'{mes:02d}' if mes else '')
+    
+    try:
+        return resposta_pacote_recibos(queryset, formato=formato, nome_base=nome_base)
+    except RuntimeError as e:
+        return HttpResponse(str(e), status=503)
+
+
 
 @staff_member_required
 def comanda_web_view_OLD_DEPRECATED(request, comanda_id):
@@ -6,6 +6,7 @@ from django.shortcuts import render, get_object_or_404
 from django.http import Http404
 from django.utils import timezone
 from core.models import Comanda
+from core.utils.condicional import RELACIONADOS_COMANDA, estado_alterado, estado_comanda, get_condicional
 import hashlib
 
 
@@ -83,6 +84,14 @@ def _get_property_safe(obj, prop_name, fallback_func):
         return fallback_func(obj)
 
 
+def _estado_comanda_web(comanda_id, token):
+    """Estado para o GET condicional; None (token inválido) deixa a view responder 404."""
+    if not validar_token_comanda(str(comanda_id), token):
+        return None
+    return estado_comanda(*RELACIONADOS_COMANDA, pk=comanda_id, is_active=True)
+
+
+@get_condicional(_estado_comanda_web)
 def comanda_web_view(request, comanda_id, token):
     """
     Exibe comanda com design bonito (mesmo do email)
@@ -103,9 +112,14 @@ def comanda_web_view(request, comanda_id, token):
     )
     
     # Aplicar multa/juros se vencida
+    # (só grava quando os valores mudaram: gravar a cada acesso mudaria o ETag)
     if is_vencida:
-        comanda.aplicar_multa_juros(salvar=True)
-        comanda.refresh_from_db()
+        valores_anteriores = (comanda.valor_multa, comanda.valor_juros)
+        comanda.aplicar_multa_juros(salvar=False)
+        if (comanda.valor_multa, comanda.valor_juros) != valores_anteriores:
+            comanda.save(update_fields=['valor_multa', 'valor_juros', 'updated_at'])
+            comanda.refresh_from_db()
+            estado_alterado(request)
     
     # 🛡️ CALCULAR dias_atraso COM FALLBACK
     dias_atraso = _get_property_safe(
@@ -3,16 +3,17 @@ Views para Sistema de Vistorias (Mobile Interface)
 Autor: Claude + Cícero (Policorp)
 Data: 11/01/2026
 """
-from io import BytesIO
 from PIL import Image
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.core.files.base import ContentFile
+from django.urls import reverse
 from django.utils import timezone
 from core.models_inspection import Inspection, InspectionPhoto, InspectionPDF
-from core.services.inspection_pdf import gerar_pdf_vistoria
+from core.services.inspection_fotos import processar_foto_vistoria, processar_fotos_pendentes
+from core.services.inspection_pdf import gerar_pdf_vistoria_incremental, limpar_paginas_em_cache
+from core.services.tarefas_background import agendar_tarefa
 
 
 @require_http_methods(["GET"])
@@ -53,7 +54,8 @@ def abrir_vistoria_mobile(request, token):
 def upload_foto_vistoria(request, token):
     """
     Upload de foto via mobile (AJAX)
-    Comprime imagem e salva no R2
+    Salva o arquivo bruto no R2 e responde na hora (202); as versões
+    1600px/miniatura são geradas em segundo plano
     """
     inspection = get_object_or_404(Inspection, token=token)
     
@@ -91,52 +93,41 @@ def upload_foto_vistoria(request, token):
     ordem = int(request.POST.get('ordem', inspection.total_fotos + 1))
     
     try:
-        # Abrir imagem com Pillow
-        img = Image.open(arquivo_foto)
-        img = img.convert("RGB")
-        
-        # Pegar dimensões originais
-        largura_original, altura_original = img.size
-        
-        # Redimensionar para máximo 1600px (mantém proporção)
-        max_dimension = 1600
-        if largura_original > max_dimension or altura_original > max_dimension:
-            img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
-        
-        # Comprimir e salvar em buffer
-        buffer = BytesIO()
-        img.save(buffer, format='JPEG', quality=75, optimize=True)
-        tamanho_bytes = buffer.tell()
-        buffer.seek(0)
-        
-        # Verificar tamanho máximo (1.5 MB)
-        if tamanho_bytes > 1.5 * 1024 * 1024:
+        # Validação rápida: só o cabeçalho é lido (sem decodificar a imagem)
+        try:
+            formato = Image.open(arquivo_foto).format
+        except Exception:
+            formato = None
+        if not formato:
             return JsonResponse({
                 'success': False,
-                'error': 'Foto muito grande (máx 1.5 MB após compressão)'
+                'error': 'Arquivo enviado não é uma imagem válida'
             }, status=400)
+        arquivo_foto.seek(0)
         
-        # Criar objeto InspectionPhoto
+        # Criar objeto InspectionPhoto (versões geradas em segundo plano)
         foto = InspectionPhoto(
             inspection=inspection,
             legenda=legenda,
             ordem=ordem,
-            largura=img.size[0],
-            altura=img.size[1],
-            tamanho_bytes=tamanho_bytes
+            status_processamento='pendente'
         )
         
-        # Salvar imagem (django-storages vai para R2 automaticamente)
-        filename = f"{inspection.id}-{ordem}.jpg"
-        foto.imagem.save(filename, ContentFile(buffer.read()), save=True)
+        # Salvar arquivo bruto (django-storages vai para R2 automaticamente)
+        extensao = (formato or 'jpg').lower().replace('jpeg', 'jpg')
+        foto.original.save(f"{ordem}-{foto.id.hex[:8]}-orig.{extensao}", arquivo_foto, save=True)
+        
+        # Redimensionar/comprimir após o commit, fora da requisição
+        agendar_tarefa(processar_foto_vistoria, foto.id)
         
         return JsonResponse({
             'success': True,
             'foto_id': str(foto.id),
             'ordem': foto.ordem,
-            'tamanho_mb': foto.tamanho_mb,
+            'status': foto.status_processamento,
+            'status_url': reverse('inspection_status_foto', kwargs={'token': token, 'foto_id': foto.id}),
             'total_fotos': inspection.total_fotos
-        })
+        }, status=202)
         
     except Exception as e:
         return JsonResponse({
@@ -145,6 +136,24 @@ def upload_foto_vistoria(request, token):
         }, status=500)
 
 
+@require_http_methods(["GET"])
+def status_foto_vistoria(request, token, foto_id):
+    """
+    Status do processamento de uma foto (consultado pelo mobile)
+    """
+    inspection = get_object_or_404(Inspection, token=token)
+    foto = get_object_or_404(InspectionPhoto, id=foto_id, inspection=inspection)
+    
+    return JsonResponse({
+        'success': True,
+        'foto_id': str(foto.id),
+        'status': foto.status_processamento,
+        'erro': foto.erro_processamento or None,
+        'miniatura_url': foto.miniatura.url if foto.miniatura else None,
+        'tamanho_mb': foto.tamanho_mb,
+    })
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def deletar_foto_vistoria(request, token, foto_id):
@@ -170,8 +179,8 @@ def deletar_foto_vistoria(request, token, foto_id):
     try:
         foto = get_object_or_404(InspectionPhoto, id=foto_id, inspection=inspection)
         
-        # Deletar arquivo do R2
-        foto.imagem.delete()
+        # Deletar arquivos do R2
+        foto.excluir_arquivos()
         
         # Deletar objeto
         foto.delete()
@@ -193,7 +202,8 @@ def deletar_foto_vistoria(request, token, foto_id):
 def finalizar_vistoria(request, token):
     """
     Finalizar vistoria e gerar PDF
-    Deleta fotos brutas após gerar PDF
+    Deleta as fotos que entraram no PDF; fotos ainda em processamento ou
+    com erro impedem a finalização (seriam perdidas)
     """
     inspection = get_object_or_404(Inspection, token=token)
     
@@ -218,9 +228,28 @@ def finalizar_vistoria(request, token):
             'error': 'É necessário pelo menos 1 foto para finalizar'
         }, status=400)
     
+    # Pendentes são processadas agora; processando/erro ficariam fora do PDF
+    processar_fotos_pendentes(inspection, incluir_travadas=False)
+    fora_do_pdf = [
+        {
+            'id': str(foto.id),
+            'ordem': foto.ordem,
+            'legenda': foto.legenda,
+            'status': foto.status_processamento,
+            'erro': foto.erro_processamento,
+        }
+        for foto in inspection.fotos.exclude(status_processamento='concluida').order_by('ordem')
+    ]
+    if fora_do_pdf:
+        return JsonResponse({
+            'success': False,
+            'error': 'Há fotos ainda em processamento ou com erro: aguarde ou exclua e envie novamente',
+            'fotos': fora_do_pdf,
+        }, status=400)
+    
     try:
-        # Gerar PDF
-        pdf_content, total_paginas = gerar_pdf_vistoria(inspection)
+        # Gerar PDF (reaproveita páginas de foto já geradas pelo admin)
+        pdf_content, total_paginas, incluidas = gerar_pdf_vistoria_incremental(inspection)
         
         # Salvar PDF no R2
         filename = f"Vistoria_{inspection.locacao.numero_contrato}_{timezone.now().strftime('%Y%m%d_%H%M')}.pdf"
@@ -243,14 +272,15 @@ def finalizar_vistoria(request, token):
             )
             pdf_obj.arquivo.save(filename, pdf_content, save=True)
         
-        # Deletar fotos brutas do R2 (economia de espaço)
-        fotos = inspection.fotos.all()
-        for foto in fotos:
-            try:
-                foto.imagem.delete(save=False)  # Deletar do R2
-            except:
-                pass  # Se já foi deletado, ignorar
+        # Deletar do R2 só as fotos que estão no PDF (economia de espaço);
+        # as que falharam na montagem continuam na vistoria
+        for foto in inspection.fotos.filter(pk__in=incluidas):
+            foto.excluir_arquivos()  # Deletar do R2
             foto.delete()  # Deletar do banco
+        nao_incluidas = list(inspection.fotos.values_list('id', flat=True))
+        
+        # Páginas em cache não são mais necessárias
+        limpar_paginas_em_cache(inspection)
         
         # Marcar vistoria como concluída
         inspection.mark_completed()
@@ -264,7 +294,8 @@ def finalizar_vistoria(request, token):
             'pdf_url': pdf_url,
             'pdf_filename': pdf_obj.nome_arquivo,
             'pdf_pages': pdf_obj.paginas,
-            'pdf_size_mb': pdf_obj.tamanho_mb
+            'pdf_size_mb': pdf_obj.tamanho_mb,
+            'fotos_nao_incluidas': [str(pk) for pk in nao_incluidas],
         })
         
     except Exception as e:
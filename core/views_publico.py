@@ -7,9 +7,21 @@ from django.shortcuts import render, get_object_or_404
 from django.http import Http404
 from django.utils import timezone
 from core.models import Comanda, Pagamento
+from core.utils.condicional import RELACIONADOS_COMANDA, estado_comanda, estado_pagamento, get_condicional
 from core.utils.token_publico import validar_token, dias_ate_expirar
 
 
+def _estado_comanda_publica(token):
+    """Estado para o GET condicional, com locatário e imóvel exibidos na página."""
+    return estado_comanda(*RELACIONADOS_COMANDA, token=token)
+
+
+def _estado_recibo_publico(token):
+    """Estado para o GET condicional, com locatário e imóvel exibidos no recibo."""
+    return estado_pagamento(*(f'comanda__{campo}' for campo in RELACIONADOS_COMANDA), token=token)
+
+
+@get_condicional(_estado_comanda_publica)
 def comanda_publica_view(request, token):
     """
     View pública para visualizar comanda via token UUID.
@@ -59,6 +71,7 @@ def comanda_publica_view(request, token):
     return render(request, 'publico/comanda_publica.html', contexto)
 
 
+@get_condicional(_estado_recibo_publico)
 def recibo_publico_view(request, token):
     """
     View pública para visualizar recibo via token UUID.
@@ -1,9 +1,18 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from django.db.models import Sum, Count, Q, Avg
+from django.db.models import Sum, Count, Q, Avg, Prefetch
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 from core.models import Comanda, Locacao, Imovel, Pagamento
+from core.services.inadimplencia import (
+    comandas_vencidas,
+    pagina_detalhe,
+    pivo_por_locador,
+    pivo_por_locatario,
+    totais_por_faixa,
+)
+from core.services.performance_imoveis import ORDENACAO_PADRAO, pagina_performance
 
 
 def dashboard_relatorios(request):
@@ -65,20 +74,31 @@ def dashboard_relatorios(request):
     return render(request, 'relatorios/dashboard.html', context)
 
 
+@staff_member_required
 def relatorio_inadimplencia(request):
-    """Relatório detalhado de inadimplência"""
+    """
+    Relatório de inadimplência por faixa de atraso (aging).
+    Totais por faixa, pivôs por locatário/locador e detalhe paginado,
+    cada bloco em uma consulta (core/services/inadimplencia.py).
+    """
     hoje = timezone.now().date()
+    faixa = request.GET.get('faixa') or None
     
-    comandas_vencidas = Comanda.objects.filter(
-        status__in=['vencida', 'pendente'],
-        data_vencimento__lt=hoje
-    ).select_related('locacao', 'locacao__imovel', 'locacao__locatario').order_by('data_vencimento')
-    
-    total_inadimplencia = sum(c.valor_total for c in comandas_vencidas)
+    vencidas = comandas_vencidas(hoje)
+    totais = totais_por_faixa(vencidas)
+    pagina = pagina_detalhe(vencidas, faixa=faixa, pagina=request.GET.get('pagina'))
+    for c in pagina:
+        c.dias_atraso = (hoje - c.data_vencimento).days
     
     context = {
-        'comandas': comandas_vencidas,
-        'total': total_inadimplencia,
+        'faixas': [{'nome': nome, **valores} for nome, valores in totais.items()],
+        'faixa': faixa,
+        'comandas': pagina,
+        'pagina': pagina,
+        'por_locatario': pivo_por_locatario(vencidas)[:20],
+        'por_locador': pivo_por_locador(vencidas)[:20],
+        'total': sum((t['valor_pendente'] for t in totais.values()), Decimal('0.00')),
+        'quantidade': sum(t['quantidade'] for t in totais.values()),
         'data_geracao': hoje,
     }
     
@@ -86,29 +106,42 @@ def relatorio_inadimplencia(request):
 
 
 def relatorio_imoveis(request):
-    """Relatório de performance por imóvel"""
-    imoveis = Imovel.objects.all()
+    """
+    Relatório de performance por imóvel (últimos 12 meses).
+    Previsto/realizado/ranking em uma consulta; ordenação e paginação no SQL.
+    """
+    comandas_12m = Comanda.objects.filter(
+        is_active=True,
+        mes_referencia__gte=timezone.now().date() - timedelta(days=365)
+    )
+    imoveis = Imovel.objects.prefetch_related(
+        Prefetch(
+            'locacoes',
+            queryset=Locacao.objects.filter(status='ACTIVE').select_related('locatario'),
+            to_attr='locacoes_ativas',
+        )
+    )
+    ordenar = request.GET.get('ordenar', ORDENACAO_PADRAO)
+    pagina = pagina_performance(
+        comandas_12m, imoveis, ordenar=ordenar, pagina=request.GET.get('pagina'),
+    )
     
     dados_imoveis = []
-    for imovel in imoveis:
-        locacao_ativa = imovel.locacoes.filter(status='ativa').first()
-        
-        # Receita do imóvel (últimos 12 meses)
-        receita_12m = Comanda.objects.filter(
-            locacao__imovel=imovel,
-            status='paga',
-            mes_referencia__gte=timezone.now().date() - timedelta(days=365)
-        ).aggregate(total=Sum('valor_pago'))['total'] or Decimal('0.00')
-        
+    for imovel in pagina:
         dados_imoveis.append({
             'imovel': imovel,
-            'locacao': locacao_ativa,
-            'receita_12m': receita_12m,
+            'locacao': imovel.locacoes_ativas[0] if imovel.locacoes_ativas else None,
+            'previsto_12m': imovel.previsto,
+            'receita_12m': imovel.realizado,
+            'taxa': round(imovel.taxa, 1),
+            'ranking': imovel.ranking,
             'status': imovel.status,
         })
     
     context = {
         'dados_imoveis': dados_imoveis,
+        'pagina': pagina,
+        'ordenar': ordenar,
     }
     
     return render(request, 'relatorios/imoveis.html', context)
@@ -0,0 +1,141 @@
+"""
+API de Sincronização Incremental (/api/sync/<modelo>/)
+Devolve só o que mudou desde o último cursor: criados, alterados e
+desativados (is_active=False), em ordem (updated_at, id)
+
+- Cursor opaco (base64 de updated_at + id): o cliente guarda o
+  ``proximo_cursor`` e o envia na próxima execução
+- Consulta por faixa no índice (updated_at, id) de cada modelo, LIMIT
+  limitado por SYNC_LIMITE_MAXIMO
+- Linhas gravadas nos últimos SYNC_MARGEM_SEGUNDOS ficam para a próxima
+  chamada: uma transação ainda aberta pode gravar updated_at anterior ao
+  cursor já entregue
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Comanda, Imovel, Locacao, Locador, Locatario, Pagamento
+
+MODELOS_SYNC = {
+    'comandas': Comanda,
+    'pagamentos': Pagamento,
+    'locacoes': Locacao,
+    'imoveis': Imovel,
+    'locatarios': Locatario,
+    'locadores': Locador,
+}
+
+SYNC_LIMITE_PADRAO = 500
+
+# Campos que nunca saem pela sincronização (links de acesso público e
+# colunas internas de busca, derivadas dos demais campos)
+CAMPOS_EXCLUIDOS = ('token', 'busca', 'documento_digitos')
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(updated_at, pk):
+    bruto = json.dumps({'u': updated_at.isoformat(), 'i': str(pk)})
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna ``(updated_at, pk)``; CursorInvalido se o texto não for um cursor."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        updated_at = parse_datetime(dados['u'])
+        if updated_at is None:
+            raise ValueError
+        return updated_at, dados['i']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise CursorInvalido('Cursor inválido')
+
+
+def campos_sync(modelo):
+    """Colunas concretas (FKs como ``<campo>_id``), sem os campos sensíveis."""
+    return [
+        campo.attname for campo in modelo._meta.concrete_fields
+        if not campo.name.startswith(CAMPOS_EXCLUIDOS)
+    ]
+
+
+def alteracoes_desde(modelo, cursor=None, limite=SYNC_LIMITE_PADRAO, agora=None):
+    """
+    Página de alterações após ``cursor`` (None = desde o início).
+    Retorna ``(linhas, proximo_cursor, tem_mais)``.
+    """
+    agora = agora or timezone.now()
+    margem = getattr(settings, 'SYNC_MARGEM_SEGUNDOS', 5)
+
+    queryset = modelo._base_manager.filter(updated_at__lte=agora - timedelta(seconds=margem))
+    desde = None
+    if cursor:
+        desde, ultimo_pk = decodificar_cursor(cursor)
+        queryset = queryset.filter(
+            Q(updated_at__gt=desde) | Q(updated_at=desde, pk__gt=ultimo_pk)
+        )
+
+    linhas = list(queryset.order_by('updated_at', 'pk').values(*campos_sync(modelo))[:limite + 1])
+    tem_mais = len(linhas) > limite
+    linhas = linhas[:limite]
+
+    for linha in linhas:
+        if not linha['is_active']:
+            linha['operacao'] = 'removido'
+        elif desde is None or linha['created_at'] > desde:
+            linha['operacao'] = 'criado'
+        else:
+            linha['operacao'] = 'atualizado'
+
+    proximo = codificar_cursor(linhas[-1]['updated_at'], linhas[-1]['id']) if linhas else cursor
+    return linhas, proximo, tem_mais
+
+
+class SincronizacaoView(APIView):
+    """
+    GET /api/sync/ → modelos disponíveis
+    GET /api/sync/<modelo>/?cursor=...&limite=... → alterações desde o cursor
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, modelo=None):
+        if modelo is None:
+            return Response({'modelos': sorted(MODELOS_SYNC)})
+
+        if modelo not in MODELOS_SYNC:
+            return Response({'erro': f'Modelo desconhecido: {modelo}'}, status=404)
+
+        maximo = getattr(settings, 'SYNC_LIMITE_MAXIMO', 1000)
+        try:
+            limite = min(int(request.query_params.get('limite', SYNC_LIMITE_PADRAO)), maximo)
+        except ValueError:
+            return Response({'erro': 'limite deve ser um número inteiro'}, status=400)
+        if limite < 1:
+            return Response({'erro': 'limite deve ser positivo'}, status=400)
+
+        try:
+            linhas, proximo, tem_mais = alteracoes_desde(
+                MODELOS_SYNC[modelo], request.query_params.get('cursor') or None, limite
+            )
+        except CursorInvalido as e:
+            return Response({'erro': str(e)}, status=400)
+
+        return Response({
+            'modelo': modelo,
+            'resultados': linhas,
+            'proximo_cursor': proximo,
+            'tem_mais': tem_mais,
+        })
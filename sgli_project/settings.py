@@ -41,6 +41,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.perfil_consultas.PerfilConsultasMiddleware',
 ]
 
 ROOT_URLCONF = 'sgli_project.urls'
@@ -266,6 +267,63 @@ CELERY_TIMEZONE = 'America/Sao_Paulo'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos
 
+# ════════════════════════════════════════════
+# TAREFAS EM SEGUNDO PLANO (core/services/tarefas_background.py)
+# ════════════════════════════════════════════
+# Pool de threads no próprio processo; True executa na hora (testes/debug)
+BACKGROUND_TAREFAS_WORKERS = config('BACKGROUND_TAREFAS_WORKERS', default=2, cast=int)
+BACKGROUND_TAREFAS_SINCRONAS = config('BACKGROUND_TAREFAS_SINCRONAS', default=False, cast=bool)
+
+# ════════════════════════════════════════════
+# CACHE (dashboard - core/dashboard/cache.py)
+# ════════════════════════════════════════════
+# CACHE_URL vazio → memória local do processo
+# file:///caminho → arquivos (compartilhado entre workers da mesma máquina)
+# redis://host:6379/1 → Redis (compartilhado entre instâncias)
+CACHE_URL = config('CACHE_URL', default='')
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL[len('file://'):],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sgli-dashboard',
+        }
+    }
+
+# Validade dos fragmentos do dashboard (segundos); gravações invalidam antes
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=300, cast=int)
+
+# ════════════════════════════════════════════
+# PERFIL DE CONSULTAS SQL (core/middleware/perfil_consultas.py)
+# ════════════════════════════════════════════
+# Mede todas as requisições; desligado, só as com "X-Perfil-Consultas: 1"
+PERFIL_CONSULTAS_ATIVO = config('PERFIL_CONSULTAS_ATIVO', default=False, cast=bool)
+PERFIL_CONSULTAS_TOP = config('PERFIL_CONSULTAS_TOP', default=5, cast=int)
+# Máximo de consultas por view (WARNING no log; testes em CI falham acima)
+PERFIL_CONSULTAS_ORCAMENTOS = {
+    'admin:core_comanda_changelist': 15,
+    'admin:core_pagamento_changelist': 12,
+    'admin:core_locacao_changelist': 12,
+    'dashboard_financeiro': 60,
+    'api-comanda-list': 8,
+    'api-locacao-list': 8,
+    'api-pagamento-list': 8,
+}
+
 # URL do site (ajuste em produção)
 SITE_URL = config('SITE_URL', default='http://localhost:8000')
 